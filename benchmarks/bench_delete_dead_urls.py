@@ -0,0 +1,190 @@
+"""
+bench_delete_dead_urls.py - Benchmark de URLValidator.delete_dead_urls_from_db
+==============================================================================
+
+Construit une base synthétique au schéma Stash (``performers`` +
+``performer_urls``), marque une fraction des URLs comme mortes, puis compare :
+
+  - legacy : un DELETE + une renumérotation corrélée par URL morte
+             (ancienne implémentation, recopiée ici comme référence) ;
+  - bulk   : ``URLValidator.delete_dead_urls_from_db`` (table temporaire,
+             un DELETE, renumérotation ROW_NUMBER par performer touché).
+
+Les deux bases résultantes sont comparées ligne à ligne.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_delete_dead_urls.py
+    python benchmarks/bench_delete_dead_urls.py --urls 100000 --dead-ratio 0.1
+    python benchmarks/bench_delete_dead_urls.py --skip-legacy
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.url_validator import URLCheckResult, URLStatus, URLValidator  # noqa: E402
+
+
+SCHEMA = """
+CREATE TABLE performers (
+    id   INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL
+);
+CREATE TABLE performer_urls (
+    performer_id INTEGER NOT NULL,
+    position     INTEGER NOT NULL,
+    url          VARCHAR(255) NOT NULL,
+    FOREIGN KEY (performer_id) REFERENCES performers(id) ON DELETE CASCADE,
+    PRIMARY KEY (performer_id, position, url)
+);
+CREATE INDEX performer_urls_url ON performer_urls (url);
+"""
+
+DOMAINS = ["iafd.com", "freeones.com", "thenude.com", "babepedia.com",
+           "boobpedia.com", "xxxbios.com", "instagram.com", "x.com",
+           "onlyfans.com", "data18.com"]
+
+
+# ---------------------------------------------------------------------------
+# Base synthétique
+# ---------------------------------------------------------------------------
+
+def build_database(path: str, nb_urls: int, seed: int = 42) -> None:
+    """
+    ~nb_urls URLs réparties sur des performers de tailles variées :
+    la plupart ont 5 à 30 URLs, quelques-uns plusieurs centaines (cas quadratique).
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    rows = []
+    performer_id = 0
+    while len(rows) < nb_urls:
+        performer_id += 1
+        size = rng.randint(300, 800) if rng.random() < 0.01 else rng.randint(5, 30)
+        for position in range(size):
+            dom = DOMAINS[position % len(DOMAINS)]
+            rows.append((performer_id, position, f"https://www.{dom}/p{performer_id}/u{position}"))
+    rows = rows[:nb_urls]
+    conn.executemany(
+        "INSERT INTO performers (id, name) VALUES (?, ?)",
+        [(i, f"Performer {i}") for i in range(1, performer_id + 1)],
+    )
+    conn.executemany("INSERT INTO performer_urls VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def pick_dead(path: str, ratio: float, seed: int = 7):
+    """Résultats DEAD pour une fraction des URLs (plus denses chez les gros performers)."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT performer_id, position, url FROM performer_urls").fetchall()
+    sizes = dict(conn.execute("SELECT performer_id, COUNT(*) FROM performer_urls GROUP BY performer_id"))
+    conn.close()
+    dead = []
+    for performer_id, position, url in rows:
+        p = ratio * (3 if sizes[performer_id] > 100 else 1)
+        if rng.random() < p:
+            dead.append(URLCheckResult(
+                performer_id=performer_id, performer_name="", position=position,
+                url=url, status=URLStatus.DEAD, http_code=404,
+            ))
+    return dead
+
+
+# ---------------------------------------------------------------------------
+# Ancienne implémentation (référence)
+# ---------------------------------------------------------------------------
+
+def legacy_delete(path: str, results) -> int:
+    conn = sqlite3.connect(path)
+    count = 0
+    try:
+        for r in [r for r in results if r.should_delete]:
+            conn.execute(
+                "DELETE FROM performer_urls WHERE performer_id = ? AND url = ?",
+                (r.performer_id, r.url)
+            )
+            conn.execute(
+                """
+                UPDATE performer_urls
+                SET position = (
+                    SELECT COUNT(*) FROM performer_urls pu2
+                    WHERE pu2.performer_id = performer_urls.performer_id
+                      AND pu2.position < performer_urls.position
+                )
+                WHERE performer_id = ?
+                """,
+                (r.performer_id,)
+            )
+            count += 1
+        conn.commit()
+    finally:
+        conn.close()
+    return count
+
+
+def dump(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT performer_id, position, url FROM performer_urls ORDER BY performer_id, position, url"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suppression des URLs mortes")
+    parser.add_argument("--urls", type=int, default=100_000, help="Nombre d'URLs synthétiques")
+    parser.add_argument("--dead-ratio", type=float, default=0.10, help="Fraction d'URLs mortes")
+    parser.add_argument("--skip-legacy", action="store_true", help="Ne pas mesurer l'ancienne version")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_dead_urls_")
+    try:
+        base = os.path.join(workdir, "base.sqlite")
+        t0 = time.perf_counter()
+        build_database(base, args.urls)
+        dead = pick_dead(base, args.dead_ratio)
+        print(f"Base synthétique : {args.urls} URLs, {len(dead)} mortes "
+              f"({time.perf_counter() - t0:.1f}s de préparation)")
+
+        bulk_path = os.path.join(workdir, "bulk.sqlite")
+        shutil.copy(base, bulk_path)
+        validator = URLValidator(db_path=bulk_path, use_history=False)
+        t0 = time.perf_counter()
+        deleted = validator.delete_dead_urls_from_db(dead)
+        bulk_s = time.perf_counter() - t0
+        print(f"bulk   : {deleted:>6} suppressions en {bulk_s:8.3f}s")
+
+        if not args.skip_legacy:
+            legacy_path = os.path.join(workdir, "legacy.sqlite")
+            shutil.copy(base, legacy_path)
+            t0 = time.perf_counter()
+            legacy_delete(legacy_path, dead)
+            legacy_s = time.perf_counter() - t0
+            print(f"legacy : {len(dead):>6} suppressions en {legacy_s:8.3f}s")
+            print(f"gain   : x{legacy_s / bulk_s:.1f}" if bulk_s else "")
+            same = dump(bulk_path) == dump(legacy_path)
+            print(f"résultat identique : {'oui' if same else 'NON'}")
+            if not same:
+                sys.exit(1)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
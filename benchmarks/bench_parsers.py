@@ -0,0 +1,324 @@
+"""
+bench_parsers.py - Benchmark hors ligne des parseurs de scrapers
+================================================================
+
+Rejoue les pages sauvegardées de ``Legacy/urlscraping/`` (IAFD, FreeOnes,
+TheNude, Babepedia, Boobpedia, XXXBios) dans chaque ``_parse`` et mesure :
+
+  - le temps par parse (moyenne / médiane / min, en ms) ;
+  - les allocations (nombre de blocs alloués pendant un parse) et le pic
+    mémoire, via ``tracemalloc`` ;
+  - une empreinte du résultat (champs extraits + sha1 du JSON), pour
+    repérer immédiatement un changement de sélecteur.
+
+Deux modes :
+  - complet (défaut) : ``scrape_from_html`` = construction de l'arbre BS4 + ``_parse`` ;
+  - ``--parse-only`` : ``_parse`` seul, sur un arbre construit une fois.
+
+Couche de parsing :
+  - défaut     : ``ScraperBase.make_soup`` (backend de config.json + régions
+                 déclarées par chaque scraper, voir ``services.html_parse``) ;
+  - ``--legacy`` : page entière avec ``html.parser`` (comportement historique) ;
+  - ``--compare``: les deux, avec le gain en temps et en mémoire par source.
+
+Aucun accès réseau : ``services.scrapers._fetch`` est neutralisé pendant
+la mesure (les requêtes secondaires d'IAFD — recherche, awards — renvoient
+None, comme une page introuvable).
+
+Baseline (``benchmarks/baselines/parsers.json``) :
+  --save-baseline  enregistre les mesures courantes ;
+  sinon, les mesures sont comparées à la baseline : un temps au-delà de
+  ``--tolerance`` ou une empreinte différente est signalé (code retour 1).
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py -n 50 --parse-only
+    python benchmarks/bench_parsers.py --only iafd,freeones
+    python benchmarks/bench_parsers.py --compare
+    python benchmarks/bench_parsers.py --save-baseline
+"""
+
+import argparse
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from services import scrapers  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(ROOT, "Legacy", "urlscraping")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baselines", "parsers.json")
+
+# clé -> (classe de scraper, fichier sauvegardé, URL d'origine simulée)
+FIXTURES = {
+    "iafd": (
+        "IAFDScraper", "bridgette b - iafd.com.html",
+        "https://www.iafd.com/person.rme/perfid=bridgetteb/gender=f/bridgette-b.htm",
+    ),
+    "freeones": (
+        "FreeOnesScraper", "Bridgette B bio _ Read about her profile at FreeOnes.html",
+        "https://www.freeones.com/bridgette-b/bio",
+    ),
+    "thenude": (
+        "TheNudeScraper", "Bridgette B nude from Scoreland and Twistys at theNude.com.html",
+        "https://www.thenude.com/Bridgette%20B_21497.htm",
+    ),
+    "babepedia": (
+        "BabepediaScraper", "Bridgette B - Free nude pics, galleries & more at Babepedia.html",
+        "https://www.babepedia.com/babe/Bridgette_B",
+    ),
+    "boobpedia": (
+        "BoobpediaScraper", "Bridgette B. - Boobpedia - Encyclopedia of big boobs.html",
+        "https://www.boobpedia.com/boobs/Bridgette_B.",
+    ),
+    "xxxbios": (
+        "XXXBiosScraper", "Bridgette B _ Busty Blonde Spanish Pornstar & Dancer _ XXXBios.html",
+        "https://www.xxxbios.com/bridgette-b-biography/",
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Mesure
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def offline():
+    """Coupe le réseau des scrapers et masque leurs ``print``."""
+    original = scrapers._fetch
+    scrapers._fetch = lambda *a, **kw: None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        scrapers._fetch = original
+
+
+def _canonical(value):
+    """Listes triées : certaines (``discovered_urls``) sortent d'un set, ordre non stable."""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def fingerprint(result) -> dict:
+    payload = json.dumps(_canonical(result), sort_keys=True, ensure_ascii=False, default=str)
+    return {
+        "fields": sorted(k for k, v in result.items() if v not in ("", None, [], {})),
+        "sha1": hashlib.sha1(payload.encode("utf-8")).hexdigest(),
+    }
+
+
+def bench_one(key: str, iterations: int, warmup: int, parse_only: bool,
+              legacy: bool = False) -> dict:
+    cls_name, filename, url = FIXTURES[key]
+    scraper = getattr(scrapers, cls_name)()
+    with open(os.path.join(FIXTURES_DIR, filename), encoding="utf-8", errors="ignore") as f:
+        html = f.read()
+
+    if legacy:
+        build = lambda h: BeautifulSoup(h, "html.parser")  # noqa: E731
+    else:
+        build = scraper.make_soup
+
+    if parse_only:
+        soup = build(html)
+        run = lambda: scraper._parse(soup, url)  # noqa: E731
+    else:
+        run = lambda: scraper._parse(build(html), url)  # noqa: E731
+
+    with offline():
+        result = None
+        for _ in range(max(warmup, 1)):
+            result = run()
+
+        timings = []
+        gc.collect()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(iterations):
+                t0 = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - t0) * 1000)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        # Mémoire : un parse isolé sous tracemalloc (il ralentit fortement l'exécution,
+        # d'où une passe séparée des mesures de temps)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        allocations = sum(max(s.count_diff, 0) for s in after.compare_to(before, "filename"))
+
+    return {
+        "source": cls_name,
+        "html_kb": round(len(html.encode("utf-8")) / 1024, 1),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "allocations": allocations,
+        "peak_kb": round(peak / 1024, 1),
+        **fingerprint(result or {}),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(path: str, mode: str, results: dict, iterations: int):
+    data = load_baseline(path)
+    data[mode] = {
+        "iterations": iterations,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Liste des régressions (temps médian, pic mémoire, empreinte)."""
+    problems = []
+    for key, cur in results.items():
+        ref = baseline.get(key)
+        if not ref:
+            continue
+        if cur["sha1"] != ref["sha1"]:
+            added = sorted(set(cur["fields"]) - set(ref["fields"]))
+            lost = sorted(set(ref["fields"]) - set(cur["fields"]))
+            detail = f" (+{added} -{lost})" if added or lost else " (valeurs modifiées)"
+            problems.append(f"{key}: résultat différent de la baseline{detail}")
+        if ref["median_ms"] and cur["median_ms"] > ref["median_ms"] * (1 + tolerance):
+            problems.append(f"{key}: médiane {cur['median_ms']:.2f}ms > "
+                            f"{ref['median_ms']:.2f}ms (+{tolerance:.0%})")
+        if ref["peak_kb"] and cur["peak_kb"] > ref["peak_kb"] * (1 + tolerance):
+            problems.append(f"{key}: pic mémoire {cur['peak_kb']:.0f}KB > "
+                            f"{ref['peak_kb']:.0f}KB (+{tolerance:.0%})")
+    return problems
+
+
+def print_comparison(keys, iterations: int, warmup: int, parse_only: bool):
+    """Couche historique (html.parser, page entière) contre la couche courante."""
+    print(f"{'source':<10} {'legacy':>10} {'courant':>10} {'gain':>7} "
+          f"{'pic legacy':>11} {'pic courant':>12} {'mémoire':>8}  résultat")
+    tot_old = tot_new = 0.0
+    for key in keys:
+        old = bench_one(key, iterations, warmup, parse_only, legacy=True)
+        new = bench_one(key, iterations, warmup, parse_only)
+        tot_old += old["median_ms"]
+        tot_new += new["median_ms"]
+        speedup = old["median_ms"] / new["median_ms"] if new["median_ms"] else 0.0
+        mem = new["peak_kb"] / old["peak_kb"] if old["peak_kb"] else 0.0
+        same = "identique" if old["sha1"] == new["sha1"] else "DIFFÉRENT"
+        print(f"{key:<10} {old['median_ms']:>8.2f}ms {new['median_ms']:>8.2f}ms {speedup:>6.1f}x "
+              f"{old['peak_kb']:>9.0f}KB {new['peak_kb']:>10.0f}KB {mem:>7.0%}  {same}")
+    if tot_new:
+        print(f"\nTotal (médianes) : {tot_old:.1f}ms -> {tot_new:.1f}ms (x{tot_old / tot_new:.1f})")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne des parseurs")
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="Parses mesurés par page")
+    parser.add_argument("--warmup", type=int, default=2, help="Parses de chauffe (non mesurés)")
+    parser.add_argument("--only", default="", help=f"Sous-ensemble : {','.join(FIXTURES)}")
+    parser.add_argument("--parse-only", action="store_true",
+                        help="Mesurer _parse seul (arbre BS4 construit une fois)")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Couche historique : html.parser sur la page entière")
+    parser.add_argument("--compare", action="store_true",
+                        help="Comparer couche historique et couche courante")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Fichier de baseline JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer comme baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Dégradation tolérée avant alerte (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    keys = [k.strip() for k in args.only.split(",") if k.strip()] or list(FIXTURES)
+    unknown = [k for k in keys if k not in FIXTURES]
+    if unknown:
+        parser.error(f"sources inconnues : {', '.join(unknown)}")
+
+    mode = "parse_only" if args.parse_only else "full"
+    if args.compare:
+        print(f"Mode {mode}, {args.iterations} itérations par page\n")
+        print_comparison(keys, args.iterations, args.warmup, args.parse_only)
+        return
+    if args.legacy:
+        mode = f"legacy_{mode}"
+    baseline = load_baseline(args.baseline).get(mode, {}).get("results", {})
+
+    print(f"Mode {mode}, {args.iterations} itérations par page\n")
+    print(f"{'source':<10} {'html':>8} {'moy.':>9} {'médiane':>9} {'min':>9} "
+          f"{'allocs':>8} {'pic':>9} {'champs':>7}  vs baseline")
+    results = {}
+    for key in keys:
+        res = bench_one(key, args.iterations, args.warmup, args.parse_only, args.legacy)
+        results[key] = res
+        ref = baseline.get(key)
+        delta = ""
+        if ref and ref.get("median_ms"):
+            delta = f"{(res['median_ms'] / ref['median_ms'] - 1):+.0%}"
+            if res["sha1"] != ref["sha1"]:
+                delta += " (résultat modifié)"
+        print(f"{key:<10} {res['html_kb']:>6.0f}KB {res['mean_ms']:>7.2f}ms "
+              f"{res['median_ms']:>7.2f}ms {res['min_ms']:>7.2f}ms "
+              f"{res['allocations']:>8} {res['peak_kb']:>7.0f}KB {len(res['fields']):>7}  {delta}")
+
+    total = sum(r["median_ms"] for r in results.values())
+    print(f"\nTotal (médianes) : {total:.1f}ms")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, mode, results, args.iterations)
+        print(f"Baseline enregistrée : {os.path.relpath(args.baseline, ROOT)} [{mode}]")
+        return
+
+    problems = compare(results, baseline, args.tolerance)
+    if problems:
+        print("\nRégressions :")
+        for p in problems:
+            print(f"  - {p}")
+        sys.exit(1)
+    if baseline:
+        print("Aucune régression par rapport à la baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+bench_save_performer.py - Benchmark de StashDatabase.save_performer_metadata
+============================================================================
+
+Construit une base synthétique au schéma Stash (performers, aliases, URLs,
+champs personnalisés, tags, scènes), puis enregistre la même série de mises
+à jour avec :
+
+  - legacy : SELECT puis INSERT par tag, INSERT ligne à ligne des aliases et
+             des URLs, SELECT + INSERT par couple (scène, tag) lors de la
+             propagation, ``sqlite_master`` relu à chaque sauvegarde
+             (ancienne implémentation, recopiée ici comme référence) ;
+  - batch  : ``StashDatabase.save_performer_metadata`` (executemany, cache
+             nom de tag → id, INSERT ... SELECT unique pour la propagation).
+
+Le nombre d'instructions SQL exécutées est relevé (trace sqlite3) et les
+deux bases résultantes sont comparées table par table.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_save_performer.py
+    python benchmarks/bench_save_performer.py --performers 200 --scenes 300 --tags 10
+    python benchmarks/bench_save_performer.py --skip-legacy
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database import StashDatabase  # noqa: E402
+
+
+SCHEMA = """
+CREATE TABLE performers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(255) NOT NULL,
+    disambiguation TEXT, birthdate TEXT, ethnicity TEXT, country TEXT,
+    eye_color TEXT, hair_color TEXT, height INTEGER, weight INTEGER,
+    measurements TEXT, fake_tits TEXT, details TEXT, death_date TEXT,
+    tattoos TEXT, piercings TEXT, career_length TEXT
+);
+CREATE TABLE performer_aliases (
+    performer_id INTEGER NOT NULL, alias VARCHAR(255) NOT NULL,
+    PRIMARY KEY (performer_id, alias)
+);
+CREATE TABLE performer_urls (
+    performer_id INTEGER NOT NULL, position INTEGER NOT NULL, url VARCHAR(255) NOT NULL,
+    PRIMARY KEY (performer_id, position, url)
+);
+CREATE TABLE performer_custom_fields (
+    performer_id INTEGER NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL,
+    PRIMARY KEY (performer_id, field)
+);
+CREATE TABLE tags (id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(255) NOT NULL);
+CREATE UNIQUE INDEX index_tags_on_name ON tags (name);
+CREATE TABLE performers_tags (
+    performer_id INTEGER NOT NULL, tag_id INTEGER NOT NULL,
+    PRIMARY KEY (performer_id, tag_id)
+);
+CREATE TABLE scenes (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT);
+CREATE TABLE performers_scenes (
+    performer_id INTEGER NOT NULL, scene_id INTEGER NOT NULL,
+    PRIMARY KEY (scene_id, performer_id)
+);
+CREATE INDEX index_performers_scenes_on_performer_id ON performers_scenes (performer_id);
+CREATE TABLE scenes_tags (
+    scene_id INTEGER NOT NULL, tag_id INTEGER NOT NULL,
+    PRIMARY KEY (scene_id, tag_id)
+);
+"""
+
+TAG_POOL = [f"Tag {i:03d}" for i in range(60)]
+
+
+# ---------------------------------------------------------------------------
+# Base synthétique
+# ---------------------------------------------------------------------------
+
+def build_database(path: str, performers: int, scenes: int, seed: int = 42) -> None:
+    """``performers`` performers ayant chacun ``scenes`` scènes (quelques-unes partagées)."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO performers (id, name) VALUES (?, ?)",
+                     [(i, f"Performer {i}") for i in range(1, performers + 1)])
+    conn.executemany("INSERT INTO tags (name) VALUES (?)", [(t,) for t in TAG_POOL[:20]])
+    total_scenes = performers * scenes
+    conn.executemany("INSERT INTO scenes (id, title) VALUES (?, ?)",
+                     [(i, f"Scene {i}") for i in range(1, total_scenes + 1)])
+    links = set()
+    for pid in range(1, performers + 1):
+        for k in range(scenes):
+            links.add((pid, (pid - 1) * scenes + k + 1))
+        for _ in range(scenes // 20):
+            links.add((pid, rng.randint(1, total_scenes)))
+    conn.executemany("INSERT INTO performers_scenes VALUES (?, ?)", sorted(links))
+    conn.executemany("INSERT INTO performer_aliases VALUES (?, ?)",
+                     [(pid, f"Old Alias {pid}") for pid in range(1, performers + 1)])
+    conn.commit()
+    conn.close()
+
+
+def make_updates(performers: int, tags: int, seed: int = 7):
+    rng = random.Random(seed)
+    out = []
+    for pid in range(1, performers + 1):
+        out.append((pid, {
+            "birthdate": f"199{pid % 10}-01-0{1 + pid % 9}",
+            "country": "FR",
+            "height": 160 + pid % 20,
+            "aliases": [f"Alias {pid}-{k}" for k in range(8)] + [f"old alias {pid}"],
+            "tags": rng.sample(TAG_POOL, tags),
+            "awards": "AVN 2020",
+            "trivia": "Lorem ipsum",
+            "instagram": f"https://instagram.com/p{pid}",
+            "discovered_urls": [f"https://www.site{k}.com/p{pid}" for k in range(25)],
+        }))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Ancienne implémentation (référence)
+# ---------------------------------------------------------------------------
+#
+# Recopiée de services/database.py, à un détail près : la lecture des
+# aliases existants utilisait ``row.get`` (absent de sqlite3.Row), si bien
+# que les anciens aliases étaient perdus. Corrigé ici pour pouvoir comparer.
+
+MAPPING = {
+    'name': 'name', 'birthdate': 'birthdate', 'birthplace': 'disambiguation',
+    'ethnicity': 'ethnicity', 'country': 'country', 'eye_color': 'eye_color',
+    'hair_color': 'hair_color', 'height': 'height', 'weight': 'weight',
+    'measurements': 'measurements', 'fake_tits': 'fake_tits', 'details': 'details',
+    'deathdate': 'death_date', 'tattoos': 'tattoos', 'piercings': 'piercings',
+    'career_start': 'career_length',
+}
+
+CUSTOM_MAP = {
+    'birthplace': 'Birthplace', 'awards': 'Awards', 'trivia': 'Trivia',
+    'trivia_fr': 'Trivia FR', 'tattoos_fr': 'Tattoos FR', 'piercings_fr': 'Piercings FR',
+    'website': 'Official Website', 'instagram': 'Instagram', 'onlyfans': 'OnlyFans',
+    'tiktok': 'TikTok', 'youtube': 'YouTube', 'twitch': 'Twitch', 'imdb': 'IMDb',
+    'twitter': 'Twitter', 'facebook': 'Facebook',
+}
+
+
+def legacy_save(conn, performer_id, updates) -> None:
+    cur = conn.cursor()
+    fields, values = [], []
+    for ui_key, db_col in MAPPING.items():
+        if ui_key in updates:
+            fields.append(f"{db_col}=?")
+            values.append(updates[ui_key])
+    if fields:
+        values.append(performer_id)
+        cur.execute(f"UPDATE performers SET {', '.join(fields)} WHERE id=?", tuple(values))
+
+    if 'aliases' in updates:
+        new_aliases = [str(a).strip() for a in updates['aliases'] if str(a).strip()]
+        cur.execute("SELECT alias FROM performer_aliases WHERE performer_id=?", (performer_id,))
+        existing = [r['alias'] for r in cur.fetchall() if r['alias']]
+        merged, seen = [], set()
+        for it in existing + new_aliases:
+            if it.casefold() not in seen:
+                seen.add(it.casefold())
+                merged.append(it)
+        cur.execute("DELETE FROM performer_aliases WHERE performer_id=?", (performer_id,))
+        for alias in merged:
+            cur.execute("INSERT INTO performer_aliases (performer_id, alias) VALUES (?, ?)",
+                        (performer_id, alias))
+
+    tag_list = []
+    if 'tags' in updates:
+        cur.execute("DELETE FROM performers_tags WHERE performer_id=?", (performer_id,))
+        tag_list = updates['tags']
+        for tag_name in tag_list:
+            cur.execute("SELECT id FROM tags WHERE name=?", (tag_name,))
+            row = cur.fetchone()
+            if row:
+                tag_id = row['id']
+            else:
+                cur.execute("INSERT INTO tags (name) VALUES (?)", (tag_name,))
+                tag_id = cur.lastrowid
+            cur.execute("INSERT INTO performers_tags (performer_id, tag_id) VALUES (?, ?)",
+                        (performer_id, tag_id))
+
+    for ui_key, custom_name in CUSTOM_MAP.items():
+        if ui_key in updates:
+            val = str(updates[ui_key]).strip()
+            cur.execute("DELETE FROM performer_custom_fields WHERE performer_id=? AND field=?",
+                        (performer_id, custom_name))
+            if val:
+                cur.execute("INSERT INTO performer_custom_fields (performer_id, field, value) VALUES (?, ?, ?)",
+                            (performer_id, custom_name, val))
+
+    if 'discovered_urls' in updates:
+        cur.execute("DELETE FROM performer_urls WHERE performer_id=?", (performer_id,))
+        cleaned, seen = [], set()
+        for u in updates['discovered_urls']:
+            u = str(u).strip()
+            if u and u not in seen:
+                seen.add(u)
+                cleaned.append(u)
+        for pos, url in enumerate(cleaned):
+            cur.execute("INSERT INTO performer_urls (performer_id, position, url) VALUES (?, ?, ?)",
+                        (performer_id, pos, url))
+
+    if 'tags' in updates:
+        legacy_propagate(cur, performer_id, tag_list)
+    conn.commit()
+
+
+def legacy_propagate(cur, performer_id, tag_names) -> None:
+    def table_exists(name):
+        return bool(cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=? LIMIT 1",
+                                (name,)).fetchone())
+
+    if not table_exists("scenes_tags"):
+        return
+    if table_exists("scenes_performers"):
+        link_table = "scenes_performers"
+    elif table_exists("performers_scenes"):
+        link_table = "performers_scenes"
+    else:
+        return
+    tag_ids = []
+    for name in tag_names:
+        cur.execute("SELECT id FROM tags WHERE name=?", (name,))
+        row = cur.fetchone()
+        if row:
+            tag_ids.append(row['id'])
+    cur.execute(f"SELECT scene_id FROM {link_table} WHERE performer_id=?", (performer_id,))
+    scene_ids = [r['scene_id'] for r in cur.fetchall()]
+    for scene_id in scene_ids:
+        for tag_id in tag_ids:
+            cur.execute("SELECT 1 FROM scenes_tags WHERE scene_id=? AND tag_id=?", (scene_id, tag_id))
+            if not cur.fetchone():
+                cur.execute("INSERT INTO scenes_tags (scene_id, tag_id) VALUES (?, ?)", (scene_id, tag_id))
+
+
+# ---------------------------------------------------------------------------
+# Mesure
+# ---------------------------------------------------------------------------
+
+def run_legacy(path: str, updates):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    count = [0]
+    conn.set_trace_callback(lambda _sql: count.__setitem__(0, count[0] + 1))
+    t0 = time.perf_counter()
+    for pid, upd in updates:
+        legacy_save(conn, pid, upd)
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed, count[0]
+
+
+def run_batch(path: str, updates):
+    db = StashDatabase(path)
+    count = [0]
+    open_write = db._open_write_connection
+
+    def traced():
+        # une connexion d'écriture par sauvegarde : trace posée à l'ouverture
+        conn = open_write()
+        conn.set_trace_callback(lambda _sql: count.__setitem__(0, count[0] + 1))
+        return conn
+
+    db._open_write_connection = traced
+    t0 = time.perf_counter()
+    for pid, upd in updates:
+        if not db.save_performer_metadata(pid, upd):
+            raise SystemExit(f"échec de sauvegarde (performer {pid})")
+    elapsed = time.perf_counter() - t0
+    db._close_conn()
+    return elapsed, count[0]
+
+
+def dump(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        out = {}
+        for table, order in (("performers", "id"), ("performer_aliases", "performer_id, alias"),
+                             ("performer_urls", "performer_id, position"),
+                             ("performer_custom_fields", "performer_id, field"),
+                             ):
+            out[table] = conn.execute(f"SELECT * FROM {table} ORDER BY {order}").fetchall()
+        # Les ids des tags créés dépendent de l'ordre d'insertion : comparaison par nom
+        for table, owner in (("performers_tags", "performer_id"), ("scenes_tags", "scene_id")):
+            out[table] = conn.execute(
+                f"SELECT x.{owner}, t.name FROM {table} x JOIN tags t ON t.id = x.tag_id "
+                f"ORDER BY x.{owner}, t.name"
+            ).fetchall()
+        out["tags"] = conn.execute("SELECT name FROM tags ORDER BY name").fetchall()
+        return out
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sauvegarde des performers")
+    parser.add_argument("--performers", type=int, default=100, help="Performers sauvegardés")
+    parser.add_argument("--scenes", type=int, default=300, help="Scènes par performer")
+    parser.add_argument("--tags", type=int, default=10, help="Tags par performer")
+    parser.add_argument("--skip-legacy", action="store_true", help="Ne pas mesurer l'ancienne version")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_save_performer_")
+    try:
+        base = os.path.join(workdir, "base.sqlite")
+        t0 = time.perf_counter()
+        build_database(base, args.performers, args.scenes)
+        updates = make_updates(args.performers, args.tags)
+        print(f"Base synthétique : {args.performers} performers × {args.scenes} scènes, "
+              f"{args.tags} tags chacun ({time.perf_counter() - t0:.1f}s de préparation)")
+
+        batch_path = os.path.join(workdir, "batch.sqlite")
+        shutil.copy(base, batch_path)
+        batch_s, batch_n = run_batch(batch_path, updates)
+        print(f"batch  : {batch_s:8.3f}s · {batch_n:>8} instructions "
+              f"({batch_n / args.performers:.0f}/performer)")
+
+        if not args.skip_legacy:
+            legacy_path = os.path.join(workdir, "legacy.sqlite")
+            shutil.copy(base, legacy_path)
+            legacy_s, legacy_n = run_legacy(legacy_path, updates)
+            print(f"legacy : {legacy_s:8.3f}s · {legacy_n:>8} instructions "
+                  f"({legacy_n / args.performers:.0f}/performer)")
+            print(f"gain   : x{legacy_s / batch_s:.1f}" if batch_s else "")
+            a, b = dump(batch_path), dump(legacy_path)
+            diff = [t for t in a if a[t] != b[t]]
+            print(f"résultat identique : {'oui' if not diff else 'NON (' + ', '.join(diff) + ')'}")
+            if diff:
+                sys.exit(1)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
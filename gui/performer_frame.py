@@ -16,8 +16,10 @@ from utils.awards_cleaner import AwardsCleaner
 from services.bio_generator import BioGenerator
 from services.database import StashDatabase
 from services.config_manager import ConfigManager
-from services.scrapers import ScraperOrchestrator
+from services.scrapers import ScraperOrchestrator, IncrementalDataMerger
 from services.source_finder import SourceFinderWidget
+from services.circuit_breaker import get_circuit_breaker
+from services.source_fingerprints import ChangeReport
 from services.url_manager import URLManager # Nouvelle importation
 from services.url_manager import URLOptimizer # Nouvelle importation
 from gui.url_verification_dialog import URLVerificationDialog # Nouvelle importation
@@ -27,6 +29,10 @@ from utils.url_utils import clean_urls_list, merge_urls_by_domain
 
 class PerformerFrame(ttk.Frame):
     """Frame principal pour la gestion des performers"""
+
+    # Colonnes sources de la grille métadonnées (ordre des colonnes affichées)
+    # Groupe 1 (sources principales) en ordre alphabétique, puis Groupe 2 (secours)
+    SOURCE_COLUMNS = ["FreeOnes", "IAFD", "TheNude", "XXXBios", "Babepedia", "Boobpedia"]
     
     def __init__(self, parent, performer_id: Optional[str] = None, on_exit_to_selector: Optional[Callable[[], None]] = None):
         super().__init__(parent)
@@ -47,6 +53,9 @@ class PerformerFrame(ttk.Frame):
         self.field_vars: Dict[str, Dict[str, Any]] = {}
         self.use_fallback_sources = False  # Par défaut: sources primaires uniquement
         self._urls_verified = False  # Dialog de vérification URLs affiché une seule fois par performer
+        # Scraping en streaming : colonnes déjà remplies {index: (résultat, valeurs)} + fusion en cours
+        self._streamed_columns: Dict[int, Tuple[Dict, Dict[str, str]]] = {}
+        self._live_merger = IncrementalDataMerger()
         
         # Widgets
         self.notebook: ttk.Notebook = None # type: ignore
@@ -333,8 +342,7 @@ class PerformerFrame(ttk.Frame):
         # Header de la grille
         headers_labels = ["Scrap", "Champ", "Valeur Stash"]
         # Sources fixes (priorité DataMerger)
-        # Groupe 1 (sources principales) en ordre alphabétique, puis Groupe 2 (secours)
-        source_names = ["FreeOnes", "IAFD", "TheNude", "XXXBios", "Babepedia", "Boobpedia"]
+        source_names = self.SOURCE_COLUMNS
         
         header_fonts = ('Segoe UI', 10, 'bold')
         for col, text in enumerate(headers_labels):
@@ -1407,6 +1415,13 @@ class PerformerFrame(ttk.Frame):
         def update_progress(current, total, source_name):
             self.after(0, lambda: self._update_ui_progress(current, total, source_name))
 
+        # Chaque source est affichée dès qu'elle est parsée (sans attendre la plus lente)
+        self._streamed_columns = {}
+        self._live_merger.reset()
+
+        def on_result(_index, result):
+            self.after(0, lambda r=result: self._on_source_result(r))
+
         def run():
             # Reset UI
             self.after(0, lambda: self.progress_bar.configure(value=0))
@@ -1444,6 +1459,7 @@ class PerformerFrame(ttk.Frame):
 
             # Toujours lancer la 1ère passe avec les URLs déjà extraites.
             results = []
+            changes = ChangeReport()    # sources revalidées sans re-parse / re-parsées
             pass1_total = max(len(pass1_urls), 1)
 
             def pass1_progress(current, total, source_name):
@@ -1452,13 +1468,18 @@ class PerformerFrame(ttk.Frame):
             results_pass1 = self.orchestrator.scrape_all(
                 pass1_urls,
                 progress_callback=pass1_progress,
+                on_result=on_result,
                 performer_name=performer_name,
                 auto_add_fallback_sources=False,
+                report=changes,
             )
             if results_pass1:
                 results.extend(results_pass1)
 
-            # Passe 2: uniquement si l'utilisateur a activé les sources de secours
+            # Passe 2: uniquement si l'utilisateur a activé les sources de secours,
+            # et seulement celles qui peuvent combler un champ encore manquant
+            if self.use_fallback_sources and fallback_urls:
+                fallback_urls = self.orchestrator.plan_fallback(results, fallback_urls)
             if self.use_fallback_sources and fallback_urls:
                 pass2_total = len(fallback_urls)
 
@@ -1468,8 +1489,10 @@ class PerformerFrame(ttk.Frame):
                 results_pass2 = self.orchestrator.scrape_all(
                     fallback_urls,
                     progress_callback=pass2_progress,
+                    on_result=on_result,
                     performer_name=performer_name,
                     auto_add_fallback_sources=False,
+                    report=changes,
                 )
                 if results_pass2:
                     results.extend(results_pass2)
@@ -1480,7 +1503,13 @@ class PerformerFrame(ttk.Frame):
                 return
 
             # Validation des URLs découvertes
-            self.after(0, lambda: self.status_label.configure(text="Validation URLs..."))
+            status = changes.format()
+            breaker = get_circuit_breaker()
+            tripped = breaker.tripped() if breaker is not None else []
+            if tripped:
+                status += f" · ⛔ indisponible(s) : {', '.join(tripped)}"
+            print(f"[SCRAPE] {status}")
+            self.after(0, lambda: self.status_label.configure(text=f"{status} · Validation URLs..."))
             all_discovered = []
             for res in results:
                 d_urls = res.get("discovered_urls", [])
@@ -1513,6 +1542,91 @@ class PerformerFrame(ttk.Frame):
                 self.status_label.configure(text="Terminé")
 
 
+    def _fill_source_column(self, source_idx: int, res: Dict) -> Dict[str, str]:
+        """
+        Remplit la colonne ``source_idx`` de la grille avec le résultat d'une source
+        et rafraîchit les listes déroulantes. Retourne {champ: valeur affichée}.
+        """
+        # Dispatcher les réseaux sociaux si présents dans le résultat
+        socials = res.get("socials", {})
+        for s_key, s_val in socials.items():
+            if s_key in res: continue # Déjà présent ?
+            # Normaliser twitter -> x? Non, on garde twitter pour la clé interne
+            if s_key == "x": s_key = "twitter"
+            if s_val: res[s_key] = s_val
+
+        column_vals = {}
+        for key, fields in self.field_vars.items():
+            if key == "discovered_urls":
+                continue
+
+            val = res.get(key, "")
+
+            # Normalisation unifiée pour tous les champs non-multiline
+            if val and not fields.get('is_multiline'):
+                val = self._normalize_field_value(key, str(val))
+            elif key == 'awards' and val:
+                # Awards : nettoyage spécial via Gemini (champ multiline)
+                val = self.bio_generator.clean_awards_with_gemini(val)
+            elif key in ('tattoos', 'piercings') and val:
+                val = self._normalize_body_art_value(key, str(val))
+
+            # Cas spécial : pour la ligne URLs, on veut l'URL source
+            if key == "urls" and res.get('url'):
+                val = res['url']
+            if isinstance(val, list):
+                val = "\n".join(map(str, val)) if fields.get('is_multiline') else ", ".join(map(str, val))
+
+            # Mettre à jour la colonne source correspondante
+            if fields.get('is_multiline'):
+                widgets = fields.get('source_widgets', [])
+                if source_idx < len(widgets):
+                    w = widgets[source_idx]
+                    w.configure(state="normal")
+                    w.delete('1.0', tk.END)
+                    w.insert('1.0', str(val))
+                    w.configure(state="disabled")
+            else:
+                fields['sources'][source_idx].set(str(val))
+
+            # Mise à jour des valeurs de la liste déroulante (Combobox)
+            if not fields.get('is_multiline') and isinstance(fields['entry'], ttk.Combobox):
+                stash_val = fields['stash'].get().strip()
+                source_vals = [s.get().strip() for s in fields['sources']]
+                
+                # Normaliser toutes les valeurs avant de les mettre dans la combobox
+                all_raw = [v for v in ([stash_val] + source_vals) if v]
+                all_normalized = []
+                for v in all_raw:
+                    normalized_v = self._normalize_field_value(key, v)
+                    if normalized_v:
+                        all_normalized.append(normalized_v)
+                
+                # Dédupliquer et trier
+                all_vals = sorted(list(set(all_normalized)))
+                fields['entry']['values'] = all_vals
+
+            column_vals[key] = val
+
+        self._streamed_columns[source_idx] = (res, column_vals)
+        return column_vals
+
+    def _on_source_result(self, result: Dict):
+        """
+        Résultat d'une source reçu en cours de scraping (thread UI) :
+        remplit immédiatement sa colonne et met à jour la fusion incrémentale.
+        """
+        source_name = result.get('source', '')
+        if source_name not in self.SOURCE_COLUMNS:
+            return
+        self._fill_source_column(self.SOURCE_COLUMNS.index(source_name), result)
+        merge = self._live_merger.add(result, index=self.SOURCE_COLUMNS.index(source_name))
+        if self.status_label:
+            self.status_label.configure(
+                text=f"{source_name} reçu · {len(merge.get('merged', {}))} champs · "
+                     f"{len(merge.get('conflicts', {}))} conflits"
+            )
+
     def _apply_scrape_results(self, results: List[Dict]):
         """Affiche les résultats du scraping dans la grille et agrège les URLs"""
         # 1. Agrégation des URLs de toutes les sources + URLs Stash actuelles
@@ -1531,19 +1645,9 @@ class PerformerFrame(ttk.Frame):
         # Mettre à jour l'en-tête (rouge si une source manque)
         self._highlight_missing_sources(all_discovered)
         
-        # Dispatcher les réseaux sociaux si présents dans les résultats
-        for res in results:
-            socials = res.get("socials", {})
-            for s_key, s_val in socials.items():
-                if s_key in res: continue # Déjà présent ?
-                # Normaliser twitter -> x? Non, on garde twitter pour la clé interne
-                if s_key == "x": s_key = "twitter"
-                if s_val: res[s_key] = s_val
-        
         # 2. Mise à jour de la grille (limité aux 6 sources principales configurées)
-        # Doit matcher l'ordre des colonnes créées dans _create_metadata_tab()
-        source_order = ["FreeOnes", "IAFD", "TheNude", "XXXBios", "Babepedia", "Boobpedia"]
-        # Réordonner les résultats selon source_order pour que chaque source tombe dans la bonne colonne
+        # Réordonner les résultats selon SOURCE_COLUMNS pour que chaque source tombe dans la bonne colonne
+        source_order = self.SOURCE_COLUMNS
         ordered_results = []
         result_by_source = {r.get('source', ''): r for r in results}
         for sname in source_order:
@@ -1551,46 +1655,18 @@ class PerformerFrame(ttk.Frame):
         limit = len(source_order)
         for source_idx in range(limit):
             res = ordered_results[source_idx]
-            source_name = res.get('source', source_order[source_idx])
-            
+            # Colonne déjà remplie en streaming avec ce même résultat : pas de re-normalisation
+            streamed = self._streamed_columns.get(source_idx)
+            if streamed and streamed[0] is res:
+                column_vals = streamed[1]
+            else:
+                column_vals = self._fill_source_column(source_idx, res)
+
             for key, fields in self.field_vars.items():
                 if key == "discovered_urls":
                     continue
-                    
-                val = res.get(key, "")
-                
-                # Normalisation unifiée pour tous les champs non-multiline
-                if val and not fields.get('is_multiline'):
-                    val = self._normalize_field_value(key, str(val))
-                elif key == 'awards' and val:
-                    # Awards : nettoyage spécial via Gemini (champ multiline)
-                    val = self.bio_generator.clean_awards_with_gemini(val)
-                elif key in ('tattoos', 'piercings') and val:
-                    val = self._normalize_body_art_value(key, str(val))
-                
-                # Cas spécial : pour la ligne URLs, on veut l'URL source
-                if key == "urls" and res.get('url'):
-                    val = res['url']
-                if isinstance(val, list):
-                    val = "\n".join(map(str, val)) if fields.get('is_multiline') else ", ".join(map(str, val))
-                
-                # Cas spécial : Socials si présents dans un dict
-                if key == "socials":
-                    # On dispatch les socials vers leurs champs respectifs
-                    pass # Sera géré après la boucle key ou via key direct
+                val = column_vals.get(key, "")
 
-                # Mettre à jour la colonne source correspondante
-                if fields.get('is_multiline'):
-                    widgets = fields.get('source_widgets', [])
-                    if source_idx < len(widgets):
-                        w = widgets[source_idx]
-                        w.configure(state="normal")
-                        w.delete('1.0', tk.END)
-                        w.insert('1.0', str(val))
-                        w.configure(state="disabled")
-                else:
-                    fields['sources'][source_idx].set(str(val))
-                
                 # Auto-remplissage si case cochée et vide
                 is_empty = False
                 if fields.get('is_multiline'):
@@ -1628,23 +1704,6 @@ class PerformerFrame(ttk.Frame):
                         fields['entry'].insert('1.0', str(val))
                     else:
                         fields['main'].set(str(val))
-                
-                # Mise à jour des valeurs de la liste déroulante (Combobox)
-                if not fields.get('is_multiline') and isinstance(fields['entry'], ttk.Combobox):
-                    stash_val = fields['stash'].get().strip()
-                    source_vals = [s.get().strip() for s in fields['sources']]
-                    
-                    # Normaliser toutes les valeurs avant de les mettre dans la combobox
-                    all_raw = [v for v in ([stash_val] + source_vals) if v]
-                    all_normalized = []
-                    for v in all_raw:
-                        normalized_v = self._normalize_field_value(key, v)
-                        if normalized_v:
-                            all_normalized.append(normalized_v)
-                    
-                    # Dédupliquer et trier
-                    all_vals = sorted(list(set(all_normalized)))
-                    fields['entry']['values'] = all_vals
 
         # 3. Remplissage du champ global URLs avec les découvertes triées
         if "urls" in self.field_vars and all_discovered:
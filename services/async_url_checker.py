@@ -0,0 +1,293 @@
+"""
+async_url_checker.py - Moteur asyncio de vérification d'URLs
+============================================================
+
+Alternative au pool de threads de ``URLValidator`` pour les balayages de
+bibliothèque complète (des dizaines de milliers de ``performer_urls``) :
+des milliers de vérifications en vol dans un seul thread.
+
+Aucune dépendance externe : client HTTP/1.1 minimal sur
+``asyncio.open_connection`` (TLS via ``ssl``).
+
+- HEAD d'abord ; si 405/501, GET dont seuls la ligne de statut et les
+  en-têtes sont lus (zéro octet de corps consommé, connexion fermée).
+- Redirections suivies (comme ``allow_redirects=True``), plafonnées.
+- Limite de connexions simultanées par hôte + plafond global en vol.
+- Politesse : le ``RateLimiter`` partagé est consulté via ``reserve()``
+  (non bloquant) puis ``asyncio.sleep``.
+
+Le résultat d'une vérification a la même forme que ``_check_single_url`` :
+``(http_code, redirect_url, error_msg)``.
+
+Usage :
+    from services.async_url_checker import AsyncURLChecker
+    checker = AsyncURLChecker(timeout=10, max_in_flight=2000, per_host=6)
+    results = checker.run(["https://www.iafd.com/...", ...])
+"""
+
+import asyncio
+import ssl
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urljoin, urlsplit
+
+from services.circuit_breaker import FAILURE_STATUSES, CircuitOpenError, get_circuit_breaker
+from services.rate_limiter import THROTTLE_STATUSES, RateLimiter, get_rate_limiter
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_TIMEOUT       = 10
+DEFAULT_MAX_IN_FLIGHT = 1000
+DEFAULT_PER_HOST      = 6
+DEFAULT_MAX_REDIRECTS = 10
+DEFAULT_RETRY         = 1
+
+MAX_HEADER_BYTES = 64 * 1024
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,*/*;q=0.9",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+CheckResult = Tuple[Optional[int], Optional[str], str]
+
+
+class TooManyRedirects(Exception):
+    pass
+
+
+def _host_key(url: str) -> str:
+    netloc = (urlsplit(url).netloc or "").lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def _request_target(parts) -> str:
+    """Chemin + query, ré-encodés si l'URL contient des caractères non ASCII."""
+    path = quote(parts.path or "/", safe="/%:@!$&'()*+,;=-._~")
+    if parts.query:
+        path += "?" + quote(parts.query, safe="/%:@!$&'()*+,;=-._~?")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Moteur
+# ---------------------------------------------------------------------------
+
+class AsyncURLChecker:
+    """
+    Vérificateur d'URLs asyncio.
+
+    Paramètres
+    ----------
+    timeout       : timeout (secondes) de chaque échange (connexion + en-têtes)
+    max_in_flight : vérifications simultanées, tous hôtes confondus
+    per_host      : connexions simultanées vers un même hôte
+    max_redirects : nombre maximal de redirections suivies
+    retry         : nb de nouvelles tentatives (erreur réseau, 429/503)
+    headers       : en-têtes envoyés
+    rate_limiter  : limiteur par domaine (None = limiteur partagé,
+                    False = aucune limitation)
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        per_host: int = DEFAULT_PER_HOST,
+        max_redirects: int = DEFAULT_MAX_REDIRECTS,
+        retry: int = DEFAULT_RETRY,
+        headers: Optional[Dict[str, str]] = None,
+        rate_limiter=None,
+    ):
+        self.timeout = timeout
+        self.max_in_flight = max(int(max_in_flight), 1)
+        self.per_host = max(int(per_host), 1)
+        self.max_redirects = max_redirects
+        self.retry = retry
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        if rate_limiter is None:
+            rate_limiter = get_rate_limiter()
+        self.rate_limiter: Optional[RateLimiter] = rate_limiter or None
+        self._ssl = ssl.create_default_context()
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._global: Optional[asyncio.Semaphore] = None
+
+    # ------------------------------------------------------------------
+    # HTTP/1.1 minimal
+    # ------------------------------------------------------------------
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        key = _host_key(url)
+        slot = self._host_slots.get(key)
+        if slot is None:
+            slot = asyncio.Semaphore(self.per_host)
+            self._host_slots[key] = slot
+        return slot
+
+    async def _exchange(self, method: str, url: str) -> Tuple[int, Dict[str, str]]:
+        """Envoie une requête et lit uniquement la ligne de statut + les en-têtes."""
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Schéma non supporté : {scheme}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        host_header = host if parts.port is None else f"{host}:{parts.port}"
+
+        reader, writer = await asyncio.open_connection(
+            host, port,
+            ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None,
+            limit=MAX_HEADER_BYTES,
+        )
+        try:
+            lines = [f"{method} {_request_target(parts)} HTTP/1.1", f"Host: {host_header}"]
+            lines += [f"{k}: {v}" for k, v in self.headers.items()]
+            lines += ["Accept-Encoding: identity", "Connection: close", "", ""]
+            writer.write("\r\n".join(lines).encode("latin-1", errors="replace"))
+            await writer.drain()
+
+            raw = await reader.readuntil(b"\r\n\r\n")
+            head = raw.decode("latin-1").split("\r\n")
+            status_line = head[0].split(" ", 2)
+            if len(status_line) < 2 or not status_line[0].startswith("HTTP/"):
+                raise ValueError(f"Réponse HTTP invalide : {head[0][:80]!r}")
+            status = int(status_line[1])
+            headers = {}
+            for line in head[1:]:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+            return status, headers
+        finally:
+            # Le corps n'est jamais lu : on coupe la connexion
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _request(self, method: str, url: str) -> Tuple[int, str]:
+        """Requête avec suivi des redirections. Retourne (statut final, URL finale)."""
+        current = url
+        breaker = get_circuit_breaker()
+        for _ in range(self.max_redirects + 1):
+            # Domaine disjoncté : CircuitOpenError est une OSError (« erreur réseau »).
+            # is_open ne consomme pas l'essai semi-ouvert : pas d'attente inutile
+            if breaker is not None and breaker.is_open(current):
+                raise CircuitOpenError(current, breaker.retry_in(current))
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(current)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            async with self._host_slot(current):
+                # allow() juste avant la requête : une annulation pendant
+                # l'attente ne laisse pas un essai semi-ouvert sans record()
+                if breaker is not None and not breaker.allow(current):
+                    raise CircuitOpenError(current, breaker.retry_in(current))
+                try:
+                    status, headers = await asyncio.wait_for(
+                        self._exchange(method, current), timeout=self.timeout
+                    )
+                except (asyncio.TimeoutError, OSError):
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.on_error(current)
+                    if breaker is not None:
+                        breaker.record(current, False)
+                    raise
+                except BaseException:
+                    if breaker is not None:
+                        breaker.record(current, None)
+                    raise
+            if breaker is not None:
+                breaker.record(current, None if status == 403 else status not in FAILURE_STATUSES)
+            if self.rate_limiter is not None:
+                self.rate_limiter.on_response(current, status, {"Retry-After": headers.get("retry-after")})
+            location = headers.get("location")
+            if status in REDIRECT_CODES and location:
+                current = urljoin(current, location)
+                continue
+            return status, current
+        raise TooManyRedirects(url)
+
+    # ------------------------------------------------------------------
+    # Vérification
+    # ------------------------------------------------------------------
+
+    async def check(self, url: str) -> CheckResult:
+        """Équivalent asyncio de ``url_validator._check_single_url``."""
+        last_error = ""
+        for attempt in range(self.retry + 1):
+            try:
+                code, final = await self._request("HEAD", url)
+                # Certains serveurs renvoient 405 sur HEAD → GET (en-têtes seulement)
+                if code in (405, 501):
+                    code, final = await self._request("GET", url)
+                if code in THROTTLE_STATUSES and attempt < self.retry:
+                    last_error = f"HTTP {code}"
+                    continue
+                redirect = final if final != url else None
+                return code, redirect, ""
+            except TooManyRedirects:
+                return None, None, "TooManyRedirects"
+            except asyncio.TimeoutError:
+                last_error = f"Timeout ({self.timeout}s)"
+            except OSError as e:
+                last_error = f"ConnectionError: {e}"
+            except Exception as e:
+                last_error = str(e) or type(e).__name__
+        return None, None, last_error
+
+    async def check_many(
+        self,
+        items: List,
+        worker: Callable,
+        on_done: Optional[Callable] = None,
+    ) -> List:
+        """
+        Applique ``worker(item)`` (coroutine) à chaque élément, au plus
+        ``max_in_flight`` à la fois. ``on_done(result)`` est appelé à chaque
+        fin, dans l'ordre d'arrivée. Retourne les résultats dans l'ordre des
+        éléments.
+        """
+        self._global = asyncio.Semaphore(self.max_in_flight)
+        self._host_slots = {}
+
+        async def guarded(item):
+            async with self._global:
+                return await worker(item)
+
+        # Création paresseuse des tâches : pas de 50 000 coroutines d'un coup
+        results: List = [None] * len(items)
+        queue = iter(enumerate(items))
+        running = {}
+
+        def launch():
+            for idx, item in queue:
+                running[asyncio.ensure_future(guarded(item))] = idx
+                if len(running) >= self.max_in_flight:
+                    break
+
+        launch()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                idx = running.pop(task)
+                results[idx] = task.result()
+                if on_done:
+                    on_done(results[idx])
+            launch()
+        return results
+
+    def run(self, urls: List[str], on_done: Optional[Callable] = None) -> List[CheckResult]:
+        """Vérifie une liste d'URLs (bloquant). Retourne les résultats dans l'ordre."""
+        return asyncio.run(self.check_many(urls, self.check, on_done))
@@ -0,0 +1,782 @@
+"""
+batch_enricher.py - Enrichissement par lot de la bibliothèque Stash
+===================================================================
+
+Version sans interface du bouton « Scraper Tout » de PerformerFrame : les
+performers sont sélectionnés dans ``stash-go.sqlite`` puis traités par un
+pool de threads, chacun à travers le même pipeline que la GUI :
+
+    urls    URLManager.process_performer_urls   (URLs prioritaires)
+    scrape  ScraperOrchestrator.scrape_all      (passe 1, puis passe 2 si --fallback)
+    merge   DataMerger.merge                    (+ validation des URLs découvertes)
+    tags    TagRulesEngine.generate_tags
+    save    StashDatabase.save_performer_metadata
+
+Comme l'auto-remplissage de la GUI, seuls les champs vides sont complétés :
+une valeur déjà présente dans Stash n'est jamais écrasée. Les aliases, les
+tags et les URLs sont fusionnés avec l'existant.
+
+En mode ``--dry-run``, rien n'est écrit : le diff (ancienne → nouvelle
+valeur) de chaque performer est affiché. Le débit de chaque étape est
+résumé en fin de traitement.
+
+Avec ``--job NOM``, le lot passe par la file persistante (``job_queue``) :
+une ligne par (performer, étape) dans la base annexe. Après un plantage ou
+un Ctrl+C, relancer la même commande reprend chaque performer à l'étape
+où il s'était arrêté ; les étapes en échec sont retentées avec un délai
+croissant.
+
+Les pages sources déjà scrapées sont revalidées par requête conditionnelle
+(``source_fingerprints``) : si aucune source n'a changé depuis la dernière
+sauvegarde du performer, fusion, tags et sauvegarde sont sautés. ``--force``
+les refait quand même.
+
+Configuration (section ``batch`` de config.json) :
+    workers       : performers traités simultanément
+    use_fallback  : passe 2 (Babepedia, Boobpedia) activée par défaut
+    validate_urls : vérifier les URLs découvertes avant de les enregistrer
+    url_limit     : nombre maximal d'URLs conservées par performer
+    skip_unchanged: sauter fusion/sauvegarde quand aucune source n'a changé
+
+Usage :
+    python -m services.batch_enricher --all --dry-run
+    python -m services.batch_enricher --ids 12,57,301 --workers 2
+    python -m services.batch_enricher --missing birthdate,country --limit 200
+    python -m services.batch_enricher --updated-before 2024-01-01 --fallback
+    python -m services.batch_enricher --dead-urls          # URLs mortes à remplacer
+    python -m services.batch_enricher --ids 12 --force     # ignorer les empreintes
+    python -m services.batch_enricher --all --job nuit     # reprenable
+    python -m services.batch_enricher --job nuit --status
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from services.circuit_breaker import get_circuit_breaker
+from services.database import StashDatabase
+from services.job_queue import FAILED, JobQueue
+from services.scrapers import DataMerger, ScraperOrchestrator
+from services.source_fingerprints import ChangeReport, get_source_fingerprints, stamps
+from services.url_manager import URLManager, URLOptimizer
+from utils.tag_engine import TagRulesEngine
+from utils.url_utils import clean_urls_list, merge_urls_by_domain
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_DB_PATH   = "H:/Stash/stash-go.sqlite"
+DEFAULT_WORKERS   = 4
+DEFAULT_URL_LIMIT = 50
+
+STAGES = ("urls", "scrape", "merge", "tags", "save")
+
+# Fiches préchargées (get_performers_metadata) en attente, par worker
+PREFETCH_PER_WORKER = 8
+
+# Attente entre deux réclamations quand aucun travail n'est prêt (s)
+QUEUE_POLL_MIN = 0.5
+QUEUE_POLL_MAX = 5.0
+
+# Domaines de la passe 1 / passe 2 (même découpage que PerformerFrame)
+PASS1_DOMAINS = ("iafd.com", "freeones.", "thenude.com", "xxxbios.com")
+PASS2_DOMAINS = ("babepedia.com", "boobpedia.com")
+
+# Champs fusionnés → clé attendue par save_performer_metadata
+FIELD_KEYS = {
+    "birthdate": "birthdate",
+    "birthplace": "birthplace",
+    "death_date": "deathdate",
+    "ethnicity": "ethnicity",
+    "country": "country",
+    "eye_color": "eye_color",
+    "hair_color": "hair_color",
+    "height": "height",
+    "weight": "weight",
+    "measurements": "measurements",
+    "fake_tits": "fake_tits",
+    "career_length": "career_start",
+    "tattoos": "tattoos",
+    "piercings": "piercings",
+    "details": "details",
+    "awards": "awards",
+    "trivia": "trivia",
+}
+
+SOCIAL_KEYS = ("website", "instagram", "onlyfans", "twitter", "tiktok", "youtube", "twitch", "imdb", "facebook")
+
+_EMPTY_VALUES = {"", "none", "unknown", "n/a", "0001-01-01"}
+_SPLIT_RE = re.compile(r"[,\n\r]+")
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, (list, tuple, set, dict)):
+        return not value
+    return str(value).strip().lower() in _EMPTY_VALUES
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return "\n".join(str(v).strip() for v in value if str(v).strip())
+    return str(value).strip()
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple, set)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in _SPLIT_RE.split(str(value or "")) if v.strip()]
+
+
+# ---------------------------------------------------------------------------
+# Statistiques
+# ---------------------------------------------------------------------------
+
+class StageStats:
+    """Compteurs d'une étape du pipeline (appels, durée cumulée, erreurs)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, ok: bool = True):
+        with self._lock:
+            self.count += 1
+            self.busy += elapsed
+            if not ok:
+                self.errors += 1
+
+    def format(self, wall: float) -> str:
+        avg = (self.busy / self.count) if self.count else 0.0
+        rate = (self.count / wall) if wall > 0 else 0.0
+        return (f"{self.name:<7} {self.count:>6} appels  {rate:>7.2f}/s  "
+                f"moy {avg * 1000:>8.0f} ms  cumul {self.busy:>8.1f} s  erreurs {self.errors}")
+
+
+@dataclass
+class PerformerOutcome:
+    """Résultat du traitement d'un performer."""
+    performer_id: Any
+    name: str
+    sources: List[str] = field(default_factory=list)
+    changes: Dict[str, Any] = field(default_factory=dict)
+    diff: Dict[str, tuple] = field(default_factory=dict)
+    saved: bool = False
+    unchanged: bool = False        # aucune source modifiée depuis la dernière sauvegarde
+    sources_unchanged: int = 0     # pages revalidées sans re-parse
+    sources_parsed: int = 0
+    error: str = ""
+    elapsed: float = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Enrichisseur
+# ---------------------------------------------------------------------------
+
+class BatchEnricher:
+    """
+    Pipeline d'enrichissement sans interface.
+
+    Paramètres
+    ----------
+    db            : StashDatabase cible
+    workers       : performers traités simultanément
+    dry_run       : True pour n'afficher que les diffs
+    use_fallback  : lancer la passe 2 (Babepedia, Boobpedia)
+    validate_urls : vérifier les URLs découvertes (URLValidator)
+    url_limit     : nombre maximal d'URLs conservées
+    skip_unchanged: sauter fusion/tags/sauvegarde si aucune source n'a changé
+    """
+
+    def __init__(self, db: StashDatabase, workers: int = DEFAULT_WORKERS,
+                 dry_run: bool = False, use_fallback: bool = False,
+                 validate_urls: bool = True, url_limit: int = DEFAULT_URL_LIMIT,
+                 skip_unchanged: bool = True):
+        self.db = db
+        self.workers = max(int(workers or 1), 1)
+        self.dry_run = dry_run
+        self.use_fallback = use_fallback
+        self.validate_urls = validate_urls
+        self.url_limit = int(url_limit or DEFAULT_URL_LIMIT)
+        self.skip_unchanged = skip_unchanged
+        self.fingerprints = get_source_fingerprints()
+
+        # Partagés entre threads : les créneaux par domaine de l'orchestrateur
+        # bornent la charge sur chaque site quel que soit le nombre de workers
+        self.url_manager = URLManager()
+        self.orchestrator = ScraperOrchestrator()
+        self.url_optimizer = URLOptimizer()
+        self.merger = DataMerger()
+
+        self.stats = {name: StageStats(name) for name in STAGES}
+        self._save_lock = threading.Lock()    # SQLite : un seul écrivain à la fois
+        self._print_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = 0.0
+        self._finished = 0.0
+
+    @classmethod
+    def from_config(cls, db: StashDatabase, cfg: Optional[Dict[str, Any]] = None,
+                    **overrides) -> "BatchEnricher":
+        """Construit l'enrichisseur depuis la section ``batch`` de config.json."""
+        cfg = cfg or {}
+        kwargs = {
+            "workers": int(cfg.get("workers") or DEFAULT_WORKERS),
+            "use_fallback": bool(cfg.get("use_fallback", False)),
+            "validate_urls": bool(cfg.get("validate_urls", True)),
+            "url_limit": int(cfg.get("url_limit") or DEFAULT_URL_LIMIT),
+            "skip_unchanged": bool(cfg.get("skip_unchanged", True)),
+        }
+        kwargs.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(db, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Étapes
+    # ------------------------------------------------------------------
+
+    def _timed(self, stage: str, func: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self.stats[stage].record(time.perf_counter() - start, ok)
+
+    def _collect_urls(self, current: Dict[str, Any]) -> List[str]:
+        return self.url_manager.process_performer_urls(
+            existing_urls=list(current.get("urls") or []),
+            performer_name=current.get("name", ""),
+            use_fallback_sources=self.use_fallback,
+        ) or []
+
+    def _scrape(self, urls: List[str], name: str, report: Optional[ChangeReport] = None) -> List[Dict[str, Any]]:
+        def on(domains):
+            return [u for u in urls if any(d in (u or "").lower() for d in domains)]
+
+        results = self.orchestrator.scrape_all(
+            on(PASS1_DOMAINS), performer_name=name, auto_add_fallback_sources=False,
+            report=report,
+        ) or []
+        fallback = on(PASS2_DOMAINS)
+        if self.use_fallback and fallback:
+            fallback = self.orchestrator.plan_fallback(results, fallback)
+        if self.use_fallback and fallback:
+            results.extend(self.orchestrator.scrape_all(
+                fallback, performer_name=name, auto_add_fallback_sources=False,
+                report=report,
+            ) or [])
+        return [r for r in results if r]
+
+    def _alive_urls(self, performer_id: Any, urls: List[str]) -> List[str]:
+        if not urls or not self.validate_urls:
+            return urls
+        from services.url_validator import URLStatus, URLValidator
+        validator = URLValidator(timeout=5)
+        entries = [{"url": u, "performer_id": performer_id, "name": "Discovered", "position": 0} for u in urls]
+        keep = (URLStatus.ACTIVE, URLStatus.AMBIGUOUS, URLStatus.REDIRECT, URLStatus.WHITELISTED)
+        return [r.url for r in validator.validate_urls(entries) if r.status in keep]
+
+    def _merge(self, performer_id: Any, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        merge = self.merger.merge(results) or {}
+        merge["discovered_urls"] = self._alive_urls(performer_id, merge.get("discovered_urls") or [])
+        return merge
+
+    def build_updates(self, current: Dict[str, Any], merge: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Changements à écrire : champs vides complétés, aliases et URLs
+        fusionnés. Les tags sont ajoutés ensuite (``_tags``).
+        """
+        from utils.normalizer import format_awards_grouped, normalize_country, normalize_date
+
+        merged = dict(merge.get("merged") or {})
+        for key, value in (merge.get("socials") or {}).items():
+            key = "twitter" if key == "x" else key
+            if key in SOCIAL_KEYS and value and _is_empty(merged.get(key)):
+                merged[key] = value
+
+        updates: Dict[str, Any] = {}
+        for src_key, save_key in list(FIELD_KEYS.items()) + [(k, k) for k in SOCIAL_KEYS]:
+            value = merged.get(src_key)
+            if _is_empty(value) or not _is_empty(current.get(save_key)):
+                continue
+            text = _as_text(value)
+            if save_key in ("birthdate", "deathdate"):
+                text = normalize_date(text)
+            elif save_key == "country":
+                text = normalize_country(text)
+            elif save_key == "awards":
+                text = format_awards_grouped(text) or text
+            if text:
+                updates[save_key] = text
+
+        # Aliases : save_performer_metadata fusionne déjà avec l'existant
+        known = {a.casefold() for a in _as_list(current.get("aliases"))}
+        known.add(str(current.get("name", "")).casefold())
+        new_aliases = [a for a in _as_list(merged.get("aliases")) if a.casefold() not in known
+                       and a.lower() not in _EMPTY_VALUES]
+        if new_aliases:
+            updates["aliases"] = list(dict.fromkeys(new_aliases))
+
+        # URLs : existantes + découvertes vivantes, triées par priorité
+        stash_urls = list(current.get("urls") or [])
+        combined = clean_urls_list(merge_urls_by_domain(stash_urls, merge.get("discovered_urls") or []))
+        combined = self.url_optimizer.get_top_urls(combined, limit=self.url_limit,
+                                                   performer_name=current.get("name", ""))
+        # Sans relecture humaine, une URL déjà dans Stash n'est jamais retirée
+        combined = merge_urls_by_domain(combined, stash_urls)
+        if combined and set(combined) != set(stash_urls):
+            updates["discovered_urls"] = combined
+        return updates
+
+    def _tags(self, current: Dict[str, Any], updates: Dict[str, Any]):
+        metadata = {k: v for k, v in current.items() if not _is_empty(v)}
+        metadata.update(updates)
+        metadata["career_length"] = metadata.get("career_start", "")
+        existing = list(current.get("tags") or [])
+        generated = TagRulesEngine.generate_tags(metadata) or []
+        if set(generated) - set(existing):
+            updates["tags"] = sorted(set(existing) | set(generated))
+
+    def _save(self, performer_id: Any, updates: Dict[str, Any]) -> bool:
+        with self._save_lock:
+            return bool(self.db.save_performer_metadata(performer_id, updates))
+
+    # ------------------------------------------------------------------
+    # Pipeline par étapes
+    # ------------------------------------------------------------------
+    #
+    # Chaque étape reçoit le résultat (JSON) de la précédente et retourne le
+    # sien : la file persistante (job_queue) les enregistre, ce qui permet
+    # de reprendre un performer à l'étape où il s'était arrêté.
+
+    def _current(self, performer_id: Any) -> Dict[str, Any]:
+        current = self.db.get_performer_metadata(performer_id)
+        if not current:
+            raise LookupError("performer introuvable")
+        return current
+
+    def _stage_urls(self, performer_id: Any, prev: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # ``prev["current"]`` : fiche déjà chargée par lot (voir ``run``)
+        current = (prev or {}).get("current") or self._current(performer_id)
+        return {"name": current.get("name", ""), "urls": self._collect_urls(current)}
+
+    def _stage_scrape(self, performer_id: Any, prev: Dict[str, Any]) -> Dict[str, Any]:
+        report = ChangeReport()
+        results = self._scrape(prev["urls"], prev["name"], report)
+        if not results:
+            raise RuntimeError("aucune donnée trouvée")
+        marks = stamps(results)
+        unchanged = bool(self.skip_unchanged and self.fingerprints is not None
+                         and self.fingerprints.is_applied(marks))
+        return {"name": prev["name"], "results": [] if unchanged else results,
+                "sources": [r.get("source", "") for r in results], "stamps": marks,
+                "unchanged": unchanged,
+                "report": {"unchanged": len(report.unchanged), "parsed": len(report.parsed)}}
+
+    @staticmethod
+    def _carry(prev: Dict[str, Any], **extra) -> Dict[str, Any]:
+        """Champs transmis tels quels d'une étape à la suivante."""
+        out = {k: prev.get(k) for k in ("name", "sources", "stamps", "unchanged", "report")}
+        out.update(extra)
+        return out
+
+    def _stage_merge(self, performer_id: Any, prev: Dict[str, Any]) -> Dict[str, Any]:
+        if prev.get("unchanged"):
+            return self._carry(prev, merge={})
+        return self._carry(prev, merge=self._merge(performer_id, prev["results"]))
+
+    def _stage_tags(self, performer_id: Any, prev: Dict[str, Any]) -> Dict[str, Any]:
+        if prev.get("unchanged"):
+            return self._carry(prev, updates={})
+        current = self._current(performer_id)
+        updates = self.build_updates(current, prev["merge"])
+        self._tags(current, updates)
+        return self._carry(prev, updates=updates)
+
+    def _stage_save(self, performer_id: Any, prev: Dict[str, Any]) -> Dict[str, Any]:
+        if prev.get("unchanged"):
+            return self._carry(prev, changes={}, diff={}, saved=False)
+        updates = prev["updates"]
+        diff = self.diff(self._current(performer_id), updates)
+        saved = False
+        if updates and not self.dry_run:
+            saved = self._save(performer_id, updates)
+            if not saved:
+                raise RuntimeError("échec de la sauvegarde")
+        if not self.dry_run and self.fingerprints is not None:
+            # Stash reflète désormais ces sources (ou n'avait rien à en tirer)
+            self.fingerprints.mark_applied(prev.get("stamps") or [])
+        return self._carry(prev, changes=updates,
+                           diff={k: list(v) for k, v in diff.items()}, saved=saved)
+
+    def run_stage(self, stage: str, performer_id: Any, prev: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Exécute une étape (mesurée dans ``stats``)."""
+        return self._timed(stage, getattr(self, f"_stage_{stage}"), performer_id, prev)
+
+    @staticmethod
+    def diff(current: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, tuple]:
+        """{champ: (valeur actuelle, nouvelle valeur)} pour l'affichage."""
+        out = {}
+        for key, new in updates.items():
+            old_key = {"discovered_urls": "urls", "career_start": "career_length",
+                       "deathdate": "death_date"}.get(key, key)
+            old = current.get(old_key)
+            if key == "aliases":
+                new = _as_list(current.get("aliases")) + list(new)
+            out[key] = (old, new)
+        return out
+
+    @staticmethod
+    def _outcome(performer_id: Any, final: Dict[str, Any]) -> PerformerOutcome:
+        return PerformerOutcome(
+            performer_id=performer_id,
+            name=final.get("name", ""),
+            sources=list(final.get("sources") or []),
+            changes=dict(final.get("changes") or {}),
+            diff={k: tuple(v) for k, v in (final.get("diff") or {}).items()},
+            saved=bool(final.get("saved")),
+            unchanged=bool(final.get("unchanged")),
+            sources_unchanged=int((final.get("report") or {}).get("unchanged", 0)),
+            sources_parsed=int((final.get("report") or {}).get("parsed", 0)),
+        )
+
+    # ------------------------------------------------------------------
+    # Traitement en mémoire
+    # ------------------------------------------------------------------
+
+    def process(self, performer_id: Any, current: Optional[Dict[str, Any]] = None) -> PerformerOutcome:
+        """Exécute le pipeline complet pour un performer (``current`` : fiche déjà chargée)."""
+        start = time.perf_counter()
+        name = ""
+        prev: Optional[Dict[str, Any]] = {"current": current} if current else None
+        try:
+            for stage in STAGES:
+                prev = self.run_stage(stage, performer_id, prev)
+                name = prev.get("name", name)
+            outcome = self._outcome(performer_id, prev)
+        except Exception as e:
+            outcome = PerformerOutcome(performer_id=performer_id, name=name, error=str(e))
+            if not isinstance(e, (LookupError, RuntimeError)):
+                outcome.error = f"{type(e).__name__}: {e}"
+        outcome.elapsed = time.perf_counter() - start
+        return outcome
+
+    @staticmethod
+    def _warm_parse_pool():
+        """Démarre le pool de parse (s'il est activé) avant la première page."""
+        try:
+            from services.parse_pool import get_parse_pool
+            pool = get_parse_pool()
+            if pool is not None and not pool.warmed:
+                pool.warm()
+                print(f"[BATCH] {pool.format_stats()}")
+        except Exception as e:
+            print(f"[BATCH] Pool de parse indisponible : {e}")
+
+    def run(self, performer_ids: List[Any],
+            on_outcome: Optional[Callable[[int, int, PerformerOutcome], None]] = None) -> List[PerformerOutcome]:
+        """Traite ``performer_ids`` avec ``workers`` threads ; ``on_outcome(n, total, outcome)``."""
+        total = len(performer_ids)
+        outcomes: List[PerformerOutcome] = []
+        # Les fiches sont chargées par paquets (get_performers_metadata) ; au
+        # plus PREFETCH_PER_WORKER fiches par worker attendent en mémoire
+        in_flight = threading.BoundedSemaphore(self.workers * PREFETCH_PER_WORKER)
+
+        def done(fut):
+            in_flight.release()
+            outcome = fut.result()
+            with self._print_lock:
+                outcomes.append(outcome)
+                if on_outcome:
+                    on_outcome(len(outcomes), total, outcome)
+
+        def submit(pool, pid, current=None):
+            in_flight.acquire()
+            pool.submit(self.process, pid, current).add_done_callback(done)
+
+        self._warm_parse_pool()
+        self._started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            loaded = set()
+            for current in self.db.get_performers_metadata(
+                    performer_ids, chunk_size=self.workers * PREFETCH_PER_WORKER):
+                loaded.add(str(current.get("id")))
+                submit(pool, current.get("id"), current)
+            # Introuvables : traités un par un pour produire leur erreur
+            for pid in performer_ids:
+                if str(pid) not in loaded:
+                    submit(pool, pid)
+        self._finished = time.perf_counter()
+        return outcomes
+
+    # ------------------------------------------------------------------
+    # Traitement via la file persistante
+    # ------------------------------------------------------------------
+
+    def run_queue(self, queue: JobQueue, name: str,
+                  on_outcome: Optional[Callable[[int, int, PerformerOutcome], None]] = None) -> List[PerformerOutcome]:
+        """
+        Consomme la file ``name`` (alimentée par ``queue.enqueue(name, ids, STAGES)``)
+        jusqu'à épuisement. Les étapes déjà terminées lors d'une exécution
+        précédente ne sont pas refaites ; ``stop()`` arrête proprement les
+        workers après l'étape en cours.
+        """
+        if self.dry_run:
+            raise ValueError("le mode dry-run n'utilise pas la file persistante")
+        total = queue.remaining(name)
+        outcomes: List[PerformerOutcome] = []
+        self._stop.clear()
+
+        def report(outcome: PerformerOutcome):
+            with self._print_lock:
+                outcomes.append(outcome)
+                if on_outcome:
+                    on_outcome(len(outcomes), total, outcome)
+
+        def worker(index: int):
+            worker_id = f"{os.getpid()}:{index}"
+            while not self._stop.is_set():
+                job = queue.claim(name, worker=worker_id)
+                if job is None:
+                    wait = queue.next_ready_in(name)
+                    if wait is None:
+                        return
+                    self._stop.wait(min(max(wait, QUEUE_POLL_MIN), QUEUE_POLL_MAX))
+                    continue
+                start = time.perf_counter()
+                try:
+                    result = self.run_stage(job.stage, job.performer_id, job.input)
+                except Exception as e:
+                    error = str(e) if isinstance(e, (LookupError, RuntimeError)) else f"{type(e).__name__}: {e}"
+                    state = queue.fail(job, error)
+                    if state == FAILED:
+                        name_ = (job.input or {}).get("name", "")
+                        report(PerformerOutcome(job.performer_id, name_, error=f"{job.stage} : {error}",
+                                                elapsed=time.perf_counter() - start))
+                    else:
+                        print(f"[BATCH] #{job.performer_id} {job.stage} : {error} "
+                              f"(essai {job.attempts}/{queue.max_attempts}, nouvel essai différé)")
+                    continue
+                queue.complete(job, result)
+                if job.stage == STAGES[-1]:
+                    outcome = self._outcome(job.performer_id, result)
+                    outcome.elapsed = time.perf_counter() - start
+                    report(outcome)
+
+        self._warm_parse_pool()
+        self._started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,), name=f"batch-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+        finally:
+            self._stop.set()
+            self._finished = time.perf_counter()
+        return outcomes
+
+    def stop(self):
+        """Demande l'arrêt des workers (l'étape en cours se termine et est enregistrée)."""
+        self._stop.set()
+
+    def format_throughput(self, outcomes: List[PerformerOutcome]) -> str:
+        wall = self._finished - self._started
+        done = len(outcomes)
+        changed = sum(1 for o in outcomes if o.changes)
+        failed = sum(1 for o in outcomes if o.error)
+        skipped = sum(1 for o in outcomes if o.unchanged)
+        lines = [
+            f"Performers : {done} en {wall:.1f} s ({(done / wall) if wall > 0 else 0:.2f}/s) · "
+            f"{changed} modifié(s) · {skipped} inchangé(s) · {failed} en échec · {self.workers} worker(s)",
+            f"Sources : {sum(o.sources_unchanged for o in outcomes)} inchangée(s), "
+            f"{sum(o.sources_parsed for o in outcomes)} re-parsée(s)",
+        ]
+        lines.extend("  " + self.stats[name].format(wall) for name in STAGES)
+        breaker = get_circuit_breaker()
+        if breaker is not None and breaker.status():
+            lines.append(breaker.format_status())
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Affichage
+# ---------------------------------------------------------------------------
+
+def _short(value: Any, width: int = 70) -> str:
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(map(str, value))
+    text = re.sub(r"\s+", " ", str(value if value is not None else "")).strip()
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def format_outcome(n: int, total: int, outcome: PerformerOutcome, show_diff: bool) -> str:
+    label = f"[{n:>5}/{total}] #{outcome.performer_id} {outcome.name}"
+    if outcome.error and not outcome.changes:
+        return f"{label} ❌ {outcome.error}"
+    if outcome.unchanged:
+        return (f"{label} ⏭ sources inchangées depuis la dernière sauvegarde "
+                f"({outcome.sources_unchanged} revalidée(s))")
+    status = "💾" if outcome.saved else ("🔎" if outcome.changes else "=")
+    lines = [f"{label} {status} {len(outcome.changes)} champ(s) · sources : {', '.join(outcome.sources) or '-'}"
+             f" · {outcome.sources_unchanged} inchangée(s), {outcome.sources_parsed} re-parsée(s)"]
+    if outcome.error:
+        lines.append(f"    ❌ {outcome.error}")
+    if show_diff:
+        for key, (old, new) in outcome.diff.items():
+            lines.append(f"    {key:<15} {_short(old) or '∅'}  →  {_short(new)}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _cli():
+    import argparse
+    import sys
+
+    try:
+        from services.config_manager import ConfigManager
+        config = ConfigManager()
+        cfg = config.get("batch", {}) or {}
+        default_db = config.get("database_path") or DEFAULT_DB_PATH
+    except Exception:
+        cfg, default_db = {}, DEFAULT_DB_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Enrichit par lot les performers de la BDD Stash (pipeline complet, sans GUI)"
+    )
+    parser.add_argument("--db", default=default_db, help="Chemin vers stash-go.sqlite")
+    sel = parser.add_mutually_exclusive_group()
+    sel.add_argument("--all", action="store_true", help="Tous les performers")
+    sel.add_argument("--ids", default="", help="Liste d'IDs séparés par des virgules")
+    sel.add_argument("--missing", default="",
+                     help="Performers dont l'un de ces champs est vide (ex : birthdate,country,urls)")
+    parser.add_argument("--updated-since", default=None, help="updated_at >= date (YYYY-MM-DD)")
+    parser.add_argument("--updated-before", default=None, help="updated_at < date (YYYY-MM-DD)")
+    parser.add_argument("--dead-urls", action="store_true",
+                        help="Performers ayant au moins une URL morte (historique des vérifications)")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre maximal de performers")
+    parser.add_argument("--workers", type=int, default=None, help="Performers traités simultanément")
+    parser.add_argument("--fallback", action="store_true", default=None,
+                        help="Activer la passe 2 (Babepedia, Boobpedia)")
+    parser.add_argument("--no-url-check", action="store_true",
+                        help="Ne pas vérifier les URLs découvertes")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Afficher les diffs sans modifier la BDD")
+    parser.add_argument("--quiet", action="store_true", help="Ne pas afficher les diffs")
+    parser.add_argument("--force", action="store_true",
+                        help="Fusionner et sauvegarder même si aucune source n'a changé")
+    queue_grp = parser.add_argument_group("file persistante (reprise après interruption)")
+    queue_grp.add_argument("--job", default=None, metavar="NOM",
+                           help="Passer par la file NOM : relancer la même commande reprend où elle s'était arrêtée")
+    queue_grp.add_argument("--status", action="store_true", help="Afficher l'état de la file et quitter")
+    queue_grp.add_argument("--retry-failed", action="store_true",
+                           help="Remettre en attente les travaux abandonnés")
+    queue_grp.add_argument("--recover", action="store_true",
+                           help="Reprendre tout de suite les travaux « en cours » d'un processus arrêté")
+    queue_grp.add_argument("--reset", action="store_true", help="Vider la file et quitter")
+    args = parser.parse_args()
+
+    has_selection = bool(args.all or args.ids or args.missing or args.updated_since
+                         or args.updated_before or args.dead_urls)
+    if (args.status or args.retry_failed or args.recover or args.reset) and not args.job:
+        parser.error("--status, --retry-failed, --recover et --reset demandent --job NOM")
+    if args.job and args.dry_run:
+        parser.error("--dry-run n'utilise pas la file persistante (retirer --job)")
+    if not has_selection and not args.job:
+        parser.error("sélection requise : --all, --ids, --missing, --dead-urls ou --updated-since/--updated-before")
+
+    queue = None
+    if args.job:
+        from services.job_queue import get_job_queue
+        queue = get_job_queue()
+        if args.status:
+            print(queue.format_status(args.job))
+            for f in queue.failures(args.job):
+                print(f"  ❌ #{f['performer_id']} {f['stage']} ({f['attempts']} essais) : {f['last_error']}")
+            return
+        if args.reset:
+            print(f"[BATCH] {queue.reset(args.job)} travaux supprimés")
+            return
+        if args.retry_failed:
+            print(f"[BATCH] {queue.retry_failed(args.job)} travaux remis en attente")
+        if args.recover:
+            print(f"[BATCH] {queue.recover(args.job)} travaux en cours repris")
+
+    db = StashDatabase(args.db)
+    selected: List[Dict] = []
+    if has_selection:
+        try:
+            selected = db.select_performers(
+                ids=[i.strip() for i in args.ids.split(",") if i.strip()] or None,
+                missing=[f.strip() for f in args.missing.split(",") if f.strip()] or None,
+                updated_since=args.updated_since,
+                updated_before=args.updated_before,
+                dead_urls=args.dead_urls,
+                limit=args.limit,
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        if not selected and queue is None:
+            print("Aucun performer sélectionné.")
+            return
+
+    enricher = BatchEnricher.from_config(
+        db, cfg,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        use_fallback=args.fallback,
+        validate_urls=False if args.no_url_check else None,
+        skip_unchanged=False if args.force else None,
+    )
+    mode = "DRY-RUN" if args.dry_run else "ÉCRITURE"
+    print(f"BDD : {args.db}")
+
+    def report(n, total, outcome):
+        print(format_outcome(n, total, outcome, show_diff=not args.quiet), flush=True)
+
+    try:
+        if queue is not None:
+            added = queue.enqueue(args.job, [p["id"] for p in selected], STAGES)
+            print(f"[BATCH] File « {args.job} » : {added} travaux ajoutés · "
+                  f"{queue.remaining(args.job)} performer(s) à traiter · {enricher.workers} worker(s)")
+            outcomes = enricher.run_queue(queue, args.job, on_outcome=report)
+        else:
+            print(f"[BATCH] {len(selected)} performer(s) · {enricher.workers} worker(s) · {mode}")
+            outcomes = enricher.run([p["id"] for p in selected], on_outcome=report)
+    except KeyboardInterrupt:
+        enricher.stop()
+        print("\n[BATCH] Interrompu" + (f" — relancer avec --job {args.job} pour reprendre" if queue else ""))
+        sys.exit(130)
+    finally:
+        try:
+            from services.parse_pool import shutdown_parse_pool
+            shutdown_parse_pool()
+        except Exception:
+            pass
+
+    print()
+    print(enricher.format_throughput(outcomes))
+    if queue is not None:
+        print(queue.format_status(args.job))
+
+
+if __name__ == "__main__":
+    _cli()
@@ -0,0 +1,299 @@
+"""
+circuit_breaker.py - Disjoncteur par domaine pour StashMaster V2
+================================================================
+
+Quand IAFD ou Babepedia se mettent à répondre 403/429 (Cloudflare), chaque
+page demandée tombe sur le fallback ``curl`` qui expire à son tour : le
+scraping, et tout un lot, avance au rythme des timeouts. Le disjoncteur
+coupe court :
+
+- fermé      : les requêtes passent ; les résultats des ``window`` dernières
+               secondes sont comptés par domaine ;
+- ouvert     : au-delà de ``min_calls`` appels et ``failure_ratio`` d'échecs,
+               le domaine est coupé pendant ``open_seconds`` : aucune
+               tentative réseau, l'appelant reçoit ``CircuitOpenError``
+               (``fetch_page`` sert alors la copie expirée du cache s'il y en a) ;
+- semi-ouvert : le délai écoulé, une requête d'essai passe ; un succès
+               referme le circuit, un échec le rouvre pour une durée doublée
+               (plafonnée à ``open_max``).
+
+Comptent comme échecs : 429/503, erreurs réseau et timeouts (client HTTP),
+et un 403 dont le fallback curl a aussi échoué (scrapers). Un 403 seul n'est
+pas un échec : plusieurs sites répondent 403 aux sondes alors que la page
+existe.
+
+Configuration (section ``circuit_breaker`` de config.json) :
+    enabled       : False pour désactiver
+    window        : fenêtre glissante d'observation (secondes)
+    min_calls     : appels minimum dans la fenêtre avant de pouvoir ouvrir
+    failure_ratio : proportion d'échecs qui ouvre le circuit
+    open_seconds  : première durée d'ouverture
+    open_max      : durée d'ouverture maximale
+
+Usage :
+    from services.circuit_breaker import get_circuit_breaker, CircuitOpenError
+    breaker = get_circuit_breaker()
+    if breaker is not None and not breaker.allow(url):
+        raise CircuitOpenError(url, breaker.retry_in(url))
+    ...
+    breaker.record(url, ok)          # True / False / None (neutre)
+    print(breaker.format_status())
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import requests
+
+from services.rate_limiter import _domain
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_WINDOW        = 60.0
+DEFAULT_MIN_CALLS     = 4
+DEFAULT_FAILURE_RATIO = 0.6
+DEFAULT_OPEN_SECONDS  = 120.0
+DEFAULT_OPEN_MAX      = 1800.0
+
+CLOSED    = "closed"
+OPEN      = "open"
+HALF_OPEN = "half_open"
+
+STATE_LABELS = {CLOSED: "fermé", OPEN: "OUVERT", HALF_OPEN: "semi-ouvert"}
+
+# Statuts HTTP comptés comme échecs par le client HTTP
+FAILURE_STATUSES = (429, 503)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Domaine coupé par le disjoncteur : aucune requête n'a été envoyée."""
+
+    def __init__(self, url: str, retry_in: float = 0.0):
+        self.url = url
+        self.retry_in = retry_in
+        super().__init__(f"circuit ouvert pour {_domain(url)} (réessai dans {retry_in:.0f} s)")
+
+
+# ---------------------------------------------------------------------------
+# Circuit d'un domaine
+# ---------------------------------------------------------------------------
+
+class DomainCircuit:
+    """État du disjoncteur d'un domaine (protégé par le verrou du CircuitBreaker)."""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.calls: Deque[Tuple[float, bool]] = deque()
+        self.opened_at = 0.0
+        self.open_for = 0.0
+        self.trips = 0
+        self.probing = False
+        self.short_circuited = 0
+
+    def prune(self, now: float, window: float):
+        while self.calls and now - self.calls[0][0] > window:
+            self.calls.popleft()
+
+    def failures(self) -> int:
+        return sum(1 for _, ok in self.calls if not ok)
+
+
+class CircuitBreaker:
+    """
+    Disjoncteurs par domaine.
+
+    Paramètres
+    ----------
+    window        : fenêtre glissante (secondes)
+    min_calls     : appels minimum avant ouverture
+    failure_ratio : proportion d'échecs qui ouvre le circuit
+    open_seconds  : première durée d'ouverture (doublée à chaque essai raté)
+    open_max      : durée d'ouverture maximale
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW,
+        min_calls: int = DEFAULT_MIN_CALLS,
+        failure_ratio: float = DEFAULT_FAILURE_RATIO,
+        open_seconds: float = DEFAULT_OPEN_SECONDS,
+        open_max: float = DEFAULT_OPEN_MAX,
+    ):
+        self.window = float(window)
+        self.min_calls = max(int(min_calls), 1)
+        self.failure_ratio = float(failure_ratio)
+        self.open_seconds = float(open_seconds)
+        self.open_max = max(float(open_max), self.open_seconds)
+        self._circuits: Dict[str, DomainCircuit] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None) -> "CircuitBreaker":
+        """Construit le disjoncteur depuis la section ``circuit_breaker`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            window=float(cfg.get("window", DEFAULT_WINDOW)),
+            min_calls=int(cfg.get("min_calls", DEFAULT_MIN_CALLS)),
+            failure_ratio=float(cfg.get("failure_ratio", DEFAULT_FAILURE_RATIO)),
+            open_seconds=float(cfg.get("open_seconds", DEFAULT_OPEN_SECONDS)),
+            open_max=float(cfg.get("open_max", DEFAULT_OPEN_MAX)),
+        )
+
+    def _circuit(self, domain: str) -> DomainCircuit:
+        circuit = self._circuits.get(domain)
+        if circuit is None:
+            circuit = self._circuits[domain] = DomainCircuit()
+        return circuit
+
+    # ------------------------------------------------------------------
+    # Décision / enregistrement
+    # ------------------------------------------------------------------
+
+    def allow(self, url: str) -> bool:
+        """
+        True si une requête vers ``url`` peut partir. En semi-ouvert, une
+        seule requête d'essai à la fois : son résultat doit être enregistré
+        par ``record()``.
+        """
+        domain = _domain(url)
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(domain)
+            if circuit is None or circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN and now - circuit.opened_at >= circuit.open_for:
+                circuit.state = HALF_OPEN
+                circuit.probing = False
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                print(f"[CIRCUIT] {domain} semi-ouvert : requête d'essai")
+                return True
+            circuit.short_circuited += 1
+            return False
+
+    def record(self, url: str, ok: Optional[bool]):
+        """
+        Résultat d'une requête autorisée : True (succès), False (échec) ou
+        None (neutre : ne compte pas, libère seulement l'essai semi-ouvert).
+        """
+        domain = _domain(url)
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuit(domain)
+            if circuit.state == HALF_OPEN and circuit.probing:
+                circuit.probing = False
+                if ok is True:
+                    circuit.state = CLOSED
+                    circuit.calls.clear()
+                    circuit.open_for = 0.0
+                    print(f"[CIRCUIT] {domain} refermé")
+                elif ok is False:
+                    self._open(domain, circuit, now, min(circuit.open_for * 2, self.open_max))
+                return
+            if ok is None or circuit.state != CLOSED:
+                return
+            circuit.calls.append((now, ok))
+            circuit.prune(now, self.window)
+            calls = len(circuit.calls)
+            if not ok and calls >= self.min_calls and circuit.failures() / calls >= self.failure_ratio:
+                self._open(domain, circuit, now, self.open_seconds)
+
+    def _open(self, domain: str, circuit: DomainCircuit, now: float, duration: float):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.open_for = duration
+        circuit.trips += 1
+        print(f"[CIRCUIT] {domain} ouvert pour {duration:.0f} s "
+              f"({circuit.failures()}/{len(circuit.calls)} échecs récents)")
+
+    def retry_in(self, url: str) -> float:
+        """Secondes avant la prochaine requête d'essai (0 si le circuit est fermé)."""
+        with self._lock:
+            circuit = self._circuits.get(_domain(url))
+            if circuit is None or circuit.state != OPEN:
+                return 0.0
+            return max(circuit.open_for - (time.monotonic() - circuit.opened_at), 0.0)
+
+    def is_open(self, url: str) -> bool:
+        return self.retry_in(url) > 0
+
+    def reset(self, domain: Optional[str] = None):
+        """Referme un domaine (ou tous)."""
+        with self._lock:
+            if domain is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(_domain(domain) if "/" in domain else domain, None)
+
+    # ------------------------------------------------------------------
+    # État
+    # ------------------------------------------------------------------
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Domaines ouverts ou semi-ouverts, ou déjà disjonctés."""
+        now = time.monotonic()
+        out = []
+        with self._lock:
+            for domain, circuit in sorted(self._circuits.items()):
+                circuit.prune(now, self.window)
+                if circuit.state == CLOSED and not circuit.trips:
+                    continue
+                out.append({
+                    "domain": domain,
+                    "state": circuit.state,
+                    "retry_in": (max(circuit.open_for - (now - circuit.opened_at), 0.0)
+                                 if circuit.state == OPEN else 0.0),
+                    "failures": circuit.failures(),
+                    "calls": len(circuit.calls),
+                    "trips": circuit.trips,
+                    "short_circuited": circuit.short_circuited,
+                })
+        return out
+
+    def tripped(self) -> List[str]:
+        """Domaines actuellement coupés (ouverts ou en essai)."""
+        return [s["domain"] for s in self.status() if s["state"] != CLOSED]
+
+    def format_status(self) -> str:
+        rows = self.status()
+        if not rows:
+            return "Disjoncteurs : tous les domaines fermés"
+        lines = ["Disjoncteurs :"]
+        for s in rows:
+            state = STATE_LABELS[s["state"]]
+            if s["state"] == OPEN:
+                state += f" (essai dans {s['retry_in']:.0f} s)"
+            lines.append(f"  {s['domain']:<22} {state:<28} {s['trips']} ouverture(s) · "
+                         f"{s['short_circuited']} requête(s) évitée(s) · "
+                         f"{s['failures']}/{s['calls']} échecs récents")
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_loaded = False
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Disjoncteur partagé, ou None si désactivé dans config.json."""
+    global _breaker, _breaker_loaded
+    if not _breaker_loaded:
+        with _breaker_lock:
+            if not _breaker_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("circuit_breaker", {}) or {}
+                except Exception:
+                    cfg = {}
+                _breaker = CircuitBreaker.from_config(cfg) if cfg.get("enabled", True) else None
+                _breaker_loaded = True
+    return _breaker
@@ -2,13 +2,181 @@
 # -*- coding: utf-8 -*-
 """
 Database - Service d'interaction avec la base de données Stash (SQLite)
+
+StashMaster lit ``stash-go.sqlite`` pendant que Stash tourne. Deux sortes
+de connexions :
+
+- lecture (une par thread, réutilisée) : ouverte en ``mode=ro``,
+  ``query_only``, cache de pages et mmap agrandis, tables temporaires en
+  mémoire. En WAL, les lectures travaillent sur un instantané : elles ne
+  bloquent pas l'écrivain de Stash et ne sont pas bloquées par lui ;
+- écriture (courte, une par sauvegarde) : ``busy_timeout`` et
+  ``BEGIN IMMEDIATE`` (le verrou d'écriture est pris d'emblée ou attendu,
+  jamais obtenu à mi-transaction), fermée dès le COMMIT.
+
+La base annexe de StashMaster (voir ``sidecar_db``) est attachée aux
+connexions de lecture sous le nom ``sidecar`` : les requêtes qui croisent
+Stash et l'état de StashMaster (URLs mortes, index des noms) sont de
+simples jointures.
+
+Configuration (section ``stash_db`` de config.json) :
+    read_only       : False pour ouvrir les lectures en lecture-écriture
+    cache_size_mb   : cache de pages des connexions de lecture
+    mmap_size_mb    : taille du mmap des connexions de lecture (0 = désactivé)
+    busy_timeout_ms : attente maximale d'un verrou tenu par Stash
+    attach_sidecar  : False pour ne pas attacher la base annexe
 """
 
+import json
 import os
 import sqlite3
 import re
 import threading
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional
+from urllib.request import pathname2url
+
+from services.sidecar_db import SIDECAR_SCHEMA, attach_sidecar, is_attached
+
+
+# ---------------------------------------------------------------------------
+# Capacités du schéma
+# ---------------------------------------------------------------------------
+#
+# Les variantes de schéma Stash diffèrent (scenes_performers ou
+# performers_scenes, custom fields, death_date, position des URLs de
+# scène...). Le schéma est lu une fois par fichier (tables + colonnes) et
+# revérifié par PRAGMA schema_version à l'ouverture d'un StashDatabase :
+# les requêtes se construisent sur ce relevé plutôt qu'à coups de
+# sqlite_master ou de try/except.
+
+@dataclass(frozen=True)
+class SchemaCapabilities:
+    """Tables et colonnes disponibles dans une base Stash."""
+    tables: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    schema_version: int = 0
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "SchemaCapabilities":
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        names = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()]
+        tables = {}
+        for name in names:
+            cols = conn.execute(f'PRAGMA main.table_info("{name}")').fetchall()
+            tables[name] = frozenset(c[1] for c in cols)
+        return cls(tables=tables, schema_version=version)
+
+    def has_table(self, table: str) -> bool:
+        return table in self.tables
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self.tables.get(table, ())
+
+    def columns(self, table: str) -> FrozenSet[str]:
+        return self.tables.get(table, frozenset())
+
+    def first_table(self, *candidates: str) -> Optional[str]:
+        return next((t for t in candidates if t in self.tables), None)
+
+    # --- Tables de liaison / fonctionnalités optionnelles ---
+
+    @property
+    def scene_performers_table(self) -> Optional[str]:
+        """Liaison scène ↔ performer (``scenes_performers`` ou ``performers_scenes``)."""
+        return self.first_table("scenes_performers", "performers_scenes")
+
+    @property
+    def can_propagate_scene_tags(self) -> bool:
+        return self.has_table("scenes_tags") and self.scene_performers_table is not None
+
+    @property
+    def has_custom_fields(self) -> bool:
+        return self.has_table("performer_custom_fields")
+
+    @property
+    def has_death_date(self) -> bool:
+        return self.has_column("performers", "death_date")
+
+    @property
+    def has_updated_at(self) -> bool:
+        return self.has_column("performers", "updated_at")
+
+    def features(self) -> Dict[str, bool]:
+        """Fonctionnalités optionnelles présentes, pour les appelants."""
+        return {
+            "performer_aliases": self.has_table("performer_aliases"),
+            "performer_urls": self.has_table("performer_urls"),
+            "performer_tags": self.has_table("performers_tags") and self.has_table("tags"),
+            "custom_fields": self.has_custom_fields,
+            "death_date": self.has_death_date,
+            "updated_at": self.has_updated_at,
+            "scene_performers": self.scene_performers_table is not None,
+            "scene_tags": self.has_table("scenes_tags"),
+            "scene_urls": self.has_table("scene_urls"),
+            "groups": self.has_table("groups"),
+            "studios": self.has_table("studios"),
+        }
+
+    def format(self) -> str:
+        absent = [k for k, v in self.features().items() if not v]
+        return (f"Schéma Stash v{self.schema_version} : {len(self.tables)} tables"
+                + (f" · absent(s) : {', '.join(absent)}" if absent else ""))
+
+
+_SCHEMAS: Dict[str, SchemaCapabilities] = {}
+_schemas_lock = threading.Lock()
+
+
+def schema_capabilities(conn: sqlite3.Connection, db_path: str) -> SchemaCapabilities:
+    """Capacités de ``db_path`` (relevé mis en cache, invalidé si schema_version change)."""
+    key = os.path.abspath(db_path)
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    with _schemas_lock:
+        caps = _SCHEMAS.get(key)
+        if caps is None or caps.schema_version != version:
+            caps = _SCHEMAS[key] = SchemaCapabilities.load(conn)
+    return caps
+
+
+# ---------------------------------------------------------------------------
+# Réglages des connexions
+# ---------------------------------------------------------------------------
+
+DEFAULT_CACHE_SIZE_MB   = 64
+DEFAULT_MMAP_SIZE_MB    = 256
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+_settings: Optional[Dict[str, Any]] = None
+_settings_lock = threading.Lock()
+
+
+def connection_settings() -> Dict[str, Any]:
+    """Section ``stash_db`` de config.json (lue une fois)."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("stash_db", {}) or {}
+                except Exception:
+                    cfg = {}
+                _settings = {
+                    "read_only": bool(cfg.get("read_only", True)),
+                    "cache_size_mb": int(cfg.get("cache_size_mb", DEFAULT_CACHE_SIZE_MB)),
+                    "mmap_size_mb": int(cfg.get("mmap_size_mb", DEFAULT_MMAP_SIZE_MB)),
+                    "busy_timeout_ms": int(cfg.get("busy_timeout_ms", DEFAULT_BUSY_TIMEOUT_MS)),
+                    "attach_sidecar": bool(cfg.get("attach_sidecar", True)),
+                }
+    return _settings
+
+
+def _file_uri(path: str, mode: str) -> str:
+    return f"file:{pathname2url(os.path.abspath(path))}?mode={mode}"
+
 
 class StashDatabase:
     """Gère les requêtes vers stash-go.sqlite"""
@@ -27,22 +195,91 @@ class StashDatabase:
     _thread_conn = threading.local()
 
     def _get_connection(self):
-        """Retourne une connexion SQLite spécifique au thread courant."""
+        """Connexion de lecture spécifique au thread courant (voir ``_open_read_connection``)."""
         conn = getattr(self._thread_conn, 'conn', None)
         if conn is None:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            self._thread_conn.conn = conn
+            conn = self._thread_conn.conn = self._open_read_connection()
         else:
             # Vérifie que la connexion n'est pas fermée
             try:
                 conn.cursor()
             except Exception:
-                conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                conn.row_factory = sqlite3.Row
-                self._thread_conn.conn = conn
+                conn = self._thread_conn.conn = self._open_read_connection()
         return conn
 
+    def _open_read_connection(self) -> sqlite3.Connection:
+        """
+        Connexion de lecture : ``mode=ro`` + ``query_only`` (aucune écriture
+        possible, la base n'est jamais créée), cache et mmap agrandis,
+        tables temporaires en mémoire, base annexe attachée.
+        """
+        settings = connection_settings()
+        timeout = settings["busy_timeout_ms"] / 1000
+        conn = None
+        if settings["read_only"]:
+            try:
+                conn = sqlite3.connect(_file_uri(self.db_path, "ro"), uri=True,
+                                       timeout=timeout, check_same_thread=False)
+                conn.execute("PRAGMA schema_version")
+            except sqlite3.Error as e:
+                # Base WAL sans fichier -shm et dossier en lecture seule, par ex.
+                print(f"[DB] Ouverture en lecture seule impossible ({e}) : connexion normale")
+                if conn is not None:
+                    conn.close()
+                conn = None
+        if conn is None:
+            conn = sqlite3.connect(_file_uri(self.db_path, "rw"), uri=True,
+                                   timeout=timeout, check_same_thread=False)
+        # autocommit : jamais de BEGIN implicite, donc pas d'instantané WAL
+        # conservé d'une lecture à l'autre (les sauvegardes restent visibles)
+        conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {settings['busy_timeout_ms']}")
+        conn.execute(f"PRAGMA cache_size = -{settings['cache_size_mb'] * 1024}")
+        conn.execute(f"PRAGMA mmap_size = {settings['mmap_size_mb'] * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if settings["attach_sidecar"]:
+            attach_sidecar(conn)
+        if settings["read_only"]:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @property
+    def sidecar_attached(self) -> bool:
+        """True si la base annexe est attachée (tables ``sidecar.*`` disponibles)."""
+        return is_attached(self._get_connection())
+
+    def _open_write_connection(self) -> sqlite3.Connection:
+        """Connexion d'écriture (``mode=rw`` : la base doit exister)."""
+        settings = connection_settings()
+        conn = sqlite3.connect(_file_uri(self.db_path, "rw"), uri=True,
+                               timeout=settings["busy_timeout_ms"] / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {settings['busy_timeout_ms']}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    @contextmanager
+    def _write_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Transaction d'écriture courte : BEGIN IMMEDIATE, COMMIT en sortie
+        (ROLLBACK sur exception), puis fermeture. Les lectures restent sur
+        leur propre connexion et ne tiennent jamais le verrou d'écriture.
+        """
+        conn = self._open_write_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conn.close()
+
     def _close_conn(self):
         """Ferme proprement la connexion thread-local et la réinitialise."""
         conn = getattr(self._thread_conn, 'conn', None)
@@ -53,6 +290,19 @@ class StashDatabase:
                 pass
             self._thread_conn.conn = None
 
+    @property
+    def schema(self) -> SchemaCapabilities:
+        """Tables/colonnes de la base (relevées une fois, voir SchemaCapabilities)."""
+        caps = getattr(self, "_schema", None)
+        if caps is None:
+            caps = self._schema = schema_capabilities(self._get_connection(), self.db_path)
+        return caps
+
+    def refresh_schema(self) -> SchemaCapabilities:
+        """Relit le schéma (après une migration Stash pendant l'exécution)."""
+        self._schema = None
+        return self.schema
+
     def get_performer_metadata(self, performer_id: str) -> Optional[Dict]:
         """Récupère les métadonnées actuelles d'un performer"""
         if not os.path.exists(self.db_path):
@@ -70,105 +320,209 @@ class StashDatabase:
                 return None
                 
             data = dict(row)
+            features = self.schema.features()
             
             # Aliases
-            cur.execute("SELECT alias FROM performer_aliases WHERE performer_id=?", (performer_id,))
-            data['aliases'] = [r['alias'] for r in cur.fetchall()]
+            aliases = []
+            if features['performer_aliases']:
+                cur.execute("SELECT alias FROM performer_aliases WHERE performer_id=?", (performer_id,))
+                aliases = [r['alias'] for r in cur.fetchall()]
             
             # URLs
-            cur.execute("SELECT url FROM performer_urls WHERE performer_id=?", (performer_id,))
-            data['urls'] = [r['url'] for r in cur.fetchall()]
+            urls = []
+            if features['performer_urls']:
+                order = " ORDER BY position" if self.schema.has_column('performer_urls', 'position') else ""
+                cur.execute(f"SELECT url FROM performer_urls WHERE performer_id=?{order}", (performer_id,))
+                urls = [r['url'] for r in cur.fetchall()]
             
             # Tags
-            query = """
-                SELECT t.name 
-                FROM tags t
-                JOIN performers_tags pt ON pt.tag_id = t.id
-                WHERE pt.performer_id = ?
-            """
-            cur.execute(query, (performer_id,))
-            data['tags'] = [r['name'] for r in cur.fetchall()]
-            
-            # Trivia/Awards (si stockés dans performers ou tables dédiées)
-            # Dans la BDD Stash standard, trivia et awards ne sont pas des colonnes natives de 'performers'
-            # mais souvent stockées dans 'details' ou via des plugins.
-            # Mapping des champs spécifiques UI
-            data['career_start'] = data.get('career_length', '')
-            data['details'] = data.get('details', '')
-
-            # Custom Fields (lecture étendue + mapping des alias vers clés UI)
-            cur.execute("SELECT field, value FROM performer_custom_fields WHERE performer_id=?", (performer_id,))
-            custom_rows = cur.fetchall()
-            data['custom_fields'] = {}
-
-            custom_map = {
-                'birthplace': 'birthplace',
-                'place of birth': 'birthplace',
-                'dob': 'birthdate',
-                'date of birth': 'birthdate',
-                'awards': 'awards',
-                'trivia': 'trivia',
-                'trivia fr': 'trivia',
-                'tattoos': 'tattoos',
-                'tattoos fr': 'tattoos',
-                'piercings': 'piercings',
-                'piercings fr': 'piercings',
-                'official website': 'website',
-                'website': 'website',
-                'instagram': 'instagram',
-                'onlyfans': 'onlyfans',
-                'tiktok': 'tiktok',
-                'youtube': 'youtube',
-                'twitch': 'twitch',
-                'imdb': 'imdb',
-                'twitter': 'twitter',
-                'facebook': 'facebook',
-                'biography': 'details',
-                'bio': 'details',
-            }
-
-            for cfield in custom_rows:
-                field_raw = str(cfield['field'] or '').strip()
-                value_raw = str(cfield['value'] or '').strip()
-                if not field_raw:
-                    continue
+            tags = []
+            if features['performer_tags']:
+                query = """
+                    SELECT t.name 
+                    FROM tags t
+                    JOIN performers_tags pt ON pt.tag_id = t.id
+                    WHERE pt.performer_id = ?
+                """
+                cur.execute(query, (performer_id,))
+                tags = [r['name'] for r in cur.fetchall()]
 
-                fname = field_raw.lower()
-                data['custom_fields'][field_raw] = value_raw
+            # Custom Fields
+            custom_rows = []
+            if features['custom_fields']:
+                cur.execute("SELECT field, value FROM performer_custom_fields WHERE performer_id=?", (performer_id,))
+                custom_rows = [(r['field'], r['value']) for r in cur.fetchall()]
 
-                ui_key = custom_map.get(fname)
-                if not ui_key:
-                    continue
-
-                # Priorité : si la clé n'est pas déjà remplie, on prend le custom field
-                # ou si la valeur actuelle est vide.
-                existing = data.get(ui_key)
-                if existing is None or str(existing).strip() == '':
-                    data[ui_key] = value_raw
-
-            # Fallback: certains setups utilisent la colonne 'disambiguation' comme lieu de naissance
-            if not data.get('birthplace') and data.get('disambiguation'):
-                data['birthplace'] = data.get('disambiguation')
-
-            # --- Nettoyage des dates ---
-            # Stash stocke les dates NULL comme "0001-01-01" — on les efface
-            NULL_DATES = {'0001-01-01', '0001-01-01T00:00:00Z', '0001-01-01 00:00:00+00:00', ''}
-            for date_col in ('birthdate', 'death_date'):
-                raw = str(data.get(date_col, '') or '').strip()
-                if raw in NULL_DATES:
-                    data[date_col] = ''
-                elif 'T' in raw:
-                    # Tronquer "1988-06-02T00:00:00Z" → "1988-06-02"
-                    data[date_col] = raw.split('T')[0]
-
-            # Mapper death_date → deathdate (clé utilisée dans le UI field_vars)
-            data['deathdate'] = data.get('death_date', '')
-
-            return data
+            return self._assemble_performer(data, aliases, urls, tags, custom_rows)
         except Exception as e:
             print(f"Erreur lors de la lecture DB: {e}")
             return None
 
+    # Clés de champs personnalisés (en minuscules) → clés UI
+    CUSTOM_FIELD_UI_KEYS = {
+        'birthplace': 'birthplace',
+        'place of birth': 'birthplace',
+        'dob': 'birthdate',
+        'date of birth': 'birthdate',
+        'awards': 'awards',
+        'trivia': 'trivia',
+        'trivia fr': 'trivia',
+        'tattoos': 'tattoos',
+        'tattoos fr': 'tattoos',
+        'piercings': 'piercings',
+        'piercings fr': 'piercings',
+        'official website': 'website',
+        'website': 'website',
+        'instagram': 'instagram',
+        'onlyfans': 'onlyfans',
+        'tiktok': 'tiktok',
+        'youtube': 'youtube',
+        'twitch': 'twitch',
+        'imdb': 'imdb',
+        'twitter': 'twitter',
+        'facebook': 'facebook',
+        'biography': 'details',
+        'bio': 'details',
+    }
+
+    # Stash stocke les dates NULL comme "0001-01-01" — on les efface
+    NULL_DATES = {'0001-01-01', '0001-01-01T00:00:00Z', '0001-01-01 00:00:00+00:00', ''}
+
+    @classmethod
+    def _assemble_performer(cls, data: Dict, aliases: List[str], urls: List[str],
+                            tags: List[str], custom_rows: List[tuple]) -> Dict:
+        """Dict UI d'un performer à partir de sa ligne et de ses tables liées."""
+        data['aliases'] = aliases
+        data['urls'] = urls
+        data['tags'] = tags
+
+        # Trivia/Awards (si stockés dans performers ou tables dédiées)
+        # Dans la BDD Stash standard, trivia et awards ne sont pas des colonnes natives de 'performers'
+        # mais souvent stockées dans 'details' ou via des plugins.
+        # Mapping des champs spécifiques UI
+        data['career_start'] = data.get('career_length', '')
+        data['details'] = data.get('details', '')
+
+        # Custom Fields (lecture étendue + mapping des alias vers clés UI)
+        data['custom_fields'] = {}
+        for field_raw, value_raw in custom_rows:
+            field_raw = str(field_raw or '').strip()
+            value_raw = str(value_raw or '').strip()
+            if not field_raw:
+                continue
+
+            data['custom_fields'][field_raw] = value_raw
+
+            ui_key = cls.CUSTOM_FIELD_UI_KEYS.get(field_raw.lower())
+            if not ui_key:
+                continue
+
+            # Priorité : si la clé n'est pas déjà remplie, on prend le custom field
+            # ou si la valeur actuelle est vide.
+            existing = data.get(ui_key)
+            if existing is None or str(existing).strip() == '':
+                data[ui_key] = value_raw
+
+        # Fallback: certains setups utilisent la colonne 'disambiguation' comme lieu de naissance
+        if not data.get('birthplace') and data.get('disambiguation'):
+            data['birthplace'] = data.get('disambiguation')
+
+        # --- Nettoyage des dates ---
+        for date_col in ('birthdate', 'death_date'):
+            raw = str(data.get(date_col, '') or '').strip()
+            if raw in cls.NULL_DATES:
+                data[date_col] = ''
+            elif 'T' in raw:
+                # Tronquer "1988-06-02T00:00:00Z" → "1988-06-02"
+                data[date_col] = raw.split('T')[0]
+
+        # Mapper death_date → deathdate (clé utilisée dans le UI field_vars)
+        data['deathdate'] = data.get('death_date', '')
+        return data
+
+    def get_performers_metadata(self, ids: Optional[List[Any]] = None, chunk_size: int = 500,
+                                **filters) -> Iterator[Dict]:
+        """
+        Version par lot de ``get_performer_metadata`` : même dict pour chaque
+        performer, produit au fil de l'eau (générateur) par paquets de
+        ``chunk_size``. Chaque paquet coûte une requête par table (ids
+        passés en liste JSON), quel que soit son nombre de
+        performers ; la mémoire reste bornée par la taille du paquet.
+
+        ids     : IDs à charger, dans cet ordre (None = sélection par ``filters``)
+        filters : arguments de ``select_performers`` (missing, updated_since,
+                  updated_before, limit) ; sans ids ni filtre, tous les performers
+        """
+        if not os.path.exists(self.db_path):
+            print(f"Erreur: Base de données non trouvée à {self.db_path}")
+            return
+        if ids is None:
+            ids = [p['id'] for p in self.select_performers(**filters)]
+        chunk_size = max(int(chunk_size or 1), 1)
+        for start in range(0, len(ids), chunk_size):
+            chunk = list(dict.fromkeys(ids[start:start + chunk_size]))
+            try:
+                loaded = self._load_performer_chunk(chunk)
+            except Exception as e:
+                print(f"Erreur lors de la lecture DB (lot de {len(chunk)}): {e}")
+                continue
+            for pid in chunk:
+                data = loaded.get(str(pid))
+                if data is not None:
+                    yield data
+
+    def _load_performer_chunk(self, ids: List[Any]) -> Dict[str, Dict]:
+        """{str(id): dict} pour un paquet d'IDs : une requête par table."""
+        conn = self._get_connection()
+        cur = conn.cursor()
+        # Liste d'IDs passée en JSON (json_each) : rien à écrire, la connexion
+        # de lecture est en query_only.
+        id_list = json.dumps([int(i) if str(i).isdigit() else i for i in ids])
+        ids_cte = "WITH t(id) AS (SELECT value FROM json_each(?)) "
+
+        rows: Dict[Any, Dict] = {}
+        for row in cur.execute(ids_cte + "SELECT p.* FROM t JOIN performers p ON p.id = t.id", (id_list,)):
+            rows[row['id']] = dict(row)
+
+        features = self.schema.features()
+
+        def grouped(feature: str, query: str) -> Dict[Any, List]:
+            out: Dict[Any, List] = {}
+            if not features[feature]:
+                return out
+            for r in cur.execute(ids_cte + query, (id_list,)):
+                out.setdefault(r[0], []).append(r[1] if len(r) == 2 else tuple(r[1:]))
+            return out
+
+        url_order = ", u.position" if self.schema.has_column('performer_urls', 'position') else ""
+        aliases = grouped(
+            'performer_aliases',
+            "SELECT a.performer_id, a.alias FROM t "
+            "JOIN performer_aliases a ON a.performer_id = t.id"
+        )
+        urls = grouped(
+            'performer_urls',
+            "SELECT u.performer_id, u.url FROM t "
+            f"JOIN performer_urls u ON u.performer_id = t.id ORDER BY u.performer_id{url_order}"
+        )
+        tags = grouped(
+            'performer_tags',
+            "SELECT pt.performer_id, tg.name FROM t "
+            "JOIN performers_tags pt ON pt.performer_id = t.id JOIN tags tg ON tg.id = pt.tag_id"
+        )
+        custom = grouped(
+            'custom_fields',
+            "SELECT c.performer_id, c.field, c.value FROM t "
+            "JOIN performer_custom_fields c ON c.performer_id = t.id"
+        )
+
+        return {
+            str(pid): self._assemble_performer(
+                data, aliases.get(pid, []), urls.get(pid, []), tags.get(pid, []), custom.get(pid, []),
+            )
+            for pid, data in rows.items()
+        }
+
     def get_all_performers(self) -> List[Dict]:
         """Récupère tous les performers pour une liste de sélection"""
         try:
@@ -180,6 +534,181 @@ class StashDatabase:
             print(f"Erreur get_all_performers: {e}")
             return []
 
+    # Champs testables par select_performers(missing=...) :
+    # colonne de `performers`, champ personnalisé ou table de liaison
+    MISSING_FIELD_COLUMNS = {
+        'birthdate': 'birthdate', 'deathdate': 'death_date', 'ethnicity': 'ethnicity',
+        'country': 'country', 'eye_color': 'eye_color', 'hair_color': 'hair_color',
+        'height': 'height', 'weight': 'weight', 'measurements': 'measurements',
+        'fake_tits': 'fake_tits', 'career_length': 'career_length', 'tattoos': 'tattoos',
+        'piercings': 'piercings', 'details': 'details',
+    }
+    MISSING_FIELD_CUSTOM = {
+        'birthplace': 'Birthplace', 'awards': 'Awards', 'trivia': 'Trivia',
+        'website': 'Official Website', 'instagram': 'Instagram', 'onlyfans': 'OnlyFans',
+        'twitter': 'Twitter',
+    }
+    MISSING_FIELD_LINKS = {
+        'aliases': 'performer_aliases', 'urls': 'performer_urls', 'tags': 'performers_tags',
+    }
+
+    def select_performers(self, ids: Optional[List[Any]] = None,
+                          missing: Optional[List[str]] = None,
+                          updated_since: Optional[str] = None,
+                          updated_before: Optional[str] = None,
+                          dead_urls: bool = False,
+                          limit: Optional[int] = None) -> List[Dict]:
+        """
+        Sélectionne des performers (id, name) pour un traitement par lot.
+
+        ids            : liste d'IDs (None = tous)
+        missing        : champs dont au moins un est vide (voir MISSING_FIELD_*)
+        updated_since  : updated_at >= date (ISO, ex: "2024-01-01")
+        updated_before : updated_at < date (fiches non retouchées depuis)
+        dead_urls      : au moins une URL morte à la dernière vérification
+                         (historique de la base annexe)
+        """
+        where: List[str] = []
+        params: List[Any] = []
+
+        if ids:
+            where.append(f"p.id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+
+        schema = self.schema
+        clauses = []
+        for fname in missing or []:
+            key = fname.strip().lower()
+            # Colonne / table absente du schéma : le champ manque à tout le monde
+            if key in self.MISSING_FIELD_COLUMNS:
+                col = self.MISSING_FIELD_COLUMNS[key]
+                if not schema.has_column('performers', col):
+                    clauses.append("1")
+                    continue
+                clauses.append(
+                    f"(p.{col} IS NULL OR TRIM(p.{col}) = '' OR p.{col} LIKE '0001-01-01%')"
+                )
+            elif key in self.MISSING_FIELD_CUSTOM:
+                if not schema.has_custom_fields:
+                    clauses.append("1")
+                    continue
+                clauses.append(
+                    "NOT EXISTS (SELECT 1 FROM performer_custom_fields cf "
+                    "WHERE cf.performer_id = p.id AND cf.field = ? COLLATE NOCASE "
+                    "AND TRIM(COALESCE(cf.value, '')) != '')"
+                )
+                params.append(self.MISSING_FIELD_CUSTOM[key])
+            elif key in self.MISSING_FIELD_LINKS:
+                table = self.MISSING_FIELD_LINKS[key]
+                if not schema.has_table(table):
+                    clauses.append("1")
+                    continue
+                clauses.append(f"NOT EXISTS (SELECT 1 FROM {table} l WHERE l.performer_id = p.id)")
+            else:
+                raise ValueError(f"Champ inconnu : {fname}")
+        if clauses:
+            where.append("(" + " OR ".join(clauses) + ")")
+
+        if (updated_since or updated_before) and not schema.has_updated_at:
+            raise ValueError("colonne performers.updated_at absente de ce schéma Stash")
+        if updated_since:
+            where.append("p.updated_at >= ?")
+            params.append(updated_since)
+        if updated_before:
+            where.append("p.updated_at < ?")
+            params.append(updated_before)
+
+        if dead_urls:
+            if not self.sidecar_attached:
+                raise ValueError("base annexe non attachée : historique des URLs indisponible")
+            if not schema.has_table('performer_urls'):
+                return []
+            where.append(
+                "EXISTS (SELECT 1 FROM performer_urls u "
+                f"JOIN {SIDECAR_SCHEMA}.url_check_history h ON h.url = u.url "
+                "WHERE u.performer_id = p.id AND h.status = 'dead')"
+            )
+
+        query = "SELECT p.id, p.name FROM performers p"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY p.id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        try:
+            conn = self._get_connection()
+            return [dict(r) for r in conn.execute(query, params).fetchall()]
+        except Exception as e:
+            print(f"Erreur select_performers: {e}")
+            return []
+
+    def get_dead_urls(self, ids: Optional[List[Any]] = None,
+                      statuses: tuple = ("dead",)) -> Dict[str, List[str]]:
+        """
+        {str(performer_id): [url, ...]} des URLs dont la dernière vérification
+        (historique de la base annexe) a l'un de ces statuts : une seule
+        jointure Stash × base annexe.
+        """
+        if not self.schema.has_table('performer_urls') or not self.sidecar_attached:
+            return {}
+        query = (
+            "SELECT u.performer_id, u.url FROM performer_urls u "
+            f"JOIN {SIDECAR_SCHEMA}.url_check_history h ON h.url = u.url "
+            f"WHERE h.status IN ({','.join('?' * len(statuses))})"
+        )
+        params: List[Any] = list(statuses)
+        if ids:
+            query += " AND u.performer_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(i) if str(i).isdigit() else i for i in ids]))
+        query += " ORDER BY u.performer_id"
+        out: Dict[str, List[str]] = {}
+        try:
+            for pid, url in self._get_connection().execute(query, params):
+                out.setdefault(str(pid), []).append(url)
+        except Exception as e:
+            print(f"Erreur get_dead_urls: {e}")
+        return out
+
+    def find_performers_by_name(self, name: str, aliases: bool = True) -> List[Dict]:
+        """
+        Performers (id, name) dont le nom (ou un alias si ``aliases``)
+        correspond à ``name`` (casse, accents et ponctuation ignorés) via
+        l'index des noms de la base annexe. Une entrée de nom périmée
+        (renommage pas encore indexé) est écartée ; si l'index ne donne
+        rien, comparaison insensible à la casse directement dans Stash
+        (performer ajouté ou renommé depuis la dernière reconstruction).
+        Les correspondances exactes (à la casse près) viennent en premier.
+        """
+        from services.name_index import get_name_index, name_key
+        index = get_name_index()
+        key = name_key(name)
+        found: List[Dict] = []
+        try:
+            conn = self._get_connection()
+            if index is not None and key and self.sidecar_attached:
+                index.refresh(self)
+                kinds = "" if aliases else " AND n.kind = 'name'"
+                rows = conn.execute(
+                    "SELECT p.id, p.name, MIN(n.kind = 'alias') AS by_alias "
+                    f"FROM {SIDECAR_SCHEMA}.performer_names n JOIN performers p ON p.id = n.performer_id "
+                    f"WHERE n.name_key = ?{kinds} GROUP BY p.id ORDER BY by_alias, p.id",
+                    (key,),
+                ).fetchall()
+                found = [{'id': r['id'], 'name': r['name']} for r in rows
+                         if r['by_alias'] or name_key(r['name']) == key]
+            if not found:
+                rows = conn.execute(
+                    "SELECT id, name FROM performers WHERE lower(name) = lower(?) ORDER BY id", (name,)
+                ).fetchall()
+                found = [dict(r) for r in rows]
+        except Exception as e:
+            print(f"Erreur find_performers_by_name: {e}")
+            return []
+        wanted = str(name).strip().casefold()
+        return sorted(found, key=lambda p: str(p['name'] or '').strip().casefold() != wanted)
+
     def get_group_metadata(self, group_id: str) -> Optional[Dict]:
         """Récupère les métadonnées d'un groupe (DVD)"""
         if not os.path.exists(self.db_path): return None
@@ -193,7 +722,7 @@ class StashDatabase:
             data = dict(row)
             
             # Studio (dans Stash 'groups' a souvent une colonne studio_id)
-            if data.get('studio_id'):
+            if data.get('studio_id') and self.schema.has_table('studios'):
                 cur.execute("SELECT name FROM studios WHERE id=?", (data['studio_id'],))
                 s_row = cur.fetchone()
                 if s_row: data['studio_name'] = s_row['name']
@@ -205,6 +734,8 @@ class StashDatabase:
 
     def get_all_groups(self) -> List[Dict]:
         """Récupère tous les groupes pour une liste de sélection"""
+        if not self.schema.has_table('groups'):
+            return []
         try:
             conn = self._get_connection()
             cur = conn.cursor()
@@ -214,247 +745,286 @@ class StashDatabase:
             print(f"Erreur get_all_groups: {e}")
             return []
 
+    # ------------------------------------------------------------------
+    # Écriture d'un performer
+    # ------------------------------------------------------------------
+    #
+    # Toute la sauvegarde tient dans une transaction sur une connexion
+    # d'écriture courte (BEGIN IMMEDIATE : le verrou d'écriture est pris
+    # d'emblée) avec des requêtes ensemblistes : executemany pour les
+    # aliases, URLs et champs personnalisés, résolution des tags en deux
+    # requêtes (cache nom → id ensuite), et propagation des tags aux
+    # scènes en un seul INSERT ... SELECT.
+
+    _tag_ids_lock = threading.Lock()
+
+    @staticmethod
+    def _split_list(value: Any, pattern: str = r'[,\n\r]+') -> List[str]:
+        if isinstance(value, str):
+            return [v.strip() for v in re.split(pattern, value) if v.strip()]
+        if isinstance(value, (list, tuple, set)):
+            return [str(v).strip() for v in value if str(v).strip()]
+        return [str(value).strip()] if value is not None and str(value).strip() else []
+
+    @staticmethod
+    def _dedupe(items: List[str], key=lambda x: x) -> List[str]:
+        out: List[str] = []
+        seen = set()
+        for it in items:
+            k = key(it)
+            if k in seen:
+                continue
+            seen.add(k)
+            out.append(it)
+        return out
+
+    def _tag_cache(self) -> Dict[str, int]:
+        cache = getattr(self, "_tag_ids", None)
+        if cache is None:
+            cache = self._tag_ids = {}
+        return cache
+
+    def clear_tag_cache(self):
+        """Oublie le cache nom de tag → id (tags supprimés/renommés dans Stash)."""
+        with self._tag_ids_lock:
+            self._tag_cache().clear()
+
+    def _resolve_tag_ids(self, cur, names: List[str]) -> Dict[str, int]:
+        """
+        {nom: id} pour ``names``, en créant les tags manquants. Retourne
+        aussi les ids lus en base (le cache n'est complété qu'après COMMIT).
+        Les ids en cache sont revérifiés dans la transaction : un tag
+        supprimé, renommé ou fusionné dans Stash est résolu à nouveau.
+        """
+        with self._tag_ids_lock:
+            cache = self._tag_cache()
+            ids = {n: cache[n] for n in names if n in cache}
+        if ids:
+            current: Dict[int, str] = {}
+            cached_ids = sorted(set(ids.values()))
+            for start in range(0, len(cached_ids), 500):
+                chunk = cached_ids[start:start + 500]
+                cur.execute(
+                    f"SELECT id, name FROM tags WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for row in cur.fetchall():
+                    current[row['id']] = row['name']
+            stale = [n for n, tag_id in ids.items()
+                     if (current.get(tag_id) or "").casefold() != n.casefold()]
+            if stale:
+                with self._tag_ids_lock:
+                    for n in stale:
+                        if cache.get(n) == ids[n]:
+                            del cache[n]
+                for n in stale:
+                    del ids[n]
+        missing = [n for n in names if n not in ids]
+        if missing:
+            cur.executemany(
+                "INSERT INTO tags (name) VALUES (?) ON CONFLICT DO NOTHING",
+                [(n,) for n in missing],
+            )
+            found: Dict[str, int] = {}
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                cur.execute(
+                    f"SELECT id, name FROM tags WHERE name IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for row in cur.fetchall():
+                    found[row['name']] = row['id']
+                    found.setdefault(row['name'].casefold(), row['id'])
+            for n in missing:
+                tag_id = found.get(n, found.get(n.casefold()))
+                if tag_id is not None:
+                    ids[n] = tag_id
+        return ids
+
     def save_performer_metadata(self, performer_id: str, updates: Dict):
         """Met à jour le performer dans Stash"""
         if not os.path.exists(self.db_path):
             return
-            
+
         try:
-            conn = self._get_connection()
-            cur = conn.cursor()
-            
-            # 1. Mise à jour de la table performers
-            # On ne met à jour que ce qui est fourni
-            fields_to_update = []
-            values = []
+            schema = self.schema
+            features = schema.features()
+            new_tag_ids: Dict[str, int] = {}
+            skipped: List[str] = []
+            with self._write_connection() as conn:
+                cur = conn.cursor()
+
+                # 1. Mise à jour de la table performers
+                # On ne met à jour que ce qui est fourni
+                fields_to_update = []
+                values = []
             
-            # Mapping UI keys -> DB columns
-            mapping = {
-                'name': 'name',
-                'birthdate': 'birthdate',
-                'birthplace': 'disambiguation', # Faute de mieux si birthplace absent
-                'ethnicity': 'ethnicity',
-                'country': 'country',
-                'eye_color': 'eye_color',
-                'hair_color': 'hair_color',
-                'height': 'height',
-                'weight': 'weight',
-                'measurements': 'measurements',
-                'fake_tits': 'fake_tits',
-                'details': 'details',
-                'deathdate': 'death_date',
-                'tattoos': 'tattoos',
-                'piercings': 'piercings',
-                'career_start': 'career_length'
-            }
+                # Mapping UI keys -> DB columns
+                mapping = {
+                    'name': 'name',
+                    'birthdate': 'birthdate',
+                    'birthplace': 'disambiguation', # Faute de mieux si birthplace absent
+                    'ethnicity': 'ethnicity',
+                    'country': 'country',
+                    'eye_color': 'eye_color',
+                    'hair_color': 'hair_color',
+                    'height': 'height',
+                    'weight': 'weight',
+                    'measurements': 'measurements',
+                    'fake_tits': 'fake_tits',
+                    'details': 'details',
+                    'deathdate': 'death_date',
+                    'tattoos': 'tattoos',
+                    'piercings': 'piercings',
+                    'career_start': 'career_length'
+                }
             
-            for ui_key, db_col in mapping.items():
-                if ui_key in updates:
-                    fields_to_update.append(f"{db_col}=?")
-                    values.append(updates[ui_key])
+                for ui_key, db_col in mapping.items():
+                    if ui_key in updates:
+                        if not schema.has_column('performers', db_col):
+                            skipped.append(ui_key)
+                            continue
+                        fields_to_update.append(f"{db_col}=?")
+                        values.append(updates[ui_key])
             
-            if fields_to_update:
-                query = f"UPDATE performers SET {', '.join(fields_to_update)} WHERE id=?"
-                values.append(performer_id)
-                cur.execute(query, tuple(values))
+                if fields_to_update:
+                    query = f"UPDATE performers SET {', '.join(fields_to_update)} WHERE id=?"
+                    values.append(performer_id)
+                    cur.execute(query, tuple(values))
             
-            # 2. Mise à jour des aliases
-            if 'aliases' in updates:
-                aliases_in = updates['aliases']
-                if isinstance(aliases_in, str):
-                    new_aliases = [a.strip() for a in re.split(r'[,\n\r]+', aliases_in) if a.strip()]
-                elif isinstance(aliases_in, list):
-                    new_aliases = [str(a).strip() for a in aliases_in if str(a).strip()]
-                else:
-                    new_aliases = [str(aliases_in).strip()] if str(aliases_in).strip() else []
-
+                # 2. Mise à jour des aliases
                 # Fusion automatique: conserve les aliases existants + ajoute les nouveaux (sans doublons)
-                existing_aliases: List[str] = []
-                try:
+                if 'aliases' in updates and not features['performer_aliases']:
+                    skipped.append('aliases')
+                elif 'aliases' in updates:
+                    new_aliases = self._split_list(updates['aliases'])
                     cur.execute("SELECT alias FROM performer_aliases WHERE performer_id=?", (performer_id,))
-                    existing_aliases = [r['alias'] for r in cur.fetchall() if r.get('alias')]
-                except Exception:
-                    existing_aliases = []
-
-                def dedupe_keep_order(items: List[str]) -> List[str]:
-                    out: List[str] = []
-                    seen = set()
-                    for it in items:
-                        it = str(it).strip()
-                        if not it:
-                            continue
-                        k = it.casefold()
-                        if k in seen:
-                            continue
-                        seen.add(k)
-                        out.append(it)
-                    return out
-
-                merged_aliases = dedupe_keep_order(existing_aliases + new_aliases)
+                    existing_aliases = [r['alias'] for r in cur.fetchall() if r['alias']]
+                    merged_aliases = self._dedupe(existing_aliases + new_aliases, key=str.casefold)
 
-                cur.execute("DELETE FROM performer_aliases WHERE performer_id=?", (performer_id,))
-                for alias in merged_aliases:
-                    cur.execute(
+                    cur.execute("DELETE FROM performer_aliases WHERE performer_id=?", (performer_id,))
+                    cur.executemany(
                         "INSERT INTO performer_aliases (performer_id, alias) VALUES (?, ?)",
-                        (performer_id, alias),
+                        [(performer_id, alias) for alias in merged_aliases],
                     )
 
-            # 2bis. Mise à jour des tags
-            if 'tags' in updates:
-                # 1. Supprimer les anciens liens
-                cur.execute("DELETE FROM performers_tags WHERE performer_id=?", (performer_id,))
-                
-                tags_raw = updates['tags']
-                if isinstance(tags_raw, str):
-                    tag_list = [t.strip() for t in re.split(r'[,\n\r]+', tags_raw) if t.strip()]
-                else:
-                    tag_list = tags_raw
-                
-                for tag_name in tag_list:
-                    # 2. Trouver ou créer le tag
-                    cur.execute("SELECT id FROM tags WHERE name=?", (tag_name,))
-                    tag_row = cur.fetchone()
-                    if tag_row:
-                        tag_id = tag_row['id']
-                    else:
-                        cur.execute("INSERT INTO tags (name) VALUES (?)", (tag_name,))
-                        tag_id = cur.lastrowid
-                    
-                    # 3. Lier le performer au tag
-                    cur.execute("INSERT INTO performers_tags (performer_id, tag_id) VALUES (?, ?)", (performer_id, tag_id))
+                # 2bis. Mise à jour des tags (remplacement des liens)
+                tag_ids: List[int] = []
+                if 'tags' in updates and not features['performer_tags']:
+                    skipped.append('tags')
+                elif 'tags' in updates:
+                    tag_list = self._dedupe(self._split_list(updates['tags']))
+                    new_tag_ids = self._resolve_tag_ids(cur, tag_list)
+                    tag_ids = self._dedupe([new_tag_ids[n] for n in tag_list if n in new_tag_ids])
+                    cur.execute("DELETE FROM performers_tags WHERE performer_id=?", (performer_id,))
+                    cur.executemany(
+                        "INSERT INTO performers_tags (performer_id, tag_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
+                        [(performer_id, tag_id) for tag_id in tag_ids],
+                    )
             
-            # 3. Mise à jour des champs personnalisés (Custom Fields)
-            # On identifie les champs qui doivent aller dans performer_custom_fields
-            custom_map = {
-                'birthplace': 'Birthplace',
-                'awards': 'Awards',
-                'trivia': 'Trivia',
-                'trivia_fr': 'Trivia FR',
-                'tattoos_fr': 'Tattoos FR',
-                'piercings_fr': 'Piercings FR',
-                'website': 'Official Website',
-                'instagram': 'Instagram',
-                'onlyfans': 'OnlyFans',
-                'tiktok': 'TikTok',
-                'youtube': 'YouTube',
-                'twitch': 'Twitch',
-                'imdb': 'IMDb',
-                'twitter': 'Twitter',
-                'facebook': 'Facebook'
-            }
-            # Note: Si l'utilisateur veut DOB en custom field, on peut l'ajouter ici
+                # 3. Mise à jour des champs personnalisés (Custom Fields)
+                # On identifie les champs qui doivent aller dans performer_custom_fields
+                custom_map = {
+                    'birthplace': 'Birthplace',
+                    'awards': 'Awards',
+                    'trivia': 'Trivia',
+                    'trivia_fr': 'Trivia FR',
+                    'tattoos_fr': 'Tattoos FR',
+                    'piercings_fr': 'Piercings FR',
+                    'website': 'Official Website',
+                    'instagram': 'Instagram',
+                    'onlyfans': 'OnlyFans',
+                    'tiktok': 'TikTok',
+                    'youtube': 'YouTube',
+                    'twitch': 'Twitch',
+                    'imdb': 'IMDb',
+                    'twitter': 'Twitter',
+                    'facebook': 'Facebook'
+                }
+                # Note: Si l'utilisateur veut DOB en custom field, on peut l'ajouter ici
             
-            for ui_key, custom_name in custom_map.items():
-                if ui_key in updates:
-                    val = str(updates[ui_key]).strip()
+                custom = [(custom_name, str(updates[ui_key]).strip())
+                          for ui_key, custom_name in custom_map.items() if ui_key in updates]
+                if custom and not features['custom_fields']:
+                    skipped.extend(name for name, _ in custom)
+                elif custom:
                     # Delete existing and re-insert
-                    cur.execute("DELETE FROM performer_custom_fields WHERE performer_id=? AND field=?", (performer_id, custom_name))
-                    if val:
-                        cur.execute("INSERT INTO performer_custom_fields (performer_id, field, value) VALUES (?, ?, ?)", 
-                                   (performer_id, custom_name, val))
-
-            # 4. Mise à jour des URLs (Discovery)
-            if 'discovered_urls' in updates:
-                cur.execute("DELETE FROM performer_urls WHERE performer_id=?", (performer_id,))
-                urls = updates['discovered_urls']
-                if isinstance(urls, str):
-                    urls = [u.strip() for u in re.split(r'[,\n\r\s]+', urls) if u.strip()]
-                # Dédupe en conservant l'ordre, et attribue une position (colonne NOT NULL dans Stash)
-                cleaned_urls = []
-                seen = set()
-                for u in urls or []:
-                    u = str(u).strip()
-                    if not u or u in seen:
-                        continue
-                    seen.add(u)
-                    cleaned_urls.append(u)
-
-                for pos, url in enumerate(cleaned_urls):
-                    cur.execute(
+                    cur.executemany(
+                        "DELETE FROM performer_custom_fields WHERE performer_id=? AND field=?",
+                        [(performer_id, name) for name, _ in custom],
+                    )
+                    cur.executemany(
+                        "INSERT INTO performer_custom_fields (performer_id, field, value) VALUES (?, ?, ?)",
+                        [(performer_id, name, val) for name, val in custom if val],
+                    )
+
+                # 4. Mise à jour des URLs (Discovery)
+                if 'discovered_urls' in updates and not features['performer_urls']:
+                    skipped.append('discovered_urls')
+                elif 'discovered_urls' in updates:
+                    # Dédupe en conservant l'ordre, et attribue une position (colonne NOT NULL dans Stash)
+                    cleaned_urls = self._dedupe(self._split_list(updates['discovered_urls'], r'[,\n\r\s]+'))
+                    cur.execute("DELETE FROM performer_urls WHERE performer_id=?", (performer_id,))
+                    cur.executemany(
                         "INSERT INTO performer_urls (performer_id, position, url) VALUES (?, ?, ?)",
-                        (performer_id, pos, url),
+                        [(performer_id, pos, url) for pos, url in enumerate(cleaned_urls)],
                     )
 
-            # 5. Propagation des Tags vers les Scènes (Optionnel mais demandé)
-            if 'tags' in updates:
-                self._propagate_tags_to_scenes(cur, performer_id, tag_list if 'tag_list' in locals() else [])
+                # 5. Propagation des Tags vers les Scènes (Optionnel mais demandé)
+                # (un échec n'annule pas la sauvegarde : l'instruction fautive seule est défaite)
+                if tag_ids and schema.can_propagate_scene_tags:
+                    try:
+                        self._propagate_tags_to_scenes(cur, performer_id, tag_ids)
+                    except sqlite3.Error as e:
+                        print(f"[DB] Propagation des tags aux scènes impossible : {e}")
 
-            conn.commit()
+            if skipped:
+                print(f"[DB] Champs ignorés (absents du schéma Stash) : {', '.join(skipped)}")
+            if new_tag_ids:
+                with self._tag_ids_lock:
+                    self._tag_cache().update(new_tag_ids)
+            if 'name' in updates or 'aliases' in updates:
+                from services.name_index import get_name_index
+                index = get_name_index()
+                if index is not None:
+                    index.invalidate(self.db_path)
             return True
         except Exception as e:
             print(f"Erreur lors de la sauvegarde DB: {e}")
-            try:
-                self._get_connection().rollback()
-            except Exception:
-                pass
-            self._close_conn()
             return False
 
-    def _propagate_tags_to_scenes(self, cur, performer_id: str, tag_names: List[str]):
-        """Propage les tags d'un performer vers toutes ses scènes"""
-        if not tag_names:
-            return
-
-        def table_exists(table_name: str) -> bool:
-            try:
-                row = cur.execute(
-                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name=? LIMIT 1",
-                    (table_name,),
-                ).fetchone()
-                return bool(row)
-            except Exception:
-                return False
-
+    def _propagate_tags_to_scenes(self, cur, performer_id: str, tag_ids: List[int]):
+        """
+        Propage les tags d'un performer vers toutes ses scènes : un seul
+        INSERT ... SELECT (scènes du performer × table temporaire des tags),
+        les liens déjà présents étant ignorés.
+        """
         # Certaines variantes de schéma Stash n'ont pas ces tables.
-        if not table_exists("scenes_tags"):
+        if not tag_ids or not self.schema.can_propagate_scene_tags:
             return
+        link_table = self.schema.scene_performers_table
 
-        link_table = None
-        if table_exists("scenes_performers"):
-            link_table = "scenes_performers"
-        elif table_exists("performers_scenes"):
-            link_table = "performers_scenes"
-        else:
-            return
-            
-        # 1. Récupérer les IDs des tags
-        tag_ids = []
-        for name in tag_names:
-            cur.execute("SELECT id FROM tags WHERE name=?", (name,))
-            row = cur.fetchone()
-            if row:
-                tag_ids.append(row['id'])
-        
-        if not tag_ids:
-            return
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS temp_tags (tag_id INTEGER PRIMARY KEY)")
+        cur.execute("DELETE FROM temp.temp_tags")
+        cur.executemany("INSERT OR IGNORE INTO temp.temp_tags (tag_id) VALUES (?)", [(t,) for t in tag_ids])
+        cur.execute(
+            f"""
+            INSERT INTO scenes_tags (scene_id, tag_id)
+            SELECT l.scene_id, t.tag_id
+            FROM (SELECT DISTINCT scene_id FROM {link_table} WHERE performer_id = ?) l
+            CROSS JOIN temp.temp_tags t
+            WHERE NOT EXISTS (
+                  SELECT 1 FROM scenes_tags st
+                  WHERE st.scene_id = l.scene_id AND st.tag_id = t.tag_id
+              )
+            ON CONFLICT DO NOTHING
+            """,
+            (performer_id,),
+        )
+        cur.execute("DELETE FROM temp.temp_tags")
 
-        # 2. Trouver toutes les scènes du performer
-        try:
-            cur.execute(f"SELECT scene_id FROM {link_table} WHERE performer_id=?", (performer_id,))
-            scene_ids = [r['scene_id'] for r in cur.fetchall()]
-        except sqlite3.OperationalError:
-            return
-        except Exception:
-            return
-        
-        for scene_id in scene_ids:
-            for tag_id in tag_ids:
-                # 3. Vérifier si le lien existe déjà pour éviter les doublons
-                try:
-                    cur.execute("SELECT 1 FROM scenes_tags WHERE scene_id=? AND tag_id=?", (scene_id, tag_id))
-                    if not cur.fetchone():
-                        cur.execute("INSERT INTO scenes_tags (scene_id, tag_id) VALUES (?, ?)", (scene_id, tag_id))
-                except sqlite3.OperationalError:
-                    return
-                except Exception:
-                    return
     def save_group_metadata(self, group_id: str, updates: Dict):
         """Met à jour un groupe dans Stash"""
         if not os.path.exists(self.db_path): return False
         try:
-            conn = self._get_connection()
-            cur = conn.cursor()
-            
             fields = []
             values = []
             mapping = {
@@ -467,20 +1037,18 @@ class StashDatabase:
             }
             
             for k, v in mapping.items():
-                if k in updates:
+                if k in updates and self.schema.has_column('groups', v):
                     fields.append(f"{v}=?")
                     values.append(updates[k])
             
             if fields:
                 query = f"UPDATE groups SET {', '.join(fields)} WHERE id=?"
                 values.append(group_id)
-                cur.execute(query, tuple(values))
-            
-            conn.commit()
+                with self._write_connection() as conn:
+                    conn.execute(query, tuple(values))
             return True
         except Exception as e:
             print(f"Erreur save_group_metadata: {e}")
-            self._close_conn()
             return False
 
     def get_scene_metadata(self, scene_id: str) -> Optional[Dict]:
@@ -495,32 +1063,20 @@ class StashDatabase:
                 return None
             
             data = dict(row)
+            schema = self.schema
             
             # Tags
-            cur.execute("""
-                SELECT t.name FROM tags t
-                JOIN scenes_tags st ON st.tag_id = t.id
-                WHERE st.scene_id = ?
-            """, (scene_id,))
-            data['tags'] = [r['name'] for r in cur.fetchall()]
+            data['tags'] = []
+            if schema.has_table('scenes_tags'):
+                cur.execute("""
+                    SELECT t.name FROM tags t
+                    JOIN scenes_tags st ON st.tag_id = t.id
+                    WHERE st.scene_id = ?
+                """, (scene_id,))
+                data['tags'] = [r['name'] for r in cur.fetchall()]
             
             # Performers
-            link_table = None
-            try:
-                row = cur.execute(
-                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='scenes_performers' LIMIT 1"
-                ).fetchone()
-                if row:
-                    link_table = "scenes_performers"
-                else:
-                    row2 = cur.execute(
-                        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='performers_scenes' LIMIT 1"
-                    ).fetchone()
-                    if row2:
-                        link_table = "performers_scenes"
-            except Exception:
-                link_table = None
-
+            link_table = schema.scene_performers_table
             if link_table:
                 cur.execute(
                     f"""
@@ -535,7 +1091,7 @@ class StashDatabase:
                 data['performers'] = []
             
             # Studio
-            if data.get('studio_id'):
+            if data.get('studio_id') and schema.has_table('studios'):
                 cur.execute("SELECT name FROM studios WHERE id=?", (data['studio_id'],))
                 s_row = cur.fetchone()
                 if s_row: data['studio'] = s_row['name']
@@ -549,9 +1105,6 @@ class StashDatabase:
         """Met à jour une scène dans Stash"""
         if not os.path.exists(self.db_path): return False
         try:
-            conn = self._get_connection()
-            cur = conn.cursor()
-            
             fields = []
             values = []
             mapping = {
@@ -563,26 +1116,27 @@ class StashDatabase:
             }
             
             for k, v in mapping.items():
-                if k in updates:
+                if k in updates and self.schema.has_column('scenes', v):
                     fields.append(f"{v}=?")
                     values.append(updates[k])
             
             if fields:
                 query = f"UPDATE scenes SET {', '.join(fields)} WHERE id=?"
                 values.append(scene_id)
-                cur.execute(query, tuple(values))
+                with self._write_connection() as conn:
+                    conn.execute(query, tuple(values))
             
             # Tags & Performers (sync complexe si besoin, mais on reste simple ici pour le moment)
             
-            conn.commit()
             return True
         except Exception as e:
             print(f"Erreur save_scene_metadata: {e}")
-            self._close_conn()
             return False
 
     def get_scenes_for_group(self, group_id: str) -> List[Dict]:
         """Récupère les scènes rattachées à un groupe"""
+        if not self.schema.has_table('groups_scenes'):
+            return []
         try:
             conn = self._get_connection()
             cur = conn.cursor()
@@ -600,17 +1154,26 @@ class StashDatabase:
 
     def add_scene_url(self, scene_id: str, url: str) -> bool:
         """Ajoute une URL à une scène si elle n'existe pas déjà"""
+        if not self.schema.has_table('scene_urls'):
+            return False
         try:
-            conn = self._get_connection()
-            cur = conn.cursor()
-            
-            # Vérifier si l'URL existe déjà
-            cur.execute("SELECT 1 FROM scene_urls WHERE scene_id=? AND url=?", (scene_id, url))
-            if cur.fetchone():
-                return True
-                
-            cur.execute("INSERT INTO scene_urls (scene_id, url) VALUES (?, ?)", (scene_id, url))
-            conn.commit()
+            with self._write_connection() as conn:
+                cur = conn.cursor()
+
+                # Vérifier si l'URL existe déjà
+                cur.execute("SELECT 1 FROM scene_urls WHERE scene_id=? AND url=?", (scene_id, url))
+                if cur.fetchone():
+                    return True
+
+                if self.schema.has_column('scene_urls', 'position'):
+                    # Colonne NOT NULL dans Stash récent : ajout en fin de liste
+                    cur.execute(
+                        "INSERT INTO scene_urls (scene_id, position, url) "
+                        "SELECT ?, COALESCE(MAX(position) + 1, 0), ? FROM scene_urls WHERE scene_id=?",
+                        (scene_id, url, scene_id),
+                    )
+                else:
+                    cur.execute("INSERT INTO scene_urls (scene_id, url) VALUES (?, ?)", (scene_id, url))
             return True
         except Exception as e:
             print(f"Erreur add_scene_url: {e}")
@@ -0,0 +1,381 @@
+"""
+fallback_fetcher.py - Fallback curl groupé pour les pages bloquées (403)
+=========================================================================
+
+IAFD, Babepedia... refusent souvent ``requests`` (Cloudflare) mais laissent
+passer ``curl``. Lancer un processus ``curl`` par URL bloquée coûte une
+création de processus et une poignée de main TLS à froid à chaque fois.
+
+Ici, les demandes de tous les threads sont regroupées pendant
+``batch_window_ms`` (ou jusqu'à ``max_batch`` URLs) puis confiées à UN seul
+processus ``curl --parallel`` : les transferts vers un même hôte partagent
+leurs connexions, et le lot entier a une échéance (``--max-time`` par
+transfert, plus un timeout global du processus). La latence de chaque
+URL (``time_total`` de curl) est relevée et résumée par ``format_stats()``.
+
+Seules les réponses finales 2xx/3xx sont acceptées : une page de challenge
+Cloudflare n'est plus prise pour la fiche.
+
+Configuration (section ``fallback_fetcher`` de config.json) :
+    enabled         : False pour revenir à un curl par URL
+    batch_window_ms : attente maximale pour grouper les demandes
+    max_batch       : URLs maximum par processus curl
+    parallel        : transferts simultanés dans un processus (--parallel-max)
+    max_processes   : processus curl simultanés
+    connect_timeout : timeout de connexion par transfert (secondes)
+    max_time        : durée maximale d'un transfert (secondes)
+
+Usage :
+    from services.fallback_fetcher import get_fallback_fetcher
+    fetcher = get_fallback_fetcher()
+    html = fetcher.fetch(url)                   # None si échec
+    pages = fetcher.fetch_many([url1, url2])    # {url: html ou None}
+    print(fetcher.format_stats())
+"""
+
+import math
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+DEFAULT_BATCH_WINDOW_MS = 50
+DEFAULT_MAX_BATCH       = 16
+DEFAULT_PARALLEL        = 6
+DEFAULT_MAX_PROCESSES   = 2
+DEFAULT_CONNECT_TIMEOUT = 15
+DEFAULT_MAX_TIME        = 30
+
+# Marge ajoutée au timeout global d'un processus curl (secondes)
+PROCESS_GRACE = 5
+
+# --parallel : curl >= 7.66
+PARALLEL_MIN_VERSION = (7, 66)
+
+WRITE_OUT = "%{filename_effective}\\t%{http_code}\\t%{time_total}\\n"
+
+
+def _curl_version(binary: str) -> tuple:
+    try:
+        out = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=5).stdout
+        return tuple(int(x) for x in out.split()[1].split(".")[:2])
+    except Exception:
+        return (0, 0)
+
+
+def _quote(value: str) -> str:
+    """Chaîne entre guillemets pour un fichier ``--config`` de curl."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+# ---------------------------------------------------------------------------
+# Résultat / statistiques
+# ---------------------------------------------------------------------------
+
+@dataclass
+class FallbackResult:
+    """Résultat d'un transfert curl."""
+    url: str
+    status: int = 0
+    body: Optional[str] = None
+    elapsed: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.body is not None
+
+
+class FallbackStats:
+    """Compteurs process-wide du fallback."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.urls = 0
+            self.ok = 0
+            self.processes = 0
+            self.latency = 0.0
+            self.max_latency = 0.0
+
+    def record_batch(self, results: List[FallbackResult]):
+        with self._lock:
+            self.processes += 1
+            for r in results:
+                self.urls += 1
+                self.ok += 1 if r.ok else 0
+                self.latency += r.elapsed
+                self.max_latency = max(self.max_latency, r.elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "urls": self.urls,
+                "ok": self.ok,
+                "processes": self.processes,
+                "avg_latency": round(self.latency / self.urls, 3) if self.urls else 0.0,
+                "max_latency": round(self.max_latency, 3),
+            }
+
+
+# ---------------------------------------------------------------------------
+# Fetcher
+# ---------------------------------------------------------------------------
+
+class FallbackFetcher:
+    """
+    Regroupe les demandes de fallback en lots exécutés par ``curl --parallel``.
+
+    Paramètres
+    ----------
+    batch_window_ms : attente maximale pour compléter un lot
+    max_batch       : URLs maximum par processus
+    parallel        : transferts simultanés par processus
+    max_processes   : processus curl simultanés
+    connect_timeout : timeout de connexion par transfert (s)
+    max_time        : durée maximale d'un transfert (s)
+    curl            : exécutable curl
+    """
+
+    def __init__(
+        self,
+        batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        parallel: int = DEFAULT_PARALLEL,
+        max_processes: int = DEFAULT_MAX_PROCESSES,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        max_time: float = DEFAULT_MAX_TIME,
+        curl: str = "curl",
+    ):
+        self.batch_window = max(float(batch_window_ms), 0.0) / 1000.0
+        self.max_batch = max(int(max_batch), 1)
+        self.parallel = max(int(parallel), 1)
+        self.max_processes = max(int(max_processes), 1)
+        self.connect_timeout = float(connect_timeout)
+        self.max_time = float(max_time)
+        self.curl = shutil.which(curl) or curl
+        self.supports_parallel = _curl_version(self.curl) >= PARALLEL_MIN_VERSION
+        self.stats = FallbackStats()
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None) -> "FallbackFetcher":
+        """Construit le fetcher depuis la section ``fallback_fetcher`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            batch_window_ms=float(cfg.get("batch_window_ms", DEFAULT_BATCH_WINDOW_MS)),
+            max_batch=int(cfg.get("max_batch", DEFAULT_MAX_BATCH)),
+            parallel=int(cfg.get("parallel", DEFAULT_PARALLEL)),
+            max_processes=int(cfg.get("max_processes", DEFAULT_MAX_PROCESSES)),
+            connect_timeout=float(cfg.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT)),
+            max_time=float(cfg.get("max_time", DEFAULT_MAX_TIME)),
+        )
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def submit(self, url: str) -> "Future[FallbackResult]":
+        """Ajoute ``url`` au prochain lot ; le Future donne le FallbackResult."""
+        self._ensure_dispatcher()
+        fut: "Future[FallbackResult]" = Future()
+        self._queue.put((url, fut))
+        return fut
+
+    def fetch(self, url: str) -> Optional[str]:
+        """HTML de ``url`` via curl, ou None."""
+        return self.submit(url).result().body
+
+    def fetch_many(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """{url: HTML ou None} ; les URLs partent dans le même lot."""
+        futures = {u: self.submit(u) for u in dict.fromkeys(urls)}
+        return {u: f.result().body for u, f in futures.items()}
+
+    def format_stats(self) -> str:
+        s = self.stats.snapshot()
+        return (f"{s['ok']}/{s['urls']} pages via curl en {s['processes']} processus · "
+                f"latence moy {s['avg_latency'] * 1000:.0f} ms, max {s['max_latency'] * 1000:.0f} ms")
+
+    def close(self):
+        """Arrête le dispatcher (les lots en cours se terminent)."""
+        with self._lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+            pool, self._pool = self._pool, None
+        if dispatcher is not None:
+            self._queue.put(None)
+            dispatcher.join(timeout=1)
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    # ------------------------------------------------------------------
+    # Regroupement
+    # ------------------------------------------------------------------
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is not None:
+            return
+        with self._lock:
+            if self._dispatcher is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_processes,
+                                                thread_name_prefix="curl-batch")
+                self._dispatcher = threading.Thread(target=self._dispatch, name="curl-dispatch",
+                                                    daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            pool = self._pool
+            if pool is None:
+                self._complete(batch, {})
+                return
+            pool.submit(self._run, batch)
+
+    def _run(self, batch: List[tuple]):
+        urls = list(dict.fromkeys(url for url, _ in batch))
+        try:
+            results = self._run_curl(urls)
+        except Exception as e:
+            results = {u: FallbackResult(u, error=f"{type(e).__name__}: {e}") for u in urls}
+        self._complete(batch, results)
+
+    @staticmethod
+    def _complete(batch: List[tuple], results: Dict[str, FallbackResult]):
+        for url, fut in batch:
+            if not fut.done():
+                fut.set_result(results.get(url) or FallbackResult(url, error="non traité"))
+
+    # ------------------------------------------------------------------
+    # Exécution d'un lot
+    # ------------------------------------------------------------------
+
+    def _run_curl(self, urls: List[str]) -> Dict[str, FallbackResult]:
+        """Télécharge ``urls`` avec un seul processus curl."""
+        tmpdir = tempfile.mkdtemp(prefix="stashmaster-curl-")
+        try:
+            outputs = {os.path.join(tmpdir, f"{i}.html"): url for i, url in enumerate(urls)}
+            config = "".join(f"url = {_quote(u)}\noutput = {_quote(p)}\n" for p, u in outputs.items())
+            cmd = [
+                self.curl, "-s", "-L",
+                "-A", USER_AGENT,
+                "-H", "Accept-Language: en-US,en;q=0.9",
+                "--connect-timeout", f"{self.connect_timeout:g}",
+                "--max-time", f"{self.max_time:g}",
+                "-w", WRITE_OUT,
+                "--config", "-",
+            ]
+            waves = 1
+            if self.supports_parallel and len(urls) > 1:
+                cmd += ["--parallel", "--parallel-max", str(self.parallel)]
+                waves = math.ceil(len(urls) / self.parallel)
+            elif len(urls) > 1:
+                waves = len(urls)
+            timeout = waves * (self.max_time + self.connect_timeout) + PROCESS_GRACE
+
+            start = time.perf_counter()
+            try:
+                proc = subprocess.run(cmd, input=config.encode("utf-8"), capture_output=True,
+                                      timeout=timeout)
+                stdout = proc.stdout
+                error = ""
+            except subprocess.TimeoutExpired as e:
+                stdout = e.stdout or b""
+                error = f"délai global dépassé ({timeout:.0f} s)"
+            wall = time.perf_counter() - start
+
+            results = {u: FallbackResult(u, elapsed=wall, error=error or "aucune réponse")
+                       for u in urls}
+            for line in stdout.decode("utf-8", errors="ignore").splitlines():
+                parts = line.split("\t")
+                if len(parts) != 3 or parts[0] not in outputs:
+                    continue
+                url = outputs[parts[0]]
+                try:
+                    status, elapsed = int(parts[1]), float(parts[2])
+                except ValueError:
+                    continue
+                result = FallbackResult(url, status=status, elapsed=elapsed)
+                if 200 <= status < 400:
+                    try:
+                        with open(parts[0], "rb") as fh:
+                            body = fh.read().decode("utf-8", errors="ignore")
+                        result.body = body or None
+                    except OSError:
+                        pass
+                if result.body is None:
+                    result.error = f"HTTP {status}" if status else "échec de connexion"
+                results[url] = result
+
+            batch = list(results.values())
+            self.stats.record_batch(batch)
+            for r in batch:
+                state = f"HTTP {r.status}" if r.ok else f"ÉCHEC ({r.error})"
+                print(f"[FALLBACK] {state} {r.elapsed * 1000:.0f} ms : {r.url}")
+            if len(urls) > 1:
+                print(f"[FALLBACK] Lot de {len(urls)} URL(s) en {wall:.1f} s (1 processus curl)")
+            return results
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_fetcher: Optional[FallbackFetcher] = None
+_fetcher_loaded = False
+_fetcher_lock = threading.Lock()
+
+
+def get_fallback_fetcher() -> Optional[FallbackFetcher]:
+    """Fetcher partagé, ou None si désactivé dans config.json."""
+    global _fetcher, _fetcher_loaded
+    if not _fetcher_loaded:
+        with _fetcher_lock:
+            if not _fetcher_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("fallback_fetcher", {}) or {}
+                except Exception:
+                    cfg = {}
+                _fetcher = FallbackFetcher.from_config(cfg) if cfg.get("enabled", True) else None
+                _fetcher_loaded = True
+    return _fetcher
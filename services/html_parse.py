@@ -0,0 +1,213 @@
+"""
+html_parse.py - Couche de parsing HTML pour StashMaster V2
+==========================================================
+
+Point unique de construction des arbres BeautifulSoup (scrapers,
+SourceFinder, InterviewExtractor) :
+
+- Backend sélectionnable : ``lxml`` (C, plusieurs fois plus rapide) par
+  défaut, ``html.parser`` en repli s'il n'est pas installé, ou forcé par
+  source dans config.json.
+- Régions : un scraper déclare les blocs de la page qu'il lit réellement
+  (``PARSE_REGIONS``). Seuls ces sous-arbres sont construits
+  (``SoupStrainer``) : le reste de la page (menus, galeries, scripts,
+  commentaires) est ignoré dès la tokenisation.
+
+Syntaxe d'une région (sélecteur CSS simple, sans combinateur) :
+    "h1"                      balise
+    "div#awards"              balise + id
+    "li.hide-on-edit"         balise + classe(s)
+    ".social-links"           classe, toute balise
+    "a[href]"                 attribut présent
+    "table[class*=infobox]"   attribut contenant une sous-chaîne
+
+Un élément retenu est conservé avec tout son contenu ; les éléments
+imbriqués dans un élément non retenu restent candidats.
+
+Configuration (section ``html_parser`` de config.json) :
+    backend     : "lxml" (défaut) ou "html.parser"
+    use_regions : False pour toujours construire la page entière
+    per_source  : {"IAFD": "html.parser", ...} backend par source
+
+Usage :
+    from services.html_parse import parse_html
+    soup = parse_html(html)                                   # page entière
+    soup = parse_html(html, regions=["h1", "div#awards"])     # sous-arbres
+"""
+
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_BACKEND  = "lxml"
+FALLBACK_BACKEND = "html.parser"
+
+# Backends acceptant ``parse_only`` (html5lib construit toujours tout l'arbre)
+STRAINER_BACKENDS = ("lxml", "html.parser")
+
+_SELECTOR_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][a-zA-Z0-9]*)?"
+    r"(?P<rest>(?:[#.][\w-]+|\[[\w-]+(?:\*?=[^\]]+)?\])*)$"
+)
+_PART_RE = re.compile(r"#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:(\*?=)([^\]]+))?\]")
+
+_available: Dict[str, bool] = {}
+
+
+def backend_available(name: str) -> bool:
+    """True si le backend BS4 ``name`` est utilisable dans cet environnement."""
+    if name not in _available:
+        if name == FALLBACK_BACKEND:
+            _available[name] = True
+        else:
+            try:
+                __import__({"lxml": "lxml.etree", "html5lib": "html5lib"}.get(name, name))
+                _available[name] = True
+            except ImportError:
+                _available[name] = False
+    return _available[name]
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Backend effectif : ``name`` (ou celui de config.json) s'il est installé, sinon html.parser."""
+    name = name or get_parse_settings().backend
+    return name if backend_available(name) else FALLBACK_BACKEND
+
+
+# ---------------------------------------------------------------------------
+# Régions
+# ---------------------------------------------------------------------------
+
+def _attr_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(value)
+    return value or ""
+
+
+def compile_region(selector: str) -> Callable[[str, Dict[str, Any]], bool]:
+    """Compile un sélecteur simple en prédicat ``(nom, attributs) -> bool``."""
+    selector = selector.strip()
+    m = _SELECTOR_RE.match(selector)
+    if not selector or not m:
+        raise ValueError(f"Région invalide : {selector!r}")
+    tag = (m.group("tag") or "").lower()
+    ids: List[str] = []
+    classes: List[str] = []
+    attrs: List[tuple] = []
+    for id_, cls, attr, op, value in _PART_RE.findall(m.group("rest")):
+        if id_:
+            ids.append(id_)
+        elif cls:
+            classes.append(cls)
+        else:
+            attrs.append((attr.lower(), op, value.strip("\"'")))
+
+    def match(name: str, tag_attrs: Dict[str, Any]) -> bool:
+        if tag and name != tag:
+            return False
+        if ids and tag_attrs.get("id") not in ids:
+            return False
+        if classes:
+            present = _attr_text(tag_attrs.get("class")).split()
+            if not all(c in present for c in classes):
+                return False
+        for attr, op, value in attrs:
+            if attr not in tag_attrs:
+                return False
+            if op == "=" and _attr_text(tag_attrs[attr]) != value:
+                return False
+            if op == "*=" and value not in _attr_text(tag_attrs[attr]):
+                return False
+        return True
+
+    return match
+
+
+def region_strainer(regions: Optional[Sequence[str]]) -> Optional[SoupStrainer]:
+    """SoupStrainer retenant les éléments qui correspondent à l'une des régions."""
+    if not regions:
+        return None
+    matchers = [compile_region(r) for r in regions]
+
+    def keep(name, attrs=None) -> bool:
+        if not isinstance(name, str):
+            return False
+        attrs = attrs or {}
+        return any(m(name, attrs) for m in matchers)
+
+    return SoupStrainer(keep)
+
+
+# ---------------------------------------------------------------------------
+# Réglages (config.json)
+# ---------------------------------------------------------------------------
+
+class ParseSettings:
+    """Réglages de la section ``html_parser`` de config.json."""
+
+    def __init__(self, backend: str = DEFAULT_BACKEND, use_regions: bool = True,
+                 per_source: Optional[Dict[str, str]] = None):
+        self.backend = backend or DEFAULT_BACKEND
+        self.use_regions = bool(use_regions)
+        self.per_source = dict(per_source or {})
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None) -> "ParseSettings":
+        cfg = cfg or {}
+        return cls(
+            backend=cfg.get("backend", DEFAULT_BACKEND),
+            use_regions=cfg.get("use_regions", True),
+            per_source=cfg.get("per_source") or {},
+        )
+
+    def backend_for(self, source: str = "", declared: Optional[str] = None) -> str:
+        """Backend d'une source : config.json > valeur déclarée par le scraper > défaut."""
+        return resolve_backend(self.per_source.get(source) or declared or self.backend)
+
+
+_settings: Optional[ParseSettings] = None
+_settings_lock = threading.Lock()
+
+
+def get_parse_settings() -> ParseSettings:
+    """Réglages partagés (lus une fois dans config.json)."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("html_parser", {}) or {}
+                except Exception:
+                    cfg = {}
+                _settings = ParseSettings.from_config(cfg)
+    return _settings
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def parse_html(
+    html: str,
+    backend: Optional[str] = None,
+    regions: Optional[Iterable[str]] = None,
+) -> BeautifulSoup:
+    """
+    Construit l'arbre BeautifulSoup de ``html``.
+
+    backend : backend BS4 (None = config.json, repli html.parser)
+    regions : sélecteurs des sous-arbres à construire (None = page entière)
+    """
+    backend = resolve_backend(backend)
+    strainer = None
+    if regions and backend in STRAINER_BACKENDS and get_parse_settings().use_regions:
+        strainer = region_strainer(list(regions))
+    return BeautifulSoup(html or "", backend, parse_only=strainer)
@@ -0,0 +1,564 @@
+"""
+http_client.py - Client HTTP partagé pour StashMaster V2
+=========================================================
+
+Un seul client par processus, avec une ``requests.Session`` (et son pool de
+connexions keep-alive) par hôte. Tous les chemins de téléchargement
+(scrapers, source_finder, url_validator, url_manager, interview_extractor)
+passent par ce module, ce qui évite de refaire une poignée de main TCP+TLS
+vers iafd.com, freeones, thenude... à chaque requête.
+
+Chaque requête passe aussi par le ``RateLimiter`` partagé (politesse par
+domaine, Retry-After, backoff) : les appelants n'ont plus à faire de
+``time.sleep()`` entre deux requêtes.
+
+Requêtes partagées (« single-flight ») : pour un même performer, une URL est
+souvent sondée par ``URLManager.is_url_reachable``, re-sondée par
+``URLValidator`` puis téléchargée par le scraper. Deux requêtes simultanées
+vers la même URL (telle quelle : ``www.`` et ``/`` final comptent, un
+serveur peut y répondre différemment) avec les mêmes en-têtes n'en font
+qu'une : la seconde attend la réponse de la première et reçoit sa propre
+copie de la réponse ; son timeout ne court qu'une fois la première requête
+sortie du limiteur de débit (Retry-After, backoff). Une sonde (HEAD, ou GET
+``stream=True`` fermé aussitôt) se contente d'un GET de la même URL reçu
+il y a moins de ``coalesce_ttl`` secondes. Les requêtes avec corps,
+paramètres ou en-têtes conditionnels ne sont jamais partagées.
+
+Un domaine disjoncté (``circuit_breaker`` : trop de 429/503, d'erreurs
+réseau ou de timeouts récents) n'est plus contacté : la requête lève
+aussitôt ``CircuitOpenError`` (une ``requests.ConnectionError``).
+
+Configuration (section ``scrapers`` de config.json) :
+    timeout          : timeout par défaut (secondes)
+    user_agent       : User-Agent par défaut
+    pool_connections : nb de pools d'hôtes conservés par session
+    pool_maxsize     : nb de connexions keep-alive conservées par hôte
+    keep_alive       : False pour forcer "Connection: close"
+    coalesce         : False pour désactiver le partage des requêtes
+    coalesce_ttl     : durée (s) pendant laquelle un GET répond aux sondes
+
+Usage :
+    from services.http_client import get_http_client
+    client = get_http_client()
+    resp = client.get("https://www.iafd.com/...", timeout=15)
+    print(client.format_stats())
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from services.circuit_breaker import (
+    FAILURE_STATUSES, CircuitBreaker, CircuitOpenError, get_circuit_breaker,
+)
+from services.rate_limiter import RateLimiter, get_rate_limiter
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+DEFAULT_TIMEOUT          = 10
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE     = 10
+DEFAULT_KEEP_ALIVE       = True
+DEFAULT_COALESCE         = True
+DEFAULT_COALESCE_TTL     = 30
+
+# Réponses GET récentes conservées pour les sondes (en-têtes seulement)
+RECENT_MAX = 512
+
+# En-têtes qui changent la réponse : requête jamais partagée
+UNSHARED_HEADERS = ("if-none-match", "if-modified-since", "range", "authorization", "cookie")
+
+DEFAULT_HEADERS = {
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+# ---------------------------------------------------------------------------
+# Compteurs de connexions
+# ---------------------------------------------------------------------------
+
+class ConnectionStats:
+    """Compteurs process-wide : requêtes, connexions ouvertes, connexions réutilisées."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.checkouts = 0
+            self.new_connections = 0
+            self.coalesced = 0       # requête jointe à une requête identique en vol
+            self.recent_hits = 0     # sonde servie par un GET récent
+
+    def on_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def on_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def on_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def on_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def on_recent_hit(self):
+        with self._lock:
+            self.recent_hits += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.checkouts - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.new_connections,
+                "connections_reused": reused,
+                "reuse_ratio": round(reused / self.checkouts, 3) if self.checkouts else 0.0,
+                "coalesced": self.coalesced,
+                "recent_hits": self.recent_hits,
+                "saved": self.coalesced + self.recent_hits,
+            }
+
+
+_STATS = ConnectionStats()
+
+
+class _CountingPoolMixin:
+    """Compte les connexions sorties du pool et celles réellement créées."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        _STATS.on_checkout()
+        return conn
+
+    def _new_conn(self):
+        _STATS.on_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter dont les pools urllib3 alimentent ``ConnectionStats``."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def _host_key(url: str) -> str:
+    """Clé de pool : hôte en minuscules (sans www.)."""
+    try:
+        netloc = (urlparse(url).netloc or "").lower()
+    except Exception:
+        return ""
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def _flight_key(url: str, headers: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Clé de partage : l'URL exacte et les en-têtes fournis par l'appelant
+    (Accept, Accept-Language, User-Agent... changent la réponse).
+    """
+    key = (url or "").strip()
+    if headers:
+        items = sorted((str(k).lower(), str(v)) for k, v in headers.items() if v is not None)
+        key += "\x1f" + "\x1e".join(f"{k}:{v}" for k, v in items)
+    return key
+
+
+def _probe_view(resp: requests.Response) -> requests.Response:
+    """Copie sans corps d'une réponse (statut, en-têtes, URL finale, redirections)."""
+    view = requests.Response()
+    view.status_code = resp.status_code
+    view.headers = CaseInsensitiveDict(resp.headers)
+    view.url = resp.url
+    view.history = list(resp.history)
+    view.reason = resp.reason
+    view.encoding = resp.encoding
+    view.request = resp.request
+    view.elapsed = resp.elapsed
+    view.cookies = resp.cookies.copy()
+    view._content = b""
+    view._content_consumed = True
+    return view
+
+
+def _response_copy(resp: requests.Response) -> requests.Response:
+    """Copie complète d'une réponse déjà lue, propre à un appelant (encoding, en-têtes modifiables)."""
+    copy = _probe_view(resp)
+    copy._content = resp.content
+    return copy
+
+
+def _wait_budget(timeout: Any, default: float) -> float:
+    """Attente maximale d'une requête partagée : le timeout de l'appelant (connexion + lecture)."""
+    if timeout is None:
+        return float(default)
+    if isinstance(timeout, (tuple, list)):
+        return float(sum(t for t in timeout if t is not None) or default)
+    return float(timeout)
+
+
+class _Flight:
+    """Requête en cours, attendue par les appelants qui la partagent."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.sent = threading.Event()   # sortie du limiteur : la requête est partie
+        self.done = threading.Event()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+
+
+class HttpClient:
+    """
+    Client HTTP à sessions poolées par hôte.
+
+    Paramètres
+    ----------
+    timeout          : timeout par défaut si l'appelant n'en fournit pas
+    user_agent       : User-Agent par défaut
+    pool_connections : nb de pools d'hôtes par session (redirections inter-hôtes)
+    pool_maxsize     : nb de connexions keep-alive conservées par hôte
+    keep_alive       : si False, envoie "Connection: close"
+    rate_limiter     : ordonnanceur par domaine (None = aucune limitation)
+    coalesce         : partager les requêtes identiques (single-flight)
+    coalesce_ttl     : durée (s) pendant laquelle un GET répond aux sondes
+    circuit_breaker  : disjoncteur par domaine (None = jamais coupé)
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        user_agent: str = DEFAULT_USER_AGENT,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        keep_alive: bool = DEFAULT_KEEP_ALIVE,
+        rate_limiter: Optional[RateLimiter] = None,
+        coalesce: bool = DEFAULT_COALESCE,
+        coalesce_ttl: float = DEFAULT_COALESCE_TTL,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.timeout = timeout
+        self.user_agent = user_agent or DEFAULT_USER_AGENT
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.rate_limiter = rate_limiter
+        self.coalesce = coalesce
+        self.coalesce_ttl = float(coalesce_ttl or 0)
+        self.circuit_breaker = circuit_breaker
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, bool], _Flight] = {}
+        self._recent: Dict[str, Tuple[float, requests.Response]] = {}
+        self._flight_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, scrapers_cfg: Optional[Dict[str, Any]] = None) -> "HttpClient":
+        """Construit un client depuis la section ``scrapers`` de config.json."""
+        cfg = scrapers_cfg
+        if cfg is None:
+            try:
+                from services.config_manager import ConfigManager
+                cfg = ConfigManager().get("scrapers", {}) or {}
+            except Exception:
+                cfg = {}
+        return cls(
+            timeout=cfg.get("timeout", DEFAULT_TIMEOUT),
+            user_agent=cfg.get("user_agent", DEFAULT_USER_AGENT),
+            pool_connections=int(cfg.get("pool_connections", DEFAULT_POOL_CONNECTIONS)),
+            pool_maxsize=int(cfg.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)),
+            keep_alive=bool(cfg.get("keep_alive", DEFAULT_KEEP_ALIVE)),
+            rate_limiter=get_rate_limiter(),
+            coalesce=bool(cfg.get("coalesce", DEFAULT_COALESCE)),
+            coalesce_ttl=float(cfg.get("coalesce_ttl", DEFAULT_COALESCE_TTL)),
+            circuit_breaker=get_circuit_breaker(),
+        )
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = _PooledAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        session.headers["User-Agent"] = self.user_agent
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Retourne (en la créant au besoin) la session dédiée à l'hôte de l'URL."""
+        key = _host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._build_session()
+                    self._sessions[key] = session
+        return session
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Équivalent de ``requests.request`` via la session poolée de l'hôte.
+        Les GET et les sondes identiques sont partagés (voir ``_coalesced``).
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        kind = self._flight_kind(method, kwargs) if self.coalesce else None
+        if kind is None:
+            return self._send(method, url, **kwargs)
+        return self._coalesced(kind, method, url, **kwargs)
+
+    def _send(self, method: str, url: str, sent: Optional[threading.Event] = None,
+              **kwargs) -> requests.Response:
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return self._send_limited(method, url, sent, **kwargs)
+        if not breaker.allow(url):
+            raise CircuitOpenError(url, breaker.retry_in(url))
+        try:
+            resp = self._send_limited(method, url, sent, **kwargs)
+        except requests.RequestException:
+            breaker.record(url, False)
+            raise
+        except BaseException:
+            breaker.record(url, None)
+            raise
+        # 403 : neutre ici (sonde refusée mais page souvent présente) ; les
+        # scrapers comptent l'échec si le fallback curl échoue aussi
+        if resp.status_code == 403:
+            breaker.record(url, None)
+        else:
+            breaker.record(url, resp.status_code not in FAILURE_STATUSES)
+        return resp
+
+    def _send_limited(self, method: str, url: str, sent: Optional[threading.Event] = None,
+                      **kwargs) -> requests.Response:
+        """Requête sous le limiteur ; ``sent`` est levé une fois le créneau obtenu."""
+        _STATS.on_request()
+        limiter = self.rate_limiter
+        if limiter is None:
+            if sent is not None:
+                sent.set()
+            return self.session_for(url).request(method, url, **kwargs)
+        with limiter.slot(url):
+            if sent is not None:
+                sent.set()
+            try:
+                resp = self.session_for(url).request(method, url, **kwargs)
+            except requests.RequestException:
+                limiter.on_error(url)
+                raise
+        limiter.on_response(url, resp.status_code, resp.headers)
+        return resp
+
+    # ------------------------------------------------------------------
+    # Partage des requêtes (single-flight)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _flight_kind(method: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        """``"get"`` (page complète), ``"probe"`` (HEAD / GET en flux) ou None (non partageable)."""
+        method = method.upper()
+        if method not in ("GET", "HEAD"):
+            return None
+        if any(kwargs.get(k) for k in ("params", "data", "json", "files", "auth", "cookies")):
+            return None
+        headers = kwargs.get("headers") or {}
+        if any(str(h).lower() in UNSHARED_HEADERS for h in headers):
+            return None
+        if method == "HEAD" or kwargs.get("stream"):
+            return "probe"
+        return "get"
+
+    def _recent_get(self, key: str, allow_redirects: bool) -> Optional[requests.Response]:
+        """GET récent (vue sans corps) utilisable par une sonde, sous ``_flight_lock``."""
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        stamp, view = entry
+        if time.monotonic() - stamp > self.coalesce_ttl:
+            del self._recent[key]
+            return None
+        # Une sonde qui ne suit pas les redirections n'accepte qu'une réponse directe
+        if not allow_redirects and view.history:
+            return None
+        return _probe_view(view)
+
+    def _remember(self, key: str, resp: requests.Response):
+        """Conserve les en-têtes d'un GET complet pour les sondes à venir."""
+        if self.coalesce_ttl <= 0 or resp.status_code == 429 or resp.status_code >= 500:
+            return
+        with self._flight_lock:
+            self._recent[key] = (time.monotonic(), _probe_view(resp))
+            if len(self._recent) > RECENT_MAX:
+                oldest = sorted(self._recent, key=lambda k: self._recent[k][0])
+                for k in oldest[:len(self._recent) - RECENT_MAX]:
+                    del self._recent[k]
+
+    def _coalesced(self, kind: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Exécute la requête, ou attend une requête identique déjà en vol.
+        Une sonde peut aussi rejoindre un GET complet en vol, ou être servie
+        par un GET récent ; l'inverse n'est pas vrai (il faut le corps).
+        """
+        key = _flight_key(url, kwargs.get("headers"))
+        redirects = bool(kwargs.get("allow_redirects", method.upper() == "GET"))
+        fkey = (key, redirects)
+        with self._flight_lock:
+            if kind == "probe":
+                view = self._recent_get(key, redirects)
+                if view is not None:
+                    _STATS.on_recent_hit()
+                    return view
+            flight = self._flights.get(fkey)
+            if flight is not None and (flight.kind == "get" or kind == "probe"):
+                leader = False
+            else:
+                # Un GET complet remplace une sonde en vol comme requête à rejoindre
+                flight = _Flight(kind)
+                self._flights[fkey] = flight
+                leader = True
+
+        if not leader:
+            _STATS.on_coalesced()
+            # Le timeout ne court qu'une fois la requête partagée sortie du
+            # limiteur : une attente Retry-After ne fait pas échouer les suiveurs
+            flight.sent.wait()
+            budget = _wait_budget(kwargs.get("timeout"), self.timeout)
+            if not flight.done.wait(budget):
+                raise requests.Timeout(f"Requête partagée sans réponse après {budget:g}s : {url}")
+            if flight.error is not None:
+                raise flight.error
+            # Chaque appelant a sa copie : ni corps en flux ni en-têtes partagés
+            if kind == "probe" or flight.kind == "probe":
+                return _probe_view(flight.response)
+            return _response_copy(flight.response)
+
+        try:
+            flight.response = self._send(method, url, flight.sent, **kwargs)
+            if kind == "get" and redirects:
+                self._remember(key, flight.response)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flight_lock:
+                if self._flights.get(fkey) is flight:
+                    del self._flights[fkey]
+            flight.sent.set()
+            flight.done.set()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("allow_redirects", True)
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("allow_redirects", False)
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self):
+        """Ferme toutes les sessions (et leurs connexions keep-alive)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de réutilisation des connexions (process-wide)."""
+        data = _STATS.snapshot()
+        with self._lock:
+            data["hosts"] = len(self._sessions)
+        return data
+
+    def reset_stats(self):
+        _STATS.reset()
+
+    def forget_recent(self):
+        """Oublie les GET récents (les sondes suivantes iront sur le réseau)."""
+        with self._flight_lock:
+            self._recent.clear()
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['requests']} requêtes · {s['hosts']} hôtes · "
+            f"{s['connections_opened']} connexions ouvertes · "
+            f"{s['connections_reused']} réutilisées ({s['reuse_ratio']:.0%}) · "
+            f"{s['saved']} évitées ({s['coalesced']} partagées, {s['recent_hits']} sondes servies par un GET récent)"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Retourne le client HTTP partagé (créé à la première utilisation)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient.from_config()
+    return _client
@@ -2,9 +2,8 @@ import re
 from typing import Iterable, Tuple
 from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
-
+from services.html_parse import parse_html
+from services.page_cache import fetch_page, get_page_cache, store_page
 from services.scrapers import HEADERS, _fetch_with_curl
 
 
@@ -50,17 +49,20 @@ def extract_interview_text(url: str, timeout: int = 15) -> Tuple[str, str]:
     """
     html = ""
     try:
-        resp = requests.get(
+        cache = get_page_cache()
+        page = fetch_page(
             url,
             headers={**HEADERS, "Accept": "text/html,application/xhtml+xml"},
             timeout=timeout,
-            allow_redirects=True,
+            cache=cache,
         )
-        if resp.status_code == 200:
-            html = resp.text or ""
-        elif resp.status_code == 403:
+        if page.status == 200:
+            html = page.body or ""
+        elif page.status == 403:
             # Anti-bot: tenter curl, souvent plus permissif
-            html = _fetch_with_curl(url) or (resp.text or "")
+            html = _fetch_with_curl(url) or ""
+            store_page(url, html, cache)
+            html = html or page.body or ""
         else:
             return "", ""
     except Exception:
@@ -71,7 +73,7 @@ def extract_interview_text(url: str, timeout: int = 15) -> Tuple[str, str]:
         return "", ""
 
     try:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = parse_html(html)
         for tag in soup(["script", "style", "noscript"]):
             tag.decompose()
 
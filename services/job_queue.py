@@ -0,0 +1,403 @@
+"""
+job_queue.py - File de travaux persistante pour les traitements par lot
+=======================================================================
+
+Un enrichissement ou un balayage d'URLs sur toute la bibliothèque dure des
+heures : plantage, mise en veille ou bannissement Cloudflare l'interrompent
+forcément. La file conserve l'avancement dans la base annexe
+(``data/database.sqlite``), table ``jobs`` :
+
+- une ligne par (file, performer, étape), avec état, nombre de tentatives,
+  dernière erreur, horodatages et résultat JSON de l'étape ;
+- les étapes d'un performer s'enchaînent dans l'ordre (``step``) : une
+  étape n'est réclamable que si les précédentes sont terminées, et reçoit
+  leur résultat — une reprise ne refait donc pas les téléchargements déjà
+  faits ;
+- réclamation atomique (``BEGIN IMMEDIATE``) : plusieurs threads, voire
+  plusieurs processus, peuvent consommer la même file ;
+- un travail en cours possède un bail : si le processus meurt, le travail
+  redevient réclamable à l'expiration du bail ;
+- un échec est retenté avec un délai exponentiel (``backoff_base`` ×
+  2^(tentatives-1), plafonné, avec gigue) ; après ``max_attempts``
+  tentatives, il passe en ``failed`` et les étapes suivantes en
+  ``cancelled``.
+
+États : pending → running → done | pending (nouvel essai) | failed.
+
+Configuration (section ``job_queue`` de config.json) :
+    max_attempts  : tentatives avant abandon
+    backoff_base  : délai (s) avant le 1er nouvel essai
+    backoff_max   : délai maximal (s) entre deux essais
+    lease_seconds : durée du bail d'un travail en cours
+
+Usage :
+    from services.job_queue import get_job_queue
+    queue = get_job_queue()
+    queue.enqueue("enrich", performer_ids, ["scrape", "save"])
+    job = queue.claim("enrich", worker="w1")   # None si rien de prêt
+    queue.complete(job, {"results": [...]})    # ou queue.fail(job, "erreur")
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from services.sidecar_db import connect_sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_MAX_ATTEMPTS  = 4
+DEFAULT_BACKOFF_BASE  = 30.0
+DEFAULT_BACKOFF_MAX   = 3600.0
+DEFAULT_LEASE_SECONDS = 900.0
+
+PENDING   = "pending"
+RUNNING   = "running"
+DONE      = "done"
+FAILED    = "failed"
+CANCELLED = "cancelled"
+
+STATES = (PENDING, RUNNING, DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """Travail réclamé : une étape d'un performer."""
+    queue: str
+    performer_id: str
+    stage: str
+    step: int
+    attempts: int
+    worker: str
+    input: Optional[Any] = None     # résultat de l'étape précédente (None pour la 1re)
+
+
+# ---------------------------------------------------------------------------
+# File
+# ---------------------------------------------------------------------------
+
+class JobQueue:
+    """
+    Table ``jobs`` de la base annexe.
+
+    Paramètres
+    ----------
+    db_path       : chemin de la base (None = ``data.database_path`` de config.json)
+    max_attempts  : tentatives avant de passer en ``failed``
+    backoff_base  : délai (s) avant le premier nouvel essai
+    backoff_max   : délai maximal (s) entre deux essais
+    lease_seconds : bail d'un travail en cours (reprise après plantage)
+    """
+
+    def __init__(self, db_path: Optional[str] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.db_path = db_path
+        self.max_attempts = max(int(max_attempts), 1)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.lease_seconds = float(lease_seconds)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None,
+                    db_path: Optional[str] = None) -> "JobQueue":
+        """Construit la file depuis la section ``job_queue`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            db_path=db_path,
+            max_attempts=int(cfg.get("max_attempts", DEFAULT_MAX_ATTEMPTS)),
+            backoff_base=float(cfg.get("backoff_base", DEFAULT_BACKOFF_BASE)),
+            backoff_max=float(cfg.get("backoff_max", DEFAULT_BACKOFF_MAX)),
+            lease_seconds=float(cfg.get("lease_seconds", DEFAULT_LEASE_SECONDS)),
+        )
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect_sidecar(self.db_path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def backoff(self, attempts: int) -> float:
+        """Délai avant le nouvel essai n° ``attempts`` (exponentiel, gigue ±20 %)."""
+        delay = min(self.backoff_base * (2 ** max(attempts - 1, 0)), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    # ------------------------------------------------------------------
+    # Alimentation
+    # ------------------------------------------------------------------
+
+    def enqueue(self, queue: str, performer_ids: Iterable[Any], stages: Sequence[str]) -> int:
+        """
+        Ajoute les étapes ``stages`` de chaque performer. Les lignes déjà
+        présentes (terminées ou non) sont conservées telles quelles.
+        Retourne le nombre de lignes ajoutées.
+        """
+        now = time.time()
+        rows = [(queue, str(pid), stage, step, now)
+                for pid in performer_ids for step, stage in enumerate(stages)]
+        with self._lock:
+            conn = self._db()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (queue, performer_id, stage, step, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+            return conn.total_changes - before
+
+    def retry_failed(self, queue: str) -> int:
+        """Remet en attente les travaux abandonnés (et les étapes annulées qui en dépendent)."""
+        with self._lock:
+            conn = self._db()
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0, next_attempt_at = 0, last_error = NULL "
+                "WHERE queue = ? AND state IN ('failed', 'cancelled')",
+                (queue,),
+            )
+            conn.commit()
+            return cur.rowcount
+
+    def recover(self, queue: str) -> int:
+        """
+        Remet en attente les travaux « en cours » sans attendre la fin de leur
+        bail (après un plantage, quand aucun autre processus ne consomme la file).
+        """
+        with self._lock:
+            conn = self._db()
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'pending', lease_until = NULL, next_attempt_at = 0 "
+                "WHERE queue = ? AND state = 'running'",
+                (queue,),
+            )
+            conn.commit()
+            return cur.rowcount
+
+    def reset(self, queue: str) -> int:
+        """Supprime la file ``queue``."""
+        with self._lock:
+            conn = self._db()
+            cur = conn.execute("DELETE FROM jobs WHERE queue = ?", (queue,))
+            conn.commit()
+            return cur.rowcount
+
+    # ------------------------------------------------------------------
+    # Consommation
+    # ------------------------------------------------------------------
+
+    def claim(self, queue: str, worker: str = "") -> Optional[Job]:
+        """
+        Réclame atomiquement le prochain travail prêt : en attente (délai de
+        nouvel essai écoulé) ou en cours avec un bail expiré, et dont les
+        étapes précédentes sont terminées. None si rien n'est prêt.
+        """
+        worker = worker or f"{os.getpid()}:{threading.get_ident()}"
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    """SELECT j.performer_id, j.stage, j.step, j.attempts FROM jobs j
+                       WHERE j.queue = ?
+                         AND ((j.state = 'pending' AND j.next_attempt_at <= ?)
+                              OR (j.state = 'running' AND j.lease_until < ?))
+                         AND NOT EXISTS (
+                             SELECT 1 FROM jobs p
+                             WHERE p.queue = j.queue AND p.performer_id = j.performer_id
+                               AND p.step < j.step AND p.state != 'done')
+                       ORDER BY j.step DESC, j.next_attempt_at, j.enqueued_at
+                       LIMIT 1""",
+                    (queue, now, now),
+                ).fetchone()
+                if row is None:
+                    conn.commit()
+                    return None
+                conn.execute(
+                    """UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?,
+                              started_at = ?, lease_until = ?
+                       WHERE queue = ? AND performer_id = ? AND stage = ?""",
+                    (worker, now, now + self.lease_seconds, queue, row["performer_id"], row["stage"]),
+                )
+                prev = conn.execute(
+                    "SELECT result FROM jobs WHERE queue = ? AND performer_id = ? AND step = ?",
+                    (queue, row["performer_id"], row["step"] - 1),
+                ).fetchone()
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        return Job(
+            queue=queue,
+            performer_id=row["performer_id"],
+            stage=row["stage"],
+            step=row["step"],
+            attempts=row["attempts"] + 1,
+            worker=worker,
+            input=json.loads(prev["result"]) if prev and prev["result"] else None,
+        )
+
+    def _finish(self, job: Job, sql: str, params: tuple) -> bool:
+        """Met à jour un travail si ``job.worker`` en détient toujours le bail."""
+        with self._lock:
+            conn = self._db()
+            cur = conn.execute(
+                sql + " WHERE queue = ? AND performer_id = ? AND stage = ? AND worker = ? AND state = 'running'",
+                params + (job.queue, job.performer_id, job.stage, job.worker),
+            )
+            conn.commit()
+            return cur.rowcount > 0
+
+    def complete(self, job: Job, result: Any = None) -> bool:
+        """Marque l'étape terminée et conserve son résultat (JSON) pour l'étape suivante."""
+        now = time.time()
+        payload = json.dumps(result, ensure_ascii=False) if result is not None else None
+        return self._finish(
+            job,
+            """UPDATE jobs SET state = 'done', result = ?, last_error = NULL, finished_at = ?,
+                      duration = ? - started_at, total_time = total_time + (? - started_at),
+                      lease_until = NULL""",
+            (payload, now, now, now),
+        )
+
+    def fail(self, job: Job, error: str, retry_after: Optional[float] = None) -> str:
+        """
+        Enregistre un échec. Nouvel essai après ``retry_after`` secondes
+        (défaut : délai exponentiel) tant que ``max_attempts`` n'est pas
+        atteint. Retourne le nouvel état (``pending`` ou ``failed``).
+        """
+        now = time.time()
+        if job.attempts >= self.max_attempts:
+            state, next_at = FAILED, 0.0
+        else:
+            state = PENDING
+            next_at = now + (retry_after if retry_after is not None else self.backoff(job.attempts))
+        ok = self._finish(
+            job,
+            """UPDATE jobs SET state = ?, last_error = ?, next_attempt_at = ?, finished_at = ?,
+                      duration = ? - started_at, total_time = total_time + (? - started_at),
+                      lease_until = NULL""",
+            (state, str(error)[:2000], next_at, now, now, now),
+        )
+        if ok and state == FAILED:
+            with self._lock:
+                conn = self._db()
+                conn.execute(
+                    "UPDATE jobs SET state = 'cancelled' "
+                    "WHERE queue = ? AND performer_id = ? AND step > ? AND state = 'pending'",
+                    (job.queue, job.performer_id, job.step),
+                )
+                conn.commit()
+        return state
+
+    def release(self, job: Job):
+        """Rend un travail non commencé (arrêt demandé) sans compter de tentative."""
+        self._finish(
+            job,
+            "UPDATE jobs SET state = 'pending', attempts = MAX(attempts - 1, 0), lease_until = NULL",
+            (),
+        )
+
+    # ------------------------------------------------------------------
+    # Suivi
+    # ------------------------------------------------------------------
+
+    def next_ready_in(self, queue: str) -> Optional[float]:
+        """
+        Secondes avant qu'un travail puisse devenir réclamable (0 = maintenant),
+        ou None si la file est épuisée (plus rien en attente ni en cours).
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db().execute(
+                """SELECT MIN(CASE WHEN state = 'pending' THEN next_attempt_at ELSE lease_until END) AS t
+                   FROM jobs WHERE queue = ? AND state IN ('pending', 'running')""",
+                (queue,),
+            ).fetchone()
+        if row is None or row["t"] is None:
+            return None
+        return max(row["t"] - now, 0.0)
+
+    def remaining(self, queue: str) -> int:
+        """Nombre de performers ayant encore une étape en attente ou en cours."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT COUNT(DISTINCT performer_id) AS n FROM jobs "
+                "WHERE queue = ? AND state IN ('pending', 'running')",
+                (queue,),
+            ).fetchone()
+        return int(row["n"] or 0)
+
+    def counts(self, queue: str) -> Dict[str, Dict[str, int]]:
+        """{étape: {état: nombre}} dans l'ordre des étapes."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT stage, MIN(step) AS step, state, COUNT(*) AS n FROM jobs "
+                "WHERE queue = ? GROUP BY stage, state ORDER BY step",
+                (queue,),
+            ).fetchall()
+        out: Dict[str, Dict[str, int]] = {}
+        for r in rows:
+            out.setdefault(r["stage"], {})[r["state"]] = r["n"]
+        return out
+
+    def failures(self, queue: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Derniers travaux abandonnés (performer, étape, tentatives, erreur)."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT performer_id, stage, attempts, last_error FROM jobs "
+                "WHERE queue = ? AND state = 'failed' ORDER BY finished_at DESC LIMIT ?",
+                (queue, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def format_status(self, queue: str) -> str:
+        counts = self.counts(queue)
+        if not counts:
+            return f"File « {queue} » vide"
+        lines = [f"File « {queue} »"]
+        for stage, by_state in counts.items():
+            total = sum(by_state.values())
+            parts = "  ".join(f"{s} {by_state[s]}" for s in STATES if by_state.get(s))
+            lines.append(f"  {stage:<7} {total:>6}  {parts}")
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """File partagée (réglages lus une fois dans config.json)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("job_queue", {}) or {}
+                except Exception:
+                    cfg = {}
+                _queue = JobQueue.from_config(cfg)
+    return _queue
@@ -0,0 +1,229 @@
+"""
+name_index.py - Index des noms de performers (base annexe)
+==========================================================
+
+Retrouver un performer par son nom dans Stash coûte un parcours complet de
+``performers`` (``lower(name) = lower(?)`` n'utilise aucun index) et ignore
+les accents comme les aliases. L'index ``performer_names`` de la base annexe
+associe chaque nom et alias normalisé (minuscules, sans accents ni
+ponctuation) à l'ID Stash du performer.
+
+L'index est reconstruit quand la signature de la base Stash change (hash
+des couples id/nom et id/alias : un renommage la modifie, même sans
+``updated_at``) ; la signature n'est recalculée qu'une fois par
+``refresh_seconds``, ou dès la sauvegarde suivante d'un nom ou d'aliases
+par StashMaster (``invalidate``). Avec la base annexe attachée à la
+connexion Stash, ``StashDatabase.find_performers_by_name`` résout
+nom → performer en une seule requête (et retombe sur une requête directe
+dans Stash quand l'index ne connaît pas encore le nom).
+
+Configuration (section ``name_index`` de config.json) :
+    enabled         : False pour chercher directement dans Stash
+    refresh_seconds : intervalle minimal entre deux vérifications de signature
+
+Usage :
+    from services.name_index import get_name_index, name_key
+    index = get_name_index()
+    index.refresh(db)                 # StashDatabase ; reconstruit si besoin
+    ids = index.find("Jane Doe")      # [performer_id, ...]
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from services.sidecar_db import connect_sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_REFRESH_SECONDS = 300.0
+
+NAME  = "name"
+ALIAS = "alias"
+
+_SIGNATURE_KEY = "name_index.signature"
+
+
+def name_key(text: str) -> str:
+    """Clé de recherche : minuscules, sans accents, ponctuation réduite à des espaces."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class NameIndex:
+    """
+    Table ``performer_names`` de la base annexe.
+
+    Paramètres
+    ----------
+    db_path         : chemin de la base annexe (None = ``data.database_path``)
+    refresh_seconds : intervalle minimal entre deux vérifications de signature
+    """
+
+    def __init__(self, db_path: Optional[str] = None,
+                 refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.db_path = db_path
+        self.refresh_seconds = float(refresh_seconds)
+        self._checked_at: Dict[str, float] = {}
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None,
+                    db_path: Optional[str] = None) -> "NameIndex":
+        """Construit l'index depuis la section ``name_index`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            db_path=db_path,
+            refresh_seconds=float(cfg.get("refresh_seconds", DEFAULT_REFRESH_SECONDS)),
+        )
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect_sidecar(self.db_path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def signature(stash_db) -> str:
+        """Empreinte des noms et aliases de la base Stash : change à chaque ajout, suppression ou renommage."""
+        conn = stash_db._get_connection()
+        digest = hashlib.sha1()
+        queries = ["SELECT id, name FROM performers ORDER BY id"]
+        if stash_db.schema.has_table("performer_aliases"):
+            queries.append("SELECT performer_id, alias FROM performer_aliases ORDER BY performer_id, alias")
+        for query in queries:
+            for pid, name in conn.execute(query):
+                digest.update(f"{pid}\x1f{name}\x1e".encode("utf-8", "surrogatepass"))
+            digest.update(b"\x1d")
+        return f"{stash_db.db_path}|{digest.hexdigest()}"
+
+    def invalidate(self, stash_path: Optional[str] = None):
+        """Force la vérification de signature à la prochaine recherche (après un renommage)."""
+        if stash_path is None:
+            self._checked_at.clear()
+        else:
+            self._checked_at.pop(stash_path, None)
+
+    def refresh(self, stash_db, force: bool = False) -> bool:
+        """Reconstruit l'index si la base Stash a changé. Retourne True si reconstruit."""
+        now = time.monotonic()
+        if not force and now - self._checked_at.get(stash_db.db_path, -self.refresh_seconds) < self.refresh_seconds:
+            return False
+        try:
+            sig = self.signature(stash_db)
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT value FROM sidecar_meta WHERE key = ?", (_SIGNATURE_KEY,)
+                ).fetchone()
+            self._checked_at[stash_db.db_path] = now
+            if not force and row is not None and row["value"] == sig:
+                return False
+            self.rebuild(stash_db, sig)
+            return True
+        except Exception as e:
+            print(f"[NAMES] Mise à jour de l'index impossible : {e}")
+            return False
+
+    def rebuild(self, stash_db, signature: Optional[str] = None) -> int:
+        """Reconstruit tout l'index depuis Stash. Retourne le nombre d'entrées."""
+        conn = stash_db._get_connection()
+        sources = [(NAME, "SELECT id, name FROM performers")]
+        if stash_db.schema.has_table("performer_aliases"):
+            sources.append((ALIAS, "SELECT performer_id, alias FROM performer_aliases"))
+        rows = []
+        for kind, query in sources:
+            for pid, name in conn.execute(query):
+                key = name_key(name)
+                if key:
+                    rows.append((key, pid, name, kind))
+        signature = signature or self.signature(stash_db)
+        t0 = time.perf_counter()
+        with self._lock:
+            side = self._db()
+            try:
+                side.execute("BEGIN IMMEDIATE")
+                side.execute("DELETE FROM performer_names")
+                side.executemany(
+                    "INSERT OR IGNORE INTO performer_names (name_key, performer_id, name, kind) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                side.execute(
+                    "INSERT INTO sidecar_meta (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (_SIGNATURE_KEY, signature),
+                )
+                side.commit()
+            except Exception:
+                side.rollback()
+                raise
+        print(f"[NAMES] Index reconstruit : {len(rows)} nom(s) en {time.perf_counter() - t0:.2f}s")
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def find(self, name: str) -> List[int]:
+        """IDs Stash dont le nom ou un alias correspond (noms d'abord)."""
+        key = name_key(name)
+        if not key:
+            return []
+        try:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT performer_id, MIN(kind = 'alias') AS by_alias FROM performer_names "
+                    "WHERE name_key = ? GROUP BY performer_id ORDER BY by_alias, performer_id",
+                    (key,),
+                ).fetchall()
+            return [r["performer_id"] for r in rows]
+        except Exception as e:
+            print(f"[NAMES] Lecture impossible : {e}")
+            return []
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_index: Optional[NameIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_name_index() -> Optional[NameIndex]:
+    """Index partagé, ou None si désactivé dans config.json."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("name_index", {}) or {}
+                except Exception:
+                    cfg = {}
+                _index = NameIndex.from_config(cfg) if cfg.get("enabled", True) else None
+                _index_loaded = True
+    return _index
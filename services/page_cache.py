@@ -0,0 +1,490 @@
+"""
+page_cache.py - Cache disque des pages HTML pour StashMaster V2
+================================================================
+
+Remplace l'ancien ``ScrapeCache`` en mémoire (Legacy) : les pages
+téléchargées sont conservées dans la base annexe (``data/database.sqlite``),
+compressées (zlib), avec leur statut, quelques en-têtes et la date de
+téléchargement. Rouvrir un performer scrapé il y a cinq minutes ne
+re-télécharge donc rien.
+
+- Clé : URL normalisée (schéma/hôte en minuscules, sans www., sans fragment,
+  paramètres triés, sans "/" final).
+- Fraîcheur : TTL par domaine (``DOMAIN_TTLS``), plus court pour les pages de
+  recherche (URL avec paramètres).
+- Page expirée : revalidation conditionnelle (If-None-Match /
+  If-Modified-Since) ; un 304 ne fait que rafraîchir la date.
+- Taille : éviction LRU (dernier accès) dès que le total dépasse
+  ``max_bytes``. Le dernier accès n'est réécrit que s'il date de plus de
+  ``ACCESS_REFRESH`` : une lecture ne coûte pas une écriture.
+
+Configuration (section ``page_cache`` de config.json) :
+    enabled           : False pour désactiver complètement le cache
+    max_size_mb       : taille maximale des corps compressés
+    default_ttl_hours : TTL des domaines non listés
+    domain_ttl_hours  : {"iafd.com": 168, ...} surcharge des TTL par domaine
+
+Usage :
+    from services.page_cache import fetch_page, get_page_cache
+    page = fetch_page(url, headers=HEADERS, timeout=15, cache=get_page_cache())
+    if page.ok:
+        html = page.body
+"""
+
+import json
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from services.http_client import get_http_client
+from services.sidecar_db import connect_sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+HOUR = 3600
+
+DEFAULT_TTL       = 24 * HOUR
+SEARCH_TTL        = 6 * HOUR        # pages de recherche / résultats
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+ACCESS_REFRESH    = 10 * 60         # précision du dernier accès (LRU)
+
+# Les fiches évoluent peu : inutile de les re-télécharger à chaque ouverture.
+DOMAIN_TTLS = {
+    "iafd.com":      7 * 24 * HOUR,
+    "freeones.com":  3 * 24 * HOUR,
+    "freeones.xxx":  3 * 24 * HOUR,
+    "thenude.com":   7 * 24 * HOUR,
+    "babepedia.com": 7 * 24 * HOUR,
+    "boobpedia.com": 14 * 24 * HOUR,
+    "xxxbios.com":   14 * 24 * HOUR,
+}
+
+# En-têtes conservés avec la page (le reste n'apporte rien au cache)
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "date")
+
+
+# ---------------------------------------------------------------------------
+# Normalisation des URLs
+# ---------------------------------------------------------------------------
+
+def _domain(url: str) -> str:
+    try:
+        netloc = (urlparse(url).netloc or "").lower()
+    except Exception:
+        return ""
+    netloc = netloc.split("@")[-1].split(":")[0]
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def normalize_url(url: str) -> str:
+    """
+    Clé de cache d'une URL.
+    Le chemin garde sa casse (Babepedia/Boobpedia y sont sensibles).
+    """
+    try:
+        p = urlparse((url or "").strip())
+    except Exception:
+        return (url or "").strip()
+    scheme = (p.scheme or "https").lower()
+    host = (p.netloc or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if (scheme == "http" and host.endswith(":80")) or (scheme == "https" and host.endswith(":443")):
+        host = host.rsplit(":", 1)[0]
+    path = p.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(p.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, "", query, ""))
+
+
+# ---------------------------------------------------------------------------
+# Page
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CachedPage:
+    """Page téléchargée (ou relue du cache)."""
+    url: str
+    status: int
+    body: str = ""
+    headers: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+    from_cache: bool = False
+    revalidated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.fetched_at, 0.0)
+
+    @property
+    def etag(self) -> str:
+        return self.headers.get("etag", "")
+
+    @property
+    def last_modified(self) -> str:
+        return self.headers.get("last-modified", "")
+
+    def validators(self) -> Dict[str, str]:
+        """En-têtes de requête conditionnelle pour revalider cette page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        elif self.fetched_at and not self.etag:
+            headers["If-Modified-Since"] = formatdate(self.fetched_at, usegmt=True)
+        return headers
+
+
+def _kept_headers(headers) -> Dict[str, str]:
+    kept = {}
+    for key in KEPT_HEADERS:
+        try:
+            value = headers.get(key)
+        except Exception:
+            value = None
+        if value:
+            kept[key] = value
+    return kept
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class PageCache:
+    """
+    Cache de pages HTML persistant (base annexe SQLite).
+
+    Paramètres
+    ----------
+    db_path     : chemin de la base (None = ``data.database_path`` de config.json)
+    max_bytes   : taille maximale cumulée des corps compressés
+    default_ttl : TTL (secondes) des domaines non listés
+    domain_ttls : surcharge des TTL par domaine (secondes)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        default_ttl: float = DEFAULT_TTL,
+        domain_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = dict(DOMAIN_TTLS)
+        if domain_ttls:
+            self.domain_ttls.update(domain_ttls)
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None) -> "PageCache":
+        """Construit le cache depuis la section ``page_cache`` de config.json."""
+        cfg = cfg or {}
+        domain_ttls = {
+            dom: float(hours) * HOUR
+            for dom, hours in (cfg.get("domain_ttl_hours") or {}).items()
+        }
+        return cls(
+            max_bytes=int(float(cfg.get("max_size_mb", DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024),
+            default_ttl=float(cfg.get("default_ttl_hours", DEFAULT_TTL / HOUR)) * HOUR,
+            domain_ttls=domain_ttls,
+        )
+
+    # ------------------------------------------------------------------
+    # Base
+    # ------------------------------------------------------------------
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect_sidecar(self.db_path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # TTL
+    # ------------------------------------------------------------------
+
+    def ttl_for(self, url: str) -> float:
+        dom = _domain(url)
+        ttl = self.default_ttl
+        for known, value in self.domain_ttls.items():
+            if dom == known or dom.endswith("." + known):
+                ttl = value
+                break
+        try:
+            if urlparse(url).query:
+                ttl = min(ttl, SEARCH_TTL)
+        except Exception:
+            pass
+        return ttl
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age < self.ttl_for(page.url)
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Page en cache (fraîche ou non), ou None."""
+        key = normalize_url(url)
+        try:
+            with self._lock:
+                conn = self._db()
+                row = conn.execute(
+                    "SELECT url, status, headers, body, fetched_at, last_access"
+                    " FROM page_cache WHERE url_key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - (row["last_access"] or 0) >= ACCESS_REFRESH:
+                    conn.execute(
+                        "UPDATE page_cache SET last_access = ? WHERE url_key = ?",
+                        (now, key),
+                    )
+                    conn.commit()
+            body = zlib.decompress(row["body"]).decode("utf-8", errors="replace")
+            return CachedPage(
+                url=row["url"],
+                status=row["status"],
+                body=body,
+                headers=json.loads(row["headers"] or "{}"),
+                fetched_at=row["fetched_at"],
+                from_cache=True,
+            )
+        except Exception as e:
+            print(f"[CACHE] Lecture impossible ({url}) : {e}")
+            return None
+
+    def put(self, page: CachedPage):
+        """Enregistre (ou remplace) une page, puis applique l'éviction LRU."""
+        key = normalize_url(page.url)
+        blob = zlib.compress((page.body or "").encode("utf-8"), 6)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute(
+                    """INSERT OR REPLACE INTO page_cache
+                       (url_key, url, status, headers, body, size, fetched_at, last_access)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (key, page.url, page.status, json.dumps(page.headers), blob,
+                     len(blob), page.fetched_at or now, now),
+                )
+                self._evict(conn)
+                conn.commit()
+        except Exception as e:
+            print(f"[CACHE] Écriture impossible ({page.url}) : {e}")
+
+    def touch(self, url: str, headers=None):
+        """Revalidation réussie (304) : la page redevient fraîche."""
+        key = normalize_url(url)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._db()
+                if headers:
+                    row = conn.execute(
+                        "SELECT headers FROM page_cache WHERE url_key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        merged = json.loads(row["headers"] or "{}")
+                        merged.update(_kept_headers(headers))
+                        conn.execute(
+                            "UPDATE page_cache SET headers = ? WHERE url_key = ?",
+                            (json.dumps(merged), key),
+                        )
+                conn.execute(
+                    "UPDATE page_cache SET fetched_at = ?, last_access = ? WHERE url_key = ?",
+                    (now, now, key),
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"[CACHE] Mise à jour impossible ({url}) : {e}")
+
+    def invalidate(self, url: str):
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute("DELETE FROM page_cache WHERE url_key = ?", (normalize_url(url),))
+                conn.commit()
+        except Exception:
+            pass
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute("DELETE FROM page_cache")
+                conn.commit()
+        except Exception:
+            pass
+
+    def _evict(self, conn):
+        """Supprime les pages les moins récemment lues au-delà de ``max_bytes``."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for row in conn.execute("SELECT url_key, size FROM page_cache ORDER BY last_access ASC"):
+            victims.append((row["url_key"],))
+            freed += row["size"]
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM page_cache WHERE url_key = ?", victims)
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+
+    def count(self, counter: str):
+        """Incrémente ``hits``, ``misses`` ou ``revalidations`` (thread-safe)."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {"hits": self.hits, "misses": self.misses,
+                        "revalidations": self.revalidations}
+            try:
+                count, size = self._db().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM page_cache"
+                ).fetchone()
+            except Exception:
+                count, size = 0, 0
+        return {"entries": count, "bytes": size, **counters}
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (
+            f"{s['entries']} pages · {s['bytes'] / 1024 / 1024:.1f} Mo · "
+            f"{s['hits']} hits · {s['revalidations']} revalidées · {s['misses']} téléchargées"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Téléchargement à travers le cache
+# ---------------------------------------------------------------------------
+
+def fetch_page(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    cache: Optional[PageCache] = None,
+    validators: Optional[Dict[str, str]] = None,
+) -> CachedPage:
+    """
+    GET à travers le cache.
+
+    - page fraîche en cache : retournée sans requête réseau ;
+    - page expirée : requête conditionnelle, 304 → page du cache ;
+    - sinon téléchargement ; seules les réponses 200 sont mises en cache.
+
+    ``validators`` : en-têtes conditionnels connus par ailleurs (empreintes
+    de ``source_fingerprints``), utilisés quand la page n'est pas en cache.
+    Un 304 sans copie en cache donne alors une page vide de statut 304.
+
+    Les erreurs réseau sont propagées (comme ``requests.get``), sauf si une
+    copie expirée existe : elle est alors retournée plutôt que rien.
+    """
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cache.is_fresh(cached):
+        cache.count("hits")
+        return cached
+
+    req_headers = dict(headers or {})
+    if cached is not None:
+        req_headers.update(cached.validators())
+    elif validators:
+        req_headers.update(validators)
+
+    try:
+        resp = get_http_client().get(url, headers=req_headers, timeout=timeout, allow_redirects=True)
+    except Exception:
+        if cached is not None:
+            print(f"[CACHE] Réseau indisponible, copie expirée utilisée : {url}")
+            return cached
+        raise
+
+    if resp.status_code == 304 and cached is not None:
+        cache.count("revalidations")
+        cache.touch(url, resp.headers)
+        cached.revalidated = True
+        cached.fetched_at = time.time()
+        return cached
+    if resp.status_code == 304:
+        return CachedPage(url=url, status=304, headers=_kept_headers(resp.headers),
+                          fetched_at=time.time(), revalidated=True)
+
+    page = CachedPage(
+        url=url,
+        status=resp.status_code,
+        body=resp.text or "",
+        headers=_kept_headers(resp.headers),
+        fetched_at=time.time(),
+    )
+    if cache is not None:
+        cache.count("misses")
+        if resp.status_code == 200:
+            cache.put(page)
+    return page
+
+
+def store_page(url: str, body: str, cache: Optional[PageCache] = None):
+    """Met en cache une page obtenue hors du client HTTP (ex : fallback curl)."""
+    if cache is None or not body:
+        return
+    cache.put(CachedPage(url=url, status=200, body=body, fetched_at=time.time()))
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_cache: Optional[PageCache] = None
+_cache_loaded = False
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Cache partagé, ou None si désactivé dans config.json."""
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        with _cache_lock:
+            if not _cache_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("page_cache", {}) or {}
+                except Exception:
+                    cfg = {}
+                _cache = PageCache.from_config(cfg) if cfg.get("enabled", True) else None
+                _cache_loaded = True
+    return _cache
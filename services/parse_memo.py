@@ -0,0 +1,316 @@
+"""
+parse_memo.py - Mémoïsation des résultats de parsing
+====================================================
+
+Une fiche IAFD / TheNude change rarement : quand le corps téléchargé est
+identique octet pour octet au précédent, relancer ``_parse`` (et le
+nettoyage des awards IAFD) ne sert à rien. Le dict normalisé est conservé
+dans la base annexe (``data/database.sqlite``), table ``parse_memo``.
+
+Clé : (classe de scraper, version du parseur, sha256 du corps). L'URL entre
+dans le hash : certains parseurs en dépendent (id IAFD, liens Babepedia).
+
+La version est calculée automatiquement (``scraper_version``) : empreinte
+du code source de la classe (et de ses bases dans ``services.scrapers``),
+des fonctions utilitaires du module qu'elle appelle, des modules importés
+dans ses méthodes (``utils.normalizer`` pour les awards), du backend de
+parsing effectif et des versions de BeautifulSoup / lxml. Modifier un
+sélecteur change donc la clé : un ancien résultat n'est jamais resservi.
+``PARSER_VERSION`` (attribut de classe) permet de forcer une invalidation
+quand le code n'est pas disponible (exécutable figé).
+
+Seul le résultat de ``_parse`` (la page elle-même) est mémorisé : les
+requêtes secondaires (awards IAFD, ``ScraperBase._complete``) sont refaites
+après chaque lecture du mémo. Une page awards en échec (403, disjoncteur,
+timeout) ne fige donc pas un résultat dégradé. Les entrées ont en plus un
+âge maximal, pour ne pas conserver indéfiniment des pages disparues.
+
+Configuration (section ``parse_memo`` de config.json) :
+    enabled       : False pour désactiver la mémoïsation
+    max_entries   : nombre maximal d'entrées (éviction LRU)
+    max_age_hours : âge maximal d'un résultat mémorisé
+
+Usage :
+    from services.parse_memo import get_parse_memo
+    memo = get_parse_memo()
+    data = memo.get(scraper, html, url)     # None si absent
+    memo.put(scraper, html, url, data)
+"""
+
+import hashlib
+import inspect
+import json
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from services.sidecar_db import connect_sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+HOUR = 3600
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_AGE     = 7 * 24 * HOUR
+
+_IDENT_RE = re.compile(r"\b[A-Za-z_][A-Za-z0-9_]*\b")
+_LOCAL_IMPORT_RE = re.compile(r"^\s*from\s+([\w.]+)\s+import\b|^\s*import\s+([\w.]+)", re.M)
+
+
+# ---------------------------------------------------------------------------
+# Version d'un scraper
+# ---------------------------------------------------------------------------
+
+_versions: Dict[type, str] = {}
+_versions_lock = threading.Lock()
+
+
+def _safe_source(obj: Any) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return ""
+
+
+def _library_versions() -> str:
+    parts = []
+    for name in ("bs4", "lxml"):
+        mod = sys.modules.get(name)
+        parts.append(f"{name}={getattr(mod, '__version__', '')}")
+    return ";".join(parts)
+
+
+def scraper_version(cls: type) -> str:
+    """Empreinte (hex, 16 caractères) du code dont dépend ``cls._parse``."""
+    with _versions_lock:
+        cached = _versions.get(cls)
+    if cached:
+        return cached
+
+    module = sys.modules.get(cls.__module__)
+    chunks = [f"{cls.__module__}.{cls.__qualname__}", str(getattr(cls, "PARSER_VERSION", ""))]
+
+    # Classe et bases définies dans le même module (ScraperBase.make_soup compris)
+    sources = [_safe_source(k) for k in cls.__mro__ if k.__module__ == cls.__module__]
+    chunks.extend(sources)
+
+    # Fonctions du module appelées par ces classes (transitivement)
+    seen = set()
+    pending = list(sources)
+    while pending and module is not None:
+        src = pending.pop()
+        for name in set(_IDENT_RE.findall(src)) - seen:
+            obj = getattr(module, name, None)
+            if inspect.isfunction(obj) and obj.__module__ == module.__name__:
+                seen.add(name)
+                fn_src = _safe_source(obj)
+                chunks.append(fn_src)
+                pending.append(fn_src)
+
+    # Modules importés dans les méthodes (ex : utils.normalizer pour les awards)
+    for src in sources:
+        for a, b in _LOCAL_IMPORT_RE.findall(src):
+            mod = sys.modules.get(a or b)
+            if mod is None:
+                try:
+                    mod = __import__(a or b, fromlist=["_"])
+                except Exception:
+                    continue
+            chunks.append(_safe_source(mod))
+
+    try:
+        from services.html_parse import get_parse_settings
+        source_name = getattr(cls, "SOURCE_NAME", "")
+        chunks.append(get_parse_settings().backend_for(source_name, getattr(cls, "PARSER_BACKEND", None)))
+    except Exception:
+        pass
+    chunks.append(_library_versions())
+
+    digest = hashlib.sha256("\x00".join(chunks).encode("utf-8")).hexdigest()[:16]
+    with _versions_lock:
+        _versions[cls] = digest
+    return digest
+
+
+def body_hash(html: str, url: str = "") -> str:
+    h = hashlib.sha256((url or "").encode("utf-8"))
+    h.update(b"\x00")
+    h.update((html or "").encode("utf-8"))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Stockage
+# ---------------------------------------------------------------------------
+
+class ParseMemo:
+    """
+    Table ``parse_memo`` de la base annexe.
+
+    Paramètres
+    ----------
+    db_path     : chemin de la base (None = ``data.database_path`` de config.json)
+    max_entries : nombre maximal d'entrées conservées
+    max_age     : âge maximal (secondes) d'un résultat servi
+    """
+
+    def __init__(self, db_path: Optional[str] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.db_path = db_path
+        self.max_entries = max(int(max_entries), 1)
+        self.max_age = max_age
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pruned: set = set()    # scrapers dont les anciennes versions ont été purgées
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None,
+                    db_path: Optional[str] = None) -> "ParseMemo":
+        """Construit la mémoïsation depuis la section ``parse_memo`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            db_path=db_path,
+            max_entries=int(cfg.get("max_entries", DEFAULT_MAX_ENTRIES)),
+            max_age=float(cfg.get("max_age_hours", DEFAULT_MAX_AGE / HOUR)) * HOUR,
+        )
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect_sidecar(self.db_path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _key(scraper: Any, html: str, url: str):
+        cls = scraper if isinstance(scraper, type) else type(scraper)
+        return cls.__qualname__, scraper_version(cls), body_hash(html, url)
+
+    def _prune_old_versions(self, conn, name: str, version: str):
+        """Supprime une fois par session les résultats d'anciennes versions du scraper."""
+        if name in self._pruned:
+            return
+        self._pruned.add(name)
+        cur = conn.execute("DELETE FROM parse_memo WHERE scraper = ? AND version != ?", (name, version))
+        if cur.rowcount:
+            conn.commit()
+            print(f"[PARSE_MEMO] {name} : {cur.rowcount} résultat(s) d'une ancienne version purgé(s)")
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, scraper: Any, html: str, url: str = "") -> Optional[Dict[str, Any]]:
+        """Dict mémorisé pour ce corps de page, ou None."""
+        name, version, sha = self._key(scraper, html, url)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._db()
+                self._prune_old_versions(conn, name, version)
+                row = conn.execute(
+                    "SELECT result, created_at FROM parse_memo "
+                    "WHERE scraper = ? AND version = ? AND body_sha = ?",
+                    (name, version, sha),
+                ).fetchone()
+                if row is None or now - row["created_at"] > self.max_age:
+                    self.misses += 1
+                    return None
+                conn.execute(
+                    "UPDATE parse_memo SET last_used = ? WHERE scraper = ? AND version = ? AND body_sha = ?",
+                    (now, name, version, sha),
+                )
+                conn.commit()
+                self.hits += 1
+            return json.loads(row["result"])
+        except Exception as e:
+            print(f"[PARSE_MEMO] Lecture impossible : {e}")
+            return None
+
+    def put(self, scraper: Any, html: str, url: str, data: Dict[str, Any]):
+        """Mémorise le dict normalisé d'un corps de page (résultat de ``_parse``, avant ``_complete``)."""
+        if not data:
+            return
+        name, version, sha = self._key(scraper, html, url)
+        now = time.time()
+        try:
+            payload = json.dumps(data, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return   # résultat non sérialisable : on ne mémorise pas
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute(
+                    """INSERT OR REPLACE INTO parse_memo
+                       (scraper, version, body_sha, result, created_at, last_used)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (name, version, sha, payload, now, now),
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._evict(conn)
+                conn.commit()
+        except Exception as e:
+            print(f"[PARSE_MEMO] Écriture impossible : {e}")
+
+    def _evict(self, conn):
+        """Éviction LRU au-delà de ``max_entries`` et des entrées trop vieilles."""
+        conn.execute("DELETE FROM parse_memo WHERE created_at < ?", (time.time() - self.max_age,))
+        conn.execute(
+            """DELETE FROM parse_memo WHERE rowid IN (
+                   SELECT rowid FROM parse_memo ORDER BY last_used DESC LIMIT -1 OFFSET ?
+               )""",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute("DELETE FROM parse_memo")
+                conn.commit()
+        except Exception:
+            pass
+
+    def format_stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"{self.hits}/{total} parses évités ({rate:.0f}%)"
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_memo: Optional[ParseMemo] = None
+_memo_loaded = False
+_memo_lock = threading.Lock()
+
+
+def get_parse_memo() -> Optional[ParseMemo]:
+    """Mémoïsation partagée, ou None si désactivée dans config.json."""
+    global _memo, _memo_loaded
+    if not _memo_loaded:
+        with _memo_lock:
+            if not _memo_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("parse_memo", {}) or {}
+                except Exception:
+                    cfg = {}
+                _memo = ParseMemo.from_config(cfg) if cfg.get("enabled", True) else None
+                _memo_loaded = True
+    return _memo
@@ -0,0 +1,354 @@
+"""
+parse_pool.py - Parsing HTML dans un pool de processus
+======================================================
+
+Le parsing d'une grosse page (IAFD avec awards, longues fiches FreeOnes)
+est purement CPU : dans un scraping multi-performers, les threads réseau
+se retrouvent sérialisés derrière le GIL. Ce module déporte
+``ScraperBase._parse`` dans un ``ProcessPoolExecutor`` :
+
+- entrée : octets HTML bruts (UTF-8) + nom de la classe de scraper + URL ;
+- sortie : le dict normalisé (objets simples, picklables) ;
+- pool « chaud » : les processus sont démarrés et ont importé
+  ``services.scrapers`` / lxml avant la première page (``warm()``, appelé
+  au lancement d'un batch) ;
+- soumission par lots (``chunk_size`` pages par tâche) pour amortir le
+  coût de sérialisation entre processus : ``parse_many`` pour une liste
+  connue d'avance ; ``parse`` / ``submit`` regroupent les pages arrivées
+  pendant ``batch_window_ms`` (threads de scraping concurrents) ;
+- en cas de pool cassé (processus tué), repli sur un parse local.
+
+Seul ``_parse`` (page principale, sans réseau) part dans le pool. Les
+requêtes secondaires (page awards d'IAFD) sont faites par
+``ScraperBase._complete`` dans le processus principal, avec son limiteur
+de débit, son disjoncteur et son cache : la politesse par domaine ne se
+multiplie pas par le nombre de processus.
+
+Configuration (section ``parse_pool`` de config.json) :
+    enabled         : True pour activer le pool (False par défaut : parse local)
+    max_workers     : nombre de processus (0 / null = nombre de cœurs)
+    chunk_size      : pages par tâche
+    batch_window_ms : attente maximale d'autres pages avant d'envoyer un lot incomplet
+
+Usage :
+    from services.parse_pool import get_parse_pool
+    pool = get_parse_pool()                 # None si désactivé
+    data = pool.parse(scraper, html, url)   # bloquant, GIL libéré pendant l'attente
+    for idx, data in pool.parse_many(jobs): # jobs = [(scraper, html, url), ...]
+        ...
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_CHUNK_SIZE   = 4
+DEFAULT_BATCH_WINDOW = 0.02
+
+# Vrai dans les processus de travail : un scraper n'y redélègue jamais au pool
+_IN_WORKER = False
+
+Job = Tuple[Any, str, str]   # (scraper ou nom de classe, html, url)
+
+
+def _default_workers() -> int:
+    return max(os.cpu_count() or 1, 1)
+
+
+# ---------------------------------------------------------------------------
+# Côté processus de travail (fonctions de module : picklables sous Windows)
+# ---------------------------------------------------------------------------
+
+def _init_worker():
+    """Initialisation d'un processus : imports lourds faits une seule fois."""
+    global _IN_WORKER
+    _IN_WORKER = True
+    from services import scrapers  # noqa: F401  (BS4, lxml, regex compilées)
+    from services.html_parse import get_parse_settings
+    get_parse_settings()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _parse_one(cls_name: str, body: bytes, url: str) -> Dict[str, Any]:
+    from services import scrapers
+    scraper = getattr(scrapers, cls_name)()
+    html = body.decode("utf-8", errors="replace")
+    return scraper._parse(scraper.make_soup(html), url)
+
+
+def _parse_chunk(chunk: List[Tuple[int, str, bytes, str]]) -> List[Tuple[int, Optional[Dict], str]]:
+    """Parse un lot de pages ; une erreur n'interrompt pas le reste du lot."""
+    out = []
+    for idx, cls_name, body, url in chunk:
+        try:
+            out.append((idx, _parse_one(cls_name, body, url), ""))
+        except Exception as e:
+            out.append((idx, None, f"{type(e).__name__}: {e}"))
+    return out
+
+
+def _class_name(scraper: Any) -> str:
+    return scraper if isinstance(scraper, str) else type(scraper).__name__
+
+
+def _parse_locally(cls_name: str, html: str, url: str) -> Dict[str, Any]:
+    from services import scrapers
+    scraper = getattr(scrapers, cls_name)()
+    return scraper._parse(scraper.make_soup(html), url)
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+class ParsePool:
+    """
+    Pool de processus dédié au parsing.
+
+    Paramètres
+    ----------
+    max_workers  : nombre de processus (None = nombre de cœurs)
+    chunk_size   : pages par tâche
+    batch_window : attente maximale (secondes) d'autres pages avant
+                   d'envoyer un lot incomplet (``submit``)
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 batch_window: float = DEFAULT_BATCH_WINDOW):
+        self.max_workers = int(max_workers or _default_workers())
+        self.chunk_size = max(int(chunk_size), 1)
+        self.batch_window = max(float(batch_window), 0.0)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.broken = False
+        self.warmed = False
+        # Pages soumises une à une, en attente de former un lot
+        self._queue: List[Tuple[Future, str, bytes, str]] = []
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None) -> "ParsePool":
+        """Construit le pool depuis la section ``parse_pool`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            max_workers=cfg.get("max_workers") or None,
+            chunk_size=int(cfg.get("chunk_size") or DEFAULT_CHUNK_SIZE),
+            batch_window=float(cfg.get("batch_window_ms", DEFAULT_BATCH_WINDOW * 1000)) / 1000,
+        )
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=_init_worker
+                    )
+        return self._executor
+
+    def warm(self) -> int:
+        """Démarre tous les processus (imports faits) ; retourne le nombre de processus prêts."""
+        if self.broken:
+            return 0
+        pool = self._pool()
+        try:
+            pids = {f.result() for f in [pool.submit(_ping) for _ in range(self.max_workers * 2)]}
+        except BrokenProcessPool:
+            self._mark_broken()
+            return 0
+        self.warmed = True
+        print(f"[PARSE_POOL] {len(pids)} processus prêts")
+        return len(pids)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def _mark_broken(self):
+        if not self.broken:
+            print("[PARSE_POOL] Pool de processus indisponible, parse local")
+        self.broken = True
+        self.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    def submit(self, scraper: Any, html: str, url: str) -> Future:
+        """
+        Soumet une page ; le Future donne le dict normalisé. Les pages
+        soumises depuis plusieurs threads sont regroupées en lots de
+        ``chunk_size`` (attente maximale ``batch_window``).
+        """
+        cls_name = _class_name(scraper)
+        fut: Future = Future()
+        if self.broken:
+            try:
+                fut.set_result(_parse_locally(cls_name, html, url))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        with self._cond:
+            self._queue.append((fut, cls_name, (html or "").encode("utf-8"), url))
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name="parse-pool-dispatch", daemon=True
+                )
+                self._dispatcher.start()
+            self._cond.notify()
+        return fut
+
+    def _dispatch_loop(self):
+        """Forme les lots de pages soumises une à une et les envoie au pool."""
+        while True:
+            with self._cond:
+                if not self._queue:
+                    # plus rien à envoyer : le thread s'arrête, submit() le relance
+                    if not self._cond.wait(timeout=5.0) and not self._queue:
+                        self._dispatcher = None
+                        return
+                    continue
+                deadline = time.monotonic() + self.batch_window
+                while len(self._queue) < self.chunk_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.chunk_size]
+                del self._queue[:self.chunk_size]
+            self._send_batch(batch)
+
+    def _send_batch(self, batch: List[Tuple[Future, str, bytes, str]]):
+        futures = [fut for fut, _, _, _ in batch]
+        items = [(i, cls_name, body, url) for i, (_, cls_name, body, url) in enumerate(batch)]
+
+        def resolve(task: Future):
+            try:
+                results = task.result()
+            except Exception as e:   # BrokenProcessPool : parse() se replie en local
+                for fut in futures:
+                    fut.set_exception(e)
+                return
+            for idx, data, err in results:
+                if err:
+                    futures[idx].set_exception(RuntimeError(err))
+                else:
+                    futures[idx].set_result(data)
+
+        try:
+            self._pool().submit(_parse_chunk, items).add_done_callback(resolve)
+        except Exception as e:
+            for fut in futures:
+                fut.set_exception(e if isinstance(e, BrokenProcessPool) else BrokenProcessPool(str(e)))
+
+    def parse(self, scraper: Any, html: str, url: str) -> Dict[str, Any]:
+        """Parse une page dans le pool (bloquant). Repli local si le pool est cassé."""
+        try:
+            return self.submit(scraper, html, url).result()
+        except BrokenProcessPool:
+            self._mark_broken()
+            return _parse_locally(_class_name(scraper), html, url)
+
+    def format_stats(self) -> str:
+        state = "indisponible" if self.broken else ("chaud" if self.warmed else "à froid")
+        return f"Pool de parse : {self.max_workers} processus ({state}) · lots de {self.chunk_size} page(s)"
+
+    def parse_many(
+        self,
+        jobs: Sequence[Job],
+        on_result: Optional[Callable[[int, Optional[Dict[str, Any]]], None]] = None,
+    ) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Parse un lot de pages par paquets de ``chunk_size``.
+        Produit des couples (index du job, dict ou None en cas d'erreur) dans
+        l'ordre d'arrivée ; ``on_result`` est appelé sur le thread appelant.
+        """
+        items = [(i, _class_name(s), (h or "").encode("utf-8"), u) for i, (s, h, u) in enumerate(jobs)]
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        done_idx = set()
+
+        def emit(batch):
+            for idx, data, err in batch:
+                if err:
+                    print(f"[PARSE_POOL] Erreur parse {jobs[idx][2]} : {err}")
+                done_idx.add(idx)
+                if on_result:
+                    on_result(idx, data)
+                yield idx, data
+
+        if not self.broken and chunks:
+            try:
+                pool = self._pool()
+                # Fenêtre bornée : pas plus de 2 lots en attente par processus
+                window = self.max_workers * 2
+                queue = iter(chunks)
+                pending = set()
+                for chunk in queue:
+                    pending.add(pool.submit(_parse_chunk, chunk))
+                    if len(pending) >= window:
+                        break
+                while pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        yield from emit(fut.result())
+                    for chunk in queue:
+                        pending.add(pool.submit(_parse_chunk, chunk))
+                        if len(pending) >= window:
+                            break
+                return
+            except BrokenProcessPool:
+                self._mark_broken()
+
+        # Repli local (pool désactivé ou cassé en cours de route)
+        remaining = [it for it in items if it[0] not in done_idx]
+        yield from emit(_parse_chunk(remaining))
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_pool: Optional[ParsePool] = None
+_pool_loaded = False
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ParsePool]:
+    """Pool partagé, ou None si désactivé (ou si l'on est déjà dans un processus de travail)."""
+    global _pool, _pool_loaded
+    if _IN_WORKER:
+        return None
+    if not _pool_loaded:
+        with _pool_lock:
+            if not _pool_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("parse_pool", {}) or {}
+                except Exception:
+                    cfg = {}
+                _pool = ParsePool.from_config(cfg) if cfg.get("enabled", False) else None
+                _pool_loaded = True
+    return _pool
+
+
+def shutdown_parse_pool():
+    """Arrête le pool partagé (fin d'un job batch, fermeture de l'application)."""
+    if _pool is not None:
+        _pool.shutdown()
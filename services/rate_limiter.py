@@ -0,0 +1,277 @@
+"""
+rate_limiter.py - Ordonnanceur de politesse par domaine pour StashMaster V2
+===========================================================================
+
+Remplace les ``time.sleep()`` globaux (SourceFinder, url_validator) : chaque
+domaine a son propre seau à jetons, les requêtes vers des hôtes différents
+se chevauchent librement, et un même hôte ne dépasse jamais son débit.
+
+- Seau à jetons par domaine (``requests_per_second`` + ``burst``), calculé
+  en « temps virtuel » (GCRA) : ``reserve()`` ne bloque pas et retourne le
+  délai à attendre, utilisable aussi bien depuis un thread que depuis asyncio.
+- Concurrence globale bornée (``max_concurrency`` requêtes en vol).
+- 429 / 503 : respect de ``Retry-After`` (secondes ou date HTTP).
+- Erreurs répétées : backoff exponentiel avec jitter, par domaine.
+
+Configuration (section ``rate_limit`` de config.json) :
+    requests_per_second : débit par défaut d'un domaine
+    burst               : rafale autorisée au-delà du débit
+    max_concurrency     : requêtes simultanées, tous domaines confondus
+    backoff_base        : premier délai de backoff (secondes)
+    backoff_max         : délai maximal (backoff et Retry-After)
+    domain_rates        : {"iafd.com": 1.0, ...} débit par domaine
+
+Usage :
+    from services.rate_limiter import get_rate_limiter
+    limiter = get_rate_limiter()
+    with limiter.slot(url):
+        resp = session.get(url)
+    limiter.on_response(url, resp.status_code, resp.headers)
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+DEFAULT_RATE            = 2.0    # requêtes / seconde / domaine
+DEFAULT_BURST           = 4
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_BACKOFF_BASE    = 1.0
+DEFAULT_BACKOFF_MAX     = 60.0
+
+# Statuts signifiant « ralentissez »
+THROTTLE_STATUSES = (429, 503)
+
+
+def _domain(url: str) -> str:
+    try:
+        netloc = (urlparse(url).netloc or "").lower()
+    except Exception:
+        return ""
+    netloc = netloc.split("@")[-1].split(":")[0]
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Délai (secondes) annoncé par un en-tête Retry-After, ou None."""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        target = parsedate_to_datetime(value).timestamp()
+    except Exception:
+        return None
+    return max(target - (now if now is not None else time.time()), 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Seau à jetons d'un domaine
+# ---------------------------------------------------------------------------
+
+class DomainBucket:
+    """
+    État de politesse d'un domaine.
+
+    ``tat`` (theoretical arrival time) est l'instant à partir duquel le seau
+    est de nouveau plein ; chaque réservation l'avance de ``1 / rate``.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 0.01)
+        self.burst = max(int(burst), 1)
+        self.tat = 0.0
+        self.blocked_until = 0.0
+        self.failures = 0
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    def reserve(self, now: float) -> float:
+        """Réserve un jeton ; retourne l'instant (monotonic) où envoyer la requête."""
+        tolerance = self.interval * (self.burst - 1)
+        start = max(now, self.blocked_until)
+        send_at = max(start, self.tat - tolerance)
+        self.tat = max(self.tat, send_at) + self.interval
+        return send_at
+
+
+# ---------------------------------------------------------------------------
+# Ordonnanceur
+# ---------------------------------------------------------------------------
+
+class RateLimiter:
+    """
+    Limiteur de débit par domaine + concurrence globale.
+
+    Paramètres
+    ----------
+    rate            : requêtes/seconde par défaut pour un domaine
+    burst           : rafale tolérée
+    max_concurrency : requêtes simultanées (tous domaines)
+    backoff_base    : premier délai de backoff après une erreur
+    backoff_max     : plafond du backoff et de Retry-After
+    domain_rates    : débits spécifiques {domaine: req/s}
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        domain_rates: Optional[Dict[str, float]] = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.domain_rates = dict(domain_rates or {})
+        self._buckets: Dict[str, DomainBucket] = {}
+        self._lock = threading.Lock()
+        self._global = threading.BoundedSemaphore(self.max_concurrency)
+        self.waited = 0.0   # temps total passé à attendre (statistique)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None) -> "RateLimiter":
+        """Construit le limiteur depuis la section ``rate_limit`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            rate=float(cfg.get("requests_per_second", DEFAULT_RATE)),
+            burst=int(cfg.get("burst", DEFAULT_BURST)),
+            max_concurrency=int(cfg.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)),
+            backoff_base=float(cfg.get("backoff_base", DEFAULT_BACKOFF_BASE)),
+            backoff_max=float(cfg.get("backoff_max", DEFAULT_BACKOFF_MAX)),
+            domain_rates={k: float(v) for k, v in (cfg.get("domain_rates") or {}).items()},
+        )
+
+    # ------------------------------------------------------------------
+    # Seaux
+    # ------------------------------------------------------------------
+
+    def _rate_for(self, domain: str) -> float:
+        for known, rate in self.domain_rates.items():
+            if domain == known or domain.endswith("." + known):
+                return rate
+        return self.rate
+
+    def _bucket(self, domain: str) -> DomainBucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = DomainBucket(self._rate_for(domain), self.burst)
+            self._buckets[domain] = bucket
+        return bucket
+
+    # ------------------------------------------------------------------
+    # Réservation
+    # ------------------------------------------------------------------
+
+    def reserve(self, url: str) -> float:
+        """
+        Réserve le prochain créneau du domaine de ``url`` sans bloquer.
+        Retourne le délai (secondes) à attendre avant d'envoyer la requête.
+        """
+        now = time.monotonic()
+        with self._lock:
+            send_at = self._bucket(_domain(url)).reserve(now)
+            delay = max(send_at - now, 0.0)
+            self.waited += delay
+        return delay
+
+    def acquire(self, url: str):
+        """Attend le créneau du domaine puis une place dans la concurrence globale."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        self._global.acquire()
+
+    def release(self, url: str = ""):
+        self._global.release()
+
+    @contextmanager
+    def slot(self, url: str):
+        self.acquire(url)
+        try:
+            yield
+        finally:
+            self.release(url)
+
+    # ------------------------------------------------------------------
+    # Retour d'information
+    # ------------------------------------------------------------------
+
+    def _backoff(self, failures: int) -> float:
+        delay = min(self.backoff_base * (2 ** max(failures - 1, 0)), self.backoff_max)
+        # jitter « plein » sur la moitié haute : évite que les threads repartent ensemble
+        return delay * random.uniform(0.5, 1.0)
+
+    def on_response(self, url: str, status: Optional[int], headers=None):
+        """Met à jour l'état du domaine après une réponse HTTP."""
+        domain = _domain(url)
+        with self._lock:
+            bucket = self._bucket(domain)
+            if status in THROTTLE_STATUSES:
+                bucket.failures += 1
+                retry_after = None
+                try:
+                    retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+                except Exception:
+                    retry_after = None
+                delay = retry_after if retry_after is not None else self._backoff(bucket.failures)
+                delay = min(delay, self.backoff_max)
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+                print(f"[RATE] {domain} : HTTP {status}, pause {delay:.1f}s")
+            elif status is not None and status < 500:
+                bucket.failures = 0
+
+    def on_error(self, url: str):
+        """Erreur réseau (timeout, connexion refusée) : backoff du domaine."""
+        with self._lock:
+            bucket = self._bucket(_domain(url))
+            bucket.failures += 1
+            delay = self._backoff(bucket.failures)
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+
+    def blocked_for(self, url: str) -> float:
+        """Temps restant (secondes) avant que le domaine soit de nouveau autorisé."""
+        with self._lock:
+            bucket = self._buckets.get(_domain(url))
+            if bucket is None:
+                return 0.0
+            return max(bucket.blocked_until - time.monotonic(), 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limiteur partagé (créé à la première utilisation)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("rate_limit", {}) or {}
+                except Exception:
+                    cfg = {}
+                _limiter = RateLimiter.from_config(cfg)
+    return _limiter
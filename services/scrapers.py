@@ -8,12 +8,26 @@ Chaque scraper retourne un dict avec les clés normalisées :
     career_start, career_end, tattoos, piercings, awards
 """
 
+import queue
 import re
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from urllib.parse import urlparse
 
+from services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from services.fallback_fetcher import get_fallback_fetcher
+from services.html_parse import get_parse_settings, parse_html
+from services.http_client import get_http_client
+from services.page_cache import CachedPage, fetch_page, get_page_cache, store_page
+from services.parse_memo import get_parse_memo
+from services.parse_pool import get_parse_pool
+from services.source_fingerprints import (
+    FAILED, PARSED, UNCHANGED, ChangeReport, body_sha, get_source_fingerprints,
+)
+
 
 # ---------------------------------------------------------------------------
 # Constantes
@@ -50,7 +64,25 @@ def _clean_career(val: str) -> str:
 
 
 def _fetch_with_curl(url: str) -> Optional[str]:
-    """Fallback utilisant curl pour contourner les blocages 403."""
+    """
+    Fallback utilisant curl pour contourner les blocages 403.
+    Les demandes simultanées partagent un même processus ``curl --parallel``
+    (``services.fallback_fetcher``). Sauté si le domaine est disjoncté ; un
+    échec compte pour le disjoncteur (le 403 qui l'a précédé est neutre côté
+    client HTTP).
+    """
+    breaker = get_circuit_breaker()
+    if breaker is not None and not breaker.allow(url):
+        return None
+    fetcher = get_fallback_fetcher()
+    html = fetcher.fetch(url) if fetcher is not None else _curl_once(url)
+    if breaker is not None:
+        breaker.record(url, html is not None)
+    return html
+
+
+def _curl_once(url: str) -> Optional[str]:
+    """Un processus curl pour une URL (``fallback_fetcher`` désactivé)."""
     import subprocess
     try:
         # On utilise curl avec des headers standards et un timeout
@@ -59,42 +91,78 @@ def _fetch_with_curl(url: str) -> Optional[str]:
             "-A", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "-H", "Accept-Language: en-US,en;q=0.9",
             "--connect-timeout", str(TIMEOUT),
+            "--max-time", str(TIMEOUT * 2),
+            # Statut final en dernière ligne : même règle que fallback_fetcher
+            "-w", "\n%{http_code}",
             url
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore',
+                                timeout=TIMEOUT * 2 + 5)
         if result.returncode == 0 and result.stdout:
-            return result.stdout
+            body, _, code = result.stdout.rpartition("\n")
+            status = int(code) if code.strip().isdigit() else 0
+            # Seules les réponses finales 2xx/3xx comptent : une page de
+            # challenge ou d'erreur (403, 503...) n'est pas la page demandée
+            if 200 <= status < 400 and body:
+                return body
+            print(f"[SCRAPER] curl : HTTP {status or '?'} pour {url}")
     except Exception:
         pass
     return None
 
 
-def _fetch(url: str) -> Optional[BeautifulSoup]:
-    """Télécharge une page et retourne un objet BeautifulSoup, ou None."""
+def _fetch_page(url: str, use_cache: bool = True,
+                validators: Optional[Dict[str, str]] = None) -> Optional[CachedPage]:
+    """
+    Télécharge une page (via le cache disque). Retourne la page (statut 200,
+    ou 304 sans corps si ``validators`` a permis une requête conditionnelle
+    hors cache), ou None en cas d'échec.
+    """
+    cache = get_page_cache() if use_cache else None
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.raise_for_status()
-        print(f"[SCRAPER] SUCCES: {url}")
-        return BeautifulSoup(resp.text, "html.parser")
-    except Exception as e:
-        # Fallback pour les erreurs 403 (Forbidden) fréquentes sur IAFD/Babepedia
-        resp_obj = getattr(e, 'response', None)
-        status_code = getattr(resp_obj, 'status_code', 0)
-        is_forbidden = status_code == 403
-        
-        if is_forbidden or "403" in str(e):
-            html = _fetch_with_curl(url)
-            if html:
-                print(f"[SCRAPER] SUCCES: {url}")
-                return BeautifulSoup(html, "html.parser")
-        
-        print(f"[SCRAPER] ECHEC: {url}")
+        page = fetch_page(url, headers=HEADERS, timeout=TIMEOUT, cache=cache, validators=validators)
+    except CircuitOpenError as e:
+        # Domaine disjoncté, aucune copie en cache : ni réseau ni curl
+        print(f"[SCRAPER] INDISPONIBLE ({e}): {url}")
         return None
+    except Exception:
+        page = None
+
+    if page is not None and (page.ok or page.status == 304):
+        origin = " (cache)" if page.from_cache else (" (inchangée)" if page.status == 304 else "")
+        print(f"[SCRAPER] SUCCES{origin}: {url}")
+        return page
+
+    # Fallback pour les erreurs 403 (Forbidden) fréquentes sur IAFD/Babepedia
+    if page is not None and page.status == 403:
+        html = _fetch_with_curl(url)
+        if html:
+            store_page(url, html, cache)
+            print(f"[SCRAPER] SUCCES: {url}")
+            return CachedPage(url=url, status=200, body=html, fetched_at=time.time())
+
+    print(f"[SCRAPER] ECHEC: {url}")
+    return None
+
+
+def _fetch_html(url: str, use_cache: bool = True) -> Optional[str]:
+    """Télécharge une page (via le cache disque) et retourne son HTML, ou None."""
+    page = _fetch_page(url, use_cache=use_cache)
+    return page.body if page is not None and page.ok else None
+
+
+def _fetch(url: str, use_cache: bool = True,
+           regions: Optional[Tuple[str, ...]] = None) -> Optional[BeautifulSoup]:
+    """Télécharge une page et retourne un objet BeautifulSoup (limité à ``regions``), ou None."""
+    html = _fetch_html(url, use_cache=use_cache)
+    if html is None:
+        return None
+    return parse_html(html, regions=regions)
 
 
 def _parse_html(html_content: str) -> BeautifulSoup:
-    """Parse du HTML brut (pour les tests avec fichiers locaux)."""
-    return BeautifulSoup(html_content, "html.parser")
+    """Parse du HTML brut, page entière (pour les tests avec fichiers locaux)."""
+    return parse_html(html_content)
 
 
 def _extract_cm(text: str) -> str:
@@ -125,28 +193,98 @@ def _extract_year(text: str) -> str:
 # ---------------------------------------------------------------------------
 
 class ScraperBase:
-    """Classe de base pour tous les scrapers."""
+    """
+    Classe de base pour tous les scrapers.
+
+    PARSER_BACKEND : backend BS4 imposé par la source (None = config.json)
+    PARSE_REGIONS  : blocs de la page lus par ``_parse`` (voir
+                     ``services.html_parse``) ; None = page entière.
+                     Doit couvrir tout ce que ``_parse`` consulte, y compris
+                     les frères (find_next_sibling) : on déclare alors le
+                     conteneur commun.
+    STRONG_FIELDS  : champs que la source renseigne de façon fiable ; sert à
+                     décider si une source de secours peut combler les champs
+                     manquants (None = inconnu, la source est toujours lancée).
+    """
 
     SOURCE_NAME = "unknown"
+    PARSER_BACKEND: Optional[str] = None
+    PARSE_REGIONS: Optional[Tuple[str, ...]] = None
+    STRONG_FIELDS: Optional[frozenset] = None
 
-    def scrape(self, url: str) -> Dict[str, Any]:
-        """Scrape une URL et retourne un dict normalisé."""
-        soup = _fetch(url)
-        if soup is None:
-            return {}
-        data = self._parse(soup, url)
+    def make_soup(self, html_content: str) -> BeautifulSoup:
+        """Arbre BS4 de la page, limité aux régions déclarées par la source."""
+        backend = get_parse_settings().backend_for(self.SOURCE_NAME, self.PARSER_BACKEND)
+        return parse_html(html_content, backend=backend, regions=self.PARSE_REGIONS)
+
+    def scrape(self, url: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Scrape une URL et retourne un dict normalisé (use_cache=False force le réseau)."""
+        return self.scrape_incremental(url, use_cache=use_cache)[0]
+
+    def scrape_incremental(self, url: str, use_cache: bool = True) -> Tuple[Dict[str, Any], str]:
+        """
+        Comme ``scrape``, en s'appuyant sur l'empreinte de la page
+        (``services.source_fingerprints``) : requête conditionnelle, et pas
+        de parse si le serveur répond 304 ou si le corps est identique.
+        Retourne ``(dict, statut)`` avec statut ``unchanged``, ``parsed`` ou ``failed``.
+        """
+        prints = get_source_fingerprints() if use_cache else None
+        previous = prints.get(url) if prints is not None else None
+        if previous is not None and not previous.result:
+            previous = None
+        page = _fetch_page(url, use_cache=use_cache,
+                           validators=previous.validators() if previous is not None else None)
+        if page is None or (page.status == 304 and previous is None):
+            return {}, FAILED
+
+        if previous is not None and (page.status == 304 or body_sha(page.body) == previous.body_sha):
+            prints.record(url, self.SOURCE_NAME, page.headers, None, previous.result)
+            data = dict(previous.result)
+            status = UNCHANGED
+        else:
+            data = self.parse_page(page.body, url)
+            status = PARSED
         data['url'] = url
         data['source'] = self.SOURCE_NAME
-        return data
+        if prints is not None and status == PARSED:
+            prints.record(url, self.SOURCE_NAME, page.headers, page.body, data)
+        return data, status
 
     def scrape_from_html(self, html_content: str, url: str = "") -> Dict[str, Any]:
         """Scrape depuis du HTML brut (pour les tests locaux)."""
-        soup = _parse_html(html_content)
-        return self._parse(soup, url)
+        return self._complete(self._parse(self.make_soup(html_content), url), url)
+
+    def parse_page(self, html_content: str, url: str) -> Dict[str, Any]:
+        """
+        ``_parse`` d'une page téléchargée : résultat mémorisé si le corps est
+        identique à un parse précédent (``services.parse_memo``), sinon dans
+        le pool de processus s'il est activé (section ``parse_pool`` de
+        config.json), sinon localement. Puis ``_complete`` (requêtes
+        secondaires), toujours dans le processus courant et jamais
+        mémorisé : un échec de requête secondaire ne se fige pas dans le mémo.
+        """
+        memo = get_parse_memo()
+        if memo is not None:
+            cached = memo.get(self, html_content, url)
+            if cached is not None:
+                return self._complete(cached, url)
+        pool = get_parse_pool() if type(self).__module__ == __name__ else None
+        if pool is not None:
+            data = pool.parse(self, html_content, url)
+        else:
+            data = self._parse(self.make_soup(html_content), url)
+        if memo is not None:
+            memo.put(self, html_content, url, data)
+        return self._complete(data, url)
 
     def _parse(self, soup: BeautifulSoup, url: str) -> Dict[str, Any]:
+        """Parse de la page seule, sans réseau (exécutable dans le pool de processus)."""
         raise NotImplementedError
 
+    def _complete(self, data: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """Complète le résultat de ``_parse`` par des requêtes secondaires (aucune par défaut)."""
+        return data
+
     @staticmethod
     def _detect_url(url: str) -> bool:
         """Retourne True si l'URL correspond à cette source."""
@@ -170,6 +308,9 @@ class IAFDScraper(ScraperBase):
     """
 
     SOURCE_NAME = "IAFD"
+    # Colonne bio (col-sm-3), onglet "home" (mensurations), onglet awards
+    PARSE_REGIONS = ("h1", "div.col-sm-3", "div#home", "div#awards", "a[href*=awards.asp]")
+    AWARDS_REGIONS = ("div#awards",)
 
     @staticmethod
     def _detect_url(url: str) -> bool:
@@ -247,7 +388,12 @@ class IAFDScraper(ScraperBase):
         # --- Awards (détection automatique) ---
         # Objectif: si la page IAFD est trouvée, tenter systématiquement de trouver
         # les awards (via lien awards.asp?id=... ou fallback id=... dans l'URL).
-        awards_target_div = soup.find("div", id="awards")
+        # Ici, uniquement ce que contient la page : les requêtes vers
+        # awards.asp se font dans _complete (processus principal).
+        awards_inline_div = soup.find("div", id="awards")
+        if awards_inline_div:
+            data["awards"] = self._parse_awards(awards_inline_div)
+        data["_inline_awards"] = bool(awards_inline_div)
 
         awards_id = ""
         awards_link = soup.find("a", href=re.compile(r"awards\.asp\?id=[a-z0-9-]{8,}", re.I))
@@ -264,72 +410,7 @@ class IAFDScraper(ScraperBase):
             m_url = re.search(r'(?:[?&]|/)id=([a-z0-9-]{8,})\b', url, re.I)
             if m_url:
                 awards_id = m_url.group(1)
-
-        if not awards_id and re.search(r'perfid=', url, re.I):
-            # Fallback auto: résoudre perfid -> id via la page de recherche IAFD.
-            # Cela évite la dépendance au lien awards quand la page profil est incomplète.
-            try:
-                perfid_match = re.search(r'perfid=([^/&?]+)', url, re.I)
-                perfid = (perfid_match.group(1) if perfid_match else '').strip()
-
-                parsed = urlparse(url)
-                slug = (parsed.path or '').rstrip('/').split('/')[-1].replace('.htm', '')
-                query_name = (slug or perfid).replace('_', ' ').replace('-', ' ').strip()
-
-                if query_name:
-                    search_q = re.sub(r'\s+', '+', query_name)
-                    search_url = (
-                        "https://www.iafd.com/results.asp"
-                        f"?searchtype=comprehensive&searchstring={search_q}"
-                    )
-                    search_soup = _fetch(search_url)
-                    if search_soup:
-                        candidates = []
-                        for a in search_soup.find_all('a', href=True):
-                            href = a.get('href', '') or ''
-                            m_id = re.search(r'person\.rme/id=([a-z0-9-]{8,})\b', href, re.I)
-                            if not m_id:
-                                continue
-                            pid = m_id.group(1)
-                            txt = _clean(a.get_text(separator=' ')).lower()
-                            hay = f"{href.lower()} {txt}"
-
-                            score = 0
-                            if perfid and perfid.lower() in hay:
-                                score += 5
-                            for tok in [t for t in query_name.lower().split() if len(t) >= 3]:
-                                if tok in hay:
-                                    score += 1
-                            candidates.append((score, pid))
-
-                        if candidates:
-                            candidates.sort(key=lambda x: x[0], reverse=True)
-                            best_score, best_id = candidates[0]
-                            if best_id and best_score >= 1:
-                                awards_id = best_id
-            except Exception:
-                pass
-
-        if awards_id:
-            awards_url = f"https://www.iafd.com/awards.asp?id={awards_id}"
-            awards_soup = _fetch(awards_url)
-            if awards_soup:
-                full_awards_div = awards_soup.find("div", id="awards")
-                if full_awards_div:
-                    awards_target_div = full_awards_div
-
-            # Fallback robuste: certains profils exposent les awards directement
-            # sur person.rme/id=... même quand awards.asp retourne vide/404.
-            if not awards_target_div:
-                person_id_url = f"https://www.iafd.com/person.rme/id={awards_id}"
-                person_id_soup = _fetch(person_id_url)
-                if person_id_soup:
-                    person_awards_div = person_id_soup.find("div", id="awards")
-                    if person_awards_div:
-                        awards_target_div = person_awards_div
-
-        if awards_target_div:
-            data["awards"] = self._parse_awards(awards_target_div)
+        data["_awards_id"] = awards_id
 
         # --- Liens Sociaux / Externes ---
         ext_links = []
@@ -352,6 +433,86 @@ class IAFDScraper(ScraperBase):
 
         return data
 
+    def _complete(self, data: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """
+        Requêtes secondaires : page awards.asp (liste complète), résolution
+        perfid → id par la recherche IAFD si la fiche ne donne pas l'id.
+        """
+        data = dict(data)
+        awards_id = data.pop("_awards_id", "")
+        has_inline = data.pop("_inline_awards", False)
+
+        if not awards_id and re.search(r'perfid=', url, re.I):
+            awards_id = self._resolve_awards_id(url)
+
+        if awards_id:
+            awards_url = f"https://www.iafd.com/awards.asp?id={awards_id}"
+            awards_soup = _fetch(awards_url, regions=self.AWARDS_REGIONS)
+            full_awards_div = awards_soup.find("div", id="awards") if awards_soup else None
+            if full_awards_div:
+                data["awards"] = self._parse_awards(full_awards_div)
+
+            # Fallback robuste: certains profils exposent les awards directement
+            # sur person.rme/id=... même quand awards.asp retourne vide/404.
+            elif not has_inline:
+                person_id_url = f"https://www.iafd.com/person.rme/id={awards_id}"
+                person_id_soup = _fetch(person_id_url, regions=self.AWARDS_REGIONS)
+                if person_id_soup:
+                    person_awards_div = person_id_soup.find("div", id="awards")
+                    if person_awards_div:
+                        data["awards"] = self._parse_awards(person_awards_div)
+        return data
+
+    def _resolve_awards_id(self, url: str) -> str:
+        """
+        Fallback auto: résoudre perfid -> id via la page de recherche IAFD.
+        Cela évite la dépendance au lien awards quand la page profil est incomplète.
+        """
+        try:
+            perfid_match = re.search(r'perfid=([^/&?]+)', url, re.I)
+            perfid = (perfid_match.group(1) if perfid_match else '').strip()
+
+            parsed = urlparse(url)
+            slug = (parsed.path or '').rstrip('/').split('/')[-1].replace('.htm', '')
+            query_name = (slug or perfid).replace('_', ' ').replace('-', ' ').strip()
+            if not query_name:
+                return ""
+
+            search_q = re.sub(r'\s+', '+', query_name)
+            search_url = (
+                "https://www.iafd.com/results.asp"
+                f"?searchtype=comprehensive&searchstring={search_q}"
+            )
+            search_soup = _fetch(search_url, regions=("a[href]",))
+            if not search_soup:
+                return ""
+            candidates = []
+            for a in search_soup.find_all('a', href=True):
+                href = a.get('href', '') or ''
+                m_id = re.search(r'person\.rme/id=([a-z0-9-]{8,})\b', href, re.I)
+                if not m_id:
+                    continue
+                pid = m_id.group(1)
+                txt = _clean(a.get_text(separator=' ')).lower()
+                hay = f"{href.lower()} {txt}"
+
+                score = 0
+                if perfid and perfid.lower() in hay:
+                    score += 5
+                for tok in [t for t in query_name.lower().split() if len(t) >= 3]:
+                    if tok in hay:
+                        score += 1
+                candidates.append((score, pid))
+
+            if candidates:
+                candidates.sort(key=lambda x: x[0], reverse=True)
+                best_score, best_id = candidates[0]
+                if best_id and best_score >= 1:
+                    return best_id
+        except Exception:
+            pass
+        return ""
+
     def _parse_awards(self, awards_div) -> str:
         """
         Parse le bloc awards IAFD et retourne une liste d'awards nettoyés :
@@ -405,6 +566,7 @@ class FreeOnesScraper(ScraperBase):
     """
 
     SOURCE_NAME = "FreeOnes"
+    PARSE_REGIONS = ("li.hide-on-edit", ".social-links", "a")
 
     @staticmethod
     def _detect_url(url: str) -> bool:
@@ -539,6 +701,7 @@ class TheNudeScraper(ScraperBase):
     """
 
     SOURCE_NAME = "TheNude"
+    PARSE_REGIONS = ("li", "div.bio-more", "a")
 
     @staticmethod
     def _detect_url(url: str) -> bool:
@@ -693,6 +856,12 @@ class BabepediaScraper(ScraperBase):
     """
 
     SOURCE_NAME = "Babepedia"
+    # Tout le contenu principal (alias, info-grid, sections h2 + frères) ; hors barres latérales
+    PARSE_REGIONS = ("main", "div.social-icons", "a")
+    STRONG_FIELDS = frozenset({
+        "aliases", "birthdate", "birthplace", "country", "ethnicity", "hair_color", "eye_color",
+        "height", "weight", "measurements", "fake_tits", "tattoos", "career_length", "trivia", "bio_raw",
+    })
 
     @staticmethod
     def _detect_url(url: str) -> bool:
@@ -924,6 +1093,12 @@ class BoobpediaScraper(ScraperBase):
     """
 
     SOURCE_NAME = "Boobpedia"
+    PARSE_REGIONS = ("h1", "table[class*=infobox]", "table[class*=wikitable]",
+                     "div#mw-content-text", "div.mw-parser-output")
+    STRONG_FIELDS = frozenset({
+        "aliases", "birthdate", "birthplace", "country", "ethnicity", "hair_color", "eye_color",
+        "height", "weight", "measurements", "fake_tits", "tattoos", "career_length", "awards",
+    })
 
     @staticmethod
     def _detect_url(url: str) -> bool:
@@ -1061,6 +1236,13 @@ class XXXBiosScraper(ScraperBase):
     """
 
     SOURCE_NAME = "XXXBios"
+    STRONG_FIELDS = frozenset({
+        "aliases", "birthdate", "birthplace", "country", "ethnicity", "hair_color", "eye_color",
+        "height", "weight", "measurements", "fake_tits", "tattoos", "piercings", "career_length",
+        "awards", "trivia", "bio_raw",
+    })
+    # Pas de régions : _parse parcourt la page entière (find_next depuis les titres,
+    # tables et liens hors du contenu principal) ; la page est de toute façon petite.
 
     @staticmethod
     def _detect_url(url: str) -> bool:
@@ -1447,9 +1629,34 @@ class ScraperOrchestrator:
     """
     Orchestre le scraping depuis plusieurs URLs.
     Détecte automatiquement la source selon l'URL.
+
+    Par défaut les sources sont scrapées en parallèle (pool borné, au plus
+    ``per_domain_limit`` requêtes simultanées par site). Les valeurs par
+    défaut viennent de la section ``scrapers`` de config.json
+    (max_workers, per_domain_limit, max_total_time).
+
+    Couverture (sous-section ``scrapers.coverage``) : les champs cibles sont
+    ceux de ``DataMerger.FIELD_PRIORITY_OVERRIDE`` (hors ``ignore_fields``).
+    - ``plan_fallback`` ne garde, après la passe 1, que les sources de
+      secours dont les ``STRONG_FIELDS`` couvrent un champ encore manquant ;
+    - en cours de scraping, dès que chaque champ cible est confirmé par
+      ``min_confirmations`` sources, les sources ``low_priority`` non
+      terminées sont annulées (leur requête n'est pas envoyée si elles
+      attendaient leur créneau, leur résultat est ignoré sinon).
     """
 
-    def __init__(self):
+    MAX_WORKERS      = 6
+    PER_DOMAIN_LIMIT = 1
+
+    # Couverture des champs (valeurs par défaut de ``scrapers.coverage``)
+    MIN_CONFIRMATIONS    = 2
+    LOW_PRIORITY_SOURCES = ("XXXBios", "Babepedia", "Boobpedia")
+    # Champs souvent absents à juste titre (performer en vie, bio rédigée à part)
+    COVERAGE_IGNORE      = ("death_date", "details")
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 per_domain_limit: Optional[int] = None,
+                 max_total_time: Optional[float] = None):
         self.scrapers = {
             "iafd": IAFDScraper(),
             "freeones": FreeOnesScraper(),
@@ -1458,6 +1665,24 @@ class ScraperOrchestrator:
             "boobpedia": BoobpediaScraper(),
             "xxxbios": XXXBiosScraper(),
         }
+        try:
+            from services.config_manager import ConfigManager
+            cfg = ConfigManager().get("scrapers", {}) or {}
+        except Exception:
+            cfg = {}
+        self.max_workers = int(max_workers or cfg.get("max_workers") or self.MAX_WORKERS)
+        self.per_domain_limit = int(per_domain_limit or cfg.get("per_domain_limit") or self.PER_DOMAIN_LIMIT)
+        self.max_total_time = max_total_time if max_total_time is not None else cfg.get("max_total_time")
+        self._domain_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+
+        cov = cfg.get("coverage", {}) or {}
+        self.early_exit = bool(cov.get("enabled", True))
+        self.min_confirmations = int(cov.get("min_confirmations") or self.MIN_CONFIRMATIONS)
+        self.low_priority = tuple(cov.get("low_priority") or self.LOW_PRIORITY_SOURCES)
+        ignore = set(cov.get("ignore_fields") or self.COVERAGE_IGNORE)
+        self.coverage_fields = [f for f in DataMerger.FIELD_PRIORITY_OVERRIDE if f not in ignore]
+        self._merger = DataMerger()
 
     def detect_source(self, url: str) -> Optional[ScraperBase]:
         """Retourne le scraper approprié pour une URL."""
@@ -1466,20 +1691,115 @@ class ScraperOrchestrator:
                 return scraper
         return None
 
-    def scrape_all(self, urls: List[str], progress_callback=None, performer_name: str = "", auto_add_fallback_sources: bool = True) -> List[Dict[str, Any]]:
+    def _domain_slot(self, source_name: str) -> threading.BoundedSemaphore:
+        """Sémaphore limitant les requêtes simultanées vers un même site."""
+        with self._slots_lock:
+            slot = self._domain_slots.get(source_name)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_domain_limit)
+                self._domain_slots[source_name] = slot
+            return slot
+
+    # ------------------------------------------------------------------
+    # Couverture des champs
+    # ------------------------------------------------------------------
+
+    def coverage(self, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """{champ cible: nombre de sources qui le confirment} (voir ``DataMerger.coverage``)."""
+        return self._merger.coverage(results, self.coverage_fields)
+
+    def missing_fields(self, results: List[Dict[str, Any]]) -> List[str]:
+        """Champs cibles qu'aucune source n'a renseignés."""
+        return [f for f, n in self.coverage(results).items() if n == 0]
+
+    def is_well_covered(self, results: List[Dict[str, Any]]) -> bool:
+        """True si chaque champ cible est confirmé par ``min_confirmations`` sources."""
+        if not results:
+            return False
+        return all(n >= self.min_confirmations for n in self.coverage(results).values())
+
+    def plan_fallback(self, results: List[Dict[str, Any]], fallback_urls: List[str]) -> List[str]:
+        """
+        URLs de secours utiles après la passe 1 : celles dont la source
+        renseigne au moins un champ encore manquant (``STRONG_FIELDS``).
+        """
+        missing = set(self.missing_fields(results))
+        planned, skipped = [], []
+        for url in fallback_urls:
+            scraper = self.detect_source(url)
+            if scraper is None:
+                continue
+            strengths = scraper.STRONG_FIELDS
+            if strengths is None or strengths & missing:
+                planned.append(url)
+            else:
+                skipped.append(scraper.SOURCE_NAME)
+        if skipped:
+            print(f"[ORCHESTRATOR] Passe 2 inutile pour {', '.join(skipped)} "
+                  f"(champs manquants : {', '.join(sorted(missing)) or 'aucun'})")
+        return planned
+
+    def _resolve_xxxbios_url(self, performer_name: str) -> str:
+        """URL XXXBios via le moteur du site, ou URL générée si la recherche échoue."""
+        found_url = self.scrapers["xxxbios"].search(performer_name)
+        if found_url:
+            return found_url
+        # Fallback sur la méthode générative si la recherche échoue
+        # (Utile si le site de recherche est down ou change)
+        return XXXBiosScraper.build_url(performer_name)
+
+    def scrape_all(self, urls: List[str], progress_callback=None, performer_name: str = "",
+                   auto_add_fallback_sources: bool = True, concurrent: bool = True,
+                   max_total_time: Optional[float] = None, on_result=None,
+                   early_exit: Optional[bool] = None,
+                   report: Optional[ChangeReport] = None) -> List[Dict[str, Any]]:
         """
         Scrape toutes les URLs fournies.
         Si performer_name est fourni ET auto_add_fallback_sources=True, auto-construit les URLs 
         Boobpedia et XXXBios si elles ne sont pas déjà dans la liste.
-        Retourne une liste de dicts (un par source).
+        Retourne une liste de dicts (un par source), dans l'ordre des URLs
+        (URLs fournies puis Boobpedia / XXXBios), quel que soit le mode.
         
         Args:
             auto_add_fallback_sources: Si False, ne pas auto-ajouter Boobpedia/XXXBios
                                        (respecte la stratégie 2-tier)
+            concurrent: Si False, scrape les sources l'une après l'autre
+            max_total_time: Durée maximale (s) en mode concurrent ; les sources
+                            non terminées sont ignorées et listées dans
+                            ``report.timed_out``
+            on_result: callback(index, result) appelé (thread appelant) dès
+                       qu'une source est parsée, sans attendre les autres
+            early_exit: annuler les sources ``low_priority`` restantes dès que
+                        tous les champs cibles sont confirmés (None = config.json) ;
+                        elles sont listées dans ``report.cancelled``
+            report: ChangeReport propre à cet appel, complété source par
+                    source (inchangées / re-parsées / annulées / hors délai)
+        """
+        results_by_index: Dict[int, Dict[str, Any]] = {}
+        for index, result in self.iter_scrape(
+            urls, progress_callback=progress_callback, performer_name=performer_name,
+            auto_add_fallback_sources=auto_add_fallback_sources, concurrent=concurrent,
+            max_total_time=max_total_time, early_exit=early_exit, report=report,
+        ):
+            results_by_index[index] = result
+            if on_result:
+                on_result(index, result)
+        return [results_by_index[i] for i in sorted(results_by_index)]
+
+    def iter_scrape(self, urls: List[str], progress_callback=None, performer_name: str = "",
+                    auto_add_fallback_sources: bool = True, concurrent: bool = True,
+                    max_total_time: Optional[float] = None, early_exit: Optional[bool] = None,
+                    report: Optional[ChangeReport] = None):
+        """
+        Générateur : produit ``(index, result)`` pour chaque source réussie,
+        dès qu'elle est parsée (ordre d'arrivée en mode concurrent).
+        ``index`` est la position de l'URL dans l'ordre de ``scrape_all``.
+        Mêmes paramètres que ``scrape_all``.
         """
         # Auto-découverte Boobpedia / XXXBios si performer_name fourni
         urls_lower = [u.lower() for u in urls]
         extra_urls = []
+        xxxbios_search = False
 
         if performer_name and auto_add_fallback_sources:
             # Boobpedia : https://www.boobpedia.com/boobs/Firstname_Lastname
@@ -1488,18 +1808,44 @@ class ScraperOrchestrator:
                 extra_urls.append(f"https://www.boobpedia.com/boobs/{slug}")
             # XXXBios : recherche via le moteur du site
             if not any("xxxbios.com" in u for u in urls_lower):
-                found_url = self.scrapers["xxxbios"].search(performer_name)
-                if found_url:
-                    extra_urls.append(found_url)
+                if concurrent:
+                    # Recherche lancée dans le pool, en même temps que les autres sources
+                    xxxbios_search = True
                 else:
-                    # Fallback sur la méthode générative si la recherche échoue
-                    # (Utile si le site de recherche est down ou change)
-                    extra_urls.append(XXXBiosScraper.build_url(performer_name))
+                    extra_urls.append(self._resolve_xxxbios_url(performer_name))
 
         all_urls = list(urls) + extra_urls
-
-        results = []
+        changes = report if report is not None else ChangeReport()
+        early_exit = self.early_exit if early_exit is None else early_exit
+
+        if concurrent:
+            yield from self._iter_concurrent(
+                all_urls, progress_callback,
+                performer_name if xxxbios_search else "",
+                max_total_time if max_total_time is not None else self.max_total_time,
+                early_exit, changes,
+            )
+        else:
+            yield from self._iter_sequential(all_urls, progress_callback, early_exit, changes)
+
+        print(f"[FINGERPRINT] {changes.format()}")
+        print(f"[HTTP] {get_http_client().format_stats()}")
+        cache = get_page_cache()
+        if cache is not None:
+            print(f"[CACHE] {cache.format_stats()}")
+        fetcher = get_fallback_fetcher()
+        if fetcher is not None and fetcher.stats.urls:
+            print(f"[FALLBACK] {fetcher.format_stats()}")
+        breaker = get_circuit_breaker()
+        tripped = breaker.tripped() if breaker is not None else []
+        if tripped:
+            print(f"[CIRCUIT] Domaines coupés : {', '.join(tripped)}")
+
+    def _iter_sequential(self, all_urls: List[str], progress_callback=None, early_exit: bool = False,
+                         report: Optional[ChangeReport] = None):
+        report = report if report is not None else ChangeReport()
         total = len(all_urls)
+        received: List[Dict[str, Any]] = []
         for i, url in enumerate(all_urls):
             url = url.strip()
             if not url:
@@ -1507,21 +1853,151 @@ class ScraperOrchestrator:
             scraper = self.detect_source(url)
             if scraper is None:
                 continue
+            if early_exit and scraper.SOURCE_NAME in self.low_priority and self.is_well_covered(received):
+                report.cancelled.append(scraper.SOURCE_NAME)
+                continue
             
             if progress_callback:
                 progress_callback(i, total, scraper.SOURCE_NAME)
                 
-            result = scraper.scrape(url)
+            result, status = scraper.scrape_incremental(url)
+            report.add(scraper.SOURCE_NAME, status)
             if result:
                 print(f"[ORCHESTRATOR] SUCCES: {scraper.SOURCE_NAME}")
-                results.append(result)
+                received.append(result)
+                yield i, result
             else:
                 print(f"[ORCHESTRATOR] ECHEC: {scraper.SOURCE_NAME}")
-        
+
+        if report.cancelled:
+            print(f"[ORCHESTRATOR] Champs confirmés, sources ignorées : {', '.join(report.cancelled)}")
         if progress_callback:
             progress_callback(total, total, "Terminé")
-            
-        return results
+
+    def _iter_concurrent(self, all_urls: List[str], progress_callback=None,
+                         xxxbios_name: str = "", max_total_time: Optional[float] = None,
+                         early_exit: bool = False, report: Optional[ChangeReport] = None):
+        """
+        Variante parallèle de ``_iter_sequential``.
+
+        ``progress_callback`` est toujours appelé depuis le thread appelant,
+        avec l'indice de l'URL, au démarrage de chaque source (comme en
+        mode séquentiel), puis ``(total, total, "Terminé")``. Si
+        ``xxxbios_name`` est fourni, la recherche XXXBios occupe le dernier
+        emplacement.
+        """
+        report = report if report is not None else ChangeReport()
+        cancelled = threading.Event()   # levé : les sources basse priorité n'envoient plus rien
+        jobs = []  # (index, source_name, callable)
+        for i, url in enumerate(all_urls):
+            url = url.strip()
+            if not url:
+                continue
+            scraper = self.detect_source(url)
+            if scraper is None:
+                continue
+            jobs.append((i, scraper.SOURCE_NAME, self._make_job(scraper, url, cancelled=cancelled, report=report)))
+
+        total = len(all_urls)
+        if xxxbios_name:
+            xxxbios = self.scrapers["xxxbios"]
+            jobs.append((total, xxxbios.SOURCE_NAME,
+                         self._make_job(xxxbios, None, xxxbios_name, cancelled=cancelled, report=report)))
+            total += 1
+
+        # Démarrages (index, source) et futures terminées, dans l'ordre où
+        # ils se produisent ; consommés par le thread appelant
+        events: "queue.Queue" = queue.Queue()
+
+        def announced(i: int, name: str, job):
+            def run():
+                events.put((i, name))
+                return job()
+            return run
+
+        deadline = time.monotonic() + max_total_time if max_total_time else None
+        pending = set()
+        abandoned = False
+        received: List[Dict[str, Any]] = []
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(jobs) or 1)),
+                                      thread_name_prefix="scrape")
+        try:
+            futures = {}
+            for i, name, job in jobs:
+                fut = executor.submit(announced(i, name, job))
+                futures[fut] = (i, name)
+                fut.add_done_callback(events.put)
+            pending = set(futures)
+            while pending:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    event = events.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if isinstance(event, tuple):
+                    if progress_callback:
+                        progress_callback(event[0], total, event[1])
+                    continue
+                if event not in pending:   # annulée ci-dessous
+                    continue
+                pending.discard(event)
+                i, name = futures[event]
+                try:
+                    result = event.result()
+                except Exception as e:
+                    print(f"[ORCHESTRATOR] ERREUR {name}: {e}")
+                    result = {}
+                if result:
+                    print(f"[ORCHESTRATOR] SUCCES: {name}")
+                    received.append(result)
+                    yield i, result
+                else:
+                    print(f"[ORCHESTRATOR] ECHEC: {name}")
+
+                # Champs cibles tous confirmés : inutile d'attendre les sources basse priorité
+                low = [f for f in pending if futures[f][1] in self.low_priority]
+                if early_exit and low and self.is_well_covered(received):
+                    cancelled.set()
+                    for fut in sorted(low, key=lambda f: futures[f][0]):
+                        fut.cancel()
+                        pending.discard(fut)
+                        report.cancelled.append(futures[fut][1])
+                    abandoned = True
+                    print(f"[ORCHESTRATOR] Champs confirmés, sources annulées : {', '.join(report.cancelled)}")
+
+            if pending:
+                report.timed_out.extend(futures[f][1] for f in sorted(pending, key=lambda f: futures[f][0]))
+                print(f"[ORCHESTRATOR] TEMPS DÉPASSÉ ({max_total_time}s): {', '.join(report.timed_out)}")
+        finally:
+            # Sources en retard, annulées (ou générateur abandonné) : elles
+            # continuent en arrière-plan, leur résultat est ignoré
+            executor.shutdown(wait=not (pending or abandoned), cancel_futures=True)
+
+        if progress_callback:
+            progress_callback(total, total, "Terminé")
+
+    def _make_job(self, scraper: ScraperBase, url: Optional[str], search_name: str = "",
+                  cancelled: Optional[threading.Event] = None,
+                  report: Optional[ChangeReport] = None):
+        """
+        Tâche de scraping d'une source, sous le sémaphore de son site.
+        Une source basse priorité annulée (``cancelled``) avant d'obtenir son
+        créneau n'envoie aucune requête. Le statut de la page (inchangée /
+        re-parsée) est ajouté à ``report``.
+        """
+        low_priority = scraper.SOURCE_NAME in self.low_priority
+
+        def job() -> Dict[str, Any]:
+            with self._domain_slot(scraper.SOURCE_NAME):
+                if low_priority and cancelled is not None and cancelled.is_set():
+                    return {}
+                target = url or self._resolve_xxxbios_url(search_name)
+                result, status = scraper.scrape_incremental(target)
+            if report is not None:
+                report.add(scraper.SOURCE_NAME, status)
+            return result
+        return job
 
 
 # ===========================================================================
@@ -1606,71 +2082,15 @@ class DataMerger:
             return {}
 
         # Collecter toutes les valeurs par champ
-        field_values: Dict[str, Dict[str, Any]] = {}  # {field: {source_name: value}}
-
-        for src in sources:
-            src_name = src.get("source", "unknown")
-            for key, val in src.items():
-                if key in ("source", "url"):
-                    continue
-                if key not in field_values:
-                    field_values[key] = {}
-                field_values[key][src_name] = val
+        field_values = self._collect_field_values(sources)
 
         merged = {}
         confirmed = {}
         conflicts = {}
         new_fields = {}
-        awards_text = ""
 
         for field, source_vals in field_values.items():
-            # Awards : champ textuel, choisir selon priorité (FreeOnes/XXXBios/IAFD...)
-            if field == "awards":
-                chosen_val = self._pick_by_priority(source_vals, field=field)
-                merged[field] = chosen_val
-                continue
-
-            # Champs list : union
-            if field in self.LIST_FIELDS:
-                all_vals = []
-                for v in source_vals.values():
-                    if isinstance(v, list):
-                        all_vals.extend(v)
-                    else:
-                        all_vals.append(v)
-                # déduplication normale mais on veut normaliser les aliases par casse
-                if field == 'aliases':
-                    normalized = {}
-                    for a in all_vals:
-                        if not a:
-                            continue
-                        key = a.strip().lower()
-                        if key not in normalized:
-                            normalized[key] = a.strip()
-                    merged[field] = list(normalized.values())
-                else:
-                    merged[field] = list(dict.fromkeys(all_vals))  # dédupliqué, ordre préservé
-                confirmed[field] = merged[field]
-                continue
-
-            unique_vals = list(set(str(v).strip() for v in source_vals.values() if v))
-            n_sources = len(source_vals)
-
-            if n_sources == 1:
-                # Valeur unique → nouvelle donnée
-                val = list(source_vals.values())[0]
-                merged[field] = val
-                new_fields[field] = {list(source_vals.keys())[0]: val}
-
-            elif len(unique_vals) == 1:
-                # Valeur identique dans plusieurs sources → confirmée
-                merged[field] = unique_vals[0]
-                confirmed[field] = unique_vals[0]
-
-            else:
-                chosen_val = self._pick_by_priority(source_vals, field=field)
-                merged[field] = chosen_val
-                conflicts[field] = source_vals
+            self._merge_field(field, source_vals, merged, confirmed, conflicts, new_fields)
 
         return {
             "merged": merged,
@@ -1681,6 +2101,93 @@ class DataMerger:
             "discovered_urls": self._merge_discovered_urls(sources)
         }
 
+    def _collect_field_values(self, sources: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Regroupe les valeurs par champ : {field: {source_name: value}}."""
+        field_values: Dict[str, Dict[str, Any]] = {}
+        for src in sources:
+            src_name = src.get("source", "unknown")
+            for key, val in src.items():
+                if key in ("source", "url"):
+                    continue
+                if key not in field_values:
+                    field_values[key] = {}
+                field_values[key][src_name] = val
+        return field_values
+
+    def _merge_field(self, field: str, source_vals: Dict[str, Any], merged: Dict[str, Any],
+                     confirmed: Dict[str, Any], conflicts: Dict[str, Any], new_fields: Dict[str, Any]):
+        """Fusionne un champ et range le résultat dans la bonne catégorie."""
+        # Awards : champ textuel, choisir selon priorité (FreeOnes/XXXBios/IAFD...)
+        if field == "awards":
+            chosen_val = self._pick_by_priority(source_vals, field=field)
+            merged[field] = chosen_val
+            return
+
+        # Champs list : union
+        if field in self.LIST_FIELDS:
+            all_vals = []
+            for v in source_vals.values():
+                if isinstance(v, list):
+                    all_vals.extend(v)
+                else:
+                    all_vals.append(v)
+            # déduplication normale mais on veut normaliser les aliases par casse
+            if field == 'aliases':
+                normalized = {}
+                for a in all_vals:
+                    if not a:
+                        continue
+                    key = a.strip().lower()
+                    if key not in normalized:
+                        normalized[key] = a.strip()
+                merged[field] = list(normalized.values())
+            else:
+                merged[field] = list(dict.fromkeys(all_vals))  # dédupliqué, ordre préservé
+            confirmed[field] = merged[field]
+            return
+
+        unique_vals = list(set(str(v).strip() for v in source_vals.values() if v))
+        n_sources = len(source_vals)
+
+        if n_sources == 1:
+            # Valeur unique → nouvelle donnée
+            val = list(source_vals.values())[0]
+            merged[field] = val
+            new_fields[field] = {list(source_vals.keys())[0]: val}
+
+        elif len(unique_vals) == 1:
+            # Valeur identique dans plusieurs sources → confirmée
+            merged[field] = unique_vals[0]
+            confirmed[field] = unique_vals[0]
+
+        else:
+            chosen_val = self._pick_by_priority(source_vals, field=field)
+            merged[field] = chosen_val
+            conflicts[field] = source_vals
+
+    # Champs textuels : deux sources ne concordent jamais mot pour mot,
+    # une valeur non vide suffit à compter comme confirmation
+    FREE_TEXT_FIELDS = {"awards", "bio_raw", "details", "trivia", "tattoos", "piercings"}
+
+    def coverage(self, sources: List[Dict[str, Any]], fields: List[str]) -> Dict[str, int]:
+        """
+        Nombre de confirmations par champ : sources qui donnent la valeur
+        majoritaire (même règle que ``confirmed``), ou sources non vides
+        pour les listes et champs textuels. 0 = champ manquant.
+        """
+        out = {}
+        for field in fields:
+            values = [src.get(field) for src in sources if src.get(field)]
+            if field in self.LIST_FIELDS or field in self.FREE_TEXT_FIELDS:
+                out[field] = len(values)
+            else:
+                counts: Dict[str, int] = {}
+                for v in values:
+                    key = str(v).strip()
+                    counts[key] = counts.get(key, 0) + 1
+                out[field] = max(counts.values()) if counts else 0
+        return out
+
     def _merge_socials(self, sources: List[Dict]) -> Dict[str, str]:
         """Fusionne les réseaux sociaux trouvés."""
         merged_socials = {}
@@ -1753,6 +2260,71 @@ class DataMerger:
         return "\n".join(lines)
 
 
+class IncrementalDataMerger(DataMerger):
+    """
+    DataMerger alimenté source par source (résultats en streaming).
+
+    Chaque ``add()`` ne recalcule que les champs apportés par la nouvelle
+    source et retourne l'état courant, au même format que ``merge()``.
+    Une fois toutes les sources reçues, le résultat est identique à
+    ``merge()`` appliqué aux mêmes sources dans l'ordre de leur ``index``.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._sources: Dict[int, Dict[str, Any]] = {}
+        self._fields: Dict[str, Dict[str, Any]] = {}  # {field: {catégorie: valeur}}
+        self._next_index = 0
+
+    @property
+    def sources(self) -> List[Dict[str, Any]]:
+        return [self._sources[i] for i in sorted(self._sources)]
+
+    def add(self, source: Dict[str, Any], index: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Intègre le résultat d'une source.
+        ``index`` = position de la source dans l'ordre de priorité des URLs
+        (par défaut : ordre d'arrivée).
+        """
+        if not source:
+            return self.result()
+        if index is None:
+            index = self._next_index
+        self._next_index = max(self._next_index, index + 1)
+        self._sources[index] = source
+
+        ordered = self.sources
+        touched = [k for k in source if k not in ("source", "url")]
+        for field in touched:
+            source_vals = {}
+            for src in ordered:
+                if field in src:
+                    source_vals[src.get("source", "unknown")] = src[field]
+            merged, confirmed, conflicts, new_fields = {}, {}, {}, {}
+            self._merge_field(field, source_vals, merged, confirmed, conflicts, new_fields)
+            self._fields[field] = {
+                "merged": merged, "confirmed": confirmed,
+                "conflicts": conflicts, "new_fields": new_fields,
+            }
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        """État courant de la fusion (même structure que ``merge()``)."""
+        ordered = self.sources
+        if not ordered:
+            return {}
+        out = {"merged": {}, "confirmed": {}, "conflicts": {}, "new_fields": {}}
+        # Ordre des champs identique à merge() : première apparition
+        for field in self._collect_field_values(ordered):
+            for category, values in self._fields.get(field, {}).items():
+                out[category].update(values)
+        out["socials"] = self._merge_socials(ordered)
+        out["discovered_urls"] = self._merge_discovered_urls(ordered)
+        return out
+
+
 # ===========================================================================
 # AWARDS CLEANER
 # ===========================================================================
@@ -0,0 +1,305 @@
+"""
+sidecar_db.py - Base SQLite annexe de StashMaster V2
+=====================================================
+
+La base Stash (stash-go.sqlite) n'appartient pas à StashMaster : on n'y crée
+aucune table. Tout l'état propre à l'application vit dans une base annexe,
+``data/database.sqlite`` par défaut (clé ``data.database_path`` de
+config.json) : cache de pages, historique des vérifications d'URLs, mémo de
+parse, empreintes des sources, file de travaux, index des noms.
+
+Schéma versionné : ``MIGRATIONS`` est une liste ordonnée de scripts, le
+numéro de la dernière migration appliquée est conservé dans
+``PRAGMA user_version``. ``connect_sidecar`` applique les migrations en
+attente (une fois par fichier et par processus). Chaque migration tient
+dans une transaction ``BEGIN IMMEDIATE`` et la version est relue une fois
+le verrou pris : deux processus qui migrent en même temps n'appliquent
+pas deux fois la même migration. Les créations de tables sont en
+``IF NOT EXISTS`` : une base créée avant les migrations est reprise telle
+quelle.
+
+La base annexe peut être attachée (``ATTACH``) à une connexion Stash : une
+jointure entre les deux bases (« performers dont une URL est morte ») tient
+alors en une seule requête SQL. Voir ``StashDatabase`` (section
+``stash_db.attach_sidecar`` de config.json).
+
+Usage :
+    from services.sidecar_db import connect_sidecar, attach_sidecar
+    conn = connect_sidecar()                 # migrée
+    attach_sidecar(stash_conn)               # → tables visibles en sidecar.<table>
+
+    python -m services.sidecar_db            # version du schéma et tables
+    python -m services.sidecar_db --vacuum
+"""
+
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Set, Tuple
+from urllib.request import pathname2url
+
+
+DEFAULT_SIDECAR_PATH = os.path.join("data", "database.sqlite")
+
+# Nom sous lequel la base annexe est attachée aux connexions Stash
+SIDECAR_SCHEMA = "sidecar"
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+#
+# Une migration publiée ne se modifie plus : tout changement de schéma
+# s'ajoute à la fin de la liste avec le numéro suivant.
+
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, "tables initiales", """
+        CREATE TABLE IF NOT EXISTS page_cache (
+            url_key     TEXT PRIMARY KEY,
+            url         TEXT NOT NULL,
+            status      INTEGER NOT NULL,
+            headers     TEXT NOT NULL DEFAULT '{}',
+            body        BLOB NOT NULL,
+            size        INTEGER NOT NULL,
+            fetched_at  REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_page_cache_access
+            ON page_cache(last_access);
+
+        CREATE TABLE IF NOT EXISTS url_check_history (
+            url         TEXT PRIMARY KEY,
+            status      TEXT NOT NULL,
+            http_code   INTEGER,
+            redirect_to TEXT,
+            latency_ms  INTEGER NOT NULL DEFAULT 0,
+            checked_at  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_url_check_history_checked
+            ON url_check_history(checked_at);
+
+        CREATE TABLE IF NOT EXISTS parse_memo (
+            scraper    TEXT NOT NULL,
+            version    TEXT NOT NULL,
+            body_sha   TEXT NOT NULL,
+            result     TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used  REAL NOT NULL,
+            PRIMARY KEY (scraper, version, body_sha)
+        );
+        CREATE INDEX IF NOT EXISTS idx_parse_memo_last_used
+            ON parse_memo(last_used);
+
+        CREATE TABLE IF NOT EXISTS source_fingerprints (
+            url_key       TEXT PRIMARY KEY,
+            url           TEXT NOT NULL,
+            source        TEXT NOT NULL,
+            etag          TEXT,
+            last_modified TEXT,
+            body_sha      TEXT,
+            fields_sha    TEXT,
+            applied_sha   TEXT,
+            result        TEXT,
+            checked_at    REAL NOT NULL,
+            changed_at    REAL NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS jobs (
+            queue           TEXT NOT NULL,
+            performer_id    TEXT NOT NULL,
+            stage           TEXT NOT NULL,
+            step            INTEGER NOT NULL,
+            state           TEXT NOT NULL DEFAULT 'pending',
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            last_error      TEXT,
+            result          TEXT,
+            worker          TEXT,
+            enqueued_at     REAL NOT NULL,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            lease_until     REAL,
+            started_at      REAL,
+            finished_at     REAL,
+            duration        REAL,
+            total_time      REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (queue, performer_id, stage)
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim
+            ON jobs(queue, state, next_attempt_at);
+    """),
+    (2, "index des noms de performers", """
+        CREATE TABLE IF NOT EXISTS performer_names (
+            name_key     TEXT NOT NULL,
+            performer_id INTEGER NOT NULL,
+            name         TEXT NOT NULL,
+            kind         TEXT NOT NULL,
+            PRIMARY KEY (name_key, performer_id, kind)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_performer_names_performer
+            ON performer_names(performer_id);
+
+        CREATE TABLE IF NOT EXISTS sidecar_meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """),
+    (3, "index de jointure des URLs mortes", """
+        CREATE INDEX IF NOT EXISTS idx_url_check_history_status
+            ON url_check_history(status, url);
+    """),
+    (4, "date du dernier parse des empreintes", """
+        ALTER TABLE source_fingerprints ADD COLUMN parsed_at REAL;
+        UPDATE source_fingerprints SET parsed_at = changed_at;
+    """),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_migrated: Set[str] = set()
+_migrate_lock = threading.Lock()
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _statements(script: str) -> List[str]:
+    """Découpe un script SQL en instructions complètes."""
+    out: List[str] = []
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        out.append(buf.strip())
+    return out
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Applique les migrations en attente, chacune dans sa transaction.
+    Retourne le nombre de migrations appliquées.
+    """
+    applied = 0
+    for version, label, script in MIGRATIONS:
+        if version <= schema_version(conn):
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # un autre processus a pu migrer pendant l'attente du verrou
+            if version <= schema_version(conn):
+                conn.rollback()
+                continue
+            for statement in _statements(script):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        print(f"[SIDECAR] Migration {version} appliquée : {label}")
+        applied += 1
+    return applied
+
+
+# ---------------------------------------------------------------------------
+# Connexion
+# ---------------------------------------------------------------------------
+
+def get_sidecar_path() -> str:
+    """Chemin de la base annexe, lu dans config.json (section ``data``)."""
+    try:
+        from services.config_manager import ConfigManager
+        data_cfg = ConfigManager().get("data", {}) or {}
+        return data_cfg.get("database_path") or DEFAULT_SIDECAR_PATH
+    except Exception:
+        return DEFAULT_SIDECAR_PATH
+
+
+def connect_sidecar(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Ouvre la base annexe (en la créant et en la migrant au besoin).
+
+    La connexion est partageable entre threads : l'appelant sérialise les
+    accès (verrou) s'il l'utilise depuis plusieurs threads.
+    """
+    path = path or get_sidecar_path()
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.DatabaseError:
+        pass
+    key = os.path.abspath(path)
+    if key not in _migrated:
+        with _migrate_lock:
+            if key not in _migrated:
+                migrate(conn)
+                _migrated.add(key)
+    return conn
+
+
+def attach_sidecar(conn: sqlite3.Connection, path: Optional[str] = None,
+                   schema: str = SIDECAR_SCHEMA, read_only: bool = True) -> bool:
+    """
+    Attache la base annexe à ``conn`` (une connexion Stash) sous ``schema`` :
+    ses tables deviennent ``sidecar.url_check_history``, etc. En lecture
+    seule par défaut (``conn`` doit avoir été ouverte avec ``uri=True``).
+    Retourne False si l'attache est impossible.
+    """
+    path = path or get_sidecar_path()
+    try:
+        # crée / migre la base avant de l'attacher en lecture seule
+        connect_sidecar(path).close()
+        target = f"file:{pathname2url(os.path.abspath(path))}" + ("?mode=ro" if read_only else "")
+        conn.execute("ATTACH DATABASE ? AS " + schema, (target,))
+        return True
+    except Exception as e:
+        print(f"[SIDECAR] Attache impossible ({path}) : {e}")
+        return False
+
+
+def is_attached(conn: sqlite3.Connection, schema: str = SIDECAR_SCHEMA) -> bool:
+    try:
+        return any(r[1] == schema for r in conn.execute("PRAGMA database_list").fetchall())
+    except sqlite3.Error:
+        return False
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _cli():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Base annexe de StashMaster (schéma, migrations)")
+    parser.add_argument("--db", default=None, help="Chemin de la base annexe (défaut : config.json)")
+    parser.add_argument("--vacuum", action="store_true", help="Compacter la base")
+    args = parser.parse_args()
+
+    path = args.db or get_sidecar_path()
+    conn = connect_sidecar(path)
+    try:
+        print(f"{path} : schéma v{schema_version(conn)} (dernière migration : v{SCHEMA_VERSION})")
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()]
+        for table in tables:
+            count = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            print(f"  {table:<22} {count} ligne(s)")
+        if args.vacuum:
+            conn.execute("VACUUM")
+            print("Base compactée")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    _cli()
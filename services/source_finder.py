@@ -20,14 +20,16 @@ Usage depuis StashMaster (import) :
 """
 
 import re
-import time
 import unicodedata
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote_plus, urlparse
-from bs4 import BeautifulSoup
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field
 
+from services.html_parse import parse_html
+from services.http_client import get_http_client
+from services.page_cache import fetch_page, get_page_cache
+
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -44,7 +46,8 @@ HEADERS = {
 }
 
 TIMEOUT         = 12
-DELAY           = 1.0
+DELAY           = 1.0   # obsolète : l'espacement par domaine est géré par RateLimiter
+MAX_WORKERS     = 4     # une source = un domaine, elles peuvent se chevaucher
 SCORE_THRESHOLD = 40
 ALL_SOURCES     = ["IAFD", "FreeOnes", "TheNude", "Babepedia"]
 
@@ -153,11 +156,12 @@ def _extract_domain(url):
         return ""
 
 
-def _fetch(url, timeout=TIMEOUT):
+def _fetch(url, timeout=TIMEOUT, use_cache=True):
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
-        if resp.status_code == 200:
-            return BeautifulSoup(resp.text, "html.parser")
+        cache = get_page_cache() if use_cache else None
+        page = fetch_page(url, headers=HEADERS, timeout=timeout, cache=cache)
+        if page.status == 200:
+            return parse_html(page.body)
         return None
     except Exception:
         return None
@@ -330,10 +334,11 @@ def _build_direct_urls(name, aliases):
 
 def _verify_direct_url(url, source, name, aliases, timeout=TIMEOUT):
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
+        resp = get_http_client().get(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
         if resp.status_code != 200:
             return None
-        soup = BeautifulSoup(resp.text, "html.parser")
+        # Seuls le titre et le h1 servent à la vérification
+        soup = parse_html(resp.text, regions=("h1", "title"))
         h1 = soup.find("h1")
         found_name = h1.get_text(strip=True) if h1 else ""
         if not found_name:
@@ -356,9 +361,10 @@ def _verify_direct_url(url, source, name, aliases, timeout=TIMEOUT):
 
 class SourceFinder:
 
-    def __init__(self, timeout=TIMEOUT, delay=DELAY):
-        self.timeout = timeout
-        self.delay   = delay
+    def __init__(self, timeout=TIMEOUT, delay=DELAY, max_workers=MAX_WORKERS):
+        self.timeout     = timeout
+        self.delay       = delay  # conservé pour compatibilité, non utilisé
+        self.max_workers = max_workers
 
     # ── Détection ──────────────────────────────────────────────────────
 
@@ -402,8 +408,6 @@ class SourceFinder:
         if result.candidates:
             return result
 
-        time.sleep(self.delay)
-
         # Étape 2 : Page de recherche du site
         candidates = self._search_on_site(source, name, aliases)
         # Essayer avec un alias si peu de résultats
@@ -433,17 +437,30 @@ class SourceFinder:
         missing_sources = missing_sources or self.detect_missing(existing_urls)
         results         = {}
 
-        for i, source in enumerate(missing_sources):
-            if progress_callback:
-                progress_callback(source, None)
-            result = self.find_for_source(source, name, aliases)
-            results[source] = result
-            if progress_callback:
-                progress_callback(source, result)
-            if i < len(missing_sources) - 1:
-                time.sleep(self.delay)
-
-        return results
+        # Sources en parallèle (domaines différents) ; la politesse par site
+        # est assurée par le RateLimiter du client HTTP.
+        # progress_callback est toujours appelé depuis le thread appelant.
+        if not missing_sources:
+            return results
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(missing_sources)))) as pool:
+            futures = {}
+            for source in missing_sources:
+                if progress_callback:
+                    progress_callback(source, None)
+                futures[pool.submit(self.find_for_source, source, name, aliases)] = source
+            for fut in as_completed(futures):
+                source = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    print(f"[FINDER] Erreur {source} : {e}")
+                    result = FinderResult(source=source, searched=True, error=str(e))
+                results[source] = result
+                if progress_callback:
+                    progress_callback(source, result)
+
+        # Ordre des sources identique à missing_sources
+        return {source: results[source] for source in missing_sources if source in results}
 
     # ── Sélection ───────────────────────────────────────────────────────
 
@@ -678,15 +695,20 @@ class SourceFinderWidget:
         self._done = 0
         self.results = {}
 
-        def run():
-            for source in self._missing:
+        def on_progress(source, result):
+            if result is None:
                 self.win.after(0, self.prog_label.config,
                                {"text": f"🔄 Recherche {source}…"})
-                result = self.finder.find_for_source(
-                    source, self.name, self.aliases)
-                self.results[source] = result
-                self._done += 1
-                self.win.after(0, self._on_source_done, source, result, self._done)
+                return
+            self.results[source] = result
+            self._done += 1
+            self.win.after(0, self._on_source_done, source, result, self._done)
+
+        def run():
+            self.finder.find_missing(
+                self.name, aliases=self.aliases,
+                missing_sources=list(self._missing),
+                progress_callback=on_progress)
             self.win.after(0, self._search_done)
 
         threading.Thread(target=run, daemon=True).start()
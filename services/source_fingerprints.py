@@ -0,0 +1,336 @@
+"""
+source_fingerprints.py - Empreintes des pages sources déjà scrapées
+===================================================================
+
+Ré-enrichir un performer déjà traité revient le plus souvent à relire des
+fiches qui n'ont pas bougé. Pour chaque page source scrapée, on conserve
+dans la base annexe (``data/database.sqlite``, table ``source_fingerprints``) :
+
+- les validateurs HTTP (``ETag``, ``Last-Modified``) : la requête suivante
+  est conditionnelle, même si la page a quitté le cache disque ;
+- le sha256 du corps : un corps identique n'est pas re-parsé ;
+- le sha256 des champs extraits (``fields_sha``) et le dict lui-même : une
+  réponse 304 ou un corps identique redonnent directement le résultat ;
+- ``applied_sha`` : les champs au moment du dernier enregistrement dans
+  Stash. Si toutes les sources d'un performer sont à leur ``applied_sha``,
+  fusion et sauvegarde sont inutiles.
+
+Une empreinte dont le dernier parse (``parsed_at``) remonte à plus de
+``max_age_hours`` est ignorée : la page est re-parsée (certains parseurs,
+IAFD, complètent la fiche par des requêtes secondaires que l'empreinte ne
+couvre pas). Chaque re-parse, même sans changement des champs, relance le
+délai ; une réponse 304 ne le relance pas.
+
+Configuration (section ``fingerprints`` de config.json) :
+    enabled       : False pour toujours re-parser
+    max_age_hours : âge maximal d'une empreinte réutilisée
+
+Usage :
+    from services.source_fingerprints import get_source_fingerprints, ChangeReport
+    prints = get_source_fingerprints()
+    previous = prints.get(url)                  # Fingerprint ou None
+    prints.record(url, source, headers, body, data)
+    marks = stamps(results)                     # [[url, fields_sha], ...] (sérialisable)
+    prints.is_applied(marks)                    # rien de neuf depuis la dernière sauvegarde ?
+    prints.mark_applied(marks)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from services.page_cache import normalize_url
+from services.sidecar_db import connect_sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+HOUR = 3600
+
+DEFAULT_MAX_AGE = 30 * 24 * HOUR
+
+UNCHANGED = "unchanged"
+PARSED    = "parsed"
+FAILED    = "failed"
+
+
+def _canonical(value: Any) -> Any:
+    """Forme stable pour le hash (l'ordre de certaines listes dépend d'un set)."""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_canonical(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, ensure_ascii=False))
+    return value
+
+
+def fields_hash(data: Dict[str, Any]) -> str:
+    """Empreinte des champs extraits (hors ``url`` / ``source``)."""
+    payload = {k: v for k, v in (data or {}).items() if k not in ("url", "source")}
+    blob = json.dumps(_canonical(payload), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def body_sha(body: str) -> str:
+    return hashlib.sha256((body or "").encode("utf-8")).hexdigest()
+
+
+def stamps(results: List[Dict[str, Any]]) -> List[List[str]]:
+    """
+    ``[[url, fields_sha], ...]`` des résultats : forme compacte (et JSON)
+    transportée d'une étape de job à l'autre jusqu'à la sauvegarde.
+    """
+    return [[d["url"], fields_hash(d)] for d in results or [] if d.get("url")]
+
+
+# ---------------------------------------------------------------------------
+# Empreinte / bilan
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Fingerprint:
+    """Dernier état connu d'une page source."""
+    url: str
+    source: str
+    etag: str = ""
+    last_modified: str = ""
+    body_sha: str = ""
+    fields_sha: str = ""
+    applied_sha: str = ""
+    result: Optional[Dict[str, Any]] = None
+    checked_at: float = 0.0
+    changed_at: float = 0.0
+    parsed_at: float = 0.0
+
+    def validators(self) -> Dict[str, str]:
+        """En-têtes de requête conditionnelle."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class ChangeReport:
+    """
+    Bilan d'un scraping : sources inchangées (non re-parsées) / re-parsées,
+    et sources abandonnées par l'orchestrateur (``timed_out`` : temps
+    maximal atteint ; ``cancelled`` : champs cibles déjà confirmés).
+    Un objet par appel à ``scrape_all`` : l'orchestrateur est partagé
+    entre threads et ne conserve aucun état de run.
+    """
+    unchanged: List[str] = field(default_factory=list)
+    parsed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    timed_out: List[str] = field(default_factory=list)
+    cancelled: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, source: str, status: str):
+        with self._lock:
+            {UNCHANGED: self.unchanged, PARSED: self.parsed}.get(status, self.failed).append(source)
+
+    def format(self) -> str:
+        text = f"{len(self.unchanged)} source(s) inchangée(s), {len(self.parsed)} re-parsée(s)"
+        if self.failed:
+            text += f", {len(self.failed)} en échec"
+        return text
+
+
+# ---------------------------------------------------------------------------
+# Stockage
+# ---------------------------------------------------------------------------
+
+class SourceFingerprints:
+    """
+    Table ``source_fingerprints`` de la base annexe.
+
+    Paramètres
+    ----------
+    db_path : chemin de la base (None = ``data.database_path`` de config.json)
+    max_age : âge maximal (secondes) d'une empreinte réutilisée
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_age: float = DEFAULT_MAX_AGE):
+        self.db_path = db_path
+        self.max_age = max_age
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]] = None,
+                    db_path: Optional[str] = None) -> "SourceFingerprints":
+        """Construit le stockage depuis la section ``fingerprints`` de config.json."""
+        cfg = cfg or {}
+        return cls(
+            db_path=db_path,
+            max_age=float(cfg.get("max_age_hours", DEFAULT_MAX_AGE / HOUR)) * HOUR,
+        )
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect_sidecar(self.db_path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, url: str) -> Optional[Fingerprint]:
+        """Empreinte réutilisable de ``url`` (None si absente ou trop vieille)."""
+        try:
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT * FROM source_fingerprints WHERE url_key = ?", (normalize_url(url),)
+                ).fetchone()
+        except Exception as e:
+            print(f"[FINGERPRINT] Lecture impossible ({url}) : {e}")
+            return None
+        if row is None:
+            return None
+        parsed_at = row["parsed_at"] if row["parsed_at"] is not None else row["changed_at"]
+        if time.time() - parsed_at > self.max_age:
+            return None
+        try:
+            result = json.loads(row["result"]) if row["result"] else None
+        except ValueError:
+            result = None
+        return Fingerprint(
+            url=row["url"], source=row["source"],
+            etag=row["etag"] or "", last_modified=row["last_modified"] or "",
+            body_sha=row["body_sha"] or "", fields_sha=row["fields_sha"] or "",
+            applied_sha=row["applied_sha"] or "", result=result,
+            checked_at=row["checked_at"], changed_at=row["changed_at"], parsed_at=parsed_at,
+        )
+
+    def record(self, url: str, source: str, headers: Optional[Dict[str, str]],
+               body: Optional[str], data: Dict[str, Any]) -> bool:
+        """
+        Enregistre l'état d'une page après parse (``body`` fourni) ou après
+        une réponse « inchangée » (``body`` None : seuls les validateurs et
+        ``checked_at`` sont mis à jour). Retourne True si les champs extraits
+        diffèrent de l'empreinte précédente.
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        now = time.time()
+        key = normalize_url(url)
+        try:
+            with self._lock:
+                conn = self._db()
+                if body is None:
+                    conn.execute(
+                        """UPDATE source_fingerprints
+                           SET checked_at = ?, etag = COALESCE(?, etag),
+                               last_modified = COALESCE(?, last_modified)
+                           WHERE url_key = ?""",
+                        (now, headers.get("etag"), headers.get("last-modified"), key),
+                    )
+                    conn.commit()
+                    return False
+                fsha = fields_hash(data)
+                row = conn.execute(
+                    "SELECT fields_sha, changed_at FROM source_fingerprints WHERE url_key = ?", (key,)
+                ).fetchone()
+                changed = row is None or row["fields_sha"] != fsha
+                conn.execute(
+                    """INSERT INTO source_fingerprints
+                           (url_key, url, source, etag, last_modified, body_sha, fields_sha,
+                            result, checked_at, changed_at, parsed_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(url_key) DO UPDATE SET
+                           url = excluded.url, source = excluded.source,
+                           etag = excluded.etag, last_modified = excluded.last_modified,
+                           body_sha = excluded.body_sha, fields_sha = excluded.fields_sha,
+                           result = excluded.result, checked_at = excluded.checked_at,
+                           changed_at = excluded.changed_at, parsed_at = excluded.parsed_at""",
+                    (key, url, source, headers.get("etag"), headers.get("last-modified"),
+                     body_sha(body), fsha, json.dumps(data, ensure_ascii=False, default=str),
+                     now, now if changed else row["changed_at"], now),
+                )
+                conn.commit()
+                return changed
+        except Exception as e:
+            print(f"[FINGERPRINT] Écriture impossible ({url}) : {e}")
+            return True
+
+    # ------------------------------------------------------------------
+    # Sauvegardes appliquées
+    # ------------------------------------------------------------------
+
+    def is_applied(self, marks: List[List[str]]) -> bool:
+        """True si chaque source est identique à ce qui a déjà été enregistré dans Stash."""
+        if not marks:
+            return False
+        try:
+            with self._lock:
+                conn = self._db()
+                for url, fsha in marks:
+                    row = conn.execute(
+                        "SELECT applied_sha FROM source_fingerprints WHERE url_key = ?",
+                        (normalize_url(url),),
+                    ).fetchone()
+                    if row is None or row["applied_sha"] != fsha:
+                        return False
+            return True
+        except Exception:
+            return False
+
+    def mark_applied(self, marks: List[List[str]]):
+        """Mémorise que ces sources (``stamps()``) ont été enregistrées dans Stash."""
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.executemany(
+                    "UPDATE source_fingerprints SET applied_sha = ? WHERE url_key = ?",
+                    [(fsha, normalize_url(url)) for url, fsha in marks],
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"[FINGERPRINT] Écriture impossible : {e}")
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute("DELETE FROM source_fingerprints")
+                conn.commit()
+        except Exception:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Singleton process-wide
+# ---------------------------------------------------------------------------
+
+_prints: Optional[SourceFingerprints] = None
+_prints_loaded = False
+_prints_lock = threading.Lock()
+
+
+def get_source_fingerprints() -> Optional[SourceFingerprints]:
+    """Stockage partagé, ou None si désactivé dans config.json."""
+    global _prints, _prints_loaded
+    if not _prints_loaded:
+        with _prints_lock:
+            if not _prints_loaded:
+                try:
+                    from services.config_manager import ConfigManager
+                    cfg = ConfigManager().get("fingerprints", {}) or {}
+                except Exception:
+                    cfg = {}
+                _prints = SourceFingerprints.from_config(cfg) if cfg.get("enabled", True) else None
+                _prints_loaded = True
+    return _prints
@@ -0,0 +1,202 @@
+"""
+url_history.py - Historique des vérifications d'URLs
+====================================================
+
+Conserve le résultat de chaque vérification HTTP (statut, code, redirection,
+latence, date) dans la base annexe de StashMaster (``data/database.sqlite``),
+indexé par URL. ``URLValidator`` s'en sert pour ne pas re-sonder une URL
+vérifiée récemment : un balayage répété ne coûte plus que les URLs dont
+l'historique a expiré. Chaque balayage commence par purger les entrées plus
+vieilles que le plus long TTL ; les URLs supprimées de Stash sont oubliées.
+
+TTL par statut (section ``url_history`` de config.json, en heures) :
+    active / redirect : 7 jours
+    dead              : 3 jours
+    ambiguous         : 1 jour
+    error             : 6 heures
+
+Usage :
+    from services.url_history import URLCheckHistory
+    history = URLCheckHistory()
+    fresh = history.lookup_fresh(["https://..."])   # {url: HistoryEntry}
+    history.record(results)                          # List[URLCheckResult]
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.sidecar_db import connect_sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+HOUR = 3600
+
+DEFAULT_TTLS = {
+    "active":    7 * 24 * HOUR,
+    "redirect":  7 * 24 * HOUR,
+    "dead":      3 * 24 * HOUR,
+    "ambiguous": 24 * HOUR,
+    "error":     6 * HOUR,
+}
+
+# Statuts jamais historisés (aucune requête réseau derrière)
+NOT_RECORDED = {"whitelisted"}
+
+_CHUNK = 500  # taille des lots pour les requêtes IN (...)
+
+
+@dataclass
+class HistoryEntry:
+    url: str
+    status: str
+    http_code: Optional[int]
+    redirect_to: Optional[str]
+    latency_ms: int
+    checked_at: float
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.checked_at, 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Historique
+# ---------------------------------------------------------------------------
+
+class URLCheckHistory:
+    """
+    Table ``url_check_history`` de la base annexe.
+
+    Paramètres
+    ----------
+    db_path : chemin de la base (None = ``data.database_path`` de config.json)
+    ttls    : surcharge des TTL par statut (secondes)
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None):
+        self.db_path = db_path
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, db_path: Optional[str] = None) -> "URLCheckHistory":
+        """TTL lus dans la section ``url_history`` de config.json (heures)."""
+        try:
+            from services.config_manager import ConfigManager
+            cfg = ConfigManager().get("url_history", {}) or {}
+        except Exception:
+            cfg = {}
+        ttls = {k: float(v) * HOUR for k, v in (cfg.get("ttl_hours") or {}).items()}
+        return cls(db_path=db_path, ttls=ttls)
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect_sidecar(self.db_path)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def ttl_for(self, status: str) -> float:
+        return self.ttls.get(status, 0.0)
+
+    def lookup(self, urls: Iterable[str]) -> Dict[str, HistoryEntry]:
+        """Dernière vérification connue de chaque URL (fraîche ou non)."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found: Dict[str, HistoryEntry] = {}
+        if not urls:
+            return found
+        try:
+            with self._lock:
+                conn = self._db()
+                for i in range(0, len(urls), _CHUNK):
+                    chunk = urls[i:i + _CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"""SELECT url, status, http_code, redirect_to, latency_ms, checked_at
+                            FROM url_check_history WHERE url IN ({marks})""",
+                        chunk,
+                    ).fetchall()
+                    for r in rows:
+                        found[r["url"]] = HistoryEntry(
+                            url=r["url"], status=r["status"], http_code=r["http_code"],
+                            redirect_to=r["redirect_to"], latency_ms=r["latency_ms"] or 0,
+                            checked_at=r["checked_at"],
+                        )
+        except Exception as e:
+            print(f"[HISTORY] Lecture impossible : {e}")
+        return found
+
+    def lookup_fresh(self, urls: Iterable[str]) -> Dict[str, HistoryEntry]:
+        """Vérifications encore valides (âge < TTL du statut)."""
+        return {
+            url: entry for url, entry in self.lookup(urls).items()
+            if entry.age < self.ttl_for(entry.status)
+        }
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def record(self, results: Iterable[Any]):
+        """Enregistre des ``URLCheckResult`` (remplace l'historique de chaque URL)."""
+        now = time.time()
+        rows = []
+        for r in results:
+            status = getattr(r.status, "value", str(r.status))
+            if status in NOT_RECORDED or getattr(r, "from_history", False):
+                continue
+            rows.append((r.url, status, r.http_code, r.redirect_to,
+                         int(r.check_duration_ms or 0), now))
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.executemany(
+                    """INSERT OR REPLACE INTO url_check_history
+                       (url, status, http_code, redirect_to, latency_ms, checked_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    rows,
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"[HISTORY] Écriture impossible : {e}")
+
+    def forget(self, urls: Iterable[str]):
+        """Oublie des URLs (ex : après suppression des URLs mortes)."""
+        urls = list(urls)
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.executemany("DELETE FROM url_check_history WHERE url = ?", [(u,) for u in urls])
+                conn.commit()
+        except Exception:
+            pass
+
+    def purge_expired(self) -> int:
+        """Supprime les entrées plus vieilles que le plus long TTL."""
+        cutoff = time.time() - max(self.ttls.values() or [0])
+        try:
+            with self._lock:
+                conn = self._db()
+                cur = conn.execute("DELETE FROM url_check_history WHERE checked_at < ?", (cutoff,))
+                conn.commit()
+                return cur.rowcount
+        except Exception:
+            return 0
@@ -1,7 +1,8 @@
 import re
-import requests
+import threading
 import time
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, List, Dict, Optional, Tuple
 from urllib.parse import urlparse, quote_plus, parse_qs, unquote
 
 # Import des scrapers
@@ -10,6 +11,11 @@ from services.scrapers import (
     BabepediaScraper, BoobpediaScraper, XXXBiosScraper,
     _fetch, HEADERS, TIMEOUT
 )
+from services.http_client import get_http_client
+
+# Résultat d'une stratégie de recherche qui interrompt la course (URL trouvée mais invalide)
+_ABORT = object()
+
 
 class URLManager:
     """
@@ -37,6 +43,21 @@ class URLManager:
     # Liste complète (pour compatibilité)
     PRIORITY_ORDER = PRIMARY_SOURCES + FALLBACK_SOURCES
 
+    # Domaines couverts par SourceFinder
+    SOURCEFINDER_MAP = {
+        "iafd.com": "IAFD",
+        "freeones.xxx": "FreeOnes",
+        "thenude.com": "TheNude",
+        "babepedia.com": "Babepedia",
+    }
+
+    # Domaines traités en parallèle (validation + acquisition)
+    MAX_WORKERS = 8
+
+    # Stratégies de recherche d'un domaine lancées en même temps : la
+    # suivante (par priorité) part par anticipation, pas toutes à la fois
+    SEARCH_PARALLELISM = 2
+
     def __init__(self):
         # Initialisation des scrapers
         self.scrapers = {
@@ -59,13 +80,13 @@ class URLManager:
             conn = db._get_connection()
             cur = conn.cursor()
 
-            # Trouver le performer par nom (insensible à la casse)
-            cur.execute("SELECT id FROM performers WHERE lower(name)=lower(?) LIMIT 1", (performer_name,))
-            row = cur.fetchone()
-            if not row:
+            # Trouver le performer par son nom (pas par alias : l'alias d'un autre
+            # performer renverrait ses URLs) ; correspondance exacte en premier
+            matches = db.find_performers_by_name(performer_name, aliases=False)
+            if not matches:
                 return None
 
-            performer_id = str(row[0])
+            performer_id = str(matches[0]['id'])
             cur.execute("SELECT url FROM performer_urls WHERE performer_id=?", (performer_id,))
             urls = [r[0] for r in cur.fetchall() if r and r[0]]
 
@@ -139,33 +160,42 @@ class URLManager:
             else:
                 other_urls.append(url)
 
-        # 3. Validation et Acquisition des manquants
-        for i, (domain, scraper_class) in enumerate(active_sources):
-            if progress_callback:
-                progress_callback(int((i / num_sources) * 50), f"Vérification {domain}...")
+        # 3. Validation et Acquisition des manquants : un pipeline par domaine,
+        #    tous les domaines en parallèle. Les "autres" URLs sont pré-vérifiées
+        #    en même temps ; la sélection finale reste séquentielle (ordre inchangé).
+        other_candidates = list(dict.fromkeys(other_urls))
+        reachable: Dict[str, bool] = {}
+        workers = max(1, min(self.MAX_WORKERS, num_sources + len(other_candidates)))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="urlmanager") as pool:
+            slot_futures = {
+                pool.submit(self._resolve_priority_slot, domain, priority_slots[i], performer_name): i
+                for i, (domain, _) in enumerate(active_sources)
+            }
+            other_futures = {pool.submit(self.is_url_reachable, u): u for u in other_candidates}
 
-            current_url = priority_slots[i]
-            
-            # A. Validation si présent
-            if current_url:
-                if not self.is_url_reachable(current_url):
-                    print(f"URL morte détectée : {current_url}")
-                    priority_slots[i] = None # On le supprime pour forcer la recherche
-                    # On ne l'ajoute pas à other_urls car morte
-            
-            # B. Acquisition si manquant (ou devenu manquant après validation)
-            if priority_slots[i] is None:
+            done = 0
+            for fut in as_completed(slot_futures):
+                i = slot_futures[fut]
+                domain = active_sources[i][0]
+                try:
+                    priority_slots[i] = fut.result()
+                except Exception as e:
+                    print(f"[URLManager] Erreur pipeline {domain}: {e}")
+                    priority_slots[i] = None
+                done += 1
                 if progress_callback:
-                    progress_callback(int((i / num_sources) * 50) + 5, f"Recherche {domain}...")
-                
-                found_url = self.search_url_for_domain(domain, performer_name)
-                if found_url:
-                    priority_slots[i] = found_url
+                    progress_callback(int((done / num_sources) * 50), f"Vérification {domain}...")
+
+            # 4. Nettoyage et validation des autres URLs
+            if progress_callback:
+                progress_callback(60, "Validation des autres URLs...")
+            for fut in as_completed(other_futures):
+                try:
+                    reachable[other_futures[fut]] = fut.result()
+                except Exception:
+                    reachable[other_futures[fut]] = False
 
-        # 4. Nettoyage et validation des autres URLs
-        if progress_callback:
-            progress_callback(60, "Validation des autres URLs...")
-            
         validated_others = []
         unique_seen = set()
         seen_other_domains: set = set()
@@ -189,7 +219,7 @@ class URLManager:
             if bdom in seen_other_domains:
                 continue
             
-            if self.is_url_reachable(url):
+            if reachable.get(url, False):
                 validated_others.append(url)
                 unique_seen.add(url)
                 seen_other_domains.add(bdom)
@@ -208,6 +238,18 @@ class URLManager:
         # Limiter à 50
         return final_list[:50]
 
+    def _resolve_priority_slot(self, domain: str, current_url: Optional[str], performer_name: str) -> Optional[str]:
+        """Pipeline d'un domaine prioritaire : validation de l'URL présente, sinon acquisition."""
+        # A. Validation si présent
+        if current_url:
+            if self.is_url_reachable(current_url):
+                return current_url
+            print(f"URL morte détectée : {current_url}")
+            # On ne l'ajoute pas à other_urls car morte
+
+        # B. Acquisition si manquant (ou devenu manquant après validation)
+        return self.search_url_for_domain(domain, performer_name)
+
     def get_domain_key(self, url: str) -> str:
         """Normalise le domaine pour correspondre aux clés."""
         try:
@@ -272,21 +314,21 @@ class URLManager:
                     print(f"[URLManager] {domain_key} accepté par pattern : {url}")
                     return True
                 # Si ce n'est pas un profil valide, on teste quand même
-                resp = requests.get(url, headers=headers, timeout=10, stream=True, allow_redirects=True)
+                resp = get_http_client().get(url, headers=headers, timeout=10, stream=True, allow_redirects=True)
                 resp.close()
                 print(f"[URLManager] {domain_key} GET → {resp.status_code}")
                 # Accepter 200 ou 403 (403 = Cloudflare mais page existe)
                 return resp.status_code in (200, 403)
             
             # Pour les autres : HEAD puis GET en fallback
-            resp = requests.head(url, headers=headers, timeout=10, allow_redirects=True)
+            resp = get_http_client().head(url, headers=headers, timeout=10, allow_redirects=True)
             
             if resp.status_code == 200:
                 return True
                 
             # Si HEAD échoue (405, 403, 404), fallback sur GET
             if resp.status_code in (405, 403, 404):
-                resp = requests.get(url, headers=headers, timeout=10, stream=True, allow_redirects=True)
+                resp = get_http_client().get(url, headers=headers, timeout=10, stream=True, allow_redirects=True)
                 resp.close()
                 return resp.status_code == 200
                 
@@ -296,7 +338,15 @@ class URLManager:
             return False
 
     def search_url_for_domain(self, domain: str, name: str) -> Optional[str]:
-        """Tente de trouver l'URL manquante via le scraper associé."""
+        """
+        Tente de trouver l'URL manquante via le scraper associé.
+
+        La base locale est consultée d'abord (instantané, sans réseau). Les
+        stratégies distantes sont ensuite lancées par ordre de priorité, au
+        plus ``SEARCH_PARALLELISM`` à la fois ; la première URL de profil
+        valide *dans l'ordre de priorité* l'emporte (même résultat que
+        l'exécution séquentielle) et les autres sont annulées.
+        """
         scraper = self.scrapers.get(domain)
         if not scraper:
             return None
@@ -305,208 +355,284 @@ class URLManager:
         known = self._lookup_known_url_from_db(domain, name)
         if known:
             return known
-            
+
+        strategies = self._search_strategies(domain, scraper)
+        try:
+            return self._race_strategies(strategies, domain, name, scraper)
+        except Exception as e:
+            print(f"Erreur recherche {domain} pour {name}: {e}")
+            return None
+
+    def _search_strategies(self, domain: str, scraper) -> List[Tuple[str, Callable]]:
+        """Stratégies distantes applicables au domaine, par ordre de priorité."""
+        strategies = []
+        if hasattr(scraper, "search"):
+            strategies.append(("recherche native", self._strategy_native_search))
+        if domain in self.SOURCEFINDER_MAP:
+            strategies.append(("SourceFinder", self._strategy_source_finder))
+        if domain == "iafd.com":
+            strategies.append(("résultats IAFD", self._strategy_iafd_results))
+        if domain in ("babepedia.com", "boobpedia.com"):
+            strategies.append(("slugs", self._strategy_slug_guesses))
+        if domain == "thenude.com":
+            strategies.append(("navbar TheNude", self._strategy_thenude_navbar))
+        if domain == "iafd.com":
+            strategies.append(("slug IAFD", self._strategy_iafd_slug))
+        if domain == "xxxbios.com" and hasattr(scraper, "build_url"):
+            strategies.append(("URL générée", self._strategy_xxxbios_build))
+        return strategies
+
+    def _race_strategies(self, strategies: List[Tuple[str, Callable]], domain: str, name: str, scraper) -> Optional[str]:
+        """
+        Exécute les stratégies par ordre de priorité, au plus
+        ``SEARCH_PARALLELISM`` en même temps : une stratégie n'est lancée
+        que si aucune stratégie plus prioritaire n'a déjà trouvé. Retourne
+        dès que le résultat de la plus prioritaire non encore terminée est
+        connu, ou qu'un gagnant moins prioritaire est confirmé (toutes les
+        précédentes ont échoué). ``cancel`` est alors levé : les stratégies
+        encore en cours s'arrêtent avant leur prochaine requête.
+        """
+        if not strategies:
+            return None
+        cancel = threading.Event()
+        window = max(1, min(self.SEARCH_PARALLELISM, len(strategies)))
+        pool = ThreadPoolExecutor(max_workers=window, thread_name_prefix="urlsearch")
+        running: Dict = {}                  # future -> rang
+        outcomes: Dict[int, object] = {}    # rang -> résultat
+        next_launch = 0                     # prochaine stratégie à lancer
+        next_rank = 0                       # plus prioritaire non encore tranchée
         try:
-            # 1) Recherche native du scraper (ex: XXXBios)
-            if hasattr(scraper, "search"):
-                found_url = scraper.search(name)
-                # Valider que l'URL trouvée correspond bien au pattern de profil attendu
-                if found_url:
-                    if self.is_profile_url(found_url, domain):
-                        return found_url
-                    else:
-                        print(f"[URLManager] URL rejetée pour {domain} (pattern invalide) : {found_url}")
+            while True:
+                # Un gagnant connu à un rang r : inutile de lancer au-delà de r
+                found = min((r for r, res in outcomes.items() if res), default=len(strategies))
+                while len(running) < window and next_launch < min(found, len(strategies)):
+                    label, fn = strategies[next_launch]
+                    fut = pool.submit(self._run_strategy, label, fn, domain, name, scraper, cancel)
+                    running[fut] = next_launch
+                    next_launch += 1
+
+                while next_rank in outcomes:
+                    result = outcomes[next_rank]
+                    if result is _ABORT:
                         return None
-                # continue vers autres stratégies si search() n'a rien donné
-
-            # 2) SourceFinder (IAFD / FreeOnes / TheNude / Babepedia)
-            sourcefinder_map = {
-                "iafd.com": "IAFD",
-                "freeones.xxx": "FreeOnes",
-                "thenude.com": "TheNude",
-                "babepedia.com": "Babepedia",
-            }
-            sf_source = sourcefinder_map.get(domain)
-            if sf_source:
-                try:
-                    from services.source_finder import SourceFinder
-                    finder = SourceFinder(timeout=10, delay=0)
-                    result = finder.find_for_source(sf_source, name, aliases=[])
-                    found_url = None
-                    if result and result.best and result.best.url:
-                        found_url = result.best.url
-                    elif result and result.candidates:
-                        found_url = result.candidates[0].url
-
-                    if found_url:
-                        if self.is_profile_url(found_url, domain):
-                            return found_url
-                        print(f"[URLManager] URL SourceFinder rejetée pour {domain}: {found_url}")
-                except Exception as e:
-                    print(f"[URLManager] SourceFinder erreur pour {domain}: {e}")
+                    if result:
+                        print(f"[URLManager] {domain} trouvé via {strategies[next_rank][0]} : {result}")
+                        return result
+                    next_rank += 1
+                if not running:
+                    return None
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    outcomes[running.pop(fut)] = fut.result()
+        finally:
+            cancel.set()
+            pool.shutdown(wait=False, cancel_futures=True)
 
-            # 2bis) Fallback direct IAFD via page de résultats
-            if domain == "iafd.com":
-                try:
-                    query = re.sub(r"\s+", "+", name.strip())
-                    search_url = (
-                        "https://www.iafd.com/results.asp?pagetype=person"
-                        f"&searchtype=name&sex=f&q={query}"
-                    )
-                    soup = _fetch(search_url)
-                    if soup:
-                        candidates = []
-                        for a in soup.find_all("a", href=True):
-                            href = a["href"]
-                            if "person.rme" not in href and "person.rvm" not in href:
-                                continue
-                            if href.startswith("/"):
-                                href = "https://www.iafd.com" + href
-                            txt = (a.get_text() or "").strip().lower()
-                            name_l = (name or "").strip().lower()
-                            score = 0
-                            if name_l and txt == name_l:
-                                score += 100
-                            elif name_l and name_l in txt:
-                                score += 60
-                            if "person.rme" in href:
-                                score += 10
-                            candidates.append((score, href))
-
-                        if candidates:
-                            candidates.sort(key=lambda x: x[0], reverse=True)
-                            for _, candidate_url in candidates:
-                                if self.is_profile_url(candidate_url, domain):
-                                    return candidate_url
-                except Exception as e:
-                    print(f"[URLManager] Fallback IAFD erreur: {e}")
-            
-            # 3) Construction d'URL directe (Babepedia/Boobpedia + XXXBios fallback)
-            if domain == "babepedia.com":
-                 name_clean = name.strip()
-                 variants = []
-                 variants.append(re.sub(r"\s+", "_", name_clean.title()))
-                 variants.append(re.sub(r"\s+", "-", name_clean.lower()))
-                 variants.append(re.sub(r"\s+", "_", name_clean))
-
-                 tried = set()
-                 for slug in variants:
-                     if slug in tried:
-                         continue
-                     tried.add(slug)
-                     url = f"https://www.babepedia.com/babe/{slug}"
-                     # Babepedia peut répondre 403 malgré une page valide, donc
-                     # on s'appuie sur le pattern profil + reachability manager.
-                     if self.is_profile_url(url, domain) and self.is_url_reachable(url):
-                         return url
-
-            if domain == "boobpedia.com":
-                 # Essais de slugs courants
-                 name_clean = name.strip()
-                 variants = []
-                 variants.append(re.sub(r"\s+", "_", name_clean.title()))
-                 variants.append(re.sub(r"\s+", "_", name_clean))
-                 variants.append(re.sub(r"\s+", "_", name_clean.lower().title()))
-
-                 tried = set()
-                 for slug in variants:
-                     if slug in tried:
-                         continue
-                     tried.add(slug)
-                     url = f"https://www.boobpedia.com/boobs/{slug}"
-                     if self.is_profile_url(url, domain) and self.is_url_reachable(url):
-                         return url
-
-            if domain == "thenude.com":
-                 # Fallback via barre de recherche principale TheNude (navbar-search)
-                 try:
-                     from urllib.parse import quote
-                     
-                     # Endpoint exact du formulaire navbar-search
-                     search_url = "https://www.thenude.com/index.php"
-                     params = {
-                         "page": "search",
-                         "action": "searchModels",
-                         "__form_name": "navbar-search",
-                         "m_aka": "on",
-                         "m_name": name.strip()
-                     }
-                     
-                     # Construire l'URL complète
-                     param_str = "&".join(f"{k}={quote(str(v), safe='')}" for k, v in params.items())
-                     full_url = f"{search_url}?{param_str}"
-                     
-                     soup = _fetch(full_url)
-                     if not soup:
-                         print(f"[URLManager] TheNude navbar-search: échec fetch")
-                     else:
-                         candidates = []
-                         for a in soup.find_all("a", href=True):
-                             href = a["href"]
-                             # Pattern profil TheNude: nom_ID.htm ou _ID.htm
-                             if not re.search(r'(?:^|/)_[0-9]+\.htm$|(?:^|/)[^/]+_[0-9]+\.htm$', href, re.I):
-                                 continue
-                             
-                             # Construire URL complète
-                             if href.startswith("/"):
-                                 href = "https://www.thenude.com" + href
-                             elif not href.startswith("http"):
-                                 href = "https://www.thenude.com/" + href
-                             
-                             # Encoder les espaces dans l'URL
-                             href = href.replace(" ", "%20")
-                             
-                             # Scoring basé sur le texte du lien
-                             txt = (a.get_text() or "").strip().lower()
-                             name_l = (name or "").strip().lower()
-                             score = 0
-                             if name_l and txt == name_l:
-                                 score += 100
-                             elif name_l and name_l in txt:
-                                 score += 60
-                             elif txt and txt in name_l:
-                                 score += 40
-                             
-                             # Bonus si le slug correspond
-                             href_lower = href.lower()
-                             name_slug = name_l.replace(" ", "-")
-                             if name_slug in href_lower:
-                                 score += 50
-                             
-                             candidates.append((score, href))
-
-                         if candidates:
-                             candidates.sort(key=lambda x: x[0], reverse=True)
-                             print(f"[URLManager] TheNude: {len(candidates)} candidats, meilleur score={candidates[0][0]}")
-                             
-                             # Prendre le premier avec score > 0 et profil valide
-                             for score, candidate_url in candidates:
-                                 if score > 0 and self.is_profile_url(candidate_url, domain):
-                                     return candidate_url
-                 except Exception as e:
-                     print(f"[URLManager] Fallback TheNude erreur: {e}")
-
-            if domain == "iafd.com":
-                 # Fallback direct : slug IAFD classique perfid=prenom_nom
-                 name_clean = name.strip()
-                 slug_us = re.sub(r"\s+", "_", name_clean.lower())
-                 slug_dash = re.sub(r"\s+", "-", name_clean.lower())
-                 url = f"https://www.iafd.com/person.rme/perfid={slug_us}/gender=f/{slug_dash}.htm"
-                 if self.is_profile_url(url, domain) and self.is_url_reachable(url):
-                     return url
-
-            if domain == "xxxbios.com":
-                 # Fallback si search n'a pas marché
-                 if hasattr(scraper, "build_url"):
-                     url = scraper.build_url(name)
-                     if self.is_profile_url(url, domain) and self.is_url_reachable(url):
-                         return url
-            
+    @staticmethod
+    def _run_strategy(label: str, fn: Callable, domain: str, name: str, scraper, cancel: threading.Event):
+        if cancel.is_set():
             return None
-            
+        try:
+            return fn(domain, name, scraper, cancel)
         except Exception as e:
-            print(f"Erreur recherche {domain} pour {name}: {e}")
+            print(f"[URLManager] {label} erreur pour {domain}: {e}")
+            return None
+
+    # ── Stratégies de recherche ─────────────────────────────────────────
+
+    def _strategy_native_search(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # 1) Recherche native du scraper (ex: XXXBios)
+        if cancel.is_set():
+            return None
+        found_url = scraper.search(name)
+        # Valider que l'URL trouvée correspond bien au pattern de profil attendu
+        if found_url:
+            if self.is_profile_url(found_url, domain):
+                return found_url
+            print(f"[URLManager] URL rejetée pour {domain} (pattern invalide) : {found_url}")
+            return _ABORT
+        # continue vers autres stratégies si search() n'a rien donné
+        return None
+
+    def _strategy_source_finder(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # 2) SourceFinder (IAFD / FreeOnes / TheNude / Babepedia)
+        from services.source_finder import SourceFinder
+        finder = SourceFinder(timeout=10, delay=0)
+        if cancel.is_set():
+            return None
+        result = finder.find_for_source(self.SOURCEFINDER_MAP[domain], name, aliases=[])
+        found_url = None
+        if result and result.best and result.best.url:
+            found_url = result.best.url
+        elif result and result.candidates:
+            found_url = result.candidates[0].url
+
+        if found_url:
+            if self.is_profile_url(found_url, domain):
+                return found_url
+            print(f"[URLManager] URL SourceFinder rejetée pour {domain}: {found_url}")
+        return None
+
+    def _strategy_iafd_results(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # 2bis) Fallback direct IAFD via page de résultats
+        query = re.sub(r"\s+", "+", name.strip())
+        search_url = (
+            "https://www.iafd.com/results.asp?pagetype=person"
+            f"&searchtype=name&sex=f&q={query}"
+        )
+        if cancel.is_set():
             return None
+        soup = _fetch(search_url)
+        if not soup:
+            return None
+        candidates = []
+        for a in soup.find_all("a", href=True):
+            href = a["href"]
+            if "person.rme" not in href and "person.rvm" not in href:
+                continue
+            if href.startswith("/"):
+                href = "https://www.iafd.com" + href
+            txt = (a.get_text() or "").strip().lower()
+            name_l = (name or "").strip().lower()
+            score = 0
+            if name_l and txt == name_l:
+                score += 100
+            elif name_l and name_l in txt:
+                score += 60
+            if "person.rme" in href:
+                score += 10
+            candidates.append((score, href))
+
+        if candidates:
+            candidates.sort(key=lambda x: x[0], reverse=True)
+            for _, candidate_url in candidates:
+                if self.is_profile_url(candidate_url, domain):
+                    return candidate_url
+        return None
+
+    def _strategy_slug_guesses(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # 3) Construction d'URL directe (Babepedia/Boobpedia)
+        name_clean = name.strip()
+        if domain == "babepedia.com":
+            base = "https://www.babepedia.com/babe/"
+            variants = [
+                re.sub(r"\s+", "_", name_clean.title()),
+                re.sub(r"\s+", "-", name_clean.lower()),
+                re.sub(r"\s+", "_", name_clean),
+            ]
+        else:
+            base = "https://www.boobpedia.com/boobs/"
+            variants = [
+                re.sub(r"\s+", "_", name_clean.title()),
+                re.sub(r"\s+", "_", name_clean),
+                re.sub(r"\s+", "_", name_clean.lower().title()),
+            ]
+
+        tried = set()
+        for slug in variants:
+            if slug in tried:
+                continue
+            if cancel.is_set():
+                return None
+            tried.add(slug)
+            url = f"{base}{slug}"
+            # Babepedia peut répondre 403 malgré une page valide, donc
+            # on s'appuie sur le pattern profil + reachability manager.
+            if self.is_profile_url(url, domain) and self.is_url_reachable(url):
+                return url
+        return None
+
+    def _strategy_thenude_navbar(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # Fallback via barre de recherche principale TheNude (navbar-search)
+        from urllib.parse import quote
+
+        # Endpoint exact du formulaire navbar-search
+        search_url = "https://www.thenude.com/index.php"
+        params = {
+            "page": "search",
+            "action": "searchModels",
+            "__form_name": "navbar-search",
+            "m_aka": "on",
+            "m_name": name.strip()
+        }
+
+        # Construire l'URL complète
+        param_str = "&".join(f"{k}={quote(str(v), safe='')}" for k, v in params.items())
+        full_url = f"{search_url}?{param_str}"
+
+        if cancel.is_set():
+            return None
+        soup = _fetch(full_url)
+        if not soup:
+            print(f"[URLManager] TheNude navbar-search: échec fetch")
+            return None
+
+        candidates = []
+        for a in soup.find_all("a", href=True):
+            href = a["href"]
+            # Pattern profil TheNude: nom_ID.htm ou _ID.htm
+            if not re.search(r'(?:^|/)_[0-9]+\.htm$|(?:^|/)[^/]+_[0-9]+\.htm$', href, re.I):
+                continue
+
+            # Construire URL complète
+            if href.startswith("/"):
+                href = "https://www.thenude.com" + href
+            elif not href.startswith("http"):
+                href = "https://www.thenude.com/" + href
+
+            # Encoder les espaces dans l'URL
+            href = href.replace(" ", "%20")
+
+            # Scoring basé sur le texte du lien
+            txt = (a.get_text() or "").strip().lower()
+            name_l = (name or "").strip().lower()
+            score = 0
+            if name_l and txt == name_l:
+                score += 100
+            elif name_l and name_l in txt:
+                score += 60
+            elif txt and txt in name_l:
+                score += 40
+
+            # Bonus si le slug correspond
+            href_lower = href.lower()
+            name_slug = name_l.replace(" ", "-")
+            if name_slug in href_lower:
+                score += 50
+
+            candidates.append((score, href))
+
+        if candidates:
+            candidates.sort(key=lambda x: x[0], reverse=True)
+            print(f"[URLManager] TheNude: {len(candidates)} candidats, meilleur score={candidates[0][0]}")
+
+            # Prendre le premier avec score > 0 et profil valide
+            for score, candidate_url in candidates:
+                if score > 0 and self.is_profile_url(candidate_url, domain):
+                    return candidate_url
+        return None
+
+    def _strategy_iafd_slug(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # Fallback direct : slug IAFD classique perfid=prenom_nom
+        name_clean = name.strip()
+        slug_us = re.sub(r"\s+", "_", name_clean.lower())
+        slug_dash = re.sub(r"\s+", "-", name_clean.lower())
+        url = f"https://www.iafd.com/person.rme/perfid={slug_us}/gender=f/{slug_dash}.htm"
+        if cancel.is_set():
+            return None
+        if self.is_profile_url(url, domain) and self.is_url_reachable(url):
+            return url
+        return None
+
+    def _strategy_xxxbios_build(self, domain: str, name: str, scraper, cancel: threading.Event):
+        # Fallback si search n'a pas marché
+        url = scraper.build_url(name)
+        if cancel.is_set():
+            return None
+        if self.is_profile_url(url, domain) and self.is_url_reachable(url):
+            return url
+        return None
 
 
 class URLOptimizer:
@@ -19,6 +19,7 @@ Usage depuis StashMaster (import) :
     validator.delete_dead_urls(results, confirm=True)
 """
 
+import asyncio
 import sqlite3
 import requests
 import threading
@@ -29,6 +30,10 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
 
+from services.http_client import get_http_client
+from services.rate_limiter import THROTTLE_STATUSES
+from services.url_history import URLCheckHistory
+
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -39,6 +44,13 @@ DEFAULT_STASH_URL   = "http://localhost:9999"
 DEFAULT_TIMEOUT     = 10       # secondes par requête
 DEFAULT_MAX_WORKERS = 8        # requêtes parallèles
 DEFAULT_RETRY       = 1        # nb de retry en cas d'échec réseau
+DEFAULT_ENGINE      = "thread" # "thread" ou "async" (balayage de toute la bibliothèque)
+DEFAULT_MAX_IN_FLIGHT = 1000   # vérifications simultanées (moteur async)
+DEFAULT_PER_HOST    = 6        # connexions simultanées par hôte (moteur async)
+
+# UPDATE ... FROM (SQLite 3.33) et fonctions de fenêtrage (3.25) : absents des
+# SQLite embarqués par les anciens Python, on renumérote alors en Python
+SQLITE_UPDATE_FROM = sqlite3.sqlite_version_info >= (3, 33, 0)
 
 # Domaines à ne jamais supprimer même si inaccessibles (VPN, abonnement, etc.)
 WHITELIST_DOMAINS = {
@@ -93,6 +105,7 @@ class URLCheckResult:
     redirect_to: Optional[str] = None
     error_msg: Optional[str] = None
     check_duration_ms: int = 0
+    from_history: bool = False   # résultat repris de l'historique (pas de requête)
     domain: str = field(init=False)
 
     def __post_init__(self):
@@ -149,7 +162,7 @@ def _check_single_url(url: str, timeout: int = DEFAULT_TIMEOUT,
     for attempt in range(retry + 1):
         try:
             # 1. Tentative HEAD (plus rapide, pas de body)
-            resp = requests.head(
+            resp = get_http_client().head(
                 url, headers=HEADERS, timeout=timeout,
                 allow_redirects=True
             )
@@ -160,12 +173,18 @@ def _check_single_url(url: str, timeout: int = DEFAULT_TIMEOUT,
             if code in (405, 501):
                 raise requests.exceptions.InvalidSchema("HEAD not allowed")
 
+            # 429/503 : le RateLimiter a mis le domaine en pause (Retry-After),
+            # la tentative suivante attendra d'elle-même
+            if code in THROTTLE_STATUSES and attempt < retry:
+                last_error = f"HTTP {code}"
+                continue
+
             return code, redirect, ""
 
         except requests.exceptions.InvalidSchema:
             # Fallback GET
             try:
-                resp = requests.get(
+                resp = get_http_client().get(
                     url, headers=HEADERS, timeout=timeout,
                     allow_redirects=True, stream=True
                 )
@@ -185,8 +204,8 @@ def _check_single_url(url: str, timeout: int = DEFAULT_TIMEOUT,
         except Exception as e:
             last_error = str(e)
 
-        if attempt < retry:
-            time.sleep(1)
+        # Pas de sleep ici : le backoff (avec jitter) est appliqué au domaine
+        # par le RateLimiter du client HTTP lors de la tentative suivante
 
     return None, None, last_error
 
@@ -205,7 +224,12 @@ class URLValidator:
     stash_url : URL de l'API Stash (pour les suppressions GraphQL)
     api_key   : clé API Stash si authentification requise
     timeout   : timeout HTTP en secondes
-    max_workers : nombre de threads parallèles
+    max_workers : nombre de threads parallèles (moteur "thread")
+    engine    : "thread" (défaut) ou "async"
+    max_in_flight : vérifications simultanées (moteur "async")
+    per_host  : connexions simultanées par hôte (moteur "async")
+    use_history : réutiliser les vérifications récentes (url_check_history)
+    history_db  : base annexe de l'historique (None = config.json)
     """
 
     def __init__(
@@ -215,12 +239,21 @@ class URLValidator:
         api_key: str = "",
         timeout: int = DEFAULT_TIMEOUT,
         max_workers: int = DEFAULT_MAX_WORKERS,
+        engine: str = DEFAULT_ENGINE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        per_host: int = DEFAULT_PER_HOST,
+        use_history: bool = True,
+        history_db: Optional[str] = None,
     ):
         self.db_path = db_path
         self.stash_url = stash_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
         self.max_workers = max_workers
+        self.engine = engine
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.history = URLCheckHistory.from_config(history_db) if use_history else None
         self._lock = threading.Lock()
 
     # ------------------------------------------------------------------
@@ -284,24 +317,39 @@ class URLValidator:
     def _check_url_entry(self, entry: Dict) -> URLCheckResult:
         """Vérifie une entrée URL et retourne un URLCheckResult."""
         url = entry["url"]
-        result_base = dict(
-            performer_id=entry["performer_id"],
-            performer_name=entry["name"],
-            position=entry["position"],
-            url=url,
-        )
 
         # Whitelist
-        if _is_whitelisted(url):
-            return URLCheckResult(
-                **result_base,
-                status=URLStatus.WHITELISTED,
-            )
+        whitelisted = self._whitelisted_result(entry)
+        if whitelisted:
+            return whitelisted
 
         # Vérification HTTP
         t0 = time.monotonic()
         code, redirect, error = _check_single_url(url, self.timeout)
         elapsed_ms = int((time.monotonic() - t0) * 1000)
+        return self._build_result(entry, code, redirect, error, elapsed_ms)
+
+    def _whitelisted_result(self, entry: Dict) -> Optional[URLCheckResult]:
+        if _is_whitelisted(entry["url"]):
+            return URLCheckResult(
+                performer_id=entry["performer_id"],
+                performer_name=entry["name"],
+                position=entry["position"],
+                url=entry["url"],
+                status=URLStatus.WHITELISTED,
+            )
+        return None
+
+    def _build_result(self, entry: Dict, code: Optional[int], redirect: Optional[str],
+                      error: str, elapsed_ms: int) -> URLCheckResult:
+        """Classe un résultat HTTP brut (commun aux moteurs thread et async)."""
+        url = entry["url"]
+        result_base = dict(
+            performer_id=entry["performer_id"],
+            performer_name=entry["name"],
+            position=entry["position"],
+            url=url,
+        )
 
         if error and code is None:
             # Timeout ou erreur réseau → ambiguïté, on ne supprime pas
@@ -335,11 +383,75 @@ class URLValidator:
         self,
         urls: List[Dict],
         progress_callback=None,
+        engine: Optional[str] = None,
+        force: bool = False,
     ) -> List[URLCheckResult]:
         """
         Valide une liste d'entrées URL en parallèle.
         progress_callback(current, total, result) est appelé après chaque check.
+        engine : "thread" (pool de threads) ou "async" (asyncio, balayages massifs) ;
+                 par défaut celui du constructeur.
+        force  : ignorer l'historique et re-sonder toutes les URLs
+                 (les nouveaux résultats sont tout de même enregistrés).
         """
+        total = len(urls)
+        if self.history is not None:
+            purged = self.history.purge_expired()
+            if purged:
+                print(f"[HISTORY] {purged} vérification(s) expirée(s) purgée(s)")
+        reused, to_check = self._split_by_history(urls, force)
+        for i, result in enumerate(reused, 1):
+            if progress_callback:
+                progress_callback(i, total, result)
+        if reused:
+            print(f"[HISTORY] {len(reused)}/{total} URL(s) vérifiées récemment, ignorées")
+
+        offset = len(reused)
+        shifted = None
+        if progress_callback:
+            def shifted(current, _total, result):
+                progress_callback(offset + current, total, result)
+
+        checked: List[URLCheckResult] = []
+        if to_check:
+            if (engine or self.engine) == "async":
+                checked = self._validate_urls_async(to_check, shifted)
+            else:
+                checked = self._validate_urls_threaded(to_check, shifted)
+            if self.history is not None:
+                self.history.record(checked)
+
+        results = reused + checked
+        # Tri : performer_id puis position
+        results.sort(key=lambda r: (r.performer_id, r.position))
+        return results
+
+    def _split_by_history(self, urls: List[Dict], force: bool = False) -> Tuple[List[URLCheckResult], List[Dict]]:
+        """Sépare les entrées vérifiées récemment (résultat repris) de celles à sonder."""
+        if force or self.history is None or not urls:
+            return [], list(urls)
+        fresh = self.history.lookup_fresh(e["url"] for e in urls)
+        reused, to_check = [], []
+        for entry in urls:
+            past = fresh.get(entry["url"])
+            if past is None:
+                to_check.append(entry)
+                continue
+            reused.append(URLCheckResult(
+                performer_id=entry["performer_id"],
+                performer_name=entry["name"],
+                position=entry["position"],
+                url=entry["url"],
+                status=URLStatus(past.status),
+                http_code=past.http_code,
+                redirect_to=past.redirect_to,
+                check_duration_ms=past.latency_ms,
+                from_history=True,
+            ))
+        return reused, to_check
+
+    def _validate_urls_threaded(self, urls: List[Dict], progress_callback=None) -> List[URLCheckResult]:
+        """Moteur par défaut : pool de threads (HEAD puis GET via le client HTTP partagé)."""
         results = []
         total = len(urls)
 
@@ -358,10 +470,41 @@ class URLValidator:
         results.sort(key=lambda r: (r.performer_id, r.position))
         return results
 
+    def _validate_urls_async(self, urls: List[Dict], progress_callback=None) -> List[URLCheckResult]:
+        """Moteur asyncio : des milliers de vérifications en vol dans un seul thread."""
+        from services.async_url_checker import AsyncURLChecker
+
+        checker = AsyncURLChecker(
+            timeout=self.timeout,
+            max_in_flight=self.max_in_flight,
+            per_host=self.per_host,
+        )
+        total = len(urls)
+        done = [0]
+
+        async def check_entry(entry: Dict) -> URLCheckResult:
+            whitelisted = self._whitelisted_result(entry)
+            if whitelisted:
+                return whitelisted
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            code, redirect, error = await checker.check(entry["url"])
+            elapsed_ms = int((loop.time() - t0) * 1000)
+            return self._build_result(entry, code, redirect, error, elapsed_ms)
+
+        def on_done(result: URLCheckResult):
+            done[0] += 1
+            if progress_callback:
+                progress_callback(done[0], total, result)
+
+        return asyncio.run(checker.check_many(urls, check_entry, on_done))
+
     def validate_all(
         self,
         performer_id: Optional[int] = None,
         progress_callback=None,
+        engine: Optional[str] = None,
+        force: bool = False,
     ) -> List[URLCheckResult]:
         """
         Valide toutes les URLs (ou celles d'un seul performer).
@@ -369,7 +512,7 @@ class URLValidator:
         entries = self.get_all_performer_urls(performer_id)
         if not entries:
             return []
-        return self.validate_urls(entries, progress_callback)
+        return self.validate_urls(entries, progress_callback, engine=engine, force=force)
 
     # ------------------------------------------------------------------
     # Suppression des URLs mortes
@@ -379,33 +522,40 @@ class URLValidator:
         """
         Supprime les URLs mortes directement dans la BDD SQLite.
         Retourne le nombre de suppressions effectuées.
+
+        Traitement ensembliste, en une seule transaction :
+          1. les paires (performer_id, url) mortes sont chargées dans une table temporaire ;
+          2. un seul DELETE les supprime ;
+          3. les positions des performers concernés sont renumérotées une fois
+             (ROW_NUMBER() OVER (PARTITION BY performer_id ORDER BY position)),
+             ou performer par performer si SQLite est antérieur à 3.33.
         """
         dead = [r for r in results if r.should_delete]
         if not dead:
             return 0
 
+        pairs = list(dict.fromkeys((r.performer_id, r.url) for r in dead))
         conn = self._get_connection()
-        count = 0
         try:
-            for r in dead:
-                conn.execute(
-                    "DELETE FROM performer_urls WHERE performer_id = ? AND url = ?",
-                    (r.performer_id, r.url)
-                )
-                # Réindexer les positions restantes pour ce performer
-                conn.execute(
-                    """
-                    UPDATE performer_urls
-                    SET position = (
-                        SELECT COUNT(*) FROM performer_urls pu2
-                        WHERE pu2.performer_id = performer_urls.performer_id
-                          AND pu2.position < performer_urls.position
-                    )
-                    WHERE performer_id = ?
-                    """,
-                    (r.performer_id,)
-                )
-                count += 1
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DROP TABLE IF EXISTS temp.dead_urls")
+            conn.execute(
+                "CREATE TEMP TABLE dead_urls (performer_id INTEGER NOT NULL, url TEXT NOT NULL, "
+                "PRIMARY KEY (performer_id, url)) WITHOUT ROWID"
+            )
+            conn.executemany("INSERT OR IGNORE INTO temp.dead_urls (performer_id, url) VALUES (?, ?)", pairs)
+
+            count = conn.execute(
+                """
+                DELETE FROM performer_urls
+                WHERE EXISTS (SELECT 1 FROM temp.dead_urls AS d
+                              WHERE d.performer_id = performer_urls.performer_id
+                                AND d.url = performer_urls.url)
+                """
+            ).rowcount
+
+            self._renumber_positions(conn, SQLITE_UPDATE_FROM)
+            conn.execute("DROP TABLE temp.dead_urls")
             conn.commit()
         except Exception as e:
             conn.rollback()
@@ -413,8 +563,48 @@ class URLValidator:
         finally:
             conn.close()
 
+        if self.history is not None:
+            self.history.forget({url for _, url in pairs})
         return count
 
+    @staticmethod
+    def _renumber_positions(conn: sqlite3.Connection, update_from: bool = True):
+        """
+        Réindexe les positions restantes (0, 1, 2...) des performers listés
+        dans ``temp.dead_urls``, dans la transaction en cours.
+        """
+        if update_from:
+            conn.execute(
+                """
+                UPDATE performer_urls
+                SET position = renum.new_position
+                FROM (
+                    SELECT performer_id, position, url,
+                           ROW_NUMBER() OVER (PARTITION BY performer_id ORDER BY position, url) - 1
+                               AS new_position
+                    FROM performer_urls
+                    WHERE performer_id IN (SELECT DISTINCT performer_id FROM temp.dead_urls)
+                ) AS renum
+                WHERE performer_urls.performer_id = renum.performer_id
+                  AND performer_urls.position = renum.position
+                  AND performer_urls.url = renum.url
+                  AND performer_urls.position <> renum.new_position
+                """
+            )
+            return
+
+        # SQLite < 3.33 : même ordre (position, url), un performer à la fois
+        performer_ids = [r[0] for r in conn.execute("SELECT DISTINCT performer_id FROM temp.dead_urls")]
+        for performer_id in performer_ids:
+            rows = conn.execute(
+                "SELECT position, url FROM performer_urls WHERE performer_id = ? ORDER BY position, url",
+                (performer_id,),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE performer_urls SET position = ? WHERE performer_id = ? AND position = ? AND url = ?",
+                [(i, performer_id, pos, url) for i, (pos, url) in enumerate(rows) if pos != i],
+            )
+
     def delete_dead_urls_via_graphql(self, results: List[URLCheckResult]) -> Dict:
         """
         Supprime les URLs mortes via l'API GraphQL de Stash.
@@ -449,6 +639,10 @@ class URLValidator:
             except Exception as e:
                 report[performer_id] = {"status": "error", "error": str(e)}
 
+        if self.history is not None:
+            self.history.forget({
+                url for v in report.values() if v.get("status") == "ok" for url in v["removed"]
+            })
         return report
 
     def _gql_headers(self) -> Dict:
@@ -889,10 +1083,18 @@ def _cli():
                         help="Timeout HTTP en secondes")
     parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
                         help="Nombre de threads parallèles")
+    parser.add_argument("--engine", choices=["thread", "async"], default=DEFAULT_ENGINE,
+                        help="Moteur de vérification (async = balayage massif)")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Vérifications simultanées (moteur async)")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help="Connexions simultanées par hôte (moteur async)")
     parser.add_argument("--auto-delete", action="store_true",
                         help="Supprimer automatiquement sans confirmation")
     parser.add_argument("--dry-run", action="store_true",
                         help="Simuler sans modifier la BDD")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignorer l'historique et re-vérifier toutes les URLs")
     parser.add_argument("--mode", choices=["auto","db_only","graphql_only"],
                         default="auto", help="Mode de suppression")
     args = parser.parse_args()
@@ -903,6 +1105,9 @@ def _cli():
         api_key=args.api_key,
         timeout=args.timeout,
         max_workers=args.workers,
+        engine=args.engine,
+        max_in_flight=args.max_in_flight,
+        per_host=args.per_host,
     )
 
     # Infos
@@ -921,12 +1126,17 @@ def _cli():
         print(f"  [{current:>4}/{total}] {result}", flush=True)
 
     print(f"\n{'─'*70}")
-    print(f"Validation en cours ({args.workers} threads, timeout={args.timeout}s)…")
+    if args.engine == "async":
+        print(f"Validation en cours (asyncio, {args.max_in_flight} en vol, "
+              f"{args.per_host}/hôte, timeout={args.timeout}s)…")
+    else:
+        print(f"Validation en cours ({args.workers} threads, timeout={args.timeout}s)…")
     print(f"{'─'*70}")
 
     results = validator.validate_all(
         performer_id=args.performer_id,
         progress_callback=progress,
+        force=args.force,
     )
 
     # Rapport
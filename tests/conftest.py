@@ -0,0 +1,41 @@
+"""
+conftest.py - Collecte pytest des tests de StashMaster V2
+=========================================================
+
+``Legacy/`` contient sa propre application, avec ses propres paquets
+``services`` et ``utils``. Quand pytest collecte les deux arborescences dans
+le même processus (``python -m pytest`` à la racine), les tests de
+``Legacy/tests`` importent les leurs en premier : on retire ces modules de
+``sys.modules`` avant d'importer ceux de la racine. Les tests Legacy gardent
+les références déjà importées.
+
+Usage :
+    python -m pytest tests
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _use_root_packages():
+    """Remplace les paquets ``services`` / ``utils`` de Legacy par ceux de la racine."""
+    for name, module in list(sys.modules.items()):
+        package = name.split(".")[0]
+        if package not in ("services", "utils"):
+            continue
+        path = os.path.abspath(getattr(module, "__file__", None) or "")
+        if not path.startswith(os.path.join(ROOT, package) + os.sep):
+            del sys.modules[name]
+    if sys.path[:1] != [ROOT]:
+        sys.path.insert(0, ROOT)
+
+
+def pytest_collect_file(file_path, parent):
+    # Appelé pour chaque fichier de tests/, après la collecte de Legacy/tests
+    _use_root_packages()
+
+
+_use_root_packages()
@@ -0,0 +1,158 @@
+"""
+Tests du disjoncteur par domaine (services/circuit_breaker.py) et de son
+usage par le vérificateur asynchrone (services/async_url_checker.py)
+"""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from services.async_url_checker import AsyncURLChecker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+URL = "https://www.iafd.com/person.rme/id=abc"
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        """Disjoncteur sensible (2 appels, 60 % d'échecs), horloge contrôlée"""
+        self.breaker = CircuitBreaker(window=60, min_calls=2, failure_ratio=0.6,
+                                      open_seconds=10, open_max=25)
+        self.now = 100.0
+        patcher = mock.patch("services.circuit_breaker.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.breaker.reset()
+
+    def _state(self):
+        rows = {s["domain"]: s for s in self.breaker.status()}
+        return rows["iafd.com"]["state"] if "iafd.com" in rows else CLOSED
+
+    def _trip(self):
+        for _ in range(2):
+            self.assertTrue(self.breaker.allow(URL))
+            self.breaker.record(URL, False)
+
+    def test_closed_lets_requests_through(self):
+        """Fermé : les requêtes passent, un échec isolé ne coupe pas"""
+        self.assertTrue(self.breaker.allow(URL))
+        self.breaker.record(URL, True)
+        self.breaker.record(URL, False)
+        self.assertTrue(self.breaker.allow(URL))
+        self.assertEqual(self._state(), CLOSED)
+
+    def test_neutral_results_do_not_count(self):
+        """Un résultat neutre (403 de sonde) n'entre pas dans le ratio"""
+        for _ in range(5):
+            self.breaker.record(URL, None)
+        self.breaker.record(URL, False)
+        self.assertEqual(self._state(), CLOSED)
+
+    def test_failures_open_the_circuit(self):
+        """Trop d'échecs : le domaine est coupé pendant open_seconds"""
+        self._trip()
+        self.assertEqual(self._state(), OPEN)
+        self.assertFalse(self.breaker.allow(URL))
+        self.assertAlmostEqual(self.breaker.retry_in(URL), 10)
+        self.assertTrue(self.breaker.is_open("https://iafd.com/other"))
+        self.assertTrue(self.breaker.allow("https://www.freeones.com/x"))
+
+    def test_old_failures_leave_the_window(self):
+        """Les échecs sortis de la fenêtre ne comptent plus"""
+        self.breaker.record(URL, False)
+        self.now += 61
+        self.breaker.record(URL, True)
+        self.breaker.record(URL, False)
+        self.assertEqual(self._state(), CLOSED)
+
+    def test_half_open_allows_a_single_probe(self):
+        """Délai écoulé : une seule requête d'essai à la fois"""
+        self._trip()
+        self.now += 10
+        self.assertTrue(self.breaker.allow(URL))
+        self.assertEqual(self._state(), HALF_OPEN)
+        self.assertFalse(self.breaker.allow(URL))
+
+    def test_successful_probe_closes(self):
+        """Essai réussi : circuit refermé, compteurs remis à zéro"""
+        self._trip()
+        self.now += 10
+        self.breaker.allow(URL)
+        self.breaker.record(URL, True)
+        self.assertEqual(self._state(), CLOSED)
+        self.assertTrue(self.breaker.allow(URL))
+        self.breaker.record(URL, False)
+        self.assertEqual(self._state(), CLOSED)
+
+    def test_failed_probe_reopens_for_longer(self):
+        """Essai raté : réouverture pour une durée doublée, plafonnée à open_max"""
+        self._trip()
+        self.now += 10
+        self.breaker.allow(URL)
+        self.breaker.record(URL, False)
+        self.assertEqual(self._state(), OPEN)
+        self.assertAlmostEqual(self.breaker.retry_in(URL), 20)
+        self.now += 20
+        self.breaker.allow(URL)
+        self.breaker.record(URL, False)
+        self.assertAlmostEqual(self.breaker.retry_in(URL), 25)
+
+    def test_neutral_probe_frees_the_slot(self):
+        """Essai neutre (annulé, 403) : l'essai est libéré sans refermer"""
+        self._trip()
+        self.now += 10
+        self.breaker.allow(URL)
+        self.breaker.record(URL, None)
+        self.assertEqual(self._state(), HALF_OPEN)
+        self.assertTrue(self.breaker.allow(URL))
+
+    def test_is_open_does_not_take_the_probe(self):
+        """is_open() ne consomme pas l'essai semi-ouvert"""
+        self._trip()
+        self.assertTrue(self.breaker.is_open(URL))
+        self.now += 10
+        self.assertFalse(self.breaker.is_open(URL))
+        self.assertTrue(self.breaker.allow(URL))
+
+    def test_reset_closes_a_domain(self):
+        """reset() referme un domaine coupé"""
+        self._trip()
+        self.breaker.reset("iafd.com")
+        self.assertTrue(self.breaker.allow(URL))
+        self.assertEqual(self.breaker.tripped(), [])
+
+
+class _SlowLimiter:
+    """Limiteur factice : chaque requête attend 5 s son créneau"""
+
+    def reserve(self, url):
+        return 5.0
+
+
+class TestAsyncCheckerBreaker(unittest.TestCase):
+    def test_cancel_during_limiter_wait_keeps_the_probe(self):
+        """Tâche annulée pendant l'attente du limiteur : l'essai semi-ouvert reste libre"""
+        breaker = CircuitBreaker(window=60, min_calls=2, failure_ratio=0.6,
+                                 open_seconds=0.05, open_max=1)
+        for _ in range(2):
+            breaker.record(URL, False)
+        checker = AsyncURLChecker(rate_limiter=_SlowLimiter())
+
+        async def scenario():
+            await asyncio.sleep(0.06)
+            task = asyncio.ensure_future(checker._request("HEAD", URL))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch("services.async_url_checker.get_circuit_breaker", return_value=breaker):
+            asyncio.run(scenario())
+        self.assertTrue(breaker.allow(URL))
+
+
+if __name__ == '__main__':
+    unittest.main()
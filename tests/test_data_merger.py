@@ -0,0 +1,145 @@
+"""
+Tests de la fusion des sources et de la couverture des champs (services/scrapers.py)
+"""
+
+import unittest
+from unittest import mock
+
+from services.scrapers import DataMerger, IncrementalDataMerger, ScraperOrchestrator
+
+IAFD = {
+    "source": "IAFD", "url": "https://www.iafd.com/person.rme/id=abc",
+    "birthdate": "1990-05-01", "country": "USA", "hair_color": "Brown", "height": "165",
+    "tattoos": "Rose on left ankle", "aliases": ["Jane D", "JD"], "awards": "AVN 2015 Winner",
+    "socials": {"twitter": "https://twitter.com/jane"}, "discovered_urls": ["https://a.com/jane"],
+}
+FREEONES = {
+    "source": "FreeOnes", "url": "https://www.freeones.com/jane-doe",
+    "birthdate": "1990-05-01", "country": "United States", "hair_color": "Blonde",
+    "trivia": ["Likes cats"], "aliases": ["jd", "Janie"], "awards": "",
+    "socials": {"twitter": "", "instagram": "https://instagram.com/jane"},
+    "discovered_urls": ["https://a.com/jane", "https://b.com/jane"],
+}
+THENUDE = {
+    "source": "TheNude", "url": "https://www.thenude.com/Jane_Doe_1.htm",
+    "birthdate": "1990-05-01", "country": "USA", "bio_raw": "Jane started in 2010.",
+    "piercings": "Navel", "aliases": ["Jane Doe"],
+}
+XXXBIOS = {
+    "source": "XXXBios", "url": "https://www.xxxbios.com/jane-doe-biography/",
+    "country": "Canada", "bio_raw": "Jane Doe is...", "ethnicity": "Caucasian",
+}
+SOURCES = [IAFD, FREEONES, THENUDE, XXXBIOS]
+
+
+class TestDataMerger(unittest.TestCase):
+    def setUp(self):
+        self.merger = DataMerger()
+        self.result = self.merger.merge(SOURCES)
+
+    def test_empty(self):
+        self.assertEqual(self.merger.merge([]), {})
+
+    def test_confirmed_values(self):
+        """Même valeur dans plusieurs sources : confirmée"""
+        self.assertEqual(self.result["confirmed"]["birthdate"], "1990-05-01")
+        self.assertNotIn("birthdate", self.result["conflicts"])
+
+    def test_single_source_is_new(self):
+        """Valeur d'une seule source : nouvelle donnée, avec sa source"""
+        self.assertEqual(self.result["new_fields"]["ethnicity"], {"XXXBios": "Caucasian"})
+        self.assertEqual(self.result["merged"]["height"], "165")
+
+    def test_conflict_resolved_by_field_priority(self):
+        """Conflit : priorité du champ (FreeOnes pour les cheveux, IAFD pour le pays)"""
+        self.assertEqual(self.result["merged"]["hair_color"], "Blonde")
+        self.assertEqual(self.result["conflicts"]["hair_color"], {"IAFD": "Brown", "FreeOnes": "Blonde"})
+        self.assertEqual(self.result["merged"]["country"], "USA")
+        self.assertEqual(set(self.result["conflicts"]["country"]), {"IAFD", "FreeOnes", "TheNude", "XXXBios"})
+
+    def test_bio_priority_prefers_thenude(self):
+        self.assertEqual(self.result["merged"]["bio_raw"], "Jane started in 2010.")
+
+    def test_default_priority_without_override(self):
+        """Champ sans priorité dédiée : ordre global des sources"""
+        merged = self.merger.merge([
+            {"source": "TheNude", "birthplace": "Paris"},
+            {"source": "IAFD", "birthplace": "Lyon"},
+        ])["merged"]
+        self.assertEqual(merged["birthplace"], "Lyon")
+
+    def test_awards_skip_empty_sources(self):
+        self.assertEqual(self.result["merged"]["awards"], "AVN 2015 Winner")
+
+    def test_list_fields_are_unioned(self):
+        """Listes : union sans doublon, alias dédupliqués sans tenir compte de la casse"""
+        self.assertEqual(self.result["merged"]["aliases"], ["Jane D", "JD", "Janie", "Jane Doe"])
+        self.assertEqual(self.result["merged"]["trivia"], ["Likes cats"])
+
+    def test_socials_and_discovered_urls(self):
+        """Premier réseau social non vide, URLs découvertes dédupliquées dans l'ordre"""
+        self.assertEqual(self.result["socials"], {
+            "twitter": "https://twitter.com/jane", "instagram": "https://instagram.com/jane",
+        })
+        self.assertEqual(self.result["discovered_urls"], ["https://a.com/jane", "https://b.com/jane"])
+
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        self.merger = DataMerger()
+        with mock.patch("builtins.print"):
+            self.orchestrator = ScraperOrchestrator()
+        self.orchestrator.coverage_fields = ["birthdate", "country", "hair_color", "bio_raw", "aliases"]
+        self.orchestrator.min_confirmations = 2
+
+    def test_coverage_counts(self):
+        """Valeur majoritaire pour les champs simples, sources non vides pour le texte et les listes"""
+        cov = self.merger.coverage(SOURCES, ["birthdate", "country", "hair_color", "bio_raw",
+                                             "aliases", "trivia", "death_date"])
+        self.assertEqual(cov, {"birthdate": 3, "country": 2, "hair_color": 1, "bio_raw": 2,
+                               "aliases": 3, "trivia": 1, "death_date": 0})
+
+    def test_coverage_ignores_whitespace(self):
+        cov = self.merger.coverage([{"height": "165"}, {"height": " 165 "}], ["height"])
+        self.assertEqual(cov, {"height": 2})
+
+    def test_missing_fields(self):
+        self.assertEqual(self.orchestrator.missing_fields([THENUDE]), ["hair_color"])
+
+    def test_is_well_covered(self):
+        """Bien couvert dès que chaque champ cible a ``min_confirmations`` sources"""
+        self.assertFalse(self.orchestrator.is_well_covered([]))
+        self.assertFalse(self.orchestrator.is_well_covered(SOURCES))   # hair_color en conflit
+        confirmed = dict(THENUDE, hair_color="Brown")
+        self.assertTrue(self.orchestrator.is_well_covered(SOURCES + [confirmed]))
+        self.orchestrator.min_confirmations = 3
+        self.assertFalse(self.orchestrator.is_well_covered(SOURCES + [confirmed]))
+
+
+class TestIncrementalDataMerger(unittest.TestCase):
+    def test_same_result_as_merge(self):
+        """Sources reçues dans le désordre : même résultat que merge() dans l'ordre des index"""
+        merger = IncrementalDataMerger()
+        for index in (2, 0, 3, 1):
+            merger.add(SOURCES[index], index=index)
+        expected = DataMerger().merge(SOURCES)
+        self.assertEqual(merger.result(), expected)
+        self.assertEqual(list(merger.result()["merged"]), list(expected["merged"]))
+
+    def test_partial_results(self):
+        """Chaque add() retourne la fusion des sources déjà reçues"""
+        merger = IncrementalDataMerger()
+        self.assertEqual(merger.add({}), {})
+        self.assertEqual(merger.add(IAFD), DataMerger().merge([IAFD]))
+        self.assertEqual(merger.add(FREEONES), DataMerger().merge([IAFD, FREEONES]))
+
+    def test_reset(self):
+        merger = IncrementalDataMerger()
+        merger.add(IAFD)
+        merger.reset()
+        self.assertEqual(merger.result(), {})
+        self.assertEqual(merger.add(THENUDE), DataMerger().merge([THENUDE]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests de l'accès à la base Stash (services/database.py)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from services import database
+from services.database import StashDatabase
+
+STASH_SCHEMA = """
+    CREATE TABLE performers (id INTEGER PRIMARY KEY, name TEXT NOT NULL, country TEXT);
+    CREATE TABLE performer_aliases (performer_id INTEGER NOT NULL, alias TEXT NOT NULL);
+    CREATE TABLE performer_urls (performer_id INTEGER NOT NULL, position INTEGER NOT NULL, url TEXT NOT NULL,
+                                 PRIMARY KEY (performer_id, position));
+    CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+    CREATE TABLE performers_tags (performer_id INTEGER NOT NULL REFERENCES performers(id),
+                                  tag_id INTEGER NOT NULL REFERENCES tags(id),
+                                  PRIMARY KEY (performer_id, tag_id));
+    CREATE TABLE scenes (id INTEGER PRIMARY KEY, title TEXT);
+    CREATE TABLE performers_scenes (performer_id INTEGER NOT NULL, scene_id INTEGER NOT NULL);
+    CREATE TABLE scenes_tags (scene_id INTEGER NOT NULL, tag_id INTEGER NOT NULL REFERENCES tags(id),
+                              PRIMARY KEY (scene_id, tag_id));
+    INSERT INTO performers (id, name) VALUES (1, 'Jane Doe'), (2, 'Anna Smith');
+    INSERT INTO scenes (id, title) VALUES (10, 'Scène');
+    INSERT INTO performers_scenes VALUES (1, 10);
+"""
+
+SETTINGS = {"read_only": True, "cache_size_mb": 8, "mmap_size_mb": 0,
+            "busy_timeout_ms": 2000, "attach_sidecar": False}
+
+
+class StashTestCase(unittest.TestCase):
+    """Base Stash minimale dans un dossier temporaire"""
+
+    def setUp(self):
+        """Création de la base Stash de test"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "stash-go.sqlite")
+        conn = sqlite3.connect(self.path)
+        conn.executescript(STASH_SCHEMA)
+        conn.close()
+        patcher = mock.patch.object(database, "_settings", dict(SETTINGS))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = StashDatabase(self.path)
+
+    def tearDown(self):
+        """Fermeture des connexions et suppression du dossier"""
+        self.db._close_conn()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def stash(self):
+        """Connexion directe (ce que ferait Stash pendant que l'application tourne)"""
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        return conn
+
+
+class TestTagSaves(StashTestCase):
+    def _tags_of(self, table, key, value):
+        return sorted(r[0] for r in self.stash().execute(
+            f"SELECT t.name FROM {table} x JOIN tags t ON t.id = x.tag_id WHERE x.{key} = ?", (value,)))
+
+    def test_tags_are_created_and_linked(self):
+        """Les tags absents sont créés, liés au performer et propagés aux scènes"""
+        self.assertTrue(self.db.save_performer_metadata("1", {"tags": "Blonde, Tattoos"}))
+        self.assertEqual(self._tags_of("performers_tags", "performer_id", 1), ["Blonde", "Tattoos"])
+        self.assertEqual(self._tags_of("scenes_tags", "scene_id", 10), ["Blonde", "Tattoos"])
+
+    def test_deleted_tag_is_resolved_again(self):
+        """Un tag supprimé dans Stash entre deux sauvegardes n'est pas relié par son ancien id"""
+        self.db.save_performer_metadata("1", {"tags": "Blonde"})
+        stash = self.stash()
+        old_id = stash.execute("SELECT id FROM tags WHERE name = 'Blonde'").fetchone()[0]
+        stash.execute("DELETE FROM performers_tags WHERE tag_id = ?", (old_id,))
+        stash.execute("DELETE FROM scenes_tags WHERE tag_id = ?", (old_id,))
+        stash.execute("DELETE FROM tags WHERE id = ?", (old_id,))
+        stash.execute("INSERT INTO tags (id, name) VALUES (?, 'Other')", (old_id + 100,))
+        stash.commit()
+
+        self.assertTrue(self.db.save_performer_metadata("2", {"tags": "Blonde"}))
+        dangling = stash.execute(
+            "SELECT COUNT(*) FROM performers_tags WHERE tag_id NOT IN (SELECT id FROM tags)"
+        ).fetchone()[0]
+        self.assertEqual(dangling, 0)
+        self.assertEqual(self._tags_of("performers_tags", "performer_id", 2), ["Blonde"])
+
+    def test_renamed_tag_is_not_reused_under_its_old_name(self):
+        """Un tag renommé dans Stash n'est plus utilisé pour son ancien nom"""
+        self.db.save_performer_metadata("1", {"tags": "Blonde"})
+        stash = self.stash()
+        stash.execute("UPDATE tags SET name = 'Blond hair' WHERE name = 'Blonde'")
+        stash.commit()
+        self.db.save_performer_metadata("2", {"tags": "Blonde"})
+        self.assertEqual(self._tags_of("performers_tags", "performer_id", 2), ["Blonde"])
+        self.assertEqual(self._tags_of("performers_tags", "performer_id", 1), ["Blond hair"])
+
+
+class TestBulkLoader(StashTestCase):
+    def setUp(self):
+        """Alias, URLs (positions dans le désordre) et tags pour les deux performers"""
+        super().setUp()
+        stash = self.stash()
+        stash.executescript("""
+            INSERT INTO performers (id, name, country) VALUES (3, 'Kim Lee', 'KR');
+            INSERT INTO performer_aliases VALUES (1, 'JD'), (1, 'Janie'), (3, 'Kimmy');
+            INSERT INTO performer_urls VALUES (1, 1, 'https://b.com/jane'), (1, 0, 'https://a.com/jane'),
+                                              (3, 0, 'https://a.com/kim');
+            INSERT INTO tags (id, name) VALUES (1, 'Blonde'), (2, 'Tattoos');
+            INSERT INTO performers_tags VALUES (1, 1), (1, 2), (3, 2);
+        """)
+        stash.commit()
+
+    def test_bulk_matches_single_loads(self):
+        """Chargement par lots (json_each) identique au chargement un par un, ordre des IDs gardé"""
+        ids = ["3", "1", "2"]
+        for chunk_size in (1, 2, 500):
+            bulk = list(self.db.get_performers_metadata(ids, chunk_size=chunk_size))
+            self.assertEqual(bulk, [self.db.get_performer_metadata(i) for i in ids])
+        jane = bulk[1]
+        self.assertEqual(jane['urls'][:2], ['https://a.com/jane', 'https://b.com/jane'])
+
+    def test_unknown_and_duplicate_ids(self):
+        """IDs inconnus ignorés, doublons d'un même lot chargés une fois"""
+        bulk = list(self.db.get_performers_metadata(["1", "99", "1"]))
+        self.assertEqual([p['name'] for p in bulk], ['Jane Doe'])
+
+    def test_all_performers_without_ids(self):
+        """Sans IDs ni filtre : tous les performers"""
+        self.assertEqual(sorted(p['name'] for p in self.db.get_performers_metadata()),
+                         ['Anna Smith', 'Jane Doe', 'Kim Lee'])
+
+
+if __name__ == '__main__':
+    unittest.main()
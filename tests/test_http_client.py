@@ -0,0 +1,105 @@
+"""
+Tests de la fusion des requêtes simultanées (services/http_client.py)
+"""
+
+import http.server
+import threading
+import time
+import unittest
+
+import requests
+
+from services.http_client import HttpClient
+from services.rate_limiter import RateLimiter
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Répond après un délai lu dans le chemin (``/0.3/...``) et compte les hits"""
+    hits = []
+
+    def do_GET(self):
+        _Handler.hits.append(self.path)
+        time.sleep(float(self.path.strip("/").split("/")[0] or 0))
+        body = ("hello " + self.headers.get("X-Variant", "-")).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCoalescing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Compteur de hits remis à zéro, client sans limiteur ni disjoncteur"""
+        _Handler.hits = []
+        self.client = HttpClient(coalesce=True, coalesce_ttl=0)
+        self.results = []
+
+    def _run(self, calls, client=None):
+        """Lance les appels en parallèle (décalés de 20 ms) et attend la fin"""
+        client = client or self.client
+
+        def go(url, kwargs):
+            try:
+                self.results.append(client.get(url, **kwargs))
+            except Exception as e:
+                self.results.append(e)
+
+        threads = [threading.Thread(target=go, args=(url, kwargs)) for url, kwargs in calls]
+        for t in threads:
+            t.start()
+            time.sleep(0.02)
+        for t in threads:
+            t.join()
+
+    def test_identical_gets_share_one_request(self):
+        """Trois GET simultanés de la même URL : un seul hit, trois réponses distinctes"""
+        self._run([(self.base + "/0.3", {})] * 3)
+        self.assertEqual(len(_Handler.hits), 1)
+        self.assertEqual([r.text for r in self.results], ["hello -"] * 3)
+        self.assertEqual(len({id(r) for r in self.results}), 3)
+
+    def test_headers_and_trailing_slash_are_not_merged(self):
+        """En-têtes différents ou ``/`` final : requêtes distinctes"""
+        self._run([
+            (self.base + "/0.3", {}),
+            (self.base + "/0.3", {"headers": {"X-Variant": "fr"}}),
+            (self.base + "/0.3/", {}),
+        ])
+        self.assertEqual(len(_Handler.hits), 3)
+        self.assertEqual(sorted(r.text for r in self.results), ["hello -", "hello -", "hello fr"])
+
+    def test_follower_bounded_by_its_own_timeout(self):
+        """Un suiveur pressé abandonne sans faire échouer le meneur"""
+        self._run([(self.base + "/1", {"timeout": 5}), (self.base + "/1", {"timeout": 0.3})])
+        self.assertEqual(len(_Handler.hits), 1)
+        self.assertEqual(self.results[0].__class__.__name__, "Timeout")
+        self.assertEqual(self.results[1].text, "hello -")
+
+    def test_follower_timeout_starts_after_rate_limiter(self):
+        """Meneur retenu par un Retry-After : le suiveur ne compte pas cette attente"""
+        limiter = RateLimiter(rate=100, burst=5, max_concurrency=4)
+        limiter.on_response(self.base, 429, {"Retry-After": "1"})
+        client = HttpClient(coalesce=True, coalesce_ttl=0, rate_limiter=limiter)
+        self._run([(self.base + "/0.1", {"timeout": 5}), (self.base + "/0.1", {"timeout": 0.5})],
+                  client=client)
+        self.assertEqual(len(_Handler.hits), 1)
+        self.assertFalse([r for r in self.results if isinstance(r, requests.RequestException)])
+        self.assertEqual([r.text for r in self.results], ["hello -"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Tests de la file de travaux persistante (services/job_queue.py)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from services.job_queue import CANCELLED, DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        """File neuve dans une base annexe temporaire, horloge contrôlée"""
+        self.tmp = tempfile.mkdtemp()
+        self.queue = JobQueue(os.path.join(self.tmp, "sidecar.sqlite"),
+                              max_attempts=2, backoff_base=30, lease_seconds=60)
+        self.now = 1000.0
+        patcher = mock.patch("services.job_queue.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Fermeture de la base et suppression du dossier temporaire"""
+        self.queue.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _state(self, performer_id, stage):
+        return self.queue._db().execute(
+            "SELECT state FROM jobs WHERE queue = 'enrich' AND performer_id = ? AND stage = ?",
+            (str(performer_id), stage),
+        ).fetchone()["state"]
+
+    # ------------------------------------------------------------------
+    # Réclamation
+    # ------------------------------------------------------------------
+
+    def test_enqueue_is_idempotent(self):
+        """Une ligne déjà présente n'est pas ajoutée deux fois"""
+        self.assertEqual(self.queue.enqueue("enrich", [1, 2], ["scrape", "save"]), 4)
+        self.assertEqual(self.queue.enqueue("enrich", [1, 2, 3], ["scrape", "save"]), 2)
+        self.assertEqual(self.queue.remaining("enrich"), 3)
+
+    def test_claim_follows_enqueue_order(self):
+        """Premières étapes réclamées dans l'ordre d'arrivée"""
+        self.queue.enqueue("enrich", [1], ["scrape", "save"])
+        self.now += 1
+        self.queue.enqueue("enrich", [2], ["scrape", "save"])
+        first = self.queue.claim("enrich", worker="w1")
+        second = self.queue.claim("enrich", worker="w1")
+        self.assertEqual((first.performer_id, first.stage), ("1", "scrape"))
+        self.assertEqual((second.performer_id, second.stage), ("2", "scrape"))
+        self.assertIsNone(self.queue.claim("enrich", worker="w1"))
+
+    def test_next_step_waits_for_previous_and_gets_its_result(self):
+        """Une étape n'est réclamable qu'après la précédente, dont elle reçoit le résultat"""
+        self.queue.enqueue("enrich", [1], ["scrape", "save"])
+        job = self.queue.claim("enrich", worker="w1")
+        self.assertIsNone(self.queue.claim("enrich", worker="w2"))
+        self.assertTrue(self.queue.complete(job, {"results": ["IAFD"]}))
+        nxt = self.queue.claim("enrich", worker="w2")
+        self.assertEqual(nxt.stage, "save")
+        self.assertEqual(nxt.input, {"results": ["IAFD"]})
+
+    def test_started_performer_is_finished_first(self):
+        """Les étapes suivantes passent avant les premières étapes des autres performers"""
+        self.queue.enqueue("enrich", [1], ["scrape", "save"])
+        self.now += 1
+        self.queue.enqueue("enrich", [2], ["scrape", "save"])
+        self.queue.complete(self.queue.claim("enrich", worker="w1"))
+        job = self.queue.claim("enrich", worker="w1")
+        self.assertEqual((job.performer_id, job.stage), ("1", "save"))
+
+    # ------------------------------------------------------------------
+    # Bail
+    # ------------------------------------------------------------------
+
+    def test_expired_lease_is_reclaimed(self):
+        """Un travail dont le bail a expiré est repris ; l'ancien worker ne peut plus le terminer"""
+        self.queue.enqueue("enrich", [1], ["scrape"])
+        lost = self.queue.claim("enrich", worker="w1")
+        self.now += 30
+        self.assertIsNone(self.queue.claim("enrich", worker="w2"))
+        self.now += 31
+        job = self.queue.claim("enrich", worker="w2")
+        self.assertIsNotNone(job)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(self.queue.complete(lost))
+        self.assertTrue(self.queue.complete(job))
+        self.assertEqual(self._state(1, "scrape"), DONE)
+
+    def test_recover_releases_running_jobs(self):
+        """recover() remet en attente les travaux en cours sans attendre le bail"""
+        self.queue.enqueue("enrich", [1], ["scrape"])
+        self.queue.claim("enrich", worker="w1")
+        self.assertEqual(self._state(1, "scrape"), RUNNING)
+        self.assertEqual(self.queue.recover("enrich"), 1)
+        self.assertEqual(self.queue.claim("enrich", worker="w2").performer_id, "1")
+
+    def test_release_does_not_count_an_attempt(self):
+        """Un travail rendu (arrêt demandé) ne consomme pas de tentative"""
+        self.queue.enqueue("enrich", [1], ["scrape"])
+        self.queue.release(self.queue.claim("enrich", worker="w1"))
+        self.assertEqual(self.queue.claim("enrich", worker="w1").attempts, 1)
+
+    # ------------------------------------------------------------------
+    # Échecs
+    # ------------------------------------------------------------------
+
+    def test_failure_is_retried_after_backoff(self):
+        """Un échec repasse en attente avec un délai"""
+        self.queue.enqueue("enrich", [1], ["scrape"])
+        state = self.queue.fail(self.queue.claim("enrich", worker="w1"), "HTTP 503")
+        self.assertEqual(state, PENDING)
+        self.assertIsNone(self.queue.claim("enrich", worker="w1"))
+        self.assertGreater(self.queue.next_ready_in("enrich"), 0)
+        self.now += self.queue.backoff_max
+        self.assertIsNotNone(self.queue.claim("enrich", worker="w1"))
+
+    def test_final_failure_cancels_later_steps(self):
+        """Après max_attempts, l'étape échoue et les étapes suivantes sont annulées"""
+        self.queue.enqueue("enrich", [1, 2], ["scrape", "merge", "save"])
+        for _ in range(2):
+            job = self.queue.claim("enrich", worker="w1")
+            while job.performer_id != "1":
+                self.queue.complete(job)
+                job = self.queue.claim("enrich", worker="w1")
+            state = self.queue.fail(job, "Cloudflare", retry_after=0)
+        self.assertEqual(state, FAILED)
+        self.assertEqual(self._state(1, "scrape"), FAILED)
+        self.assertEqual(self._state(1, "merge"), CANCELLED)
+        self.assertEqual(self._state(1, "save"), CANCELLED)
+        self.assertEqual(self._state(2, "scrape"), DONE)
+        self.assertEqual(self.queue.failures("enrich")[0]["last_error"], "Cloudflare")
+
+    def test_retry_failed_restores_cancelled_steps(self):
+        """retry_failed() remet l'étape échouée et les étapes annulées en attente"""
+        self.queue.enqueue("enrich", [1], ["scrape", "save"])
+        for _ in range(2):
+            self.queue.fail(self.queue.claim("enrich", worker="w1"), "boom", retry_after=0)
+        self.assertEqual(self.queue.remaining("enrich"), 0)
+        self.assertEqual(self.queue.retry_failed("enrich"), 2)
+        job = self.queue.claim("enrich", worker="w1")
+        self.assertEqual((job.stage, job.attempts), ("scrape", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests du cache disque des pages et de la revalidation (services/page_cache.py)
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from requests.structures import CaseInsensitiveDict
+
+from services.page_cache import ACCESS_REFRESH, CachedPage, PageCache, fetch_page, normalize_url
+
+URL = "https://www.iafd.com/person.rme/id=abc/"
+
+
+class _FakeClient:
+    """Client HTTP factice : répond 304 si l'ETag envoyé correspond"""
+
+    def __init__(self, etag='"v1"', body="<html>Jane</html>"):
+        self.etag = etag
+        self.body = body
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = dict(headers or {})
+        self.requests.append(headers)
+        resp = mock.Mock()
+        resp.headers = CaseInsensitiveDict({"ETag": self.etag, "Content-Type": "text/html"})
+        if headers.get("If-None-Match") == self.etag:
+            resp.status_code, resp.text = 304, ""
+        else:
+            resp.status_code, resp.text = 200, self.body
+        return resp
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        """Cache dans une base annexe temporaire, client HTTP factice"""
+        self.tmp = tempfile.mkdtemp()
+        self.cache = PageCache(db_path=os.path.join(self.tmp, "sidecar.sqlite"))
+        self.client = _FakeClient()
+        patcher = mock.patch("services.page_cache.get_http_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Fermeture du cache et suppression du dossier"""
+        self.cache.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _row(self, url=URL):
+        return self.cache._db().execute(
+            "SELECT fetched_at, last_access, headers FROM page_cache WHERE url_key = ?",
+            (normalize_url(url),),
+        ).fetchone()
+
+    def _age(self, seconds, url=URL):
+        """Vieillit la page en base de ``seconds``"""
+        conn = self.cache._db()
+        conn.execute(
+            "UPDATE page_cache SET fetched_at = fetched_at - ?, last_access = last_access - ?"
+            " WHERE url_key = ?",
+            (seconds, seconds, normalize_url(url)),
+        )
+        conn.commit()
+
+    def test_normalize_url(self):
+        """www., casse de l'hôte, ``/`` final et ordre des paramètres ignorés"""
+        self.assertEqual(normalize_url("https://WWW.IAFD.com/a/B/?z=1&a=2#top"),
+                         "https://iafd.com/a/B?a=2&z=1")
+
+    def test_fresh_page_served_without_request(self):
+        """Page fraîche : aucune requête réseau"""
+        first = fetch_page(URL, cache=self.cache)
+        second = fetch_page(URL, cache=self.cache)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.body, "<html>Jane</html>")
+        self.assertEqual(len(self.client.requests), 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (1, 1, 1))
+
+    def test_expired_page_revalidated_with_304(self):
+        """Page expirée : requête conditionnelle, un 304 la rend de nouveau fraîche"""
+        fetch_page(URL, cache=self.cache)
+        self._age(self.cache.ttl_for(URL) + 60)
+        page = fetch_page(URL, cache=self.cache)
+        self.assertEqual(self.client.requests[-1].get("If-None-Match"), '"v1"')
+        self.assertTrue(page.revalidated)
+        self.assertEqual(page.body, "<html>Jane</html>")
+        self.assertLess(time.time() - self._row()["fetched_at"], 5)
+        self.assertEqual(self.cache.stats()["revalidations"], 1)
+
+        fetch_page(URL, cache=self.cache)
+        self.assertEqual(len(self.client.requests), 2)
+
+    def test_changed_page_replaced(self):
+        """Page expirée et modifiée : nouveau corps en cache"""
+        fetch_page(URL, cache=self.cache)
+        self._age(self.cache.ttl_for(URL) + 60)
+        self.client.etag, self.client.body = '"v2"', "<html>Jane Doe</html>"
+        page = fetch_page(URL, cache=self.cache)
+        self.assertFalse(page.revalidated)
+        self.assertEqual(self.cache.get(URL).body, "<html>Jane Doe</html>")
+        self.assertEqual(self.cache.get(URL).etag, '"v2"')
+
+    def test_last_access_written_only_when_stale(self):
+        """Une lecture ne réécrit le dernier accès qu'au-delà de ``ACCESS_REFRESH``"""
+        self.cache.put(CachedPage(url=URL, status=200, body="x", fetched_at=time.time()))
+        written = self._row()["last_access"]
+        self.cache.get(URL)
+        self.assertEqual(self._row()["last_access"], written)
+
+        self._age(ACCESS_REFRESH + 1)
+        self.cache.get(URL)
+        self.assertGreater(self._row()["last_access"], written - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
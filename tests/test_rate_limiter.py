@@ -0,0 +1,115 @@
+"""
+Tests du limiteur de débit GCRA et de Retry-After (services/rate_limiter.py)
+"""
+
+import threading
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+from services.rate_limiter import DomainBucket, RateLimiter, parse_retry_after
+
+URL = "https://www.iafd.com/person.rme/id=abc"
+
+
+class TestDomainBucket(unittest.TestCase):
+    def test_burst_then_spacing(self):
+        """Rafale de ``burst`` requêtes immédiates, puis une tous les 1/rate"""
+        bucket = DomainBucket(rate=2.0, burst=3)
+        sends = [bucket.reserve(100.0) for _ in range(5)]
+        self.assertEqual(sends[:3], [100.0, 100.0, 100.0])
+        self.assertEqual(sends[3:], [100.5, 101.0])
+
+    def test_idle_bucket_refills(self):
+        """Après une pause, la rafale est de nouveau disponible"""
+        bucket = DomainBucket(rate=2.0, burst=2)
+        bucket.reserve(100.0)
+        bucket.reserve(100.0)
+        self.assertEqual(bucket.reserve(100.0), 100.5)
+        self.assertEqual(bucket.reserve(110.0), 110.0)
+        self.assertEqual(bucket.reserve(110.0), 110.0)
+
+    def test_blocked_until_delays_reservation(self):
+        """Un domaine bloqué ne repart qu'à ``blocked_until``"""
+        bucket = DomainBucket(rate=2.0, burst=3)
+        bucket.blocked_until = 130.0
+        self.assertEqual(bucket.reserve(100.0), 130.0)
+
+
+class TestRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+
+    def test_http_date(self):
+        """Date HTTP : délai relatif à ``now``"""
+        self.assertAlmostEqual(parse_retry_after(formatdate(1000030, usegmt=True), now=1000000), 30.0)
+
+    def test_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("bientôt"))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        """Limiteur 1 req/s sans rafale, horloge contrôlée"""
+        self.limiter = RateLimiter(rate=1.0, burst=1, max_concurrency=2,
+                                   backoff_base=2.0, backoff_max=60.0,
+                                   domain_rates={"data18.com": 4.0})
+        self.now = 100.0
+        patcher = mock.patch("services.rate_limiter.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reserve_spaces_requests_per_domain(self):
+        """Les délais s'accumulent par domaine, ``www.`` compris"""
+        self.assertEqual(self.limiter.reserve(URL), 0.0)
+        self.assertEqual(self.limiter.reserve("https://iafd.com/x"), 1.0)
+        self.assertEqual(self.limiter.reserve("https://www.babepedia.com/"), 0.0)
+        self.assertEqual(self.limiter.waited, 1.0)
+
+    def test_domain_rates(self):
+        """Débit spécifique d'un domaine et de ses sous-domaines"""
+        self.limiter.reserve("https://www.data18.com/a")
+        self.assertEqual(self.limiter.reserve("https://data18.com/b"), 0.25)
+
+    def test_retry_after_blocks_domain(self):
+        """429 + Retry-After : le domaine est bloqué le temps annoncé"""
+        with mock.patch("builtins.print"):
+            self.limiter.on_response(URL, 429, {"Retry-After": "30"})
+        self.assertEqual(self.limiter.blocked_for(URL), 30.0)
+        self.assertEqual(self.limiter.blocked_for("https://www.babepedia.com/"), 0.0)
+        self.assertEqual(self.limiter.reserve(URL), 30.0)
+
+    def test_retry_after_capped_by_backoff_max(self):
+        with mock.patch("builtins.print"):
+            self.limiter.on_response(URL, 503, {"Retry-After": "3600"})
+        self.assertEqual(self.limiter.blocked_for(URL), 60.0)
+
+    def test_throttle_without_header_backs_off(self):
+        """Sans Retry-After : backoff exponentiel avec jitter, remis à zéro par un succès"""
+        with mock.patch("builtins.print"), mock.patch("services.rate_limiter.random.uniform", return_value=1.0):
+            self.limiter.on_response(URL, 429)
+            self.assertEqual(self.limiter.blocked_for(URL), 2.0)
+            self.limiter.on_response(URL, 429)
+            self.assertEqual(self.limiter.blocked_for(URL), 4.0)
+        self.limiter.on_response(URL, 200)
+        self.assertEqual(self.limiter._buckets["iafd.com"].failures, 0)
+
+    def test_waited_is_consistent_under_threads(self):
+        """``waited`` est la somme exacte des délais réservés en parallèle"""
+        delays = []
+
+        def worker():
+            for _ in range(200):
+                delays.append(self.limiter.reserve(URL))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.limiter.waited, sum(delays))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests du schéma versionné de la base annexe (services/sidecar_db.py)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from services import sidecar_db
+from services.sidecar_db import (
+    MIGRATIONS, SCHEMA_VERSION, attach_sidecar, connect_sidecar, is_attached, migrate, schema_version,
+)
+
+
+def _tables(conn):
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _columns(conn, table):
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+class TestSidecarMigrations(unittest.TestCase):
+    def setUp(self):
+        """Dossier temporaire pour les bases de test"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "sidecar.sqlite")
+        self.conns = []
+
+    def tearDown(self):
+        """Fermeture des connexions et suppression du dossier"""
+        for conn in self.conns:
+            conn.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _connect(self, path=None):
+        conn = sqlite3.connect(path or self.path)
+        self.conns.append(conn)
+        return conn
+
+    def test_versions_are_sequential(self):
+        """Les migrations sont numérotées 1, 2, 3... sans trou"""
+        self.assertEqual([v for v, _, _ in MIGRATIONS], list(range(1, len(MIGRATIONS) + 1)))
+        self.assertEqual(SCHEMA_VERSION, len(MIGRATIONS))
+
+    def test_new_database_reaches_latest_version(self):
+        """Base vierge : toutes les migrations, toutes les tables"""
+        conn = self._connect()
+        self.assertEqual(migrate(conn), len(MIGRATIONS))
+        self.assertEqual(schema_version(conn), SCHEMA_VERSION)
+        self.assertTrue({"page_cache", "url_check_history", "parse_memo", "source_fingerprints",
+                         "jobs", "performer_names", "sidecar_meta"} <= _tables(conn))
+        self.assertIn("parsed_at", _columns(conn, "source_fingerprints"))
+
+    def test_migrate_is_idempotent(self):
+        """Une base à jour n'est pas re-migrée"""
+        conn = self._connect()
+        migrate(conn)
+        self.assertEqual(migrate(conn), 0)
+        self.assertEqual(migrate(self._connect()), 0)
+
+    def test_legacy_database_is_upgraded(self):
+        """Base antérieure aux migrations (user_version 0, tables existantes) : données conservées"""
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE source_fingerprints (
+                url_key TEXT PRIMARY KEY, url TEXT NOT NULL, source TEXT NOT NULL,
+                etag TEXT, last_modified TEXT, body_sha TEXT, fields_sha TEXT,
+                applied_sha TEXT, result TEXT, checked_at REAL NOT NULL, changed_at REAL NOT NULL
+            );
+            INSERT INTO source_fingerprints (url_key, url, source, checked_at, changed_at)
+                VALUES ('iafd.com/x', 'https://www.iafd.com/x', 'IAFD', 50, 42);
+        """)
+        self.assertEqual(schema_version(conn), 0)
+        migrate(conn)
+        self.assertEqual(schema_version(conn), SCHEMA_VERSION)
+        row = conn.execute("SELECT changed_at, parsed_at FROM source_fingerprints").fetchone()
+        self.assertEqual(row, (42, 42))
+        self.assertIn("jobs", _tables(conn))
+
+    def test_partial_upgrade_applies_only_pending(self):
+        """Base en version 2 : seules les migrations suivantes sont appliquées"""
+        conn = self._connect()
+        with mock.patch.object(sidecar_db, "MIGRATIONS", MIGRATIONS[:2]), mock.patch("builtins.print"):
+            self.assertEqual(migrate(conn), 2)
+        self.assertEqual(schema_version(conn), 2)
+        with mock.patch("builtins.print"):
+            self.assertEqual(migrate(conn), SCHEMA_VERSION - 2)
+        self.assertEqual(schema_version(conn), SCHEMA_VERSION)
+
+    def test_connect_migrates_each_path_once(self):
+        """connect_sidecar ne vérifie les migrations qu'à la première ouverture d'un chemin"""
+        with mock.patch.object(sidecar_db, "migrate", wraps=migrate) as spy, mock.patch("builtins.print"):
+            for _ in range(3):
+                connect_sidecar(self.path).close()
+        self.assertEqual(spy.call_count, 1)
+
+    def test_failed_migration_is_rolled_back(self):
+        """Une migration en erreur n'est pas appliquée à moitié"""
+        broken = MIGRATIONS + [(SCHEMA_VERSION + 1, "cassée", """
+            CREATE TABLE extra (id INTEGER);
+            INSERT INTO missing_table VALUES (1);
+        """)]
+        conn = self._connect()
+        with mock.patch.object(sidecar_db, "MIGRATIONS", broken), mock.patch("builtins.print"):
+            with self.assertRaises(sqlite3.Error):
+                migrate(conn)
+        self.assertEqual(schema_version(conn), SCHEMA_VERSION)
+        self.assertNotIn("extra", _tables(conn))
+
+    def test_statements_keep_multiline_sql_together(self):
+        """Le découpage ne coupe pas une instruction sur plusieurs lignes"""
+        script = "CREATE TABLE a (\n  x TEXT\n);\nCREATE INDEX i ON a(x);\n"
+        self.assertEqual(len(sidecar_db._statements(script)), 2)
+
+    def test_attach_read_only(self):
+        """Base attachée : tables visibles sous sidecar., écriture refusée"""
+        with mock.patch("builtins.print"):
+            connect_sidecar(self.path).close()
+        stash = sqlite3.connect(":memory:", uri=True)
+        self.conns.append(stash)
+        self.assertTrue(attach_sidecar(stash, self.path))
+        self.assertTrue(is_attached(stash))
+        self.assertEqual(stash.execute("SELECT COUNT(*) FROM sidecar.url_check_history").fetchone()[0], 0)
+        with self.assertRaises(sqlite3.OperationalError):
+            stash.execute("INSERT INTO sidecar.sidecar_meta (key, value) VALUES ('k', 'v')")
+
+
+if __name__ == '__main__':
+    unittest.main()
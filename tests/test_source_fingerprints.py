@@ -0,0 +1,106 @@
+"""
+Tests des empreintes de pages sources (services/source_fingerprints.py)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from services.source_fingerprints import ChangeReport, SourceFingerprints, fields_hash, stamps
+
+URL = "https://www.iafd.com/person.rme/id=abc"
+HTML = "<html><h1>Jane Doe</h1></html>"
+
+
+class TestSourceFingerprints(unittest.TestCase):
+    def setUp(self):
+        """Empreintes dans une base annexe temporaire, horloge contrôlée"""
+        self.tmp = tempfile.mkdtemp()
+        self.prints = SourceFingerprints(os.path.join(self.tmp, "sidecar.sqlite"), max_age=100)
+        self.now = 1000.0
+        patcher = mock.patch("services.source_fingerprints.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Fermeture de la base et suppression du dossier temporaire"""
+        self.prints.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_fields_hash_ignores_order_and_origin(self):
+        """L'empreinte des champs ne dépend ni de l'ordre des listes ni de url/source"""
+        a = {"name": "Jane", "aliases": ["B", "A"], "url": "x", "source": "IAFD"}
+        b = {"aliases": ["A", "B"], "name": "Jane"}
+        self.assertEqual(fields_hash(a), fields_hash(b))
+        self.assertNotEqual(fields_hash(a), fields_hash({"name": "Jane"}))
+
+    def test_record_then_reuse(self):
+        """Une page parsée est retrouvée avec ses validateurs et son résultat"""
+        data = {"name": "Jane Doe"}
+        self.assertTrue(self.prints.record(URL, "IAFD", {"ETag": '"v1"'}, HTML, data))
+        fp = self.prints.get(URL)
+        self.assertIsNotNone(fp)
+        self.assertEqual(fp.result, data)
+        self.assertEqual(fp.validators(), {"If-None-Match": '"v1"'})
+        self.assertFalse(self.prints.record(URL, "IAFD", {}, HTML, data))
+
+    def test_unchanged_response_does_not_refresh_age(self):
+        """Une réponse 304 ne relance pas le délai ; un re-parse le relance"""
+        self.prints.record(URL, "IAFD", {}, HTML, {"name": "Jane"})
+        self.now += 80
+        self.prints.record(URL, "IAFD", {"ETag": '"v2"'}, None, {"name": "Jane"})
+        self.now += 30
+        self.assertIsNone(self.prints.get(URL))
+        self.prints.record(URL, "IAFD", {}, HTML, {"name": "Jane"})
+        self.now += 80
+        fp = self.prints.get(URL)
+        self.assertIsNotNone(fp)
+        self.assertEqual(fp.changed_at, 1000.0)
+
+    def test_change_is_judged_on_fields(self):
+        """Corps différent mais mêmes champs : pas de changement ; champs différents : changement"""
+        self.prints.record(URL, "IAFD", {}, HTML, {"name": "Jane"})
+        self.now += 10
+        self.assertFalse(self.prints.record(URL, "IAFD", {}, HTML + "<!-- pub -->", {"name": "Jane"}))
+        self.assertEqual(self.prints.get(URL).changed_at, 1000.0)
+        self.now += 10
+        self.assertTrue(self.prints.record(URL, "IAFD", {}, HTML, {"name": "Jane Doe"}))
+        fp = self.prints.get(URL)
+        self.assertEqual((fp.changed_at, fp.result), (1020.0, {"name": "Jane Doe"}))
+
+    def test_unchanged_response_keeps_validators(self):
+        """Réponse inchangée sans validateurs : les anciens sont conservés"""
+        self.prints.record(URL, "IAFD", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+                           HTML, {"name": "Jane"})
+        self.prints.record(URL, "IAFD", {"ETag": '"v2"'}, None, {})
+        self.assertEqual(self.prints.get(URL).validators(), {
+            "If-None-Match": '"v2"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        })
+
+    def test_applied_marks(self):
+        """is_applied : vrai seulement si toutes les sources ont déjà été enregistrées"""
+        data = {"name": "Jane", "url": URL}
+        self.prints.record(URL, "IAFD", {}, HTML, data)
+        marks = stamps([data])
+        self.assertFalse(self.prints.is_applied(marks))
+        self.prints.mark_applied(marks)
+        self.assertTrue(self.prints.is_applied(marks))
+        self.assertFalse(self.prints.is_applied(stamps([{"name": "Jane Doe", "url": URL}])))
+        self.assertFalse(self.prints.is_applied([]))
+
+    def test_change_report(self):
+        """Le bilan classe les sources et garde les sources abandonnées à part"""
+        report = ChangeReport()
+        report.add("IAFD", "unchanged")
+        report.add("FreeOnes", "parsed")
+        report.add("TheNude", "failed")
+        report.timed_out.append("Babepedia")
+        self.assertEqual(report.format(), "1 source(s) inchangée(s), 1 re-parsée(s), 1 en échec")
+        self.assertEqual(report.timed_out, ["Babepedia"])
+        self.assertEqual(ChangeReport().cancelled, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Tests de la suppression groupée des URLs mortes (services/url_validator.py)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from services import url_validator
+from services.url_history import URLCheckHistory
+from services.url_validator import URLCheckResult, URLStatus, URLValidator
+
+# Schéma de performer_urls tel que créé par Stash
+SCHEMA = """
+    CREATE TABLE performer_urls (performer_id INTEGER NOT NULL, position INTEGER NOT NULL,
+                                 url VARCHAR(255) NOT NULL, PRIMARY KEY (performer_id, position, url));
+    INSERT INTO performer_urls VALUES
+        (1, 0, 'https://a.com/jane'), (1, 1, 'https://dead.com/jane'), (1, 2, 'https://b.com/jane'),
+        (1, 3, 'https://dead.com/jane2'), (1, 4, 'https://c.com/jane'),
+        (2, 0, 'https://dead.com/anna'), (2, 1, 'https://a.com/anna'),
+        (3, 0, 'https://dead.com/kim'), (3, 1, 'https://a.com/kim');
+"""
+
+
+def _result(performer_id, position, url, status=URLStatus.DEAD):
+    return URLCheckResult(performer_id, "", position, url, status)
+
+
+class TestDeleteDeadUrls(unittest.TestCase):
+    def setUp(self):
+        """Base Stash minimale dans un dossier temporaire"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "stash-go.sqlite")
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SCHEMA)
+        conn.close()
+        self.validator = URLValidator(self.path, use_history=False)
+        self.results = [
+            _result(1, 1, "https://dead.com/jane"),
+            _result(1, 3, "https://dead.com/jane2"),
+            _result(1, 3, "https://dead.com/jane2"),   # doublon
+            _result(2, 0, "https://dead.com/anna"),
+            _result(3, 0, "https://dead.com/kim", URLStatus.AMBIGUOUS),
+            _result(1, 0, "https://a.com/jane", URLStatus.ACTIVE),
+        ]
+
+    def tearDown(self):
+        """Suppression du dossier temporaire"""
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _urls(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute("SELECT performer_id, position, url FROM performer_urls "
+                                "ORDER BY performer_id, position").fetchall()
+        finally:
+            conn.close()
+        return rows
+
+    def _check(self):
+        self.assertEqual(self.validator.delete_dead_urls_from_db(self.results), 3)
+        self.assertEqual(self._urls(), [
+            (1, 0, "https://a.com/jane"), (1, 1, "https://b.com/jane"), (1, 2, "https://c.com/jane"),
+            (2, 0, "https://a.com/anna"),
+            (3, 0, "https://dead.com/kim"), (3, 1, "https://a.com/kim"),
+        ])
+
+    def test_delete_and_renumber(self):
+        """Seules les URLs mortes partent ; positions renumérotées sans trou"""
+        self._check()
+
+    def test_delete_and_renumber_without_update_from(self):
+        """Même résultat avec le repli pour SQLite < 3.33"""
+        with mock.patch.object(url_validator, "SQLITE_UPDATE_FROM", False):
+            self._check()
+
+    def test_nothing_to_delete(self):
+        self.assertEqual(self.validator.delete_dead_urls_from_db(self.results[-2:]), 0)
+        self.assertEqual(len(self._urls()), 9)
+
+
+class TestHistoryUpkeep(TestDeleteDeadUrls):
+    def setUp(self):
+        """Même base, avec historique dans une base annexe temporaire"""
+        super().setUp()
+        self.history = URLCheckHistory(os.path.join(self.tmp, "sidecar.sqlite"))
+        self.validator.history = self.history
+        self.history.record(self.results)
+        self.addCleanup(self.history.close)
+
+    def test_deleted_urls_are_forgotten(self):
+        """Les URLs supprimées quittent l'historique, les autres y restent"""
+        self.validator.delete_dead_urls_from_db(self.results)
+        self.assertEqual(sorted(self.history.lookup(r.url for r in self.results)),
+                         ["https://a.com/jane", "https://dead.com/kim"])
+
+    def test_sweep_purges_expired_entries(self):
+        """Un balayage commence par purger les entrées au-delà du plus long TTL"""
+        conn = self.history._db()
+        conn.execute("UPDATE url_check_history SET checked_at = ? WHERE url = 'https://dead.com/anna'",
+                     (time.time() - max(self.history.ttls.values()) - 60,))
+        conn.commit()
+        with mock.patch.object(self.validator, "_validate_urls_threaded", return_value=[]), \
+                mock.patch("builtins.print"):
+            self.validator.validate_urls([])
+        self.assertEqual(len(self.history.lookup(r.url for r in self.results)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()